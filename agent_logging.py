@@ -0,0 +1,208 @@
+"""
+Logging cho job process của agent
+- Event loop chỉ đưa LogRecord vào queue (QueueHandler), việc format + ghi (console, IPC của
+  LiveKit) chạy ở thread riêng (QueueListener)
+- Trường có cấu trúc thay cho f-string dựng sẵn:
+      logger.info("🛒 Order requested", extra=fields(items=items))
+  -> "🛒 Order requested items={'Phở bò': 2}" (format ở thread ghi log, record.fields giữ nguyên)
+- Sampling / rate limit theo logger cho record dưới WARNING:
+      LOG_SAMPLING="restaurant-bot=0.2,livekit.agents=1"   (tỉ lệ giữ lại)
+      LOG_RATE_LIMIT="restaurant-bot=50"                    (record / giây, burst = 1 giây)
+
+Lưu ý: args của record được format muộn ở thread khác, đừng truyền object sẽ bị sửa ngay sau đó.
+"""
+
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import threading
+import time
+from typing import Optional
+
+logger = logging.getLogger("restaurant-bot")
+
+QUEUE_SIZE = 10_000  # records; beyond that new records are dropped instead of blocking the loop
+
+
+def fields(**values) -> dict:
+    """extra= for a structured record"""
+    return {"fields": values}
+
+
+def format_fields(values: dict) -> str:
+    return " ".join(f"{key}={value!r}" if isinstance(value, str) else f"{key}={value}"
+                    for key, value in values.items())
+
+
+def parse_rules(spec: Optional[str]) -> dict[str, float]:
+    """'restaurant-bot=0.2,livekit=1' -> {'restaurant-bot': 0.2, 'livekit': 1.0}"""
+    rules = {}
+    for part in (spec or "").split(","):
+        name, _, value = part.partition("=")
+        if name.strip() and value.strip():
+            rules[name.strip()] = float(value)
+    return rules
+
+
+class SamplingFilter(logging.Filter):
+    """Per-logger sampling and token-bucket rate limit; WARNING and above always pass"""
+
+    def __init__(self, sample_rates: dict[str, float], rate_limits: dict[str, float]) -> None:
+        super().__init__()
+        self.sample_rates = sample_rates
+        self.rate_limits = rate_limits
+        self._buckets: dict[str, list[float]] = {}  # logger -> [tokens, last refill]
+        self._rules: dict[str, tuple[Optional[str], Optional[str]]] = {}
+        self.dropped: dict[str, int] = {}
+
+    @staticmethod
+    def _match(name: str, configured: dict) -> Optional[str]:
+        """Most specific configured logger for `name` (dotted prefix, like logging itself)"""
+        while name:
+            if name in configured:
+                return name
+            name = name.rpartition(".")[0]
+        return None
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rule = self._rules.get(record.name)
+        if rule is None:
+            rule = self._rules[record.name] = (
+                self._match(record.name, self.sample_rates),
+                self._match(record.name, self.rate_limits),
+            )
+        sampled, limited = rule
+
+        if sampled is not None and random.random() >= self.sample_rates[sampled]:
+            self.dropped[record.name] = self.dropped.get(record.name, 0) + 1
+            return False
+
+        if limited is not None:
+            rate = self.rate_limits[limited]
+            now = time.monotonic()
+            bucket = self._buckets.setdefault(limited, [rate, now])
+            bucket[0] = min(rate, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                self.dropped[record.name] = self.dropped.get(record.name, 0) + 1
+                return False
+            bucket[0] -= 1
+        return True
+
+
+class LoopQueueHandler(logging.handlers.QueueHandler):
+    """Hands the record over as is: no formatting on the event loop, never blocks"""
+
+    def __init__(self, log_queue: queue.Queue) -> None:
+        super().__init__(log_queue)
+        self.overflow = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record  # same process: args and exc_info are formatted by the listener thread
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.overflow += 1
+
+
+def merge_fields(record: logging.LogRecord) -> logging.LogRecord:
+    """Append record.fields to the message, for handlers that know nothing about them"""
+    values = getattr(record, "fields", None)
+    if values:
+        record.msg = f"{record.getMessage()} {format_fields(values)}"
+        record.args = None
+    return record
+
+
+class InlineFields(logging.Filter):
+    """Without setup() (token server, tools): merge the fields when the record is created"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        merge_fields(record)
+        return True
+
+
+class FieldsQueueListener(logging.handlers.QueueListener):
+    """Writer thread: merges structured fields into the message for the existing handlers"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return merge_fields(record)
+
+
+_inline_fields = InlineFields()
+logger.addFilter(_inline_fields)
+
+_listener: Optional[FieldsQueueListener] = None
+_handler: Optional[LoopQueueHandler] = None
+_filter: Optional[SamplingFilter] = None
+_lock = threading.Lock()
+
+
+def setup(
+    sample_rates: Optional[dict[str, float]] = None,
+    rate_limits: Optional[dict[str, float]] = None,
+    queue_size: int = QUEUE_SIZE,
+) -> None:
+    """
+    Move the root handlers (LiveKit's console / job IPC handler) behind a queue.
+    Call once per process, after LiveKit configured logging (prewarm).
+    """
+    global _listener, _handler, _filter
+    with _lock:
+        if _listener is not None:
+            return
+        root = logging.getLogger()
+        handlers = root.handlers[:]
+        if not handlers:
+            console = logging.StreamHandler()
+            console.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+            handlers = [console]
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+
+        log_queue: queue.Queue = queue.Queue(queue_size)
+        _filter = SamplingFilter(
+            sample_rates if sample_rates is not None else parse_rules(os.getenv("LOG_SAMPLING")),
+            rate_limits if rate_limits is not None else parse_rules(os.getenv("LOG_RATE_LIMIT")),
+        )
+        _handler = LoopQueueHandler(log_queue)
+        _handler.addFilter(_filter)
+        root.addHandler(_handler)
+        logger.removeFilter(_inline_fields)  # the listener thread merges them now
+
+        _listener = FieldsQueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown)
+
+
+def stats() -> dict:
+    return {
+        "queued": _handler.queue.qsize() if _handler else 0,
+        "overflow": _handler.overflow if _handler else 0,
+        "dropped": dict(_filter.dropped) if _filter else {},
+    }
+
+
+def shutdown() -> None:
+    """Flush the queue and give the handlers back to the root logger"""
+    global _listener, _handler, _filter
+    with _lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        summary = {"overflow": _handler.overflow, "dropped": dict(_filter.dropped)}
+        root = logging.getLogger()
+        root.removeHandler(_handler)
+        for handler in _listener.handlers:
+            root.addHandler(handler)
+        logger.addFilter(_inline_fields)
+        _listener = _handler = _filter = None
+    if summary["overflow"] or summary["dropped"]:
+        logger.info(f"🔇 Log records dropped: {format_fields(summary)}")
@@ -0,0 +1,233 @@
+"""
+Drain worker agent trước khi restart / deploy (không cắt ngang cuộc gọi đang đặt món)
+- `kill -USR1 <pid worker>`: worker báo FULL cho LiveKit (không nhận dispatch mới), chờ các
+  session đang chạy kết thúc (tối đa DRAIN_TIMEOUT giây) rồi tự thoát
+- Việc chậm sau một tool (ghi nhật ký kho, gửi Telegram) chạy ở thread nền (PendingWork),
+  mỗi job chờ chúng xong trước khi process của job bị thu hồi
+- Trạng thái worker được ghi ra AGENT_STATUS_DIR (worker-<pid>.json); token server đọc để trả
+  503 khi mọi worker trên máy đều đang drain, thay vì tạo room mà không agent nào vào
+
+Restart không downtime: chạy worker mới trước (`python restaurant_agent.py start`), sau đó drain worker cũ.
+Kiểm tra với stand-in (không cần LiveKit):  python tools/drain_check.py
+"""
+
+import asyncio
+import concurrent.futures
+import json
+import logging
+import os
+import signal
+import tempfile
+import threading
+import time
+from typing import Callable, Optional
+
+from agent_logging import fields
+
+logger = logging.getLogger("restaurant-bot")
+
+DRAIN_TIMEOUT = float(os.getenv("DRAIN_TIMEOUT", "600"))  # seconds active sessions may keep running
+FLUSH_TIMEOUT = 8.0  # per job, below LiveKit's shutdown_process_timeout (10 s)
+STATUS_DIR = os.getenv("AGENT_STATUS_DIR", os.path.join(tempfile.gettempdir(), "restaurant-bot-workers"))
+STATUS_INTERVAL = 5.0
+STATUS_STALE = 3 * STATUS_INTERVAL  # a worker that stopped writing is ignored (crashed / killed)
+QUEUE_THREADS = {"telegram": 4}  # other queues get one thread: run in submit order
+
+
+class PendingWork:
+    """
+    Blocking side effects of the tools, run off the event loop.
+    Queues with one thread keep the submit order (inventory writes land in commit order).
+    Works with both job executors: futures are not bound to a job's event loop.
+    """
+
+    def __init__(self) -> None:
+        self._executors: dict[str, concurrent.futures.ThreadPoolExecutor] = {}
+        self._futures: set[concurrent.futures.Future] = set()
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.failed = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._futures)
+
+    def submit(self, queue: str, fn: Callable, *args) -> concurrent.futures.Future:
+        with self._lock:
+            executor = self._executors.get(queue)
+            if executor is None:
+                executor = self._executors[queue] = concurrent.futures.ThreadPoolExecutor(
+                    QUEUE_THREADS.get(queue, 1), thread_name_prefix=f"pending-{queue}"
+                )
+            future = executor.submit(fn, *args)
+            self._futures.add(future)
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, future: concurrent.futures.Future) -> None:
+        with self._lock:
+            self._futures.discard(future)
+        if future.exception() is not None:
+            self.failed += 1
+            logger.error("❌ Background task failed", extra=fields(error=str(future.exception())))
+        else:
+            self.completed += 1
+
+    async def flush(self, timeout: float = FLUSH_TIMEOUT) -> int:
+        """Wait for everything submitted so far; returns how many did not finish in time"""
+        with self._lock:
+            futures = set(self._futures)
+        if not futures:
+            return 0
+        _, not_done = await asyncio.to_thread(concurrent.futures.wait, futures, timeout)
+        if not_done:
+            logger.warning("⚠️ Background tasks still running after the flush timeout",
+                           extra=fields(tasks=len(not_done), timeout_s=timeout))
+        return len(not_done)
+
+
+pending_work = PendingWork()
+
+
+async def flush_pending_work() -> None:
+    """Job shutdown callback: inventory writes and notifications of this process"""
+    if pending_work.pending:
+        logger.info("⏳ Flushing background tasks", extra=fields(tasks=pending_work.pending))
+        await pending_work.flush()
+
+
+# ---------- worker status (read by the token server) ----------
+def status_path(pid: int, status_dir: str = STATUS_DIR) -> str:
+    return os.path.join(status_dir, f"worker-{pid}.json")
+
+
+def write_status(status: dict, status_dir: str = STATUS_DIR) -> None:
+    os.makedirs(status_dir, exist_ok=True)
+    path = status_path(status["pid"], status_dir)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(status, f)
+    os.replace(tmp, path)  # readers never see a half-written file
+
+
+def remove_status(pid: int, status_dir: str = STATUS_DIR) -> None:
+    try:
+        os.remove(status_path(pid, status_dir))
+    except FileNotFoundError:
+        pass
+
+
+def read_statuses(status_dir: str = STATUS_DIR, stale: float = STATUS_STALE) -> list[dict]:
+    """Fresh status of the workers on this host (stale files are skipped)"""
+    statuses = []
+    now = time.time()
+    try:
+        names = os.listdir(status_dir)
+    except FileNotFoundError:
+        return []
+    for name in names:
+        if not (name.startswith("worker-") and name.endswith(".json")):
+            continue
+        try:
+            with open(os.path.join(status_dir, name), "r", encoding="utf-8") as f:
+                status = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if now - status.get("updated_at", 0) <= stale:
+            statuses.append(status)
+    return statuses
+
+
+class WorkerAvailability:
+    """Token server side: are all local workers draining? (cached, read at most once per ttl)"""
+
+    def __init__(self, status_dir: str = STATUS_DIR, ttl: float = 1.0) -> None:
+        self.status_dir = status_dir
+        self.ttl = ttl
+        self._checked_at = 0.0
+        self._all_draining = False
+
+    def all_draining(self) -> bool:
+        now = time.monotonic()
+        if now - self._checked_at >= self.ttl:
+            statuses = read_statuses(self.status_dir)
+            # No status at all (agent on another host, or not started): let LiveKit decide
+            self._all_draining = bool(statuses) and all(status["draining"] for status in statuses)
+            self._checked_at = now
+        return self._all_draining
+
+
+# ---------- worker side ----------
+class DrainCoordinator:
+    """
+    Drains an AgentServer on SIGUSR1. Needs only server.on("worker_started"),
+    server.active_jobs and server.drain(timeout), so stand-ins can drive it (tools/drain_check.py).
+    """
+
+    def __init__(self, server, timeout: float = DRAIN_TIMEOUT, status_dir: str = STATUS_DIR,
+                 agent_name: str = "", on_drained: Optional[Callable[[], None]] = None) -> None:
+        self.server = server
+        self.timeout = timeout
+        self.status_dir = status_dir
+        self.agent_name = agent_name
+        # Default: SIGTERM to ourselves, the LiveKit CLI then closes the worker
+        self.on_drained = on_drained or (lambda: os.kill(os.getpid(), signal.SIGTERM))
+        self.draining = False
+        self.drain_started_at: Optional[float] = None
+        self._status_task: Optional[asyncio.Task] = None
+        self._drain_task: Optional[asyncio.Task] = None
+
+    def attach(self) -> None:
+        self.server.on("worker_started", self._on_worker_started)
+
+    def _on_worker_started(self, *_) -> None:
+        loop = asyncio.get_running_loop()
+        loop.add_signal_handler(signal.SIGUSR1, self.start_drain)
+        self._status_task = loop.create_task(self._publish_status())
+        logger.info("🚰 Drain with: kill -USR1 <pid>", extra=fields(pid=os.getpid(), deadline_s=self.timeout))
+
+    def status(self) -> dict:
+        return {
+            "pid": os.getpid(),
+            "agent_name": self.agent_name,
+            "draining": self.draining,
+            "active_jobs": len(self.server.active_jobs),
+            "drain_started_at": self.drain_started_at,
+            "updated_at": time.time(),
+        }
+
+    async def _publish_status(self) -> None:
+        try:
+            while True:
+                try:
+                    write_status(self.status(), self.status_dir)
+                except OSError as e:
+                    logger.warning("⚠️ Could not write worker status", extra=fields(error=str(e)))
+                await asyncio.sleep(STATUS_INTERVAL)
+        finally:
+            remove_status(os.getpid(), self.status_dir)
+
+    def start_drain(self) -> None:
+        if self.draining:
+            return
+        self.draining = True
+        self.drain_started_at = time.time()
+        self._drain_task = asyncio.get_running_loop().create_task(self._drain())
+        try:
+            write_status(self.status(), self.status_dir)  # token server sees it right away
+        except OSError as e:
+            logger.warning("⚠️ Could not write worker status", extra=fields(error=str(e)))
+
+    async def _drain(self) -> None:
+        logger.info("🚰 Draining: no new dispatches", extra=fields(active_sessions=len(self.server.active_jobs),
+                                                                  deadline_s=self.timeout))
+        try:
+            await self.server.drain(timeout=int(self.timeout))
+            logger.info("✅ All sessions finished",
+                        extra=fields(after_s=round(time.time() - self.drain_started_at, 1)))
+        except asyncio.TimeoutError:
+            logger.warning("⏰ Drain deadline reached, closing the remaining sessions",
+                           extra=fields(sessions=len(self.server.active_jobs)))
+        if self._status_task is not None:
+            self._status_task.cancel()
+        self.on_drained()
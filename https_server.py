@@ -1,21 +1,274 @@
-import http.server
-import ssl
+#!/usr/bin/env python3
+"""
+HTTPS static file server cho các trang HTML (Homepage, Menu, About, Blog...)
+
+- Async (aiohttp): nhiều kết nối keep-alive đồng thời
+- File được giữ trong RAM, nén sẵn gzip (và brotli nếu có cài `brotli`)
+- ETag / Last-Modified / Cache-Control, trả 304 khi client đã có bản mới nhất
+- Tự reload khi file thay đổi trên đĩa
+"""
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import mimetypes
 import os
+import ssl
+from dataclasses import dataclass
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional
+
+from aiohttp import web
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+STATIC_ROOT = os.path.dirname(os.path.abspath(__file__))
+DIST_ROOT = os.path.join(STATIC_ROOT, 'dist')  # output of tools/build_assets.py
+MANIFEST_FILE = 'manifest.json'
+CERT_DIR = os.path.join(STATIC_ROOT, '.cert')
+PORT = 8099
+INDEX_PAGE = 'Homepage.html'
+
+# Only these file types are served (never .py, .env, certificates, ...)
+SERVED_EXTENSIONS = {
+    '.html', '.css', '.js', '.mjs', '.json', '.svg', '.png', '.jpg', '.jpeg',
+    '.gif', '.webp', '.ico', '.woff', '.woff2', '.txt', '.map',
+}
+COMPRESSIBLE_EXTENSIONS = {'.html', '.css', '.js', '.mjs', '.json', '.svg', '.txt', '.map'}
+SKIPPED_DIRS = {'node_modules', '__pycache__'}
+MIN_COMPRESS_SIZE = 512  # bytes; smaller files are not worth compressing
+RELOAD_INTERVAL = 1.0  # seconds between mtime checks
+
+CACHE_CONTROL_HTML = 'no-cache'  # always revalidate (cheap 304 thanks to ETag)
+CACHE_CONTROL_ASSET = 'public, max-age=3600'
+CACHE_CONTROL_IMMUTABLE = 'public, max-age=31536000, immutable'  # fingerprinted bundles
+
+
+@dataclass
+class StaticAsset:
+    path: str
+    body: bytes
+    content_type: str
+    etag: str
+    last_modified: str
+    mtime: float
+    cache_control: str
+    gzip_body: Optional[bytes] = None
+    br_body: Optional[bytes] = None
+
+
+def load_asset(rel_path: str, full_path: str, immutable: bool = False) -> StaticAsset:
+    """Read a file and precompute its compressed variants and validators"""
+    with open(full_path, 'rb') as f:
+        body = f.read()
+    mtime = os.path.getmtime(full_path)
+    ext = os.path.splitext(rel_path)[1].lower()
+
+    content_type = mimetypes.guess_type(rel_path)[0] or 'application/octet-stream'
+    if content_type.startswith('text/') or ext in ('.js', '.mjs', '.json', '.svg'):
+        content_type += '; charset=utf-8'
+
+    asset = StaticAsset(
+        path=rel_path,
+        body=body,
+        content_type=content_type,
+        etag=f'"{hashlib.sha1(body).hexdigest()[:16]}"',
+        last_modified=formatdate(mtime, usegmt=True),
+        mtime=mtime,
+        cache_control=(
+            CACHE_CONTROL_IMMUTABLE if immutable
+            else CACHE_CONTROL_HTML if ext == '.html'
+            else CACHE_CONTROL_ASSET
+        ),
+    )
+
+    if ext in COMPRESSIBLE_EXTENSIONS and len(body) >= MIN_COMPRESS_SIZE:
+        asset.gzip_body = gzip.compress(body, compresslevel=9, mtime=0)
+        if brotli is not None:
+            asset.br_body = brotli.compress(body, quality=11)
+    return asset
+
+
+class AssetCache:
+    """All servable files of STATIC_ROOT, kept in memory and reloaded on change"""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.assets: dict[str, StaticAsset] = {}
+        # Fingerprinted bundles listed in the build manifest never change
+        self.immutable: set[str] = set()
+
+    def _load_manifest(self) -> None:
+        manifest_path = os.path.join(self.root, MANIFEST_FILE)
+        if not os.path.exists(manifest_path):
+            self.immutable = set()
+            return
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                self.immutable = set(json.load(f).get('assets', {}))
+        except (OSError, ValueError) as e:
+            print(f'⚠️  Could not read {MANIFEST_FILE}: {e}')
+            self.immutable = set()
+
+    def _iter_files(self):
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            # Skip hidden dirs (.cert, .git, .vite) and build/dependency folders
+            dirnames[:] = [d for d in dirnames if not d.startswith('.') and d not in SKIPPED_DIRS]
+            for filename in filenames:
+                if os.path.splitext(filename)[1].lower() not in SERVED_EXTENSIONS:
+                    continue
+                full_path = os.path.join(dirpath, filename)
+                rel_path = os.path.relpath(full_path, self.root).replace(os.sep, '/')
+                yield rel_path, full_path
+
+    def scan(self) -> list[str]:
+        """Load new/changed files, drop deleted ones. Returns the changed paths"""
+        changed = []
+        present = set()
+        self._load_manifest()
+        for rel_path, full_path in self._iter_files():
+            present.add(rel_path)
+            try:
+                mtime = os.path.getmtime(full_path)
+                current = self.assets.get(rel_path)
+                if current is None or current.mtime != mtime:
+                    self.assets[rel_path] = load_asset(rel_path, full_path, rel_path in self.immutable)
+                    changed.append(rel_path)
+            except OSError:
+                continue  # file disappeared while scanning
+
+        for rel_path in list(self.assets):
+            if rel_path not in present:
+                del self.assets[rel_path]
+                changed.append(rel_path)
+        return changed
+
+    async def watch(self, interval: float = RELOAD_INTERVAL):
+        """Poll the tree and reload changed files"""
+        while True:
+            await asyncio.sleep(interval)
+            changed = await asyncio.to_thread(self.scan)
+            if changed:
+                print(f'♻️  Reloaded {len(changed)} file(s): {", ".join(changed[:5])}'
+                      f'{" ..." if len(changed) > 5 else ""}')
+
+    def get(self, rel_path: str) -> Optional[StaticAsset]:
+        return self.assets.get(rel_path)
+
+
+def not_modified(request: web.Request, asset: StaticAsset) -> bool:
+    """Conditional GET: If-None-Match takes precedence over If-Modified-Since"""
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(',')]
+        return asset.etag in tags or '*' in tags
+
+    if_modified_since = request.headers.get('If-Modified-Since')
+    if if_modified_since:
+        try:
+            return int(asset.mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def choose_encoding(request: web.Request, asset: StaticAsset) -> tuple[bytes, Optional[str]]:
+    accept = request.headers.get('Accept-Encoding', '')
+    if asset.br_body is not None and 'br' in accept:
+        return asset.br_body, 'br'
+    if asset.gzip_body is not None and 'gzip' in accept:
+        return asset.gzip_body, 'gzip'
+    return asset.body, None
+
+
+async def handle_static(request: web.Request) -> web.StreamResponse:
+    cache: AssetCache = request.app['assets']
+    rel_path = request.match_info.get('path', '')
+    if not rel_path:
+        raise web.HTTPFound(f'/{INDEX_PAGE}')
+
+    asset = cache.get(rel_path)
+    if asset is None:
+        raise web.HTTPNotFound()
+
+    headers = {
+        'ETag': asset.etag,
+        'Last-Modified': asset.last_modified,
+        'Cache-Control': asset.cache_control,
+        'Vary': 'Accept-Encoding',
+    }
+    if not_modified(request, asset):
+        return web.Response(status=304, headers=headers)
+
+    body, encoding = choose_encoding(request, asset)
+    headers['Content-Type'] = asset.content_type
+    if encoding:
+        headers['Content-Encoding'] = encoding
+    return web.Response(body=body, headers=headers)
+
+
+def create_app(root: str = STATIC_ROOT, reload: bool = True) -> web.Application:
+    app = web.Application()
+    cache = AssetCache(root)
+    cache.scan()
+    app['assets'] = cache
+    app.router.add_get('/{path:.*}', handle_static)  # GET also answers HEAD
+
+    async def start_watcher(app: web.Application):
+        app['watcher'] = asyncio.create_task(cache.watch())
+
+    async def stop_watcher(app: web.Application):
+        app['watcher'].cancel()
+
+    if reload:
+        app.on_startup.append(start_watcher)
+        app.on_cleanup.append(stop_watcher)
+    return app
+
+
+def create_ssl_context(cert_dir: str = CERT_DIR) -> Optional[ssl.SSLContext]:
+    cert_file = os.path.join(cert_dir, 'server-cert.pem')
+    key_file = os.path.join(cert_dir, 'server-key.pem')
+    if not (os.path.exists(cert_file) and os.path.exists(key_file)):
+        return None
+    ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    ssl_context.load_cert_chain(cert_file, key_file)
+    return ssl_context
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Static HTTPS server for the restaurant pages')
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--root', default=STATIC_ROOT)
+    parser.add_argument('--dist', action='store_true',
+                        help='serve the minified build from dist/ (python3 tools/build_assets.py)')
+    parser.add_argument('--no-tls', action='store_true', help='serve plain HTTP (benchmarks)')
+    parser.add_argument('--no-reload', action='store_true', help='do not watch files for changes')
+    args = parser.parse_args()
+
+    root = DIST_ROOT if args.dist else args.root
+    if args.dist and not os.path.exists(os.path.join(root, MANIFEST_FILE)):
+        print('❌ dist/ not built yet. Run: python3 tools/build_assets.py')
+        return
 
-os.chdir('/home/sotatek/Documents/Uyen/demo_voice')
+    app = create_app(root, reload=not args.no_reload)
+    ssl_context = None if args.no_tls else create_ssl_context()
+    protocol = 'https' if ssl_context else 'http'
+    if not args.no_tls and ssl_context is None:
+        print('⚠️  Running without HTTPS (cert files not found)')
 
-server_address = ('0.0.0.0', 8099)
-httpd = http.server.HTTPServer(server_address, http.server.SimpleHTTPRequestHandler)
+    cache: AssetCache = app['assets']
+    print(f'📦 Loaded {len(cache.assets)} file(s) into memory '
+          f'(gzip{" + brotli" if brotli is not None else ""})')
+    print(f'🔒 {protocol.upper()} Server running on {protocol}://0.0.0.0:{args.port}')
+    print(f'📱 Access from other devices: {protocol}://192.168.200.22:{args.port}/{INDEX_PAGE}')
+    web.run_app(app, host='0.0.0.0', port=args.port, ssl_context=ssl_context, print=None)
 
-# Use existing certificates
-cert_path = '/home/sotatek/Documents/Uyen/demo_voice/.cert'
-httpd.socket = ssl.wrap_socket(
-    httpd.socket,
-    keyfile=f'{cert_path}/server-key.pem',
-    certfile=f'{cert_path}/server-cert.pem',
-    server_side=True
-)
 
-print(f'🔒 HTTPS Server running on https://0.0.0.0:8099')
-print(f'📱 Access from other devices: https://192.168.200.22:8099/Homepage.html')
-httpd.serve_forever()
+if __name__ == '__main__':
+    main()
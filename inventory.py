@@ -0,0 +1,139 @@
+"""
+Inventory (kho hàng) helpers dùng chung cho agent và các tool benchmark:
+đọc inventory.json, chuẩn hóa tên món, kiểm tra và trừ kho khi đặt món.
+Mọi thay đổi kho được ghi vào nhật ký kho (inventory_log.py), không ghi lại cả file.
+Không phụ thuộc LiveKit để có thể đo riêng (tools/bench_inventory.py).
+"""
+
+import json
+import logging
+import os
+import unicodedata
+from typing import Optional
+
+from agent_logging import fields
+
+logger = logging.getLogger("restaurant-bot")
+
+INVENTORY_FILE = os.getenv("INVENTORY_FILE", "/home/sotatek/Documents/Uyen/demo_voice/inventory.json")
+
+
+def load_inventory(path: Optional[str] = None) -> dict:
+    """Load inventory from JSON file"""
+    path = path or INVENTORY_FILE
+    try:
+        logger.info(f"📂 Loading inventory from: {path}")
+        with open(path, 'r', encoding='utf-8') as f:
+            inventory = json.load(f)
+        logger.info("✅ Inventory loaded successfully", extra=fields(items=len(inventory)))
+        return inventory
+    except FileNotFoundError:
+        logger.error(f"❌ Inventory file not found: {path}")
+        return {}
+    except json.JSONDecodeError as e:
+        logger.error(f"❌ Invalid JSON in inventory file: {e}")
+        return {}
+    except Exception as e:
+        logger.error(f"❌ Error loading inventory: {e}")
+        return {}
+
+def normalize_item_name(name: str) -> str:
+    """Normalize item name: remove quotes, accents, convert to lowercase"""
+    # Remove quotes
+    name = name.strip().strip("'\"")
+    # Convert to lowercase
+    name = name.lower()
+    # Remove Vietnamese accents
+    nfd = unicodedata.normalize('NFD', name)
+    name = ''.join(char for char in nfd if unicodedata.category(char) != 'Mn')
+    return name
+
+def find_inventory_key(item_name: str, inventory: dict) -> Optional[str]:
+    """Find matching inventory key for item name (supports partial matching)"""
+    normalized_input = normalize_item_name(item_name)
+    logger.debug("🔍 Looking for %r → normalized: %r", item_name, normalized_input)
+    
+    # Try exact match
+    if normalized_input in inventory:
+        logger.debug("✅ Exact match found: %r", normalized_input)
+        return normalized_input
+    
+    # Try partial match - check if input is in any key or vice versa
+    for key in inventory.keys():
+        if normalized_input in key or key in normalized_input:
+            logger.debug("✅ Partial match found: %r matches %r", key, normalized_input)
+            return key
+        # Check if they start with the same words
+        if normalized_input.startswith(key) or key.startswith(normalized_input):
+            logger.debug("✅ Prefix match found: %r matches %r", key, normalized_input)
+            return key
+    
+    logger.warning("❌ No match found", extra=fields(item=normalized_input, inventory_items=len(inventory)))
+    return None
+
+def check_availability(inventory: dict, order: dict[str, int]) -> tuple[bool, str]:
+    """
+    Check if items are available in sufficient quantity
+    Returns: (is_available, message)
+    """
+    for item_name, quantity in order.items():
+        item_key = find_inventory_key(item_name, inventory)
+        
+        if item_key is None:
+            return False, f"Sản phẩm '{item_name}' không có trong menu / Item '{item_name}' is not in the menu"
+        
+        available = inventory[item_key]["quantity"]
+        display_name = inventory[item_key]["name"]
+        
+        if available < quantity:
+            return False, (
+                f"Xin lỗi, chỉ còn {available} {display_name}, không đủ {quantity} / "
+                f"Sorry, only {available} {display_name} available, not enough for {quantity}"
+            )
+    
+    return True, "Đủ hàng / Available"
+
+def deduct_inventory(inventory: dict, order: dict[str, int]) -> dict:
+    """Deduct ordered items from inventory"""
+    for item_name, quantity in order.items():
+        item_key = find_inventory_key(item_name, inventory)
+        if item_key and item_key in inventory:
+            inventory[item_key]["quantity"] -= quantity
+            logger.info("✅ Deducted", extra=fields(
+                item=inventory[item_key]["name"], quantity=quantity, remaining=inventory[item_key]["quantity"]
+            ))
+    return inventory
+
+
+def order_quantities(inventory: dict, order: dict[str, int]) -> dict[str, int]:
+    """{item name as ordered: qty} -> {inventory key: qty}; unknown items are left out"""
+    quantities: dict[str, int] = {}
+    for item_name, quantity in order.items():
+        item_key = find_inventory_key(item_name, inventory)
+        if item_key is not None:
+            quantities[item_key] = quantities.get(item_key, 0) + quantity
+    return quantities
+
+
+def validate_order(inventory: dict, items: dict[str, int]) -> tuple[bool, str]:
+    """
+    Order path of the update_order tool
+    Returns: (is_available, reply for the LLM)
+    """
+    logger.info("🛒 Order requested", extra=fields(items=dict(items), inventory_items=len(inventory)))
+
+    # Check if inventory is loaded
+    if not inventory:
+        logger.error("❌ Inventory is empty!")
+        return False, "❌ Lỗi hệ thống: Không thể kiểm tra kho hàng / System error: Cannot check inventory"
+
+    # Check if items are available in sufficient quantity
+    is_available, message = check_availability(inventory, items)
+
+    if not is_available:
+        logger.warning("❌ Not available", extra=fields(reason=message))
+        return False, f"❌ {message}"
+
+    order_summary = ", ".join([f"{qty}x {item}" for item, qty in items.items()])
+    logger.info("✅ Order updated", extra=fields(order=order_summary))
+    return True, f"✅ Đơn hàng đã cập nhật / Order updated: {order_summary}"
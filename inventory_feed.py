@@ -0,0 +1,268 @@
+"""
+Inventory change feed: đẩy thay đổi kho tới mọi phiên gọi đang chạy và tới web client
+- Mỗi job process có một InventoryFeed (get_feed()) giữ bản kho hiện tại và một thread theo dõi
+  nhật ký kho (inventory_log.py, stat mỗi INVENTORY_POLL_INTERVAL giây). Khi log dài thêm
+  (manage_inventory.py, job process khác checkout) thread chỉ đọc các event mới và phát delta;
+  sau một lần compact thì đọc lại snapshot + log và so với bản đang giữ
+- Checkout trong cùng process gọi record(): ghi event vào log rồi đọc lại ngay, không chờ lần poll
+- Mỗi phiên mở một SessionInventory: delta được áp vào userdata.inventory trên event loop của
+  phiên và gửi qua LiveKit data channel (topic "inventory") để Homepage.html / Menu.html / App.jsx
+  làm mờ món hết hàng
+- Phiên mới lấy snapshot() của feed, không phiên nào đọc lại file JSON
+
+Delta: {key: item (name, price, quantity) hoặc None nếu món bị xóa}, áp theo giá trị tuyệt đối nên
+áp lại nhiều lần vẫn đúng.
+
+Không phụ thuộc LiveKit để đo riêng:  python tools/bench_inventory_feed.py
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+import inventory_log
+from agent_logging import fields
+
+logger = logging.getLogger("restaurant-bot")
+
+INVENTORY_TOPIC = "inventory"
+INVENTORY_POLL_INTERVAL = float(os.getenv("INVENTORY_POLL_INTERVAL", "1.0"))  # seconds between log checks
+
+Delta = dict[str, Optional[dict]]
+
+
+def diff_inventory(old: dict, new: dict) -> Delta:
+    """Items added or changed in new, None for the ones removed"""
+    delta: Delta = {key: dict(item) for key, item in new.items() if old.get(key) != item}
+    delta.update({key: None for key in old.keys() - new.keys()})
+    return delta
+
+
+def events_delta(items: dict, events: list[dict]) -> Delta:
+    """What a batch of log events changes in items (items itself is not modified)"""
+    touched: Delta = {}
+    for event in events:
+        key = event.get("key")
+        if key is None:
+            continue
+        current = touched[key] if key in touched else (dict(items[key]) if key in items else None)
+        touched[key] = inventory_log.apply_event(current, event)
+    return {key: item for key, item in touched.items() if item != items.get(key)}
+
+
+def apply_delta(items: dict, delta: Delta) -> None:
+    """In place; every item is copied so sessions never share a dict"""
+    for key, item in delta.items():
+        if item is None:
+            items.pop(key, None)
+        else:
+            items[key] = dict(item)
+
+
+def feed_message(kind: str, version: int, delta: Delta) -> bytes:
+    """Data channel payload: {"type": "snapshot" | "delta", "version", "items": [...], "removed": [...]}"""
+    return json.dumps({
+        "type": kind,
+        "version": version,
+        "items": [
+            {"key": key, "name": item["name"], "quantity": item["quantity"], "available": item["quantity"] > 0}
+            for key, item in delta.items() if item is not None
+        ],
+        "removed": [key for key, item in delta.items() if item is None],
+    }, ensure_ascii=False).encode()
+
+
+class Subscription:
+    """callback(delta, version) runs on loop, in publish order"""
+
+    def __init__(self, feed: "InventoryFeed", callback: Callable[[Delta, int], None],
+                 loop: asyncio.AbstractEventLoop):
+        self.feed = feed
+        self.callback = callback
+        self.loop = loop
+
+    def deliver(self, delta: Delta, version: int) -> None:
+        try:
+            self.loop.call_soon_threadsafe(self._run, delta, version)
+        except RuntimeError:  # loop closed: the session is gone
+            self.feed.unsubscribe(self)
+
+    def _run(self, delta: Delta, version: int) -> None:
+        try:
+            self.callback(delta, version)
+        except Exception as e:
+            logger.error(f"❌ Inventory feed subscriber failed: {e}")
+
+    def close(self) -> None:
+        self.feed.unsubscribe(self)
+
+
+class InventoryFeed:
+    """The process's current inventory and its subscribers; one watcher thread per process"""
+
+    def __init__(self, path: Optional[str] = None, poll_interval: float = INVENTORY_POLL_INTERVAL):
+        self.log = inventory_log.InventoryLog(path)
+        self.path = self.log.path
+        self.poll_interval = poll_interval
+        self.version = 0
+        self._items: dict = {}
+        self._position: Optional[inventory_log.LogPosition] = None  # how far the log was read
+        self._subscribers: list[Subscription] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.check()
+
+    def snapshot(self) -> dict:
+        """Copy for a new session (no file read)"""
+        with self._lock:
+            return {key: dict(item) for key, item in self._items.items()}
+
+    def subscribe(self, callback: Callable[[Delta, int], None],
+                  loop: Optional[asyncio.AbstractEventLoop] = None) -> Subscription:
+        subscription = Subscription(self, callback, loop or asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def current(self, keys) -> dict[str, int]:
+        """Quantities with every event appended so far (the log is read first); 0 for unknown keys"""
+        self.check()
+        with self._lock:
+            return {key: self._items[key]["quantity"] if key in self._items else 0 for key in keys}
+
+    def record(self, events: list[dict], source: str = "checkout") -> int:
+        """Changes made in this process (checkout): appended to the log, then read back at once"""
+        self.log.append(events, source)
+        return self.check()
+
+    def check(self) -> int:
+        """Read the events appended since the last check; returns the number of items in the delta"""
+        with self._lock:  # the watcher and record() never apply the same events twice
+            position = self._position
+            if position is not None:
+                try:
+                    stat = os.stat(self.log.log_path)
+                except FileNotFoundError:
+                    stat = None
+                if stat is not None and stat.st_ino == position.inode:
+                    if stat.st_size <= position.offset:
+                        return 0
+                    events, self._position = self.log.read_since(position)
+                    if events is not None:
+                        sources = sorted({event.get("source", "?") for event in events if "key" in event})
+                        return self._dispatch(events_delta(self._items, events), ",".join(sources))
+            # First read, or the log was compacted / replaced: snapshot + log, compared with what we hold
+            try:
+                items, self._position = self.log.load()
+            except FileNotFoundError:
+                return 0
+            except (OSError, ValueError, RuntimeError) as e:
+                logger.warning(f"⚠️ Inventory not readable, retrying on the next poll: {e}")
+                return 0
+            return self._dispatch(diff_inventory(self._items, items), "load" if position is None else "compaction")
+
+    def _dispatch(self, delta: Delta, source: str) -> int:
+        """Under the lock, so every subscriber sees the deltas in version order"""
+        if not delta:
+            return 0
+        apply_delta(self._items, delta)
+        self.version += 1
+        for subscription in list(self._subscribers):
+            subscription.deliver(delta, self.version)
+        sold_out = [item["name"] for item in delta.values() if item is not None and item["quantity"] <= 0]
+        logger.info("📦 Inventory changed", extra=fields(
+            source=source, version=self.version, items=len(delta), sold_out=sold_out,
+            subscribers=len(self._subscribers),
+        ))
+        return len(delta)
+
+    def start(self) -> "InventoryFeed":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._watch, name="inventory-feed", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"❌ Inventory feed check failed: {e}")
+
+
+class SessionInventory:
+    """One session's live view: deltas go into userdata.inventory and out to the room"""
+
+    def __init__(self, feed: InventoryFeed, userdata, room=None, topic: str = INVENTORY_TOPIC):
+        self.feed = feed
+        self.userdata = userdata  # anything with an .inventory dict (restaurant_agent.UserData)
+        self.room = room
+        self.topic = topic
+        self._tasks: set[asyncio.Task] = set()
+        self._subscription = feed.subscribe(self._on_delta)
+
+    def _on_delta(self, delta: Delta, version: int) -> None:
+        apply_delta(self.userdata.inventory, delta)
+        self._send(feed_message("delta", version, delta))
+
+    def send_snapshot(self) -> None:
+        """Whole inventory, once the client is in the room"""
+        items = self.userdata.inventory
+        self._send(feed_message("snapshot", self.feed.version, items))
+
+    def _send(self, data: bytes) -> None:
+        if self.room is None:
+            return
+        task = asyncio.create_task(self._publish(data))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _publish(self, data: bytes) -> None:
+        try:
+            await self.room.local_participant.publish_data(data, topic=self.topic)
+        except Exception as e:
+            logger.warning(f"⚠️ Inventory update not sent to the room: {e}")
+
+    async def close(self) -> None:
+        """Job shutdown callback"""
+        self._subscription.close()
+        if self._tasks:
+            await asyncio.wait(self._tasks, timeout=2)
+
+
+_feed: Optional[InventoryFeed] = None
+_feed_lock = threading.Lock()
+
+
+def get_feed() -> InventoryFeed:
+    """The process's feed, watcher started on first use"""
+    global _feed
+    with _feed_lock:
+        if _feed is None:
+            started = time.perf_counter()
+            _feed = InventoryFeed().start()
+            logger.info("📦 Inventory feed started", extra=fields(
+                path=_feed.path, items=len(_feed._items), poll_s=_feed.poll_interval,
+                ms=round((time.perf_counter() - started) * 1000, 1),
+            ))
+        return _feed
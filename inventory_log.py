@@ -0,0 +1,440 @@
+#!/usr/bin/env python3
+"""
+Nhật ký kho hàng (append-only) + snapshot: mỗi thay đổi kho là một event, không ghi lại cả file
+- Event là một dòng JSON, ghi thêm (O_APPEND) vào <INVENTORY_FILE>.log:
+  deduct (checkout), restock (+/-), set (đặt số lượng), price (đổi giá), item (thêm / sửa món), remove
+- Trạng thái kho = snapshot gần nhất (<INVENTORY_FILE>.snapshot) + các event sau nó. Chưa có snapshot
+  thì bắt đầu từ inventory.json
+- Compact (tự động khi log vượt INVENTORY_LOG_COMPACT_MB, hoặc `compact` bên dưới): ghi snapshot mới,
+  bắt đầu log mới, ghi lại inventory.json (bản dễ đọc). Log cũ được giữ làm lịch sử (.log.<N>,
+  INVENTORY_LOG_ARCHIVES bản gần nhất)
+- Nhiều job process ghi chung: ghi event giữ flock LOCK_SH, compact giữ LOCK_EX. deduct / restock
+  là số tương đối nên hai process trừ cùng một món không ghi đè lên nhau
+- Snapshot và log mang số thế hệ (generation): compact bị ngắt giữa chừng không làm áp event hai lần
+
+    python inventory_log.py history "Pad Thai" -n 20
+    python inventory_log.py stats
+    python inventory_log.py compact
+
+Không phụ thuộc LiveKit để đo riêng:  python tools/bench_inventory_log.py
+"""
+
+import argparse
+import fcntl
+import glob
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, Optional
+
+from agent_logging import fields
+from inventory import INVENTORY_FILE, normalize_item_name
+
+logger = logging.getLogger("restaurant-bot")
+
+COMPACT_BYTES = int(float(os.getenv("INVENTORY_LOG_COMPACT_MB", "4")) * 2**20)
+ARCHIVES = int(os.getenv("INVENTORY_LOG_ARCHIVES", "20"))  # compacted logs kept for history, 0 = none
+
+
+@dataclass(frozen=True)
+class LogPosition:
+    """How far a reader got: the log file (inode), bytes read, the log's generation"""
+    inode: int
+    offset: int
+    generation: int
+
+
+# ==================== EVENTS ====================
+def encode(event: dict) -> bytes:
+    return json.dumps(event, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def apply_event(item: Optional[dict], event: dict) -> Optional[dict]:
+    """The item after one event (None = not in the inventory); item is modified in place"""
+    op = event["op"]
+    if op == "item":
+        return dict(event["item"])
+    if op == "remove" or item is None:  # a stock change for an item removed meanwhile is dropped
+        return None
+    if op == "deduct":
+        item["quantity"] -= event["qty"]
+    elif op == "restock":
+        item["quantity"] += event["qty"]
+    elif op == "set":
+        item["quantity"] = event["qty"]
+    elif op == "price":
+        item["price"] = event["price"]
+    return item
+
+
+def apply_events(items: dict, events: Iterable[dict]) -> dict:
+    """In place; header lines (no key) are skipped"""
+    for event in events:
+        key = event.get("key")
+        if key is None:
+            continue
+        item = apply_event(items.get(key), event)
+        if item is None:
+            items.pop(key, None)
+        else:
+            items[key] = item
+    return items
+
+
+def deduct_events(sold: dict[str, int]) -> list[dict]:
+    """{inventory key: quantity sold} of one checkout"""
+    return [{"op": "deduct", "key": key, "qty": qty} for key, qty in sold.items()]
+
+
+def events_from_diff(old: dict, new: dict, relative: Iterable[str] = ()) -> list[dict]:
+    """Events turning old into new. Quantity changes of the keys in relative are written as
+    restock deltas (kept when another process changed the item meanwhile), the rest as set."""
+    relative = set(relative)
+    events = [{"op": "remove", "key": key} for key in old.keys() - new.keys()]
+    for key, item in new.items():
+        before = old.get(key)
+        if before == item:
+            continue
+        if before is None or any(before.get(f) != item.get(f) for f in before.keys() | item.keys()
+                                 if f not in ("quantity", "price")):
+            events.append({"op": "item", "key": key, "item": item})
+            continue
+        if before.get("price") != item.get("price"):
+            events.append({"op": "price", "key": key, "price": item["price"]})
+        if before.get("quantity") != item.get("quantity"):
+            if key in relative:
+                events.append({"op": "restock", "key": key, "qty": item["quantity"] - before["quantity"]})
+            else:
+                events.append({"op": "set", "key": key, "qty": item["quantity"]})
+    return events
+
+
+def read_events(f, offset: int = 0) -> tuple[list[dict], int]:
+    """Complete lines from offset on, and the offset after them (a line still being written is
+    read next time)"""
+    f.seek(offset)
+    data = f.read()
+    end = data.rfind(b"\n") + 1
+    events = []
+    for line in data[:end].splitlines():
+        if not line:
+            continue
+        try:
+            events.append(json.loads(line))
+        except ValueError:
+            logger.warning("⚠️ Inventory log: unreadable line skipped", extra=fields(line=line[:80]))
+    return events, offset + end
+
+
+def log_generation(events: list[dict]) -> int:
+    return events[0].get("generation", 0) if events and events[0].get("op") == "base" else 0
+
+
+def write_atomic(path: str, chunks: Iterable[bytes]) -> None:
+    """Temp file in the same directory, fsync, then os.replace: readers see the old or the new file"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".inventory-", dir=directory)
+    try:
+        os.fchmod(fd, 0o644)  # mkstemp's 0600 would lock other readers out
+        with os.fdopen(fd, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def write_json_atomic(path: str, items: dict) -> None:
+    """inventory.json, one item per line (indent= would switch json to its pure-Python encoder)"""
+    lines = ",\n".join(f"  {json.dumps(key)}: {json.dumps(item)}" for key, item in items.items())
+    write_atomic(path, [f"{{\n{lines}\n}}\n".encode("utf-8")])
+
+
+# ==================== LOG ====================
+class InventoryLog:
+    """
+    Event log of one inventory file. Appends hold a shared flock on the log, compaction an
+    exclusive one: appends of several processes run side by side, never during a compaction.
+    """
+
+    def __init__(self, path: Optional[str] = None, compact_bytes: int = COMPACT_BYTES) -> None:
+        self.path = path or INVENTORY_FILE  # seed before the first snapshot, rewritten by compaction
+        self.log_path = f"{self.path}.log"
+        self.snapshot_path = f"{self.path}.snapshot"
+        self.compact_bytes = compact_bytes
+        self._fd: Optional[int] = None
+        self._fd_generation = 0
+        self._snapshot_stamp: Optional[tuple] = None
+        self._snapshot_generation = 0
+        self._lock = threading.Lock()
+
+    # ----- snapshot -----
+    def read_snapshot(self) -> tuple[dict, int]:
+        """(items, generation); inventory.json as generation 0 before the first compaction"""
+        try:
+            f = open(self.snapshot_path, "rb")
+        except FileNotFoundError:
+            with open(self.path, "rb") as seed:
+                return json.load(seed), 0
+        with f:
+            header = json.loads(f.readline())
+            return json.loads(f.read()), header["generation"]
+
+    def snapshot_generation(self) -> int:
+        """Header line only, re-read when the snapshot file changes"""
+        try:
+            stat = os.stat(self.snapshot_path)
+        except FileNotFoundError:
+            return 0
+        stamp = (stat.st_ino, stat.st_mtime_ns)
+        if stamp != self._snapshot_stamp:
+            with open(self.snapshot_path, "rb") as f:
+                self._snapshot_generation = json.loads(f.readline())["generation"]
+            self._snapshot_stamp = stamp
+        return self._snapshot_generation
+
+    def _write_snapshot(self, items: dict, generation: int) -> None:
+        header = {"generation": generation, "ts": time.time(), "items": len(items)}
+        write_atomic(self.snapshot_path, [encode(header), json.dumps(items, ensure_ascii=False).encode("utf-8")])
+
+    def _create_log(self, generation: int, replace: bool = False) -> None:
+        """Header line written to a temp file, then linked (new log) or renamed over the old one"""
+        directory = os.path.dirname(os.path.abspath(self.log_path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".inventory-log-", dir=directory)
+        try:
+            os.fchmod(fd, 0o644)
+            os.write(fd, encode({"op": "base", "generation": generation, "ts": time.time()}))
+            os.fsync(fd)
+            os.close(fd)
+            if replace:
+                os.replace(tmp_path, self.log_path)
+                return
+            try:
+                os.link(tmp_path, self.log_path)
+            except FileExistsError:
+                pass  # another process created it first
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+    # ----- read -----
+    def load(self) -> tuple[dict, LogPosition]:
+        """Latest snapshot + the events after it"""
+        for _ in range(10):
+            items, generation = self.read_snapshot()
+            try:
+                f = open(self.log_path, "rb")
+            except FileNotFoundError:
+                self._create_log(generation)
+                continue
+            with f:
+                inode = os.fstat(f.fileno()).st_ino
+                events, offset = read_events(f)
+            current = log_generation(events)
+            if current > generation:
+                continue  # compacted between the two reads: read the new snapshot
+            if current == generation:
+                apply_events(items, events)
+            # current < generation: a compaction stopped before replacing the log; its events are in the snapshot
+            return items, LogPosition(inode, offset, current)
+        raise RuntimeError(f"Inventory log {self.log_path} keeps changing while loading")
+
+    def read_since(self, position: LogPosition) -> tuple[Optional[list[dict]], LogPosition]:
+        """Events appended after position; None when the log was compacted or replaced (load() again)"""
+        try:
+            f = open(self.log_path, "rb")
+        except FileNotFoundError:
+            return None, position
+        with f:
+            if os.fstat(f.fileno()).st_ino != position.inode:
+                return None, position
+            events, offset = read_events(f, position.offset)
+        return events, LogPosition(position.inode, offset, position.generation)
+
+    # ----- write -----
+    def _open(self) -> int:
+        if self._fd is None:
+            generation = self.snapshot_generation()
+            if not os.path.exists(self.log_path):
+                self._create_log(generation)
+            fd = os.open(self.log_path, os.O_RDWR | os.O_APPEND)
+            current = log_generation([json.loads(os.pread(fd, 4096, 0).split(b"\n", 1)[0] or b"{}")])
+            if current < generation:
+                # A compaction stopped between writing the snapshot and replacing the log: finish it,
+                # events appended to this log would never be replayed
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                try:
+                    if os.stat(self.log_path).st_ino == os.fstat(fd).st_ino:
+                        self._create_log(generation, replace=True)
+                finally:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                    os.close(fd)
+                return self._open()
+            self._fd, self._fd_generation = fd, current
+        return self._fd
+
+    def _is_current(self, fd: int) -> bool:
+        """Still the log at log_path (not compacted away) and not older than the snapshot"""
+        try:
+            stat = os.stat(self.log_path)
+        except FileNotFoundError:
+            return False
+        return stat.st_ino == os.fstat(fd).st_ino and self._fd_generation >= self.snapshot_generation()
+
+    def append(self, events: list[dict], source: str) -> int:
+        """All events in one write; returns the log size after it. Compacts past compact_bytes."""
+        if not events:
+            return 0
+        ts = round(time.time(), 3)
+        data = b"".join(encode({"ts": ts, **event, "source": source}) for event in events)
+        with self._lock:
+            while True:
+                fd = self._open()
+                fcntl.flock(fd, fcntl.LOCK_SH)
+                try:
+                    if self._is_current(fd):
+                        view = memoryview(data)
+                        while view:
+                            view = view[os.write(fd, view):]
+                        size = os.fstat(fd).st_size
+                        break
+                finally:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                self.close()  # compacted meanwhile: append to the new log
+        if size > self.compact_bytes:
+            self.compact(min_bytes=self.compact_bytes)
+        return size
+
+    def deduct(self, sold: dict[str, int], source: str = "checkout") -> int:
+        return self.append(deduct_events(sold), source)
+
+    def compact(self, min_bytes: int = 0) -> Optional[dict]:
+        """Snapshot of the current state, a new empty log, inventory.json rewritten.
+        None when the log is below min_bytes (another process compacted it first)."""
+        started = time.perf_counter()
+        with self._lock:
+            while True:
+                if not os.path.exists(self.log_path):
+                    self._create_log(self.snapshot_generation())
+                f = open(self.log_path, "rb")
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    if os.stat(self.log_path).st_ino == os.fstat(f.fileno()).st_ino:
+                        break
+                except FileNotFoundError:
+                    pass
+                f.close()
+            try:
+                size = os.fstat(f.fileno()).st_size
+                if size < min_bytes:
+                    return None
+                items, generation = self.read_snapshot()
+                events, _ = read_events(f)
+                current = log_generation(events)
+                if current == generation:
+                    apply_events(items, events)
+                new_generation = max(current, generation) + 1
+                self._write_snapshot(items, new_generation)  # first: from here the old log is never replayed
+                if ARCHIVES and not os.path.exists(f"{self.log_path}.{current}"):
+                    os.link(self.log_path, f"{self.log_path}.{current}")
+                self._create_log(new_generation, replace=True)
+                write_json_atomic(self.path, items)
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+                f.close()
+            self.close()
+        self._prune_archives()
+        stats = {
+            "items": len(items), "events": max(0, len(events) - 1), "log_mb": round(size / 2**20, 2),
+            "generation": new_generation, "ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+        logger.info("🗜️ Inventory log compacted", extra=fields(path=self.log_path, **stats))
+        return stats
+
+    def archives(self) -> list[str]:
+        """Compacted logs, oldest first"""
+        paths = glob.glob(glob.escape(self.log_path) + ".*")
+        return sorted((p for p in paths if p.rsplit(".", 1)[1].isdigit()), key=lambda p: int(p.rsplit(".", 1)[1]))
+
+    def _prune_archives(self) -> None:
+        for path in self.archives()[:-ARCHIVES or None]:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+    def history(self) -> Iterable[dict]:
+        """Every event still on disk (archives, then the current log), oldest first"""
+        for path in [*self.archives(), self.log_path]:
+            try:
+                with open(path, "rb") as f:
+                    events, _ = read_events(f)
+            except FileNotFoundError:
+                continue
+            yield from (event for event in events if event.get("op") != "base")
+
+    def close(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+# ==================== CLI ====================
+def format_event(event: dict) -> str:
+    when = datetime.fromtimestamp(event.get("ts", 0)).strftime("%Y-%m-%d %H:%M:%S")
+    op = event["op"]
+    if op in ("deduct", "restock", "set"):
+        sign = {"deduct": "-", "restock": "+" if event["qty"] >= 0 else "", "set": "="}[op]
+        change = f"{sign}{event['qty']}"
+    elif op == "price":
+        change = f"giá ${event['price']}"
+    elif op == "item":
+        change = f"{event['item'].get('name')} ${event['item'].get('price')} - {event['item'].get('quantity')} phần"
+    else:
+        change = "xóa"
+    return f"{when}  {op:<8} {event['key']:<28} {change:<30} ({event.get('source', '?')})"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Nhật ký kho hàng (append-only)")
+    parser.add_argument("--file", default=None, help=f"file inventory (mặc định INVENTORY_FILE: {INVENTORY_FILE})")
+    commands = parser.add_subparsers(dest="command", required=True)
+    history = commands.add_parser("history", help="lịch sử thay đổi (audit)")
+    history.add_argument("item", nargs="?", help="tên món (mặc định mọi món)")
+    history.add_argument("-n", type=int, default=50, help="số event gần nhất")
+    commands.add_parser("stats", help="snapshot, kích thước log")
+    commands.add_parser("compact", help="ghi snapshot mới và bắt đầu log mới")
+    args = parser.parse_args()
+
+    log = InventoryLog(args.file)
+    try:
+        if args.command == "history":
+            key = normalize_item_name(args.item) if args.item else None
+            events = [event for event in log.history() if key is None or event.get("key") == key]
+            for event in events[-args.n:]:
+                print(format_event(event))
+            print(f"📜 {min(len(events), args.n)} / {len(events)} event")
+        elif args.command == "stats":
+            items, position = log.load()
+            print(f"📦 {len(items)} món, snapshot thế hệ {log.snapshot_generation()}")
+            print(f"📜 Log {log.log_path}: {position.offset / 2**20:.2f} MB "
+                  f"(compact khi > {log.compact_bytes / 2**20:g} MB), {len(log.archives())} bản lưu trữ")
+        else:
+            stats = log.compact()
+            print(f"✅ Đã compact {stats['events']} event, {stats['items']} món ({stats['ms']:.0f} ms)")
+    except FileNotFoundError as e:
+        print(f"❌ Không tìm thấy {e.filename}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,147 +1,351 @@
 #!/usr/bin/env python3
 """
-Script quản lý inventory - View và Reset số lượng sản phẩm
+Script quản lý inventory - xem, cập nhật hàng loạt, nhập / xuất CSV-JSON, bổ sung hàng theo danh mục
+- Mỗi lệnh đọc kho một lần (snapshot + nhật ký kho, inventory_log.py), áp mọi thay đổi trong bộ nhớ
+  rồi ghi các thay đổi thành event vào nhật ký trong một lần write, không ghi lại cả file
+- --dry-run: chỉ in các thay đổi (món mới / bị xóa / đổi số lượng, giá...), không ghi gì
+- Số lượng: "50" (đặt bằng 50), "+20" (thêm 20), "-5" (bớt 5, không xuống dưới 0), "par" (mức chuẩn)
+- Mỗi món có "category" (breakfast / main / drinks / desserts) và "par" (mức tồn chuẩn để reset / restock)
+
+Các phiên gọi đang chạy nhận thay đổi qua inventory_feed.py (không cần restart agent).
+Đo với file 50k món:  python tools/bench_manage_inventory.py
 """
 
+import argparse
+import csv
 import json
-from pathlib import Path
+import os
 import sys
+import time
+from typing import Iterable, Optional
 
-INVENTORY_FILE = "/home/sotatek/Documents/Uyen/demo_voice/inventory.json"
+from inventory import normalize_item_name
+from inventory_feed import diff_inventory
+from inventory_log import InventoryLog, events_from_diff
 
-def view_inventory():
-    """Xem inventory hiện tại"""
-    if not Path(INVENTORY_FILE).exists():
-        print(f"❌ File {INVENTORY_FILE} không tồn tại")
-        return
-    
+# Same file as the agent (inventory.py): running sessions pick up changes through inventory_feed.py
+INVENTORY_FILE = os.getenv("INVENTORY_FILE", "/home/sotatek/Documents/Uyen/demo_voice/inventory.json")
+
+CSV_FIELDS = ["key", "name", "category", "price", "quantity", "par"]
+DIFF_LINES = 30  # changed items printed before "... và N món khác"
+
+
+class InventoryError(Exception):
+    """Invalid input: nothing is written"""
+
+
+# ==================== FILE ====================
+def load_items(path: Optional[str] = None) -> dict:
+    """Latest snapshot + the inventory log"""
+    path = path or INVENTORY_FILE
     try:
-        with open(INVENTORY_FILE, 'r', encoding='utf-8') as f:
-            inventory = json.load(f)
-        
-        print("\n📦 INVENTORY HIỆN TẠI:")
-        print("=" * 50)
-        for key, item in inventory.items():
-            status = "✅" if item['quantity'] > 0 else "❌"
-            print(f"{status} {item['name']}: ${item['price']} - Còn {item['quantity']} phần")
-        print("=" * 50)
-        
-    except Exception as e:
-        print(f"❌ Lỗi khi đọc file: {e}")
-
-
-def reset_inventory():
-    """Reset inventory về số lượng mặc định"""
-    default_inventory = {
-        "pizza": {
-            "name": "Pizza",
-            "price": 10.0,
-            "quantity": 10
-        },
-        "salad": {
-            "name": "Salad",
-            "price": 5.0,
-            "quantity": 10
-        },
-        "ice cream": {
-            "name": "Ice Cream",
-            "price": 3.0,
-            "quantity": 20
-        },
-        "coffee": {
-            "name": "Coffee",
-            "price": 2.0,
-            "quantity": 10
-        }
-    }
-    
+        return InventoryLog(path).load()[0]
+    except FileNotFoundError:
+        raise InventoryError(f"File {path} không tồn tại")
+    except ValueError as e:
+        raise InventoryError(f"File {path} không phải JSON hợp lệ: {e}")
+
+
+# ==================== CHANGES ====================
+def parse_quantity(spec: str) -> tuple[str, Optional[int]]:
+    """"50" -> ("set", 50), "+20" -> ("add", 20), "-5" -> ("add", -5), "par" -> ("par", None)"""
+    spec = str(spec).strip().lower()
+    if spec == "par":
+        return "par", None
     try:
-        with open(INVENTORY_FILE, 'w', encoding='utf-8') as f:
-            json.dump(default_inventory, f, ensure_ascii=False, indent=2)
-        
-        print("\n✅ Đã reset inventory về số lượng mặc định!")
-        view_inventory()
-        
-    except Exception as e:
-        print(f"❌ Lỗi khi reset inventory: {e}")
-
-
-def update_quantity(item_name: str, new_quantity: int):
-    """Cập nhật số lượng của một sản phẩm"""
-    if not Path(INVENTORY_FILE).exists():
-        print(f"❌ File {INVENTORY_FILE} không tồn tại")
+        value = int(spec)
+    except ValueError:
+        raise InventoryError(f"Số lượng không hợp lệ: '{spec}' (ví dụ: 50, +20, -5, par)")
+    if spec[0] in "+-":
+        return "add", value
+    return "set", value
+
+
+def new_quantity(item: dict, op: str, value: Optional[int]) -> int:
+    if op == "set":
+        return value
+    if op == "add":
+        return max(0, item["quantity"] + value)
+    if "par" not in item:
+        raise InventoryError(f"'{item['name']}' chưa có mức par, dùng số lượng cụ thể")
+    return item["par"]
+
+
+def resolve_key(items: dict, name: str) -> str:
+    """Exact key or normalized name; no partial matching (a batch must not touch the wrong item)"""
+    if name in items:
+        return name
+    key = normalize_item_name(name)
+    if key in items:
+        return key
+    raise InventoryError(f"Không tìm thấy sản phẩm '{name}'")
+
+
+def apply_updates(items: dict, updates: list[tuple[str, str]]) -> dict:
+    """[(name, quantity spec), ...] -> new inventory; the input is not modified"""
+    result = {key: dict(item) for key, item in items.items()}
+    for name, spec in updates:
+        key = resolve_key(result, name)
+        op, value = parse_quantity(spec)
+        result[key]["quantity"] = new_quantity(result[key], op, value)
+    return result
+
+
+def restock(items: dict, category: Optional[str], spec: str = "par") -> dict:
+    """Every item of the category (all items if None) to the quantity spec; items without a par
+    level are left as they are when restocking to par"""
+    op, value = parse_quantity(spec)
+    matched = [key for key, item in items.items() if category is None or item.get("category") == category]
+    if not matched:
+        known = sorted({item.get("category") for item in items.values() if item.get("category")})
+        raise InventoryError(f"Không có món nào thuộc danh mục '{category}' (có: {', '.join(known) or '—'})")
+    result = {key: dict(item) for key, item in items.items()}
+    skipped = []
+    for key in matched:
+        if op == "par" and "par" not in result[key]:
+            skipped.append(result[key]["name"])
+            continue
+        result[key]["quantity"] = new_quantity(result[key], op, value)
+    if skipped:
+        print(f"⚠️  {len(skipped)} món chưa có mức par, giữ nguyên: {', '.join(skipped[:10])}")
+    return result
+
+
+def read_rows(path: str, fmt: Optional[str] = None) -> list[dict]:
+    """CSV (header: name, quantity and any of key, category, price, par) or JSON (inventory.json shape or a list)"""
+    fmt = fmt or ("json" if path.endswith(".json") else "csv")
+    stream = sys.stdin if path == "-" else open(path, "r", encoding="utf-8", newline="")
+    with stream:
+        if fmt == "json":
+            data = json.load(stream)
+            if isinstance(data, dict):
+                return [{"key": key, **item} for key, item in data.items()]
+            return list(data)
+        reader = csv.DictReader(stream)
+        if not reader.fieldnames or not ({"name", "key"} & set(reader.fieldnames)):
+            raise InventoryError("CSV cần dòng tiêu đề có cột name (hoặc key)")
+        return [{k: v for k, v in row.items() if v not in (None, "")} for row in reader]
+
+
+def merge_rows(items: dict, rows: list[dict], replace: bool = False) -> dict:
+    """Upsert rows by key (normalized name if no key); replace drops items not in rows.
+    All rows are validated first: one bad row and nothing changes."""
+    result = {} if replace else {key: dict(item) for key, item in items.items()}
+    by_name = {item["name"]: key for key, item in items.items()}  # sync files repeat the exact names
+    errors = []
+    for line, row in enumerate(rows, 2):  # CSV line numbers (header is line 1)
+        try:
+            name = str(row.get("name", "")).strip()
+            key = row.get("key") or by_name.get(name) or normalize_item_name(name)
+            if not key:
+                raise InventoryError("thiếu name")
+            item = result.get(key) or (dict(items[key]) if key in items else {})
+            if "name" in row:
+                item["name"] = name
+            if "category" in row:
+                item["category"] = str(row["category"]).strip().lower()
+            if "price" in row:
+                item["price"] = float(row["price"])
+                if item["price"] < 0:
+                    raise InventoryError("giá < 0")
+            for field in ("quantity", "par"):
+                if field in row:
+                    op, value = parse_quantity(row[field])
+                    if field == "par" or op != "add":
+                        if op == "par" or value < 0:
+                            raise InventoryError(f"{field} không hợp lệ: {row[field]}")
+                        item[field] = value
+                    else:
+                        item[field] = max(0, item.get(field, 0) + value)
+            missing = [field for field in ("name", "price", "quantity") if field not in item]
+            if missing:
+                raise InventoryError(f"món mới thiếu {', '.join(missing)}")
+            item.setdefault("par", item["quantity"])  # a new item's first stock is its normal level
+            result[key] = item
+        except (InventoryError, ValueError) as e:
+            errors.append(f"dòng {line} ({row.get('name') or row.get('key') or '?'}): {e}")
+    if errors:
+        shown = "\n  ".join(errors[:20])
+        more = f"\n  ... và {len(errors) - 20} lỗi khác" if len(errors) > 20 else ""
+        raise InventoryError(f"{len(errors)} dòng không hợp lệ, không ghi gì:\n  {shown}{more}")
+    return result
+
+
+def export_items(items: dict, fmt: str, stream) -> None:
+    if fmt == "json":
+        json.dump(items, stream, ensure_ascii=False, indent=2)
+        stream.write("\n")
         return
-    
-    try:
-        with open(INVENTORY_FILE, 'r', encoding='utf-8') as f:
-            inventory = json.load(f)
-        
-        item_key = item_name.lower()
-        if item_key not in inventory:
-            print(f"❌ Không tìm thấy sản phẩm '{item_name}'")
-            print(f"Các sản phẩm có sẵn: {', '.join([v['name'] for v in inventory.values()])}")
+    writer = csv.DictWriter(stream, fieldnames=CSV_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    for key, item in items.items():
+        writer.writerow({"key": key, **item})
+
+
+# ==================== OUTPUT ====================
+def print_diff(old: dict, new: dict, limit: int = DIFF_LINES) -> int:
+    """Changed items, one line each; returns how many changed"""
+    delta = diff_inventory(old, new)
+    for key, item in list(delta.items())[:limit]:
+        if item is None:
+            print(f"  ➖ {old[key]['name']} (xóa)")
+        elif key not in old:
+            print(f"  ➕ {item['name']}: ${item['price']} - {item['quantity']} phần")
+        else:
+            changes = [f"{field}: {old[key].get(field)} → {item.get(field)}"
+                       for field in ("name", "category", "price", "quantity", "par")
+                       if old[key].get(field) != item.get(field)]
+            print(f"  ✏️  {item['name']}: {', '.join(changes)}")
+    if len(delta) > limit:
+        print(f"  ... và {len(delta) - limit} món khác")
+    added = sum(1 for key, item in delta.items() if item is not None and key not in old)
+    removed = sum(1 for item in delta.values() if item is None)
+    print(f"📊 {len(delta)} thay đổi: {added} món mới, {removed} món bị xóa, {len(delta) - added - removed} món cập nhật")
+    return len(delta)
+
+
+def commit(old: dict, new: dict, dry_run: bool, path: Optional[str] = None,
+           relative: Iterable[str] = (), source: str = "manage_inventory") -> None:
+    """Changes appended to the inventory log; relative keys are written as +/- (see events_from_diff)"""
+    started = time.perf_counter()
+    changed = print_diff(old, new)
+    if dry_run:
+        print("🔍 Dry run: không ghi gì")
+        return
+    if not changed:
+        print("✅ Không có gì thay đổi")
+        return
+    log = InventoryLog(path or INVENTORY_FILE)
+    events = events_from_diff(old, new, relative)
+    log.append(events, source)
+    log.close()
+    print(f"✅ Đã ghi {len(events)} event vào {log.log_path} ({(time.perf_counter() - started) * 1000:.0f} ms)")
+
+
+def view_inventory(items: dict, category: Optional[str] = None, sold_out: bool = False) -> None:
+    """Xem inventory hiện tại"""
+    print("\n📦 INVENTORY HIỆN TẠI:")
+    print("=" * 50)
+    shown = 0
+    for item in items.values():
+        if category and item.get("category") != category:
+            continue
+        if sold_out and item["quantity"] > 0:
+            continue
+        status = "✅" if item["quantity"] > 0 else "❌"
+        print(f"{status} {item['name']}: ${item['price']} - Còn {item['quantity']} phần")
+        shown += 1
+    print("=" * 50)
+    print(f"{shown} / {len(items)} món")
+
+
+# ==================== CLI ====================
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Quản lý inventory - Restaurant Agent",
+        epilog=(
+            "Ví dụ:\n"
+            "  python manage_inventory.py view --category drinks\n"
+            "  python manage_inventory.py update Pizza 50 'Pad Thai' +20 Cappuccino -5\n"
+            "  python manage_inventory.py restock drinks            # về mức par\n"
+            "  python manage_inventory.py import stock.csv --dry-run\n"
+            "  python manage_inventory.py export -o inventory.csv\n"
+            "  python manage_inventory.py reset -y"
+        ),
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--file", default=None, help=f"file inventory (mặc định INVENTORY_FILE: {INVENTORY_FILE})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    view = commands.add_parser("view", help="xem inventory")
+    view.add_argument("--category")
+    view.add_argument("--sold-out", action="store_true", help="chỉ món hết hàng")
+
+    update = commands.add_parser("update", help="cập nhật nhiều món, ghi một lần")
+    update.add_argument("pairs", nargs="+", metavar="TÊN SỐ", help="tên món và số lượng (50, +20, -5, par), lặp lại")
+    update.add_argument("--dry-run", action="store_true")
+
+    restock_cmd = commands.add_parser("restock", help="bổ sung hàng cho cả danh mục")
+    restock_cmd.add_argument("category", help="breakfast, main, drinks, desserts hoặc all")
+    restock_cmd.add_argument("quantity", nargs="?", default="par", help="50, +20 hoặc par (mặc định)")
+    restock_cmd.add_argument("--dry-run", action="store_true")
+
+    import_cmd = commands.add_parser("import", help="nhập CSV / JSON (cập nhật theo tên, thêm món mới)")
+    import_cmd.add_argument("source", help="file .csv / .json, '-' để đọc stdin")
+    import_cmd.add_argument("--format", choices=["csv", "json"])
+    import_cmd.add_argument("--replace", action="store_true", help="xóa các món không có trong file")
+    import_cmd.add_argument("--dry-run", action="store_true")
+
+    export = commands.add_parser("export", help="xuất CSV / JSON")
+    export.add_argument("-o", "--output", default="-", help="file (mặc định stdout)")
+    export.add_argument("--format", choices=["csv", "json"])
+
+    reset = commands.add_parser("reset", help="đưa số lượng về mức par (hoặc --quantity)")
+    reset.add_argument("--quantity", help="số lượng cho mọi món thay vì par")
+    reset.add_argument("--category")
+    reset.add_argument("-y", "--yes", action="store_true", help="không hỏi lại")
+    reset.add_argument("--dry-run", action="store_true")
+    return parser
+
+
+def run(args) -> None:
+    items = load_items(args.file)
+
+    if args.command == "view":
+        view_inventory(items, args.category, args.sold_out)
+
+    elif args.command == "update":
+        if len(args.pairs) % 2:
+            raise InventoryError("Thiếu số lượng. Sử dụng: update <tên> <số> [<tên> <số> ...]")
+        updates = list(zip(args.pairs[::2], args.pairs[1::2]))
+        new = apply_updates(items, updates)
+        relative = {resolve_key(items, name) for name, spec in updates if parse_quantity(spec)[0] == "add"}
+        commit(items, new, args.dry_run, args.file, relative, "manage_inventory update")
+
+    elif args.command == "restock":
+        category = None if args.category == "all" else args.category.lower()
+        relative = items.keys() if parse_quantity(args.quantity)[0] == "add" else ()
+        commit(items, restock(items, category, args.quantity), args.dry_run, args.file, relative,
+               "manage_inventory restock")
+
+    elif args.command == "import":
+        started = time.perf_counter()
+        rows = read_rows(args.source, args.format)
+        print(f"📥 {len(rows)} dòng từ {args.source} ({(time.perf_counter() - started) * 1000:.0f} ms)")
+        commit(items, merge_rows(items, rows, args.replace), args.dry_run, args.file,
+               source=f"manage_inventory import {os.path.basename(args.source)}")
+
+    elif args.command == "export":
+        fmt = args.format or ("json" if args.output.endswith(".json") else "csv")
+        if args.output == "-":
+            export_items(items, fmt, sys.stdout)
             return
-        
-        old_quantity = inventory[item_key]['quantity']
-        inventory[item_key]['quantity'] = new_quantity
-        
-        with open(INVENTORY_FILE, 'w', encoding='utf-8') as f:
-            json.dump(inventory, f, ensure_ascii=False, indent=2)
-        
-        print(f"✅ Đã cập nhật {inventory[item_key]['name']}: {old_quantity} → {new_quantity} phần")
-        view_inventory()
-        
-    except Exception as e:
-        print(f"❌ Lỗi khi cập nhật: {e}")
+        with open(args.output, "w", encoding="utf-8", newline="") as f:
+            export_items(items, fmt, f)
+        print(f"📤 Đã xuất {len(items)} món vào {args.output}")
+
+    elif args.command == "reset":
+        new = restock(items, args.category, args.quantity or "par")
+        if not args.dry_run and not args.yes:
+            confirm = input("⚠️  Bạn có chắc muốn reset inventory? (yes/no): ")
+            if confirm.lower() not in ["yes", "y"]:
+                print("❌ Đã hủy")
+                return
+        commit(items, new, args.dry_run, args.file, source="manage_inventory reset")
 
 
 def main():
+    parser = build_parser()
     if len(sys.argv) < 2:
-        print("\n🛠️  QUẢN LÝ INVENTORY - RESTAURANT AGENT")
-        print("=" * 50)
-        print("Sử dụng:")
-        print("  python manage_inventory.py view              - Xem inventory")
-        print("  python manage_inventory.py reset             - Reset về mặc định")
-        print("  python manage_inventory.py update <tên> <số> - Cập nhật số lượng")
-        print("\nVí dụ:")
-        print("  python manage_inventory.py view")
-        print("  python manage_inventory.py reset")
-        print("  python manage_inventory.py update Pizza 50")
-        print("=" * 50)
+        parser.print_help()
         return
-    
-    command = sys.argv[1].lower()
-    
-    if command == "view":
-        view_inventory()
-    
-    elif command == "reset":
-        confirm = input("⚠️  Bạn có chắc muốn reset inventory? (yes/no): ")
-        if confirm.lower() in ['yes', 'y']:
-            reset_inventory()
-        else:
-            print("❌ Đã hủy")
-    
-    elif command == "update":
-        if len(sys.argv) < 4:
-            print("❌ Thiếu tham số. Sử dụng: python manage_inventory.py update <tên> <số>")
-            return
-        
-        item_name = sys.argv[2]
-        try:
-            quantity = int(sys.argv[3])
-            if quantity < 0:
-                print("❌ Số lượng phải >= 0")
-                return
-            update_quantity(item_name, quantity)
-        except ValueError:
-            print("❌ Số lượng phải là số nguyên")
-    
-    else:
-        print(f"❌ Lệnh không hợp lệ: {command}")
-        print("Các lệnh có sẵn: view, reset, update")
+    args = parser.parse_args()
+    try:
+        run(args)
+    except InventoryError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
 
 
 if __name__ == "__main__":
     main()
-
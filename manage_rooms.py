@@ -5,169 +5,376 @@ Quản lý rooms và cleanup để tránh conflict khi tạo room cùng tên
 """
 
 import asyncio
+import logging
 import os
 import sys
+import time
+from types import SimpleNamespace
+
+import aiohttp
 from dotenv import load_dotenv
 from livekit import api
 
+from room_janitor import JanitorPolicy, RoomJanitor
+
 load_dotenv()
 
+# Số request đồng thời tối đa gửi tới LiveKit (tránh bị rate-limit)
+DEFAULT_CONCURRENCY = 16
+
+
 class RoomManager:
-    def __init__(self):
+    def __init__(self, concurrency: int = DEFAULT_CONCURRENCY, index_url: str = None):
         self.livekit_url = os.getenv("LIVEKIT_URL")
         self.api_key = os.getenv("LIVEKIT_API_KEY")
         self.api_secret = os.getenv("LIVEKIT_API_SECRET")
-        
+
         if not all([self.livekit_url, self.api_key, self.api_secret]):
             raise ValueError("Missing LiveKit credentials in .env file")
-    
-    async def list_rooms(self):
-        """List all active rooms"""
-        lkapi = api.LiveKitAPI(
-            self.livekit_url,
-            self.api_key,
-            self.api_secret,
+
+        self.concurrency = max(1, concurrency)
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._lkapi = None
+        # Token server base URL: read rooms from its webhook index instead of polling LiveKit
+        self.index_url = index_url or os.getenv("ROOM_INDEX_URL")
+
+    @property
+    def lkapi(self) -> api.LiveKitAPI:
+        """Shared LiveKit API client (created lazily, reused by every call)"""
+        if self._lkapi is None:
+            self._lkapi = api.LiveKitAPI(
+                self.livekit_url,
+                self.api_key,
+                self.api_secret,
+            )
+        return self._lkapi
+
+    async def aclose(self):
+        """Close the shared client"""
+        if self._lkapi is not None:
+            await self._lkapi.aclose()
+            self._lkapi = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def _bounded(self, coro):
+        """Run a coroutine while holding the concurrency semaphore"""
+        async with self._semaphore:
+            return await coro
+
+    async def fetch_rooms(self, prefix: str = None, min_age: float = None,
+                          max_participants: int = None) -> list:
+        """Fetch active rooms (no printing), optionally filtered"""
+        if self.index_url:
+            rooms = await self.fetch_rooms_from_index()
+        else:
+            rooms = (await self.lkapi.room.list_rooms(api.ListRoomsRequest())).rooms
+        return filter_rooms(
+            rooms,
+            prefix=prefix,
+            min_age=min_age,
+            max_participants=max_participants,
         )
-        
+
+    async def fetch_rooms_from_index(self) -> list:
+        """Read rooms from the token server's webhook index (GET /api/rooms)"""
+        url = f"{self.index_url.rstrip('/')}/api/rooms"
+        # ssl=False: the token server uses a self-signed certificate
+        async with aiohttp.ClientSession() as session:
+            async with session.get(url, ssl=False) as response:
+                response.raise_for_status()
+                data = await response.json()
+
+        return [
+            SimpleNamespace(
+                name=room["name"],
+                sid=room["sid"],
+                num_participants=room["num_participants"],
+                creation_time=int(room["created_at"]),
+                empty_timeout="?",
+            )
+            for room in data["rooms"]
+        ]
+
+    async def list_rooms(self, prefix: str = None, min_age: float = None,
+                         max_participants: int = None):
+        """List all active rooms"""
         try:
-            rooms = await lkapi.room.list_rooms(api.ListRoomsRequest())
-            
-            if not rooms.rooms:
+            rooms = await self.fetch_rooms(prefix, min_age, max_participants)
+
+            if not rooms:
                 print("📋 No active rooms")
                 return []
-            
-            print(f"\n📋 Active Rooms ({len(rooms.rooms)}):")
+
+            print(f"\n📋 Active Rooms ({len(rooms)}):")
             print("="*70)
-            
-            for room in rooms.rooms:
+
+            for room in rooms:
                 print(f"\n🏠 Room: {room.name}")
                 print(f"   SID: {room.sid}")
                 print(f"   👥 Participants: {room.num_participants}")
-                print(f"   📅 Created: {room.creation_time}")
+                print(f"   📅 Created: {room.creation_time} ({room_age(room):.0f}s ago)")
                 print(f"   🔴 Empty timeout: {room.empty_timeout}s")
-            
+
             print("\n" + "="*70)
-            
-            await lkapi.aclose()
-            return rooms.rooms
+
+            return rooms
         except Exception as e:
             print(f"❌ Error listing rooms: {e}")
-            await lkapi.aclose()
             return []
-    
-    async def delete_room(self, room_name: str):
+
+    async def delete_room(self, room_name: str, quiet: bool = False):
         """Delete a specific room"""
-        lkapi = api.LiveKitAPI(
-            self.livekit_url,
-            self.api_key,
-            self.api_secret,
-        )
-        
         try:
-            await lkapi.room.delete_room(api.DeleteRoomRequest(room=room_name))
-            print(f"✅ Room '{room_name}' deleted successfully")
-            await lkapi.aclose()
+            await self._bounded(
+                self.lkapi.room.delete_room(api.DeleteRoomRequest(room=room_name))
+            )
+            if not quiet:
+                print(f"✅ Room '{room_name}' deleted successfully")
             return True
         except Exception as e:
             print(f"❌ Error deleting room '{room_name}': {e}")
-            await lkapi.aclose()
             return False
-    
-    async def delete_all_rooms(self):
-        """Delete all active rooms"""
-        rooms = await self.list_rooms()
-        
+
+    async def delete_rooms(self, room_names: list[str]) -> dict:
+        """
+        Delete many rooms concurrently (bounded by the semaphore).
+        Returns a timing report: {deleted, failed, elapsed, rooms_per_sec}
+        """
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *(self.delete_room(name, quiet=True) for name in room_names)
+        )
+        elapsed = time.perf_counter() - start
+
+        deleted = sum(1 for ok in results if ok)
+        return {
+            "deleted": deleted,
+            "failed": len(results) - deleted,
+            "elapsed": elapsed,
+            "rooms_per_sec": len(results) / elapsed if elapsed > 0 else 0.0,
+        }
+
+    async def delete_all_rooms(self, prefix: str = None, min_age: float = None,
+                               max_participants: int = None, assume_yes: bool = False):
+        """Delete all active rooms (matching the filters)"""
+        rooms = await self.list_rooms(prefix, min_age, max_participants)
+
         if not rooms:
             print("No rooms to delete")
             return
-        
+
         print(f"\n⚠️  About to delete {len(rooms)} room(s)")
-        confirm = input("Type 'yes' to confirm: ")
-        
-        if confirm.lower() != 'yes':
-            print("Cancelled")
-            return
-        
-        lkapi = api.LiveKitAPI(
-            self.livekit_url,
-            self.api_key,
-            self.api_secret,
+        if not assume_yes:
+            confirm = input("Type 'yes' to confirm: ")
+
+            if confirm.lower() != 'yes':
+                print("Cancelled")
+                return
+
+        report = await self.delete_rooms([room.name for room in rooms])
+        print_timing_report("Deleted", report["deleted"], report)
+
+        if report["failed"]:
+            print(f"⚠️  {report['failed']} room(s) failed to delete")
+        print("\n✅ Cleanup complete!")
+
+    async def fetch_participants(self, room_name: str) -> list:
+        """Fetch participants of a room (no printing)"""
+        response = await self._bounded(
+            self.lkapi.room.list_participants(
+                api.ListParticipantsRequest(room=room_name)
+            )
         )
-        
-        for room in rooms:
+        return list(response.participants)
+
+    async def fetch_participants_many(self, room_names: list[str]) -> dict:
+        """Fetch participants of many rooms concurrently: {room_name: [participants]}"""
+        async def fetch_one(name):
             try:
-                await lkapi.room.delete_room(api.DeleteRoomRequest(room=room.name))
-                print(f"✅ Deleted room: {room.name}")
+                return name, await self.fetch_participants(name)
             except Exception as e:
-                print(f"❌ Failed to delete {room.name}: {e}")
-        
-        await lkapi.aclose()
-        print("\n✅ Cleanup complete!")
-    
+                print(f"❌ Error listing participants of '{name}': {e}")
+                return name, []
+
+        results = await asyncio.gather(*(fetch_one(name) for name in room_names))
+        return dict(results)
+
     async def list_participants(self, room_name: str):
         """List participants in a specific room"""
-        lkapi = api.LiveKitAPI(
-            self.livekit_url,
-            self.api_key,
-            self.api_secret,
-        )
-        
         try:
-            participants = await lkapi.room.list_participants(
-                api.ListParticipantsRequest(room=room_name)
-            )
-            
-            if not participants.participants:
+            participants = await self.fetch_participants(room_name)
+
+            if not participants:
                 print(f"📋 No participants in room '{room_name}'")
-                await lkapi.aclose()
                 return []
-            
+
             print(f"\n👥 Participants in '{room_name}':")
             print("="*70)
-            
-            for p in participants.participants:
-                print(f"\n👤 Identity: {p.identity}")
-                print(f"   Name: {p.name}")
-                print(f"   SID: {p.sid}")
-                print(f"   State: {p.state}")
-                print(f"   Is agent: {p.is_publisher and 'agent' in p.identity.lower()}")
-            
+
+            for p in participants:
+                print_participant(p)
+
             print("\n" + "="*70)
-            
-            await lkapi.aclose()
-            return participants.participants
+
+            return participants
         except Exception as e:
             print(f"❌ Error listing participants: {e}")
-            await lkapi.aclose()
             return []
-    
+
+    async def list_all_participants(self, prefix: str = None, min_age: float = None,
+                                    max_participants: int = None):
+        """List participants of every (filtered) room, fetched concurrently"""
+        try:
+            rooms = await self.fetch_rooms(prefix, min_age, max_participants)
+        except Exception as e:
+            print(f"❌ Error listing rooms: {e}")
+            return {}
+
+        if not rooms:
+            print("📋 No active rooms")
+            return {}
+
+        start = time.perf_counter()
+        by_room = await self.fetch_participants_many([room.name for room in rooms])
+        elapsed = time.perf_counter() - start
+
+        for room_name, participants in by_room.items():
+            print(f"\n🏠 Room: {room_name} ({len(participants)} participant(s))")
+            for p in participants:
+                print_participant(p)
+
+        print("\n" + "="*70)
+        print_timing_report("Scanned", len(by_room), {
+            "elapsed": elapsed,
+            "rooms_per_sec": len(by_room) / elapsed if elapsed > 0 else 0.0,
+        })
+        return by_room
+
     async def remove_participant(self, room_name: str, participant_identity: str):
         """Remove a specific participant from room"""
-        lkapi = api.LiveKitAPI(
-            self.livekit_url,
-            self.api_key,
-            self.api_secret,
-        )
-        
         try:
-            await lkapi.room.remove_participant(
-                api.RoomParticipantIdentity(
-                    room=room_name,
-                    identity=participant_identity
+            await self._bounded(
+                self.lkapi.room.remove_participant(
+                    api.RoomParticipantIdentity(
+                        room=room_name,
+                        identity=participant_identity
+                    )
                 )
             )
             print(f"✅ Removed participant '{participant_identity}' from room '{room_name}'")
-            await lkapi.aclose()
             return True
         except Exception as e:
             print(f"❌ Error removing participant: {e}")
-            await lkapi.aclose()
             return False
 
+    async def watch(self, policy: JanitorPolicy):
+        """Run the room janitor in the foreground (Ctrl+C to stop)"""
+        janitor = RoomJanitor(self.lkapi, policy)
+        print(f"🧹 Watching rooms every {policy.interval:.0f}s "
+              f"(empty > {policy.empty_grace:.0f}s, agent-only > {policy.agent_only_grace:.0f}s"
+              f"{', dry-run' if policy.dry_run else ''})")
+        try:
+            await janitor.run()
+        finally:
+            print(f"\n📊 Janitor metrics: {janitor.metrics.snapshot()}")
+
+
+def room_age(room, now: float = None) -> float:
+    """Seconds since the room was created"""
+    now = time.time() if now is None else now
+    return max(0.0, now - room.creation_time)
+
+
+def filter_rooms(rooms, prefix: str = None, min_age: float = None,
+                 max_participants: int = None, now: float = None) -> list:
+    """Filter rooms by name prefix, minimum age (seconds) and participant count"""
+    now = time.time() if now is None else now
+    selected = []
+    for room in rooms:
+        if prefix and not room.name.startswith(prefix):
+            continue
+        if min_age is not None and room_age(room, now) < min_age:
+            continue
+        if max_participants is not None and room.num_participants > max_participants:
+            continue
+        selected.append(room)
+    return selected
+
+
+def print_participant(p):
+    print(f"\n👤 Identity: {p.identity}")
+    print(f"   Name: {p.name}")
+    print(f"   SID: {p.sid}")
+    print(f"   State: {p.state}")
+    print(f"   Is agent: {p.is_publisher and 'agent' in p.identity.lower()}")
+
+
+def print_timing_report(action: str, count: int, report: dict):
+    print(f"\n⏱️  {action} {count} room(s) in {report['elapsed']:.2f}s "
+          f"({report['rooms_per_sec']:.1f} rooms/s)")
+
+
+def parse_duration(value: str) -> float:
+    """Parse '90', '90s', '15m', '2h', '1d' into seconds"""
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    value = value.strip().lower()
+    if value and value[-1] in units:
+        return float(value[:-1]) * units[value[-1]]
+    return float(value)
+
+
+def parse_options(args: list[str]) -> tuple[list[str], dict]:
+    """Split CLI args into positional arguments and --options"""
+    positional = []
+    options = {
+        "prefix": None,
+        "min_age": None,
+        "max_participants": None,
+        "assume_yes": False,
+        "dry_run": False,
+        "interval": None,
+        "index_url": None,
+        "concurrency": None,  # RoomManager: DEFAULT_CONCURRENCY, watch: ROOM_JANITOR_CONCURRENCY
+    }
+
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg in ("--yes", "-y"):
+            options["assume_yes"] = True
+        elif arg == "--dry-run":
+            options["dry_run"] = True
+        elif arg in ("--prefix", "--older-than", "--max-participants", "--concurrency", "--interval",
+                     "--index-url"):
+            if i + 1 >= len(args):
+                raise ValueError(f"Missing value for {arg}")
+            value = args[i + 1]
+            if arg == "--prefix":
+                options["prefix"] = value
+            elif arg == "--older-than":
+                options["min_age"] = parse_duration(value)
+            elif arg == "--max-participants":
+                options["max_participants"] = int(value)
+            elif arg == "--interval":
+                options["interval"] = parse_duration(value)
+            elif arg == "--index-url":
+                options["index_url"] = value
+            else:
+                options["concurrency"] = int(value)
+            i += 1
+        else:
+            positional.append(arg)
+        i += 1
+
+    return positional, options
+
 
 async def main():
-    manager = RoomManager()
-    
     if len(sys.argv) < 2:
         print("""
 ╔═══════════════════════════════════════════════════════════════╗
@@ -175,60 +382,111 @@ async def main():
 ╚═══════════════════════════════════════════════════════════════╝
 
 Usage:
-    python3 manage_rooms.py <command> [arguments]
+    python3 manage_rooms.py <command> [arguments] [options]
 
 Commands:
     list                           - List all active rooms
     delete <room_name>             - Delete a specific room
     delete-all                     - Delete all active rooms
     participants <room_name>       - List participants in a room
+    participants-all               - List participants of all rooms
     remove <room_name> <identity>  - Remove participant from room
+    watch                          - Run the room janitor (auto-delete empty /
+                                     agent-only rooms, see ROOM_JANITOR_* in .env)
+
+Options (list / delete-all / participants-all):
+    --prefix <text>                - Only rooms whose name starts with <text>
+    --older-than <age>             - Only rooms older than <age> (90s, 15m, 2h, 1d)
+    --max-participants <n>         - Only rooms with at most <n> participants
+    --concurrency <n>              - Parallel LiveKit requests (default: 16)
+    --index-url <url>              - Read rooms from the token server webhook index
+                                     instead of polling LiveKit (or ROOM_INDEX_URL)
+    --yes, -y                      - Skip confirmation (non-interactive bulk mode)
+
+Options (watch):
+    --interval <age>               - Time between sweeps (default: 60s)
+    --prefix <text>                - Only manage rooms whose name starts with <text>
+    --dry-run                      - Only log what would be deleted
+    --concurrency <n>              - Parallel deletes (default: ROOM_JANITOR_CONCURRENCY or 8)
 
 Examples:
     python3 manage_rooms.py list
     python3 manage_rooms.py delete my-old-room
     python3 manage_rooms.py delete-all
+    python3 manage_rooms.py delete-all --prefix restaurant- --older-than 2h --yes
+    python3 manage_rooms.py delete-all --max-participants 0 --yes
+    python3 manage_rooms.py list --index-url https://localhost:8089
     python3 manage_rooms.py participants test-room
     python3 manage_rooms.py remove test-room agent-bot-123
+    python3 manage_rooms.py watch --interval 30s --prefix restaurant-
 
 💡 Tip: Delete old rooms before creating new ones with the same name
         to avoid bot conflicts!
 """)
         return
-    
+
     command = sys.argv[1].lower()
-    
-    if command == "list":
-        await manager.list_rooms()
-    
-    elif command == "delete":
-        if len(sys.argv) < 3:
-            print("❌ Usage: python3 manage_rooms.py delete <room_name>")
-            return
-        room_name = sys.argv[2]
-        await manager.delete_room(room_name)
-    
-    elif command == "delete-all":
-        await manager.delete_all_rooms()
-    
-    elif command == "participants":
-        if len(sys.argv) < 3:
-            print("❌ Usage: python3 manage_rooms.py participants <room_name>")
-            return
-        room_name = sys.argv[2]
-        await manager.list_participants(room_name)
-    
-    elif command == "remove":
-        if len(sys.argv) < 4:
-            print("❌ Usage: python3 manage_rooms.py remove <room_name> <identity>")
-            return
-        room_name = sys.argv[2]
-        identity = sys.argv[3]
-        await manager.remove_participant(room_name, identity)
-    
-    else:
-        print(f"❌ Unknown command: {command}")
-        print("Run without arguments to see available commands")
+    try:
+        args, options = parse_options(sys.argv[2:])
+    except ValueError as e:
+        print(f"❌ {e}")
+        return
+
+    filters = {
+        "prefix": options["prefix"],
+        "min_age": options["min_age"],
+        "max_participants": options["max_participants"],
+    }
+
+    concurrency = options["concurrency"] if options["concurrency"] is not None else DEFAULT_CONCURRENCY
+    async with RoomManager(concurrency=concurrency, index_url=options["index_url"]) as manager:
+        if command == "list":
+            await manager.list_rooms(**filters)
+
+        elif command == "delete":
+            if len(args) < 1:
+                print("❌ Usage: python3 manage_rooms.py delete <room_name>")
+                return
+            room_name = args[0]
+            await manager.delete_room(room_name)
+
+        elif command == "delete-all":
+            await manager.delete_all_rooms(**filters, assume_yes=options["assume_yes"])
+
+        elif command == "participants":
+            if len(args) < 1:
+                print("❌ Usage: python3 manage_rooms.py participants <room_name>")
+                return
+            room_name = args[0]
+            await manager.list_participants(room_name)
+
+        elif command == "participants-all":
+            await manager.list_all_participants(**filters)
+
+        elif command == "remove":
+            if len(args) < 2:
+                print("❌ Usage: python3 manage_rooms.py remove <room_name> <identity>")
+                return
+            room_name = args[0]
+            identity = args[1]
+            await manager.remove_participant(room_name, identity)
+
+        elif command == "watch":
+            logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+            policy = JanitorPolicy.from_env()
+            if options["interval"] is not None:
+                policy.interval = options["interval"]
+            if options["prefix"]:
+                policy.room_prefix = options["prefix"]
+            if options["dry_run"]:
+                policy.dry_run = True
+            if options["concurrency"] is not None:
+                policy.concurrency = options["concurrency"]
+            await manager.watch(policy)
+
+        else:
+            print(f"❌ Unknown command: {command}")
+            print("Run without arguments to see available commands")
 
 
 if __name__ == "__main__":
@@ -238,4 +496,3 @@ if __name__ == "__main__":
         print("\n👋 Cancelled")
     except Exception as e:
         print(f"❌ Error: {e}")
-
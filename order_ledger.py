@@ -0,0 +1,518 @@
+#!/usr/bin/env python3
+"""
+Sổ đơn hàng (append-only) + thống kê bán hàng
+- confirm_checkout ghi mỗi món của đơn thành một record 32 byte, confirm_reservation ghi một record
+  đặt bàn, vào ORDER_LEDGER_FILE (thread nền, mỗi đơn một lần write O_APPEND: nhiều job process ghi chung)
+- Tên món nằm ở file .items bên cạnh (id = crc32 của tên đã chuẩn hóa, không cần khóa giữa các process)
+- Thống kê bằng NumPy trên memmap: theo món, theo giờ, theo ngày, trong khoảng thời gian bất kỳ
+- Rollup theo giờ được cache (.rollup.npz) và cập nhật tăng dần: lần chạy sau chỉ đọc record mới
+
+    python order_ledger.py report --from 11:00 --to 13:00          # hôm nay, theo món
+    python order_ledger.py report --by hour --from 2026-10-01
+    python order_ledger.py report --by day --json
+    python order_ledger.py tail -n 20
+
+Đo với hàng triệu record:  python tools/bench_order_ledger.py
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import zlib
+from datetime import datetime, timedelta
+from typing import Optional
+
+import numpy as np
+
+from agent_logging import fields
+from inventory import find_inventory_key, normalize_item_name
+
+logger = logging.getLogger("restaurant-bot")
+
+ORDER_LEDGER_FILE = os.getenv(
+    "ORDER_LEDGER_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "orders.ledger")
+)
+
+MAGIC = b"SYLEDGR1"
+VERSION = 1
+HEADER_SIZE = 32
+
+CHECKOUT = 0
+RESERVATION = 1
+
+RECORD = np.dtype([
+    ("ts", "<f8"),      # unix time of the checkout / reservation confirmation
+    ("order", "<u8"),   # id shared by the lines of one order
+    ("item", "<u4"),    # crc32 of the normalized item name (0 for reservations)
+    ("amount", "<f4"),  # line amount in USD (price x qty)
+    ("qty", "<u4"),     # quantity; party size for reservations (0 = unknown)
+    ("kind", "u1"),     # CHECKOUT / RESERVATION
+    ("_pad", "V3"),
+])
+assert RECORD.itemsize == 32
+
+DENSE_LIMIT = 20_000_000  # bins; larger key spans are grouped with np.unique instead of bincount
+
+
+def item_id(name: str) -> int:
+    return zlib.crc32(normalize_item_name(name).encode("utf-8")) or 1
+
+
+def _header() -> bytes:
+    return MAGIC + np.array([VERSION, RECORD.itemsize], dtype="<u4").tobytes() + bytes(HEADER_SIZE - 16)
+
+
+class OrderLedger:
+    """
+    Writer side, one per process. Every append is a single os.write on an O_APPEND fd,
+    so records of concurrent job processes never interleave.
+    """
+
+    def __init__(self, path: str = ORDER_LEDGER_FILE) -> None:
+        self.path = path
+        self.items_path = f"{path}.items"
+        self._known_items: set[int] = set()
+        self._fd: Optional[int] = None
+        self._items_fd: Optional[int] = None
+
+    def _open(self) -> int:
+        if self._fd is None:
+            if not os.path.exists(self.path):
+                create_ledger(self.path)
+            check_header(self.path)
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND)
+            self._items_fd = os.open(self.items_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            self._known_items = set(read_item_names(self.items_path))
+        return self._fd
+
+    def _register_items(self, names: dict[int, str]) -> None:
+        new = {iid: name for iid, name in names.items() if iid not in self._known_items}
+        if new:
+            lines = "".join(f"{iid}\t{name}\n" for iid, name in new.items())
+            os.write(self._items_fd, lines.encode("utf-8"))  # duplicates across processes are harmless
+            self._known_items.update(new)
+
+    def append(self, records: np.ndarray, names: Optional[dict[int, str]] = None) -> None:
+        fd = self._open()
+        if names:
+            self._register_items(names)  # before the records: readers always find the name
+        os.write(fd, records.tobytes())
+
+    def append_checkout(self, order: dict[str, int], inventory: dict, ts: Optional[float] = None) -> int:
+        """Lines of a confirmed order; prices come from the inventory. Returns the order id"""
+        ts = ts or time.time()
+        order_id = new_order_id(ts)
+        records = np.zeros(len(order), dtype=RECORD)
+        names = {}
+        for row, (item_name, quantity) in enumerate(order.items()):
+            key = find_inventory_key(item_name, inventory)
+            entry = inventory.get(key) if key else None
+            display = entry["name"] if entry else item_name
+            iid = item_id(display)
+            names[iid] = display
+            records[row] = (ts, order_id, iid, (entry["price"] if entry else 0.0) * quantity, quantity,
+                            CHECKOUT, b"")
+        self.append(records, names)
+        logger.info("📒 Order recorded", extra=fields(order_id=order_id, lines=len(records),
+                                                     amount=round(float(records["amount"].sum()), 2)))
+        return order_id
+
+    def append_reservation(self, party_size: int = 0, ts: Optional[float] = None) -> int:
+        ts = ts or time.time()
+        order_id = new_order_id(ts)
+        records = np.zeros(1, dtype=RECORD)
+        records[0] = (ts, order_id, 0, 0.0, party_size, RESERVATION, b"")
+        self.append(records)
+        logger.info("📒 Reservation recorded", extra=fields(order_id=order_id, party_size=party_size))
+        return order_id
+
+    def close(self) -> None:
+        for fd in (self._fd, self._items_fd):
+            if fd is not None:
+                os.close(fd)
+        self._fd = self._items_fd = None
+
+
+_ledger: Optional[OrderLedger] = None
+
+
+def get_ledger() -> OrderLedger:
+    """Process-wide writer; appends run on the "ledger" queue of drain.pending_work (one thread)"""
+    global _ledger
+    if _ledger is None:
+        _ledger = OrderLedger()
+    return _ledger
+
+
+def new_order_id(ts: float) -> int:
+    """Milliseconds (upper 42 bits) + random bits: unique across processes without coordination"""
+    return (int(ts * 1000) << 22) | int.from_bytes(os.urandom(3), "little") & 0x3FFFFF
+
+
+def create_ledger(path: str) -> None:
+    """Header written to a temp file and linked in place: concurrent creators never see a partial header"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".ledger-")
+    try:
+        os.write(fd, _header())
+        os.close(fd)
+        os.chmod(tmp, 0o644)
+        try:
+            os.link(tmp, path)
+        except FileExistsError:
+            pass
+    finally:
+        os.unlink(tmp)
+
+
+def check_header(path: str) -> None:
+    with open(path, "rb") as f:
+        header = f.read(HEADER_SIZE)
+    if header[:8] != MAGIC:
+        raise ValueError(f"{path} is not an order ledger")
+    version, itemsize = np.frombuffer(header[8:16], dtype="<u4")
+    if version != VERSION or itemsize != RECORD.itemsize:
+        raise ValueError(f"{path}: ledger version {version} / record size {itemsize} not supported")
+
+
+def read_records(path: str = ORDER_LEDGER_FILE, start: int = 0) -> np.ndarray:
+    """Records from index start on (memmap, no copy); a record being written is not included"""
+    if not os.path.exists(path):
+        return np.zeros(0, dtype=RECORD)
+    check_header(path)
+    count = (os.path.getsize(path) - HEADER_SIZE) // RECORD.itemsize
+    if count <= start:
+        return np.zeros(0, dtype=RECORD)
+    return np.memmap(path, dtype=RECORD, mode="r", offset=HEADER_SIZE + start * RECORD.itemsize,
+                     shape=(count - start,))
+
+
+def read_item_names(path: str) -> dict[int, str]:
+    names = {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                iid, _, name = line.rstrip("\n").partition("\t")
+                if name:
+                    names[int(iid)] = name
+    except FileNotFoundError:
+        pass
+    return names
+
+
+# ---------- aggregation ----------
+def group_sum(keys: np.ndarray, *weights: np.ndarray) -> tuple[np.ndarray, ...]:
+    """Unique keys (sorted) and the sum of every weight per key"""
+    if not len(keys):
+        return (keys[:0],) + tuple(np.zeros(0) for _ in weights)
+    low, high = int(keys.min()), int(keys.max())
+    if high - low < DENSE_LIMIT:
+        offsets = keys - low
+        counts = np.bincount(offsets)
+        present = np.flatnonzero(counts)
+        sums = tuple(np.bincount(offsets, weights=w, minlength=len(counts))[present] for w in weights)
+        return (present + low,) + sums
+    unique, inverse = np.unique(keys, return_inverse=True)
+    return (unique,) + tuple(np.bincount(inverse, weights=w, minlength=len(unique)) for w in weights)
+
+
+class Rollup:
+    """
+    Hourly sums (UTC hour buckets): per (hour, item) quantity and amount of checkout lines,
+    per hour the number of orders, reservations, guests and revenue
+    """
+
+    def __init__(self) -> None:
+        self.covered = 0  # ledger records included
+        self.item_hour = np.zeros(0, dtype=np.int64)
+        self.item_id = np.zeros(0, dtype=np.uint32)
+        self.item_qty = np.zeros(0)
+        self.item_amount = np.zeros(0)
+        self.hour = np.zeros(0, dtype=np.int64)
+        self.orders = np.zeros(0)
+        self.reservations = np.zeros(0)
+        self.guests = np.zeros(0)
+        self.revenue = np.zeros(0)
+
+    @classmethod
+    def from_records(cls, records: np.ndarray, covered: int = 0, shift: float = 0.0,
+                     known_items: Optional[np.ndarray] = None, previous_order: int = 0) -> "Rollup":
+        """
+        shift (seconds) is added to ts first: hour buckets of another time zone.
+        previous_order: order id of the record before these (an order cut by a concurrent read).
+        known_items (sorted ids of the .items file) lets items be indexed with searchsorted
+        instead of sorting every record.
+        """
+        rollup = cls()
+        rollup.covered = covered + len(records)
+        if not len(records):
+            return rollup
+        kind = np.asarray(records["kind"])
+        qty = records["qty"].astype(np.float64)  # contiguous copies: bincount weights
+        amount = records["amount"].astype(np.float64)  # 0 on reservation rows
+        hours = (records["ts"] + shift).astype(np.int64) // 3600
+        checkout = kind == CHECKOUT
+
+        # Item x hour over all rows (cheaper than masking every column); other kinds go to slot n, dropped
+        items = np.asarray(records["item"])
+        if checkout.any():
+            universe = known_items if known_items is not None and len(known_items) else np.unique(items[checkout])
+            index = np.minimum(np.searchsorted(universe, items), len(universe) - 1)
+            if ((universe[index] != items) & checkout).any():  # an id missing from the .items file
+                universe = np.unique(items[checkout])
+                index = np.minimum(np.searchsorted(universe, items), len(universe) - 1)
+            slots = len(universe) + 1
+            index[~checkout] = len(universe)
+            first_hour = int(hours.min())
+            keys, item_qty, item_amount = group_sum((hours - first_hour) * slots + index, qty, amount)
+            keep = keys % slots != len(universe)
+            keys = keys[keep]
+            rollup.item_hour = keys // slots + first_hour
+            rollup.item_id = universe[keys % slots].astype(np.uint32)
+            rollup.item_qty, rollup.item_amount = item_qty[keep], item_amount[keep]
+
+        # All lines of an order share ts and are written together: count one per order
+        order = np.asarray(records["order"])
+        first_line = checkout.copy()
+        first_line[1:] &= order[1:] != order[:-1]
+        first_line[0] &= int(order[0]) != previous_order
+        reservation = kind == RESERVATION
+        rollup.hour, rollup.orders, rollup.reservations, rollup.guests, rollup.revenue = group_sum(
+            hours, first_line, reservation, np.where(reservation, qty, 0), amount,
+        )
+        return rollup
+
+    def merge(self, other: "Rollup") -> "Rollup":
+        merged = Rollup()
+        merged.covered = other.covered
+        keys, merged.item_qty, merged.item_amount = group_sum(
+            np.concatenate([(self.item_hour << 32) | self.item_id, (other.item_hour << 32) | other.item_id]),
+            np.concatenate([self.item_qty, other.item_qty]), np.concatenate([self.item_amount, other.item_amount]),
+        )
+        merged.item_hour, merged.item_id = keys >> 32, (keys & 0xFFFFFFFF).astype(np.uint32)
+        merged.hour, merged.orders, merged.reservations, merged.guests, merged.revenue = group_sum(
+            np.concatenate([self.hour, other.hour]),
+            *(np.concatenate([getattr(self, name), getattr(other, name)])
+              for name in ("orders", "reservations", "guests", "revenue")),
+        )
+        return merged
+
+    ARRAYS = ("item_hour", "item_id", "item_qty", "item_amount", "hour", "orders", "reservations", "guests", "revenue")
+
+    def save(self, path: str) -> None:
+        tmp = f"{path}.tmp.npz"
+        np.savez(tmp, covered=self.covered, version=VERSION,
+                 **{name: getattr(self, name) for name in self.ARRAYS})
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["Rollup"]:
+        try:
+            with np.load(path) as data:
+                if int(data["version"]) != VERSION:
+                    return None
+                rollup = cls()
+                rollup.covered = int(data["covered"])
+                for name in cls.ARRAYS:
+                    setattr(rollup, name, data[name])
+                return rollup
+        except (OSError, KeyError, ValueError):
+            return None
+
+
+def rollup_path(path: str) -> str:
+    return f"{path}.rollup.npz"
+
+
+def known_item_ids(path: str = ORDER_LEDGER_FILE) -> np.ndarray:
+    return np.array(sorted(read_item_names(f"{path}.items")), dtype=np.uint32)
+
+
+def cached_rollup(path: str = ORDER_LEDGER_FILE, save: bool = True) -> Rollup:
+    """Cached hourly rollup brought up to date with the records appended since"""
+    cache = Rollup.load(rollup_path(path))
+    total = (os.path.getsize(path) - HEADER_SIZE) // RECORD.itemsize if os.path.exists(path) else 0
+    if cache is None or cache.covered > total:  # no cache, or the ledger was replaced
+        cache = Rollup()
+    if cache.covered == total:
+        return cache
+    records = read_records(path, max(cache.covered - 1, 0))
+    previous_order = 0
+    if cache.covered:
+        previous_order, records = int(records[0]["order"]), records[1:]
+    rollup = cache.merge(Rollup.from_records(records, cache.covered, known_items=known_item_ids(path),
+                                             previous_order=previous_order))
+    if save:
+        try:
+            rollup.save(rollup_path(path))
+        except OSError as e:
+            logger.warning(f"⚠️ Could not write rollup cache: {e}")
+    return rollup
+
+
+# ---------- reports ----------
+def utc_offset_hours() -> float:
+    return time.localtime().tm_gmtoff / 3600
+
+
+def report(path: str = ORDER_LEDGER_FILE, by: str = "item", start: Optional[float] = None,
+           end: Optional[float] = None, offset_hours: Optional[float] = None, use_cache: bool = True) -> list[dict]:
+    """
+    Rows grouped by item / hour (of day) / day for start <= ts < end (local time = UTC + offset_hours).
+    The hourly cache answers whole-hour ranges; other ranges scan the ledger.
+    """
+    offset_hours = utc_offset_hours() if offset_hours is None else offset_hours
+    aligned = all(bound is None or bound % 3600 == 0 for bound in (start, end)) and float(offset_hours).is_integer()
+    names = read_item_names(f"{path}.items")
+    if use_cache and aligned:
+        rollup = cached_rollup(path)
+    else:
+        records = read_records(path)
+        if start is not None or end is not None:
+            ts = records["ts"]
+            mask = np.ones(len(records), dtype=bool)
+            if start is not None:
+                mask &= ts >= start
+            if end is not None:
+                mask &= ts < end
+            records = records[mask]
+        # Buckets already in local time
+        rollup = Rollup.from_records(records, shift=offset_hours * 3600,
+                                     known_items=np.array(sorted(names), dtype=np.uint32))
+        return _rows(rollup, by, None, None, 0, names)
+    return _rows(rollup, by, start, end, int(offset_hours), names)
+
+
+def _rows(rollup: Rollup, by: str, start: Optional[float], end: Optional[float], offset_hours: int,
+          names: dict[int, str]) -> list[dict]:
+    def in_range(hours: np.ndarray) -> np.ndarray:
+        mask = np.ones(len(hours), dtype=bool)
+        if start is not None:
+            mask &= hours >= int(start // 3600)
+        if end is not None:
+            mask &= hours < int(end // 3600)
+        return mask
+
+    if by == "item":
+        mask = in_range(rollup.item_hour)
+        items, qty, amount = group_sum(rollup.item_id[mask].astype(np.int64), rollup.item_qty[mask],
+                                       rollup.item_amount[mask])
+        rows = [{"item": names.get(int(iid), f"#{iid}"), "qty": int(q), "amount": round(float(a), 2)}
+                for iid, q, a in zip(items, qty, amount)]
+        return sorted(rows, key=lambda row: (-row["qty"], row["item"]))
+
+    mask = in_range(rollup.hour)
+    local_hours = (rollup.hour[mask] + offset_hours) * 3600
+    if by == "hour":
+        keys = (local_hours // 3600) % 24
+    elif by == "day":
+        keys = local_hours // 86400
+    else:
+        raise ValueError(f"unknown grouping: {by}")
+    keys, orders, reservations, guests, revenue = group_sum(
+        keys, rollup.orders[mask], rollup.reservations[mask], rollup.guests[mask], rollup.revenue[mask]
+    )
+    rows = []
+    for key, o, r, g, rev in zip(keys, orders, reservations, guests, revenue):
+        label = f"{int(key):02d}:00" if by == "hour" else str(np.datetime64(int(key), "D"))
+        rows.append({by: label, "orders": int(o), "revenue": round(float(rev), 2),
+                     "reservations": int(r), "guests": int(g)})
+    return rows
+
+
+# ---------- CLI ----------
+def parse_time(value: str, now: Optional[datetime] = None) -> float:
+    """'11:00' / '13' (today), '2026-10-19', '2026-10-19 11:30' -> unix time (local)"""
+    now = now or datetime.now()
+    value = value.strip()
+    try:
+        if ":" in value and "-" not in value:
+            hour, minute = value.split(":", 1)
+            moment = now.replace(hour=int(hour), minute=int(minute), second=0, microsecond=0)
+        elif value.isdigit() and len(value) <= 2:
+            moment = now.replace(hour=int(value), minute=0, second=0, microsecond=0)
+        else:
+            moment = datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid time: {value!r} (HH:MM, YYYY-MM-DD or 'YYYY-MM-DD HH:MM')")
+    return moment.timestamp()
+
+
+LABELS = {"item": "Món", "hour": "Giờ", "day": "Ngày"}
+
+
+def print_rows(rows: list[dict], by: str) -> None:
+    if not rows:
+        print("📭 Không có dữ liệu trong khoảng thời gian này")
+        return
+    if by == "item":
+        width = max(len(row["item"]) for row in rows)
+        print(f"  {LABELS['item']:<{width}} {'SL':>8} {'Doanh thu':>12}")
+        for row in rows:
+            print(f"  {row['item']:<{width}} {row['qty']:>8,} {row['amount']:>12,.2f}")
+        print(f"  {'Tổng':<{width}} {sum(r['qty'] for r in rows):>8,} {sum(r['amount'] for r in rows):>12,.2f}")
+    else:
+        print(f"  {LABELS[by]:<10} {'Đơn':>8} {'Doanh thu':>12} {'Đặt bàn':>8} {'Khách':>7}")
+        for row in rows:
+            print(f"  {row[by]:<10} {row['orders']:>8,} {row['revenue']:>12,.2f} "
+                  f"{row['reservations']:>8,} {row['guests']:>7,}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sổ đơn hàng: thống kê bán hàng")
+    parser.add_argument("--file", default=ORDER_LEDGER_FILE, help="ledger file (ORDER_LEDGER_FILE)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rep = sub.add_parser("report", help="tổng hợp theo món / giờ / ngày")
+    rep.add_argument("--by", choices=["item", "hour", "day"], default="item")
+    rep.add_argument("--from", dest="start", type=parse_time, help="HH:MM (hôm nay), YYYY-MM-DD[ HH:MM]")
+    rep.add_argument("--to", dest="end", type=parse_time, help="không gồm thời điểm này")
+    rep.add_argument("--days", type=int, help="N ngày gần nhất (thay cho --from)")
+    rep.add_argument("--utc-offset", type=float, help="giờ địa phương = UTC + N (mặc định: múi giờ máy)")
+    rep.add_argument("--no-cache", action="store_true", help="quét toàn bộ sổ, không dùng rollup cache")
+    rep.add_argument("--json", action="store_true")
+
+    tail = sub.add_parser("tail", help="các dòng mới nhất")
+    tail.add_argument("-n", type=int, default=20)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.file):
+        print(f"❌ File {args.file} không tồn tại (chưa có đơn nào?)")
+        sys.exit(1)
+
+    if args.command == "tail":
+        records = read_records(args.file)[-args.n:]
+        names = read_item_names(f"{args.file}.items")
+        for record in records:
+            when = datetime.fromtimestamp(float(record["ts"])).strftime("%Y-%m-%d %H:%M:%S")
+            if record["kind"] == RESERVATION:
+                print(f"{when}  #{int(record['order']):x}  📅 đặt bàn, {int(record['qty']) or '?'} khách")
+            else:
+                name = names.get(int(record["item"]), f"#{int(record['item'])}")
+                print(f"{when}  #{int(record['order']):x}  {int(record['qty'])}x {name}  "
+                      f"${float(record['amount']):.2f}")
+        return
+
+    start = args.start
+    if args.days:
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        start = (today - timedelta(days=args.days - 1)).timestamp()
+    began = time.perf_counter()
+    rows = report(args.file, by=args.by, start=start, end=args.end, offset_hours=args.utc_offset,
+                  use_cache=not args.no_cache)
+    elapsed_ms = (time.perf_counter() - began) * 1000
+    if args.json:
+        print(json.dumps(rows, ensure_ascii=False, indent=2))
+        return
+    span = " → ".join(datetime.fromtimestamp(t).strftime("%Y-%m-%d %H:%M") if t else "…" for t in (start, args.end))
+    print(f"\n📊 Bán hàng theo {LABELS[args.by].lower()} ({span}), {elapsed_ms:.0f} ms")
+    print_rows(rows, args.by)
+
+
+if __name__ == "__main__":
+    main()
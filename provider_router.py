@@ -0,0 +1,436 @@
+"""
+Latency-aware STT/TTS routing
+- Theo dõi first-byte latency (EWMA + p50) và tỉ lệ lỗi gần đây của từng provider
+- Mỗi utterance (STT) / câu (TTS) mới đi tới provider nhanh nhất đang khỏe, lỗi thì chuyển provider khác
+- Tuỳ chọn hedge TTS: câu đầu tiên của mỗi lượt trả lời được gửi song song tới 2 provider,
+  provider nào ra audio trước thắng, provider còn lại bị huỷ
+- Số liệu routing: snapshot() / log_metrics()
+
+Bật qua providers.py: TTS_ROUTING=elevenlabs,openai  TTS_HEDGE=first  STT_ROUTING=soniox,deepgram
+"""
+
+import asyncio
+import logging
+import statistics
+import time
+from collections import deque
+from typing import Optional
+
+from livekit import rtc
+from livekit.agents import (
+    DEFAULT_API_CONNECT_OPTIONS,
+    APIConnectionError,
+    APIConnectOptions,
+    stt,
+    tts,
+    utils,
+)
+
+logger = logging.getLogger("restaurant-bot")
+
+WINDOW = 50  # samples kept per provider
+EWMA_ALPHA = 0.3
+MAX_CONSECUTIVE_ERRORS = 3
+MAX_ERROR_RATE = 0.3  # over the window, once MIN_SAMPLES are collected
+MIN_SAMPLES = 10
+COOLDOWN = 30.0  # seconds an unhealthy provider is skipped
+STALE_AFTER = 60.0  # re-probe a healthy provider with no recent samples
+FIRST_BYTE_TIMEOUT = 5.0
+REPLY_GAP = 1.0  # idle seconds between TTS calls = a new reply (hedge its first sentence)
+LOG_EVERY = 50  # decisions between metric log lines
+
+HEDGE_MODES = ("off", "first", "all")
+
+
+class ProviderStats:
+    """Rolling first-byte latency and outcome window of one provider"""
+
+    def __init__(self, name: str, window: int = WINDOW):
+        self.name = name
+        self.latencies: deque[float] = deque(maxlen=window)
+        self.outcomes: deque[bool] = deque(maxlen=window)
+        self.ewma: Optional[float] = None
+        self.consecutive_errors = 0
+        self.cooldown_until = 0.0
+        self.last_sample_at = 0.0
+        # routing counters
+        self.routed = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.hedge_wins = 0
+        self.cancelled = 0
+
+    def record_success(self, latency: float) -> None:
+        self.latencies.append(latency)
+        self.outcomes.append(True)
+        self.ewma = latency if self.ewma is None else EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * self.ewma
+        self.consecutive_errors = 0
+        self.last_sample_at = time.monotonic()
+
+    def record_error(self, timeout: bool = False) -> None:
+        self.outcomes.append(False)
+        self.errors += 1
+        self.timeouts += timeout
+        self.consecutive_errors += 1
+        self.last_sample_at = time.monotonic()
+        if self.consecutive_errors >= MAX_CONSECUTIVE_ERRORS or (
+            len(self.outcomes) >= MIN_SAMPLES and self.error_rate > MAX_ERROR_RATE
+        ):
+            self.cooldown_until = time.monotonic() + COOLDOWN
+            self.outcomes.clear()  # judged afresh after the cooldown
+            self.consecutive_errors = 0
+            logger.warning(f"⚠️ Provider {self.name} unhealthy, skipped for {COOLDOWN:.0f}s")
+
+    @property
+    def error_rate(self) -> float:
+        return 1 - sum(self.outcomes) / len(self.outcomes) if self.outcomes else 0.0
+
+    def healthy(self, now: float) -> bool:
+        return now >= self.cooldown_until
+
+    def score(self, now: float) -> float:
+        """Expected first-byte latency; untried or stale providers score 0 so they get probed"""
+        if self.ewma is None or now - self.last_sample_at > STALE_AFTER:
+            return 0.0
+        return self.ewma
+
+    def snapshot(self, now: float) -> dict:
+        return {
+            "healthy": self.healthy(now),
+            "ewma_ms": round(self.ewma * 1000, 1) if self.ewma is not None else None,
+            "p50_ms": round(statistics.median(self.latencies) * 1000, 1) if self.latencies else None,
+            "error_rate": round(self.error_rate, 3),
+            "routed": self.routed,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "hedge_wins": self.hedge_wins,
+            "cancelled": self.cancelled,
+        }
+
+
+class ProviderRouter:
+    """Ranks the providers of one kind; shared by every session of the process"""
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.stats: dict[str, ProviderStats] = {}
+        self.decisions = 0
+        self.failovers = 0
+        self.hedges = 0
+
+    def add(self, name: str) -> None:
+        self.stats.setdefault(name, ProviderStats(f"{self.kind}:{name}"))
+
+    def ranked(self, names: list[str]) -> list[str]:
+        """Healthy providers fastest first, then unhealthy ones (last resort) by cooldown end"""
+        now = time.monotonic()
+        healthy = sorted((n for n in names if self.stats[n].healthy(now)), key=lambda n: self.stats[n].score(now))
+        cooling = sorted((n for n in names if not self.stats[n].healthy(now)),
+                         key=lambda n: self.stats[n].cooldown_until)
+        return healthy + cooling
+
+    def routed(self, name: str) -> None:
+        self.stats[name].routed += 1
+        self.decisions += 1
+        if self.decisions % LOG_EVERY == 0:
+            logger.info(f"📊 {self.kind} routing: {self.snapshot()}")
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        return {
+            "decisions": self.decisions,
+            "failovers": self.failovers,
+            "hedges": self.hedges,
+            "providers": {name: stats.snapshot(now) for name, stats in self.stats.items()},
+        }
+
+
+_routers: dict[str, ProviderRouter] = {}
+
+
+def get_router(kind: str, names: list[str]) -> ProviderRouter:
+    router = _routers.setdefault(kind, ProviderRouter(kind))
+    for name in names:
+        router.add(name)
+    return router
+
+
+def snapshot() -> dict:
+    return {kind: router.snapshot() for kind, router in _routers.items()}
+
+
+async def log_metrics() -> None:
+    """Shutdown callback: routing decisions of this process"""
+    for kind, router in _routers.items():
+        logger.info(f"📊 {kind} routing: {router.snapshot()}")
+
+
+# ==================== TTS ====================
+
+
+class RoutingTTS(tts.TTS):
+    """Non-streaming TTS (the session sentence-splits via StreamAdapter): one routed call per sentence"""
+
+    def __init__(
+        self,
+        providers: dict[str, tts.TTS],
+        *,
+        hedge: str = "off",
+        hedge_after: float = 0.0,
+        first_byte_timeout: float = FIRST_BYTE_TIMEOUT,
+        reply_gap: float = REPLY_GAP,
+    ) -> None:
+        if hedge not in HEDGE_MODES:
+            raise ValueError(f"hedge must be one of {HEDGE_MODES}")
+        super().__init__(
+            capabilities=tts.TTSCapabilities(streaming=False),
+            sample_rate=max(p.sample_rate for p in providers.values()),
+            num_channels=1,
+        )
+        self.providers = providers
+        self.router = get_router("tts", list(providers))
+        self.hedge = hedge
+        self.hedge_after = hedge_after
+        self.first_byte_timeout = first_byte_timeout
+        self.reply_gap = reply_gap
+        self._last_done = 0.0
+
+    @property
+    def model(self) -> str:
+        return "router"
+
+    @property
+    def provider(self) -> str:
+        return "+".join(self.providers)
+
+    def should_hedge(self) -> bool:
+        if self.hedge == "all":
+            return True
+        return self.hedge == "first" and time.monotonic() - self._last_done > self.reply_gap
+
+    def mark_done(self) -> None:
+        self._last_done = time.monotonic()
+
+    def synthesize(
+        self, text: str, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS
+    ) -> "RoutingChunkedStream":
+        return RoutingChunkedStream(tts=self, input_text=text, conn_options=conn_options)
+
+    def prewarm(self) -> None:
+        for provider in self.providers.values():
+            provider.prewarm()
+
+    async def aclose(self) -> None:
+        for provider in self.providers.values():
+            await provider.aclose()
+
+
+class RoutingChunkedStream(tts.ChunkedStream):
+    async def _run(self, output_emitter: tts.AudioEmitter) -> None:
+        routing: RoutingTTS = self._tts
+        router = routing.router
+        output_emitter.initialize(
+            request_id=utils.shortuuid(),
+            sample_rate=routing.sample_rate,
+            num_channels=1,
+            mime_type="audio/pcm",
+        )
+
+        ranked = router.ranked(list(routing.providers))
+        first = ranked[:2] if routing.should_hedge() and len(ranked) > 1 else ranked[:1]
+        groups = [first] + [[name] for name in ranked[len(first):]]
+
+        last_error: Optional[Exception] = None
+        try:
+            for index, group in enumerate(groups):
+                if index:
+                    router.failovers += 1
+                    logger.warning(f"🔁 TTS failover to {group[0]} after: {last_error}")
+                try:
+                    await self._race(group, output_emitter)
+                    output_emitter.flush()
+                    return
+                except _AudioStarted:
+                    raise  # audio already played: never replay the sentence on another voice
+                except APIConnectionError as e:
+                    last_error = e
+        finally:
+            routing.mark_done()
+        raise APIConnectionError(f"all TTS providers failed: {last_error}", retryable=False)
+
+    async def _race(self, group: list[str], output_emitter: tts.AudioEmitter) -> None:
+        """First provider of the group to produce audio wins; the others are cancelled"""
+        routing: RoutingTTS = self._tts
+        router = routing.router
+        loop = asyncio.get_running_loop()
+        winner: asyncio.Future[str] = loop.create_future()
+        queues: dict[str, asyncio.Queue] = {name: asyncio.Queue() for name in group}
+        inner_options = APIConnectOptions(max_retry=0, timeout=self._conn_options.timeout)
+
+        async def pump(name: str, delay: float) -> None:
+            if delay:
+                await asyncio.sleep(delay)
+                if winner.done():
+                    return  # primary answered within hedge_after: no hedge request
+            router.routed(name)
+            stats = router.stats[name]
+            start = time.perf_counter()
+            resampler: Optional[rtc.AudioResampler] = None
+            try:
+                async with routing.providers[name].synthesize(self.input_text, conn_options=inner_options) as stream:
+                    async for audio in stream:
+                        if not winner.done():
+                            winner.set_result(name)
+                            stats.record_success(time.perf_counter() - start)
+                        frame = audio.frame
+                        if frame.sample_rate != routing.sample_rate:
+                            resampler = resampler or rtc.AudioResampler(
+                                frame.sample_rate, routing.sample_rate, num_channels=frame.num_channels
+                            )
+                            for resampled in resampler.push(frame):
+                                queues[name].put_nowait(resampled)
+                        else:
+                            queues[name].put_nowait(frame)
+                if resampler is not None:
+                    for resampled in resampler.flush():
+                        queues[name].put_nowait(resampled)
+                queues[name].put_nowait(None)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if not winner.done() or winner.result() == name:
+                    stats.record_error()
+                queues[name].put_nowait(e)
+
+        if len(group) > 1:
+            router.hedges += 1
+        tasks = {
+            name: asyncio.create_task(pump(name, routing.hedge_after if i else 0.0))
+            for i, name in enumerate(group)
+        }
+        try:
+            deadline = loop.time() + routing.first_byte_timeout
+            while not winner.done():
+                pending = [task for task in tasks.values() if not task.done()]
+                if not pending:
+                    errors = [q.get_nowait() for q in queues.values() if not q.empty()]
+                    raise APIConnectionError(f"{'/'.join(group)} produced no audio: {errors}")
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    for name, task in tasks.items():
+                        if not task.done():
+                            router.stats[name].record_error(timeout=True)
+                    raise APIConnectionError(f"{'/'.join(group)}: no first byte in {routing.first_byte_timeout}s")
+                await asyncio.wait([winner, *pending], timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+
+            name = winner.result()
+            for other, task in tasks.items():
+                if other != name and not task.done():
+                    task.cancel()
+                    router.stats[other].cancelled += 1
+            if len(group) > 1:
+                router.stats[name].hedge_wins += 1
+
+            pushed = False
+            while True:
+                item = await queues[name].get()
+                if item is None:
+                    return
+                if isinstance(item, Exception):
+                    if pushed:
+                        raise _AudioStarted(f"{name} failed mid-sentence: {item}") from item
+                    raise APIConnectionError(f"{name} failed: {item}") from item
+                output_emitter.push(bytes(item.data))
+                pushed = True
+        finally:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+
+class _AudioStarted(APIConnectionError):
+    def __init__(self, message: str) -> None:
+        super().__init__(message, retryable=False)
+
+
+# ==================== STT ====================
+
+
+class RoutingSTT(stt.STT):
+    """
+    Per-utterance routing: the session wraps this non-streaming STT with VAD, every
+    utterance goes to the fastest healthy provider (streaming providers get a short
+    stream per utterance). Trade-off: no interim transcripts.
+    """
+
+    def __init__(self, providers: dict[str, stt.STT], *, timeout: float = FIRST_BYTE_TIMEOUT) -> None:
+        super().__init__(capabilities=stt.STTCapabilities(streaming=False, interim_results=False))
+        self.providers = providers
+        self.router = get_router("stt", list(providers))
+        self.timeout = timeout
+
+    @property
+    def model(self) -> str:
+        return "router"
+
+    @property
+    def provider(self) -> str:
+        return "+".join(self.providers)
+
+    async def _recognize_impl(
+        self,
+        buffer: utils.AudioBuffer,
+        *,
+        language=None,
+        conn_options: APIConnectOptions,
+    ) -> stt.SpeechEvent:
+        inner_options = APIConnectOptions(max_retry=0, timeout=conn_options.timeout)
+        last_error: Optional[Exception] = None
+        for index, name in enumerate(self.router.ranked(list(self.providers))):
+            if index:
+                self.router.failovers += 1
+                logger.warning(f"🔁 STT failover to {name} after: {last_error}")
+            self.router.routed(name)
+            stats = self.router.stats[name]
+            start = time.perf_counter()
+            try:
+                event = await asyncio.wait_for(
+                    self._recognize_with(self.providers[name], buffer, language, inner_options), self.timeout
+                )
+            except asyncio.TimeoutError as e:
+                stats.record_error(timeout=True)
+                last_error = e
+                continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                stats.record_error()
+                last_error = e
+                continue
+            stats.record_success(time.perf_counter() - start)
+            return event
+        raise APIConnectionError(f"all STT providers failed: {last_error}", retryable=False)
+
+    @staticmethod
+    async def _recognize_with(provider: stt.STT, buffer, language, conn_options) -> stt.SpeechEvent:
+        kwargs = {"language": language} if language else {}
+        if not provider.capabilities.streaming:
+            return await provider.recognize(buffer, conn_options=conn_options, **kwargs)
+
+        stream = provider.stream(conn_options=conn_options, **kwargs)
+        try:
+            for frame in buffer if isinstance(buffer, list) else [buffer]:
+                stream.push_frame(frame)
+            stream.end_input()
+            finals = []
+            async for event in stream:
+                if event.type == stt.SpeechEventType.FINAL_TRANSCRIPT and event.alternatives:
+                    finals.append(event.alternatives[0])
+        finally:
+            await stream.aclose()
+
+        text = " ".join(alt.text for alt in finals if alt.text).strip()
+        return stt.SpeechEvent(
+            type=stt.SpeechEventType.FINAL_TRANSCRIPT,
+            alternatives=[stt.SpeechData(language=finals[0].language if finals else (language or ""), text=text)],
+        )
@@ -0,0 +1,275 @@
+"""
+Provider registry (STT / LLM / TTS / VAD)
+Chỉ import plugin LiveKit thực sự được chọn, và chỉ khi dùng lần đầu.
+
+Cấu hình (ưu tiên từ trên xuống):
+- Env: STT_PROVIDER, LLM_PROVIDER, TTS_PROVIDER, VAD_PROVIDER (silero | silero-batched)
+- Routing nhiều provider (provider_router.py): STT_ROUTING=soniox,deepgram
+  TTS_ROUTING=elevenlabs,openai  TTS_HEDGE=off|first|all  TTS_HEDGE_AFTER_MS=0
+- File JSON: PROVIDERS_CONFIG (mặc định providers.json cạnh file này, nếu có)
+      {"stt": {"provider": "deepgram", "model": "nova-3"},
+       "tts": {"provider": "elevenlabs", "voice_id": "..."}}
+- DEFAULTS bên dưới (Soniox + Gemini + ElevenLabs + Silero)
+
+Đo thời gian khởi động:  python restaurant_agent.py --profile-startup
+"""
+
+import importlib
+import json
+import logging
+import os
+import re
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from operator import attrgetter
+from typing import Any, Optional
+
+logger = logging.getLogger("restaurant-bot")
+
+KINDS = ("stt", "llm", "tts", "vad")
+ROUTABLE = ("stt", "tts")
+ROUTER_OPTIONS = ("routing", "hedge", "hedge_after")
+CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "providers.json")
+
+
+@dataclass(frozen=True)
+class ProviderSpec:
+    module: str  # plugin module, imported on first use
+    factory: str  # attribute of the module, e.g. "STT" or "VAD.load"
+    api_key_env: Optional[str] = None
+    defaults: dict = field(default_factory=dict)
+    tokenizer_arg: Optional[str] = None  # streaming TTS: kwarg taking a SentenceTokenizer
+    requires: tuple = ()  # plugins `module` imports on first use (preloaded with it)
+
+
+REGISTRY: dict[str, dict[str, ProviderSpec]] = {
+    "stt": {
+        "soniox": ProviderSpec("livekit.plugins.soniox", "STT", "SONIOX_API_KEY"),
+        "deepgram": ProviderSpec("livekit.plugins.deepgram", "STT", "DEEPGRAM_API_KEY"),
+        "openai": ProviderSpec("livekit.plugins.openai", "STT", "OPENAI_API_KEY"),
+    },
+    "llm": {
+        "google": ProviderSpec("livekit.plugins.google", "LLM", "GEMINI_API_KEY", {"model": "gemini-2.5-flash"}),
+        "openai": ProviderSpec("livekit.plugins.openai", "LLM", "OPENAI_API_KEY", {"model": "gpt-4o-mini"}),
+    },
+    "tts": {
+        "elevenlabs": ProviderSpec(
+            "livekit.plugins.elevenlabs", "TTS", "ELEVENLABS_API_KEY",
+            {"voice_id": "Xb7hH8MSUJpSbSDYk0k2", "model": "eleven_turbo_v2_5"},
+            tokenizer_arg="word_tokenizer",
+        ),
+        "openai": ProviderSpec("livekit.plugins.openai", "TTS", "OPENAI_API_KEY", {"voice": "nova"}),
+    },
+    "vad": {
+        "silero": ProviderSpec("livekit.plugins.silero", "VAD.load"),
+        # One batched ONNX call per tick for all sessions of the process (vad_batcher.py)
+        "silero-batched": ProviderSpec("vad_batcher", "load_vad", requires=("livekit.plugins.silero",)),
+    },
+}
+
+DEFAULTS = {"stt": "soniox", "llm": "google", "tts": "elevenlabs", "vad": "silero"}
+
+# module -> seconds spent importing it (first use only)
+import_times: dict[str, float] = {}
+
+
+def load_config(path: Optional[str] = None) -> dict[str, dict[str, Any]]:
+    """{kind: {"provider": name, **options}} from defaults, config file and env"""
+    config = {kind: {"provider": name} for kind, name in DEFAULTS.items()}
+
+    path = path or os.getenv("PROVIDERS_CONFIG", CONFIG_FILE)
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for kind, options in json.load(f).items():
+                    if kind in config:
+                        config[kind] = {"provider": config[kind]["provider"], **options}
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Could not read provider config {path}: {e}")
+
+    for kind in KINDS:
+        name = os.getenv(f"{kind.upper()}_PROVIDER")
+        if name and name != config[kind]["provider"]:
+            config[kind] = {"provider": name}  # file options belong to the other provider
+
+    for kind in ROUTABLE:
+        names = [name.strip() for name in os.getenv(f"{kind.upper()}_ROUTING", "").split(",") if name.strip()]
+        if names:
+            if names[0] != config[kind]["provider"]:
+                config[kind] = {"provider": names[0]}
+            config[kind]["routing"] = names
+        if config[kind].get("routing"):
+            config[kind]["provider"] = config[kind]["routing"][0]
+    if os.getenv("TTS_HEDGE"):
+        config["tts"]["hedge"] = os.getenv("TTS_HEDGE")
+    if os.getenv("TTS_HEDGE_AFTER_MS"):
+        config["tts"]["hedge_after"] = float(os.getenv("TTS_HEDGE_AFTER_MS")) / 1000
+
+    for kind, options in config.items():
+        for name in options.get("routing") or [options["provider"]]:
+            if name not in REGISTRY[kind]:
+                raise ValueError(
+                    f"Unknown {kind} provider '{name}', "
+                    f"expected one of: {', '.join(REGISTRY[kind])}"
+                )
+    return config
+
+
+_config: Optional[dict] = None
+
+
+def get_config() -> dict[str, dict[str, Any]]:
+    global _config
+    if _config is None:
+        _config = load_config()
+    return _config
+
+
+def _import_plugin(module: str):
+    if module in sys.modules:
+        return sys.modules[module]
+    start = time.perf_counter()
+    plugin = importlib.import_module(module)
+    import_times[module] = time.perf_counter() - start
+    logger.info(f"🔌 Loaded {module} in {import_times[module] * 1000:.0f} ms")
+    return plugin
+
+
+def _instantiate(kind: str, name: str, options: dict, overrides: dict):
+    spec = REGISTRY[kind][name]
+    kwargs = {**spec.defaults, **options, **overrides}
+    if spec.api_key_env:
+        kwargs.setdefault("api_key", os.getenv(spec.api_key_env))
+    factory = attrgetter(spec.factory)(_import_plugin(spec.module))
+    return factory(**kwargs)
+
+
+def create(kind: str, **overrides):
+    """
+    Instantiate the configured provider of a kind ('stt', 'llm', 'tts', 'vad').
+    With several providers in `routing`, returns a provider_router.RoutingSTT / RoutingTTS.
+    """
+    options = dict(get_config()[kind])
+    name = options.pop("provider")
+    router_options = {key: options.pop(key) for key in ROUTER_OPTIONS if key in options}
+    routing = router_options.pop("routing", None)
+    if kind not in ROUTABLE or not routing or len(routing) < 2:
+        return _instantiate(kind, name, options, overrides)
+
+    import provider_router
+
+    # File options belong to the primary provider, the others use their defaults
+    instances = {
+        routed: _instantiate(kind, routed, options if routed == name else {}, overrides)
+        for routed in routing
+    }
+    if kind == "stt":
+        return provider_router.RoutingSTT(instances)
+    return provider_router.RoutingTTS(instances, **router_options)
+
+
+def create_stt(**overrides):
+    return create("stt", **overrides)
+
+
+def create_llm(**overrides):
+    return create("llm", **overrides)
+
+
+def create_tts(sentence_tokenizer=None, **overrides):
+    """
+    sentence_tokenizer: segments the LLM text before synthesis. Streaming providers that
+    accept one get it directly, the others (and the router) are wrapped in tts.StreamAdapter.
+    """
+    if sentence_tokenizer is None:
+        return create("tts", **overrides)
+
+    config = get_config()["tts"]
+    tokenizer_arg = REGISTRY["tts"][config["provider"]].tokenizer_arg
+    if tokenizer_arg and len(config.get("routing") or []) < 2:
+        return create("tts", **{tokenizer_arg: sentence_tokenizer}, **overrides)
+
+    from livekit.agents import tts
+
+    return tts.StreamAdapter(tts=create("tts", **overrides), sentence_tokenizer=sentence_tokenizer)
+
+
+def create_vad(**overrides):
+    return create("vad", **overrides)
+
+
+async def log_provider_metrics() -> None:
+    """Job shutdown callback: routing decisions (STT_ROUTING / TTS_ROUTING) and batched VAD stats"""
+    if "provider_router" in sys.modules:
+        await sys.modules["provider_router"].log_metrics()
+    if "vad_batcher" in sys.modules and sys.modules["vad_batcher"].batcher_stats():
+        logger.info(f"📊 Batched VAD: {sys.modules['vad_batcher'].batcher_stats()}")
+
+
+def selected_modules() -> list[str]:
+    config = get_config()
+    specs = [
+        REGISTRY[kind][name]
+        for kind in KINDS
+        for name in config[kind].get("routing") or [config[kind]["provider"]]
+    ]
+    return sorted({module for spec in specs for module in (*spec.requires, spec.module)})
+
+
+def preload_plugins() -> None:
+    """
+    Import the selected plugins now. LiveKit plugins register themselves on import
+    and must be imported on the main thread (worker main / prewarm).
+    """
+    for module in selected_modules():
+        _import_plugin(module)
+
+
+# ==================== --profile-startup ====================
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def import_group(module: str) -> str:
+    """livekit.plugins.soniox.stt -> livekit.plugins.soniox, aiohttp.web -> aiohttp"""
+    parts = module.split(".")
+    if parts[0] == "livekit":
+        return ".".join(parts[:3] if len(parts) > 1 and parts[1] == "plugins" else parts[:2])
+    return parts[0]
+
+
+def profile_startup(module: str = "restaurant_agent", top: int = 25, preload: bool = True) -> None:
+    """Import `module` + the selected plugins in a fresh interpreter and break down import time"""
+    code = f"import {module}" + ("; import providers; providers.preload_plugins()" if preload else "")
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        print(result.stderr[-2000:])
+        raise SystemExit(f"❌ Import of {module} failed")
+
+    groups: dict[str, float] = {}
+    total_us = 0
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us = int(match.group(1))
+        total_us += self_us
+        group = import_group(match.group(4))
+        groups[group] = groups.get(group, 0) + self_us
+
+    config = get_config()
+    plugins = ", ".join(k + "=" + config[k]["provider"] for k in KINDS) if preload else "none"
+    print(f"\n🚀 Startup profile: import {module} + plugins ({plugins})")
+    print(f"   interpreter + imports: {wall * 1000:.0f} ms wall, imports {total_us / 1000:.0f} ms\n")
+    print(f"  {'package':<36} {'self ms':>9} {'share':>7}")
+    print("  " + "-" * 54)
+    for group, self_us in sorted(groups.items(), key=lambda kv: -kv[1])[:top]:
+        print(f"  {group:<36} {self_us / 1000:>9.1f} {self_us * 100 / max(total_us, 1):>6.1f}%")
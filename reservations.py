@@ -0,0 +1,461 @@
+"""
+Đặt bàn theo khung giờ, có kiểm tra sức chứa (không nhận quá số bàn)
+- Giờ khách nói được phân tích cả tiếng Việt lẫn tiếng Anh: "7 giờ rưỡi tối mai", "19h30",
+  "thứ bảy 8 giờ tối", "tomorrow at 7pm", "half past seven tonight", "20/10 12:00"...
+- Mỗi bàn giữ danh sách booking đã sắp xếp (không chồng nhau): kiểm tra một bàn trống là
+  một lần bisect, O(log n); chọn bàn nhỏ nhất đủ chỗ (RESERVATION_TABLES)
+- Hết bàn: gợi ý các khung giờ gần nhất còn trống
+- Lưu ở SQLite (RESERVATIONS_FILE), dùng chung cho các job process: đặt bàn chạy trong
+  BEGIN IMMEDIATE sau khi cập nhật chỉ mục với các thay đổi của process khác
+
+Đo với hàng chục nghìn booking:  python tools/bench_reservations.py
+"""
+
+import bisect
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from agent_logging import fields
+from inventory import normalize_item_name
+
+logger = logging.getLogger("restaurant-bot")
+
+RESERVATIONS_FILE = os.getenv(
+    "RESERVATIONS_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "reservations.sqlite3")
+)
+RESERVATION_TABLES = os.getenv("RESERVATION_TABLES", "2:6,4:8,6:4,8:2")  # seats:count
+OPENING_HOURS = os.getenv("OPENING_HOURS", "10:00-22:00")
+DINING_MINUTES = int(os.getenv("DINING_MINUTES", "90"))  # a table is held this long
+SLOT_MINUTES = 15  # grid of the suggested times
+SUGGEST_WINDOW_MINUTES = 180  # look this far before / after the requested time
+DEFAULT_PARTY_SIZE = 2
+HISTORY_DAYS = 1  # bookings that ended longer ago are not loaded into the index
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bookings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    table_no INTEGER NOT NULL,
+    party_size INTEGER NOT NULL,
+    start_ts REAL NOT NULL,
+    end_ts REAL NOT NULL,
+    customer_name TEXT NOT NULL DEFAULT '',
+    customer_phone TEXT NOT NULL DEFAULT '',
+    status TEXT NOT NULL DEFAULT 'booked',
+    seq INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS bookings_seq ON bookings (seq);
+CREATE INDEX IF NOT EXISTS bookings_start ON bookings (start_ts);
+"""
+
+
+def parse_tables(spec: str = RESERVATION_TABLES) -> list[int]:
+    """'2:6,4:8' -> seats of table 1..N (smallest first)"""
+    seats = []
+    for part in spec.split(","):
+        if part.strip():
+            size, _, count = part.partition(":")
+            seats += [int(size)] * int(count or 1)
+    return sorted(seats)
+
+
+def parse_opening(spec: str = OPENING_HOURS) -> tuple[int, int]:
+    """'10:00-22:00' -> minutes since midnight"""
+    begin, _, end = spec.partition("-")
+    to_minutes = lambda value: int(value.split(":")[0]) * 60 + int(value.split(":")[1] if ":" in value else 0)
+    return to_minutes(begin.strip()), to_minutes(end.strip())
+
+
+# ---------- time parsing ----------
+# Read on the accented text: without accents "tối" (evening) is "tôi" (I), "bảy giờ" is "bây giờ" (now)
+VI_NUMBERS = {
+    "mười một": 11, "mười hai": 12, "một": 1, "hai": 2, "ba": 3, "bốn": 4, "tư": 4, "năm": 5,
+    "sáu": 6, "bảy": 7, "tám": 8, "chín": 9, "mười": 10,
+}
+EN_NUMBERS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "eight": 8,
+    "nine": 9, "ten": 10, "eleven": 11, "twelve": 12,
+}
+EN_MINUTES = {"fifteen": 15, "thirty": 30, "forty five": 45, "forty-five": 45}
+EVENING = ("tối", "chiều", "đêm", "pm", "p.m", "tonight", "evening", "afternoon")
+MORNING = ("sáng", "am", "a.m", "morning")
+NOON = ("trưa", "noon", "midday", "lunch")
+
+# Read on the normalized text (no accents)
+WEEKDAYS = {
+    "monday": 0, "tuesday": 1, "wednesday": 2, "thursday": 3, "friday": 4, "saturday": 5, "sunday": 6,
+    "thu hai": 0, "thu ba": 1, "thu tu": 2, "thu nam": 3, "thu sau": 4, "thu bay": 5, "chu nhat": 6,
+}
+RELATIVE_DAYS = {
+    "ngay kia": 2, "day after tomorrow": 2, "ngay mai": 1, "toi mai": 1, "trua mai": 1, "chieu mai": 1,
+    "sang mai": 1, "tomorrow": 1, "hom nay": 0, "today": 0, "toi nay": 0, "tonight": 0,
+}
+
+_words = lambda table: "|".join(sorted(map(re.escape, table), key=len, reverse=True))
+_VI_NUMBER_HOUR = re.compile(rf"(?<!\w)({_words(VI_NUMBERS)})(?=\s+giờ)")
+_EN_NUMBER = re.compile(rf"\b({_words(EN_NUMBERS)})\b")
+_EN_MINUTES = re.compile(rf"\b(\d{{1,2}}|{_words(EN_NUMBERS)})\s+({_words(EN_MINUTES)})\b")  # "seven thirty" -> "seven:30"
+_EVENING = re.compile(rf"(?<!\w)({_words(EVENING)})(?!\w)")
+_MORNING = re.compile(rf"(?<!\w)({_words(MORNING)})(?!\w)")
+_NOON = re.compile(rf"(?<!\w)({_words(NOON)})(?!\w)")
+_WEEKDAY = re.compile(rf"\b({_words(WEEKDAYS)})\b")
+_RELATIVE = re.compile(rf"\b({_words(RELATIVE_DAYS)})\b")
+_ISO_DATE = re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b")
+_DMY_DATE = re.compile(r"\b(\d{1,2})/(\d{1,2})(?:/(\d{2,4}))?\b")
+_DAY_OF_MONTH = re.compile(r"\b(?:ngay|the)\s+(\d{1,2})(?:st|nd|rd|th)?\b")
+_QUARTER = re.compile(r"\b(half|quarter)\s+(past|to)\s+(\d{1,2})\b")
+_TIME = re.compile(
+    r"\b(\d{1,2})"
+    r"(?:\s*[:.h]\s*(\d{2})\b"                 # 19:30, 7.30, 19h30
+    r"|\s*gio(?:\s+(\d{1,2})(?:\s*phut)?)?"     # 7 giờ, 7 giờ 15 (phút)
+    r"|\s*o'?\s*clock|h\b)?"
+    r"(?:\s*(ruoi)|\s*kem\s*(\d{1,2}))?"         # rưỡi = :30, kém 15 = 15 phút trước
+    r"(?:\s*([ap])\.?m\b\.?)?"
+)
+_TIME_BEFORE = re.compile(r"\b(at|luc|vao|khoang|around|by)\s*$")
+_TIME_AFTER = re.compile(r"^\s*(toi|chieu|dem|sang|trua|tonight|this evening)\b")
+
+
+def parse_reservation_time(text: str, now: Optional[datetime] = None,
+                           opening: Optional[tuple[int, int]] = None) -> Optional[datetime]:
+    """
+    Spoken / typed reservation time (Vietnamese or English) -> local datetime, None if no time found.
+    Without a date: today, or tomorrow when that time has passed. Without am/pm: the reading
+    that falls in the opening hours ("7 giờ" -> 19:00).
+    """
+    now = now or datetime.now()
+    opening = opening or parse_opening()
+    raw = text.lower()
+    raw = _EN_MINUTES.sub(lambda m: f"{m.group(1)}:{EN_MINUTES[m.group(2)]}", raw)
+    raw = _EN_NUMBER.sub(lambda m: str(EN_NUMBERS[m.group(1)]), raw)
+    raw = _VI_NUMBER_HOUR.sub(lambda m: str(VI_NUMBERS[m.group(1)]), raw)
+    evening, morning, noon = (bool(pattern.search(raw)) for pattern in (_EVENING, _MORNING, _NOON))
+    text = normalize_item_name(raw).replace("đ", "d")
+
+    # Date
+    day: Optional[date] = None
+    explicit_day = False
+    if match := _ISO_DATE.search(text):
+        day, explicit_day = _safe_date(int(match[1]), int(match[2]), int(match[3])), True
+    elif match := _DMY_DATE.search(text):
+        year = int(match[3]) if match[3] else now.year
+        year += 2000 if year < 100 else 0
+        day, explicit_day = _safe_date(year, int(match[2]), int(match[1])), True
+        if day and not match[3] and day < now.date():
+            day = _safe_date(year + 1, day.month, day.day)
+    elif match := _DAY_OF_MONTH.search(text):
+        day, explicit_day = _safe_date(now.year, now.month, int(match[1])), True
+        if day and day < now.date():
+            month = now.month % 12 + 1
+            day = _safe_date(now.year + (month == 1), month, int(match[1]))
+    elif match := _WEEKDAY.search(text):
+        day, explicit_day = now.date() + timedelta(days=(WEEKDAYS[match[1]] - now.weekday()) % 7), True
+    elif match := _RELATIVE.search(text):
+        day, explicit_day = now.date() + timedelta(days=RELATIVE_DAYS[match[1]]), True
+    if explicit_day:
+        if day is None:
+            return None  # "31/2"
+        if match.re is not _RELATIVE and match.re is not _WEEKDAY:
+            text = text[:match.start()] + " " + text[match.end():]
+
+    # Time
+    hour = minute = None
+    meridiem = ""
+    if match := _QUARTER.search(text):
+        hour, offset = int(match[3]), 30 if match[1] == "half" else 15
+        hour, minute = (hour, offset) if match[2] == "past" else (hour - 1, 60 - offset)
+    else:
+        for match in _TIME.finditer(text):
+            marked = any(match[group] for group in (2, 3, 4, 5, 6)) or len(match[0].strip()) > len(match[1])
+            if not marked and not _TIME_BEFORE.search(text[:match.start()]) and not _TIME_AFTER.match(text[match.end():]):
+                continue  # "4 nguoi", "for 4"
+            hour, minute = int(match[1]), int(match[2] or match[3] or 0)
+            if match[4]:
+                minute = 30
+            elif match[5]:
+                hour, minute = hour - 1, 60 - int(match[5])
+            meridiem = match[6] or ""
+            break
+        else:
+            if noon:
+                hour, minute = 12, 0
+    if hour is None or not (0 <= hour <= 23 and 0 <= minute < 60):
+        return None
+
+    if hour < 12 and (meridiem == "p" or (evening and meridiem != "a")):
+        hour += 12
+    elif hour == 12 and (meridiem == "a" or (morning and not noon and not meridiem)):
+        hour = 0
+    elif hour < 12 and noon and not morning and hour < 6:
+        hour += 12  # "1 giờ trưa"
+    elif hour < 12 and not (meridiem or morning or noon):
+        # No am/pm: the reading inside the opening hours ("7 giờ" at a dinner restaurant)
+        if not opening[0] <= hour * 60 + minute < opening[1] and opening[0] <= (hour + 12) * 60 + minute < opening[1]:
+            hour += 12
+
+    moment = datetime.combine(day or now.date(), datetime.min.time()).replace(hour=hour, minute=minute)
+    if day is None and moment < now:
+        moment += timedelta(days=1)
+    return moment
+
+
+def _safe_date(year: int, month: int, day: int) -> Optional[date]:
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+# ---------- index ----------
+class TableSchedule:
+    """Bookings of one table, sorted by start; they never overlap, so ends are sorted too"""
+
+    __slots__ = ("seats", "starts", "ends", "ids")
+
+    def __init__(self, seats: int) -> None:
+        self.seats = seats
+        self.starts: list[float] = []
+        self.ends: list[float] = []
+        self.ids: list[int] = []
+
+    def is_free(self, start: float, end: float) -> bool:
+        i = bisect.bisect_right(self.starts, start)
+        if i and self.ends[i - 1] > start:
+            return False
+        return i == len(self.starts) or self.starts[i] >= end
+
+    def add(self, booking_id: int, start: float, end: float) -> None:
+        i = bisect.bisect_right(self.starts, start)
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+        self.ids.insert(i, booking_id)
+
+    def remove(self, booking_id: int, start: float) -> bool:
+        i = bisect.bisect_left(self.starts, start)
+        while i < len(self.starts) and self.starts[i] == start:
+            if self.ids[i] == booking_id:
+                del self.starts[i], self.ends[i], self.ids[i]
+                return True
+            i += 1
+        return False
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+
+@dataclass
+class Booking:
+    id: int
+    table: int
+    party_size: int
+    start: float
+    end: float
+    customer_name: str = ""
+    customer_phone: str = ""
+
+    @property
+    def starts_at(self) -> datetime:
+        return datetime.fromtimestamp(self.start)
+
+
+class ReservationBook:
+    """
+    Table schedules of this process, kept in sync with the SQLite file (other job processes
+    book too): every query first applies the rows changed since (seq > last seen).
+    """
+
+    def __init__(self, path: str = RESERVATIONS_FILE, tables: Optional[list[int]] = None,
+                 opening: Optional[tuple[int, int]] = None, dining_minutes: int = DINING_MINUTES) -> None:
+        self.path = path
+        self.opening = opening or parse_opening()
+        self.duration = dining_minutes * 60
+        self.tables = [TableSchedule(seats) for seats in (tables or parse_tables())]  # table_no = index + 1
+        self.max_party = max(table.seats for table in self.tables)
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=10.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        with self._lock:
+            self._refresh()
+
+    # Must hold self._lock
+    def _refresh(self) -> int:
+        rows = self._conn.execute(
+            "SELECT id, table_no, start_ts, end_ts, status, seq FROM bookings WHERE seq > ? AND end_ts >= ?"
+            " ORDER BY seq",
+            (self._seq, time.time() - HISTORY_DAYS * 86400),
+        ).fetchall()
+        for booking_id, table_no, start, end, status, seq in rows:
+            if not 1 <= table_no <= len(self.tables):
+                continue  # table removed from RESERVATION_TABLES
+            schedule = self.tables[table_no - 1]
+            schedule.remove(booking_id, start)
+            if status == "booked":
+                schedule.add(booking_id, start, end)
+            self._seq = max(self._seq, seq)
+        if rows:
+            self._seq = max(self._seq, rows[-1][-1])
+        return len(rows)
+
+    def refresh(self) -> int:
+        with self._lock:
+            return self._refresh()
+
+    def is_open(self, start: float) -> bool:
+        moment = datetime.fromtimestamp(start)
+        minutes = moment.hour * 60 + moment.minute
+        return self.opening[0] <= minutes and minutes * 60 + self.duration <= self.opening[1] * 60
+
+    def _free_table(self, start: float, party_size: int) -> Optional[int]:
+        """Smallest free table with enough seats (table_no), keeps big tables for big parties"""
+        end = start + self.duration
+        for table_no, schedule in enumerate(self.tables, 1):
+            if schedule.seats >= party_size and schedule.is_free(start, end):
+                return table_no
+        return None
+
+    def free_table(self, start: float, party_size: int) -> Optional[int]:
+        with self._lock:
+            self._refresh()
+            return self._free_table(start, party_size) if self.is_open(start) else None
+
+    def suggest(self, start: float, party_size: int, count: int = 3,
+                window_minutes: int = SUGGEST_WINDOW_MINUTES) -> list[datetime]:
+        """Closest free times on the SLOT_MINUTES grid, earlier or later, within window_minutes"""
+        slot = SLOT_MINUTES * 60
+        base = start - start % slot
+        steps = window_minutes // SLOT_MINUTES
+        candidates = sorted((base + step * slot for step in range(-steps, steps + 1)),
+                            key=lambda t: (abs(t - start), t))
+        now = time.time()
+        found = []
+        with self._lock:
+            self._refresh()
+            for candidate in candidates:
+                if candidate == start or candidate < now or not self.is_open(candidate):
+                    continue
+                if self._free_table(candidate, party_size) is not None:
+                    found.append(candidate)
+                    if len(found) == count:
+                        break
+        return [datetime.fromtimestamp(t) for t in sorted(found)]
+
+    def book(self, start: float, party_size: int, customer_name: str = "",
+             customer_phone: str = "") -> Optional[Booking]:
+        """Holds a table, None when none is free; the write lock makes it safe across processes"""
+        return self._book(start, party_size, customer_name, customer_phone)
+
+    def rebook(self, old_id: int, start: float, party_size: int, customer_name: str = "",
+               customer_phone: str = "") -> Optional[Booking]:
+        """
+        Moves booking old_id to a new time / party size in one transaction: the new table is held
+        and the old one cancelled together. None when nothing is free, the old booking stays.
+        """
+        return self._book(start, party_size, customer_name, customer_phone, replaces=old_id)
+
+    def _book(self, start: float, party_size: int, customer_name: str, customer_phone: str,
+              replaces: Optional[int] = None) -> Optional[Booking]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            old = None
+            try:
+                self._refresh()  # bookings of the other processes, under the write lock
+                if replaces is not None:
+                    old = self._conn.execute(
+                        "SELECT table_no, start_ts, end_ts FROM bookings WHERE id = ? AND status = 'booked'",
+                        (replaces,),
+                    ).fetchone()
+                    # Its own table is free for the new time (moving by 30 minutes keeps the table)
+                    if old is not None and not (1 <= old[0] <= len(self.tables)
+                                                and self.tables[old[0] - 1].remove(replaces, old[1])):
+                        old = None
+                table_no = self._free_table(start, party_size) if self.is_open(start) else None
+                if table_no is None:
+                    self._conn.execute("ROLLBACK")
+                    if old is not None:
+                        self.tables[old[0] - 1].add(replaces, old[1], old[2])
+                    return None
+                if replaces is not None:
+                    self._conn.execute(
+                        "UPDATE bookings SET status = 'cancelled', seq = (SELECT MAX(seq) + 1 FROM bookings)"
+                        " WHERE id = ? AND status = 'booked'",
+                        (replaces,),
+                    )
+                end = start + self.duration
+                booking_id = self._conn.execute(
+                    "INSERT INTO bookings (table_no, party_size, start_ts, end_ts, customer_name, customer_phone,"
+                    " seq, created_at) VALUES (?, ?, ?, ?, ?, ?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM bookings), ?)",
+                    (table_no, party_size, start, end, customer_name, customer_phone, time.time()),
+                ).lastrowid
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                if old is not None:
+                    self.tables[old[0] - 1].add(replaces, old[1], old[2])
+                raise
+            self._refresh()
+        if replaces is not None:
+            logger.info("🔁 Booking moved", extra=fields(booking_id=booking_id, replaces=replaces, table=table_no,
+                                                        party_size=party_size,
+                                                        start=datetime.fromtimestamp(start).isoformat(timespec="minutes")))
+        else:
+            logger.info("📅 Table booked", extra=fields(booking_id=booking_id, table=table_no, party_size=party_size,
+                                                        start=datetime.fromtimestamp(start).isoformat(timespec="minutes")))
+        return Booking(booking_id, table_no, party_size, start, end, customer_name, customer_phone)
+
+    def cancel(self, booking_id: int) -> bool:
+        with self._lock:
+            cancelled = self._conn.execute(
+                "UPDATE bookings SET status = 'cancelled', seq = (SELECT MAX(seq) + 1 FROM bookings)"
+                " WHERE id = ? AND status = 'booked'",
+                (booking_id,),
+            ).rowcount
+            self._refresh()
+        if cancelled:
+            logger.info("🗑️ Booking cancelled", extra=fields(booking_id=booking_id))
+        return bool(cancelled)
+
+    def seating_hours(self) -> str:
+        """'10:00-20:30': first and last time a table can be booked"""
+        last = self.opening[1] - self.duration // 60
+        return f"{self.opening[0] // 60:02d}:{self.opening[0] % 60:02d}-{last // 60:02d}:{last % 60:02d}"
+
+    def bookings(self) -> int:
+        with self._lock:
+            return sum(len(table) for table in self.tables)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_book: Optional[ReservationBook] = None
+_book_lock = threading.Lock()
+
+
+def get_book() -> ReservationBook:
+    """Process-wide reservation book (opened on first use)"""
+    global _book
+    with _book_lock:
+        if _book is None:
+            _book = ReservationBook()
+        return _book
+
+
+def format_time(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%d %H:%M")
+
+
+def format_slots(slots: list[datetime], reference: datetime) -> str:
+    """'18:30, 20:15' (with the date when it is not the requested day)"""
+    return ", ".join(slot.strftime("%H:%M" if slot.date() == reference.date() else "%Y-%m-%d %H:%M")
+                     for slot in slots)
@@ -1,197 +1,46 @@
 import logging
 import json
-import unicodedata
+import time
 from dataclasses import dataclass, field
+from datetime import datetime
 from typing import Annotated, Optional
-import requests
 import asyncio
-import ssl
+import uuid
 
-import yaml
 from dotenv import load_dotenv
 from pydantic import Field
-from aiohttp import web
 
-from livekit.agents import AgentServer, JobContext, cli
+from livekit.agents import AgentServer, JobContext, JobExecutorType, JobProcess, cli, tokenize, utils
 from livekit.agents.llm import function_tool
 from livekit.agents.voice import Agent, AgentSession, RunContext
-from livekit.plugins import deepgram, openai, silero, google, elevenlabs, soniox
-from livekit.api import AccessToken, VideoGrants, LiveKitAPI, CreateAgentDispatchRequest, CreateRoomRequest, DeleteRoomRequest
-# cartesia not needed - removed to avoid import error
+# STT/LLM/TTS/VAD plugins are imported on demand by providers.py (only the selected ones)
+# yaml and requests are imported where they are used; token_server only when run as a script
+# (job processes do not need the token API, webhook index or janitor)
+
+import agent_logging
+import inventory_feed
+import inventory_log
+import order_ledger
+import prompts
+import providers
+import reservations
+import session_store
+import stock_holds
+from drain import DrainCoordinator, flush_pending_work, pending_work
+from viseme import VisemePublisher
+from agent_logging import fields
+from text_chunker import ClauseSegmenter, protected_prefixes, split_clauses
+from prompts import MENU
+from inventory import find_inventory_key, validate_order, deduct_inventory, order_quantities
 
 import os
 from dotenv import load_dotenv
 load_dotenv()
 
-# ==================== TOKEN SERVER CONFIG ====================
-TOKEN_SERVER_PORT = 8089
-AGENT_NAME = "restaurant-bot"
-
 logger = logging.getLogger("restaurant-bot")
 logger.setLevel(logging.INFO)
 
-# ==================== TOKEN SERVER FUNCTIONS ====================
-async def handle_token_request(request: web.Request) -> web.Response:
-    """
-    Create room + dispatch agent + generate token (ALL IN ONE).
-    
-    Flow:
-    1. Create room on LiveKit server
-    2. Dispatch agent to room
-    3. Generate JWT token for user
-    """
-    try:
-        room_name = request.query.get('room', 'default-room')
-        participant_name = request.query.get('name', 'user')
-        
-        api_key = os.getenv("LIVEKIT_API_KEY")
-        api_secret = os.getenv("LIVEKIT_API_SECRET")
-        livekit_url = os.getenv("LIVEKIT_URL")
-        
-        if not api_key or not api_secret:
-            return web.json_response(
-                {"error": "Missing LIVEKIT credentials"}, 
-                status=500
-            )
-        
-        metadata = {"participant_name": participant_name}
-        
-        # ====== STEP 1: Create room on LiveKit server ======
-        async with LiveKitAPI(livekit_url, api_key, api_secret) as lk_api:
-            try:
-                await lk_api.room.create_room(
-                    CreateRoomRequest(
-                        name=room_name,
-                        metadata=json.dumps(metadata),
-                        empty_timeout=300,  # Auto-delete after 5 min empty
-                        max_participants=10
-                    )
-                )
-                logger.info(f"✅ Room created: {room_name}")
-            except Exception as e:
-                logger.warning(f"⚠️ Room may already exist: {e}")
-            
-            # ====== STEP 2: Dispatch agent to room ======
-            try:
-                logger.info(f"🤖 Dispatching agent '{AGENT_NAME}' to room {room_name}...")
-                await lk_api.agent_dispatch.create_dispatch(
-                    CreateAgentDispatchRequest(
-                        agent_name=AGENT_NAME,
-                        room=room_name,
-                        metadata=json.dumps(metadata)
-                    )
-                )
-                logger.info(f"✅ Agent '{AGENT_NAME}' dispatched to room {room_name}!")
-            except Exception as dispatch_error:
-                logger.error(f"❌ Agent dispatch failed: {dispatch_error}")
-        
-        # ====== STEP 3: Generate JWT token ======
-        token = AccessToken(api_key, api_secret)
-        token.with_identity(participant_name)
-        token.with_name(participant_name)
-        token.with_grants(
-            VideoGrants(
-                room_join=True,
-                room=room_name,
-                can_publish=True,
-                can_subscribe=True,
-                can_publish_data=True,
-            )
-        )
-        
-        jwt_token = token.to_jwt()
-        
-        logger.info(f"✅ Token generated | Room: {room_name} | User: {participant_name}")
-        
-        response = web.json_response({
-            "token": jwt_token,
-            "url": livekit_url,
-            "room": room_name,
-            "name": participant_name
-        })
-        response.headers['Access-Control-Allow-Origin'] = '*'
-        return response
-        
-    except Exception as e:
-        logger.error(f"❌ Error generating token: {e}")
-        return web.json_response({"error": str(e)}, status=500)
-
-
-async def handle_delete_room(request: web.Request) -> web.Response:
-    """Delete a LiveKit room when user disconnects"""
-    try:
-        room_name = request.match_info.get('room_name')
-        if not room_name:
-            return web.json_response({"error": "Room name required"}, status=400)
-        
-        api_key = os.getenv("LIVEKIT_API_KEY")
-        api_secret = os.getenv("LIVEKIT_API_SECRET")
-        livekit_url = os.getenv("LIVEKIT_URL")
-        
-        logger.info(f"🗑️ Deleting room: {room_name}")
-        
-        async with LiveKitAPI(livekit_url, api_key, api_secret) as lk_api:
-            await lk_api.room.delete_room(
-                DeleteRoomRequest(room=room_name)
-            )
-        
-        logger.info(f"✅ Room deleted: {room_name}")
-        
-        response = web.json_response({
-            "success": True,
-            "message": f"Room '{room_name}' deleted",
-            "room_name": room_name
-        })
-        response.headers['Access-Control-Allow-Origin'] = '*'
-        return response
-        
-    except Exception as e:
-        logger.error(f"❌ Error deleting room: {e}")
-        return web.json_response({"error": str(e)}, status=500)
-
-
-async def handle_cors(request: web.Request) -> web.Response:
-    """Handle CORS preflight requests"""
-    return web.Response(
-        status=200,
-        headers={
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Methods': 'GET, DELETE, OPTIONS',
-            'Access-Control-Allow-Headers': 'Content-Type',
-        }
-    )
-
-
-async def start_token_server():
-    """Start the HTTP token server"""
-    app = web.Application()
-    app.router.add_get('/api/token', handle_token_request)
-    app.router.add_delete('/api/room/{room_name}', handle_delete_room)
-    app.router.add_options('/api/token', handle_cors)
-    app.router.add_options('/api/room/{room_name}', handle_cors)
-    
-    # Check for SSL certs
-    cert_file = os.path.join(os.path.dirname(__file__), '.cert/server-cert.pem')
-    key_file = os.path.join(os.path.dirname(__file__), '.cert/server-key.pem')
-    
-    ssl_context = None
-    protocol = "http"
-    
-    if os.path.exists(cert_file) and os.path.exists(key_file):
-        ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
-        ssl_context.load_cert_chain(cert_file, key_file)
-        protocol = "https"
-        logger.info("🔒 Token Server: HTTPS enabled")
-    else:
-        logger.info("⚠️ Token Server: Running without HTTPS")
-    
-    runner = web.AppRunner(app)
-    await runner.setup()
-    site = web.TCPSite(runner, '0.0.0.0', TOKEN_SERVER_PORT, ssl_context=ssl_context)
-    await site.start()
-    
-    logger.info(f"🚀 Token Server running at: {protocol}://0.0.0.0:{TOKEN_SERVER_PORT}")
-    logger.info(f"🔗 Token endpoint: {protocol}://localhost:{TOKEN_SERVER_PORT}/api/token?room=<room>&name=<name>")
+AGENT_NAME = "restaurant-bot"  # token_server.AGENT_NAME dispatches this agent
 
 
 # ==================== RESTAURANT AGENT ====================
@@ -207,7 +56,10 @@ class UserData:
     customer_name: Optional[str] = None
     customer_phone: Optional[str] = None
 
-    reservation_time: Optional[str] = None
+    reservation_time: Optional[str] = None  # "YYYY-MM-DD HH:MM", checked against the tables (reservations.py)
+    party_size: Optional[int] = None
+    reservation_id: Optional[int] = None
+    booked_time: Optional[str] = None  # reservation_time of reservation_id, kept when moving it fails
 
     order: Optional[dict[str, int]] = None  # Changed to dict: {item_name: quantity}
 
@@ -220,13 +72,18 @@ class UserData:
 
     agents: dict[str, Agent] = field(default_factory=dict)
     prev_agent: Optional[Agent] = None
+    active_agent: str = "greeter"  # key in agents, checkpointed for resume (session_store.py)
+    resumed: bool = False  # restored from a checkpoint, the next on_enter tells the LLM
     inventory: dict = field(default_factory=dict)  # Add inventory tracking
+    session_id: str = field(default_factory=lambda: uuid.uuid4().hex)  # owner of the stock holds; the room name
+    viseme: Optional[VisemePublisher] = None  # mouth-frame timeline for the avatar
 
     def summarize(self) -> str:
         data = {
             "customer_name": self.customer_name or "unknown",
             "customer_phone": self.customer_phone or "unknown",
             "reservation_time": self.reservation_time or "unknown",
+            "party_size": self.party_size or "unknown",
             "order": self.order or "unknown",
             "credit_card": {
                 "number": self.customer_credit_card or "unknown",
@@ -239,13 +96,12 @@ class UserData:
             "checked_out": self.checked_out or False,
         }
         # summarize in yaml performs better than json
+        import yaml
         return yaml.dump(data)
 
 
 RunContext_T = RunContext[UserData]
 
-INVENTORY_FILE = "/home/sotatek/Documents/Uyen/demo_voice/inventory.json"
-
 # Telegram configuration
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
@@ -258,6 +114,7 @@ def send_telegram_notification(message: str) -> bool:
         return False
     
     try:
+        import requests
         url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
         payload = {
             "chat_id": TELEGRAM_CHAT_ID,
@@ -276,98 +133,74 @@ def send_telegram_notification(message: str) -> bool:
         logger.error(f"❌ Failed to send Telegram notification: {e}")
         return False
 
-# Inventory management functions
-def load_inventory() -> dict:
-    """Load inventory from JSON file"""
-    try:
-        logger.info(f"📂 Loading inventory from: {INVENTORY_FILE}")
-        with open(INVENTORY_FILE, 'r', encoding='utf-8') as f:
-            inventory = json.load(f)
-        logger.info(f"✅ Inventory loaded successfully: {list(inventory.keys())}")
-        return inventory
-    except FileNotFoundError:
-        logger.error(f"❌ Inventory file not found: {INVENTORY_FILE}")
-        return {}
-    except json.JSONDecodeError as e:
-        logger.error(f"❌ Invalid JSON in inventory file: {e}")
-        return {}
-    except Exception as e:
-        logger.error(f"❌ Error loading inventory: {e}")
-        return {}
 
-def save_inventory(inventory: dict) -> None:
-    """Save inventory to JSON file"""
-    try:
-        with open(INVENTORY_FILE, 'w') as f:
-            json.dump(inventory, f, indent=2)
-        logger.info("Inventory saved successfully")
-    except Exception as e:
-        logger.error(f"Failed to save inventory: {e}")
-
-def normalize_item_name(name: str) -> str:
-    """Normalize item name: remove quotes, accents, convert to lowercase"""
-    # Remove quotes
-    name = name.strip().strip("'\"")
-    # Convert to lowercase
-    name = name.lower()
-    # Remove Vietnamese accents
-    nfd = unicodedata.normalize('NFD', name)
-    name = ''.join(char for char in nfd if unicodedata.category(char) != 'Mn')
-    return name
-
-def find_inventory_key(item_name: str, inventory: dict) -> Optional[str]:
-    """Find matching inventory key for item name (supports partial matching)"""
-    normalized_input = normalize_item_name(item_name)
-    logger.info(f"🔍 Looking for '{item_name}' → normalized: '{normalized_input}'")
-    
-    # Try exact match
-    if normalized_input in inventory:
-        logger.info(f"✅ Exact match found: '{normalized_input}'")
-        return normalized_input
-    
-    # Try partial match - check if input is in any key or vice versa
-    for key in inventory.keys():
-        if normalized_input in key or key in normalized_input:
-            logger.info(f"✅ Partial match found: '{key}' matches '{normalized_input}'")
-            return key
-        # Check if they start with the same words
-        if normalized_input.startswith(key) or key.startswith(normalized_input):
-            logger.info(f"✅ Prefix match found: '{key}' matches '{normalized_input}'")
-            return key
-    
-    logger.warning(f"❌ No match found for '{normalized_input}' in inventory keys: {list(inventory.keys())}")
-    return None
+def create_agent_llm():
+    """LLM used by the Greeter (the other agents use the session LLM)"""
+    return providers.create_llm()
 
-def check_availability(inventory: dict, order: dict[str, int]) -> tuple[bool, str]:
-    """
-    Check if items are available in sufficient quantity
-    Returns: (is_available, message)
-    """
-    for item_name, quantity in order.items():
-        item_key = find_inventory_key(item_name, inventory)
-        
-        if item_key is None:
-            return False, f"Sản phẩm '{item_name}' không có trong menu / Item '{item_name}' is not in the menu"
-        
-        available = inventory[item_key]["quantity"]
-        display_name = inventory[item_key]["name"]
-        
-        if available < quantity:
-            return False, (
-                f"Xin lỗi, chỉ còn {available} {display_name}, không đủ {quantity} / "
-                f"Sorry, only {available} {display_name} available, not enough for {quantity}"
-            )
-    
-    return True, "Đủ hàng / Available"
 
-def deduct_inventory(inventory: dict, order: dict[str, int]) -> dict:
-    """Deduct ordered items from inventory"""
-    for item_name, quantity in order.items():
-        item_key = find_inventory_key(item_name, inventory)
-        if item_key and item_key in inventory:
-            inventory[item_key]["quantity"] -= quantity
-            logger.info(f"✅ Deducted {quantity}x {inventory[item_key]['name']}, remaining: {inventory[item_key]['quantity']}")
-    return inventory
+def create_agent_tts():
+    """Voice shared by all agents"""
+    return providers.create_tts(sentence_tokenizer=create_sentence_tokenizer())
+
+
+# ==================== TTS TEXT CHUNKING ====================
+class ClauseStream(tokenize.SentenceStream):
+    def __init__(self, segmenter: ClauseSegmenter) -> None:
+        super().__init__()
+        self._segmenter = segmenter
+        self._segment_id = utils.shortuuid()
+
+    def _emit(self, chunks: list[str]) -> None:
+        for chunk in chunks:
+            self._event_ch.send_nowait(tokenize.TokenData(token=chunk, segment_id=self._segment_id))
+
+    def push_text(self, text: str) -> None:
+        self._check_not_closed()
+        self._emit(self._segmenter.push(text))
+
+    def flush(self) -> None:
+        self._check_not_closed()
+        self._emit(self._segmenter.flush())
+        self._segment_id = utils.shortuuid()
+
+    def end_input(self) -> None:
+        self.flush()
+        self._event_ch.close()
+
+    async def aclose(self) -> None:
+        self._event_ch.close()
+
+
+class ClauseTokenizer(tokenize.SentenceTokenizer):
+    """Earliest safe clause boundaries (text_chunker.py) instead of whole sentences"""
+
+    def __init__(self, **options) -> None:
+        self._options = options
+
+    def tokenize(self, text: str, *, language=None) -> list[str]:
+        return split_clauses(text, **self._options)
+
+    def stream(self, *, language=None) -> ClauseStream:
+        return ClauseStream(ClauseSegmenter(**self._options))
+
+
+_protected_item_names: Optional[list[str]] = None
+
+
+def create_sentence_tokenizer() -> Optional[ClauseTokenizer]:
+    """TTS_CHUNKER=0 keeps the provider's own sentence tokenizer"""
+    global _protected_item_names
+    if os.getenv("TTS_CHUNKER", "1") != "1":
+        return None
+    if _protected_item_names is None:
+        # Item names with punctuation ("Fish & Chips", "French Macarons (6pc)") are never split
+        names = (item.get("name", key) for key, item in inventory_feed.get_feed().snapshot().items())
+        _protected_item_names = [name for name in names if protected_prefixes([name])]
+    return ClauseTokenizer(
+        min_chars=int(os.getenv("TTS_MIN_CHUNK_CHARS", "20")),
+        protected=_protected_item_names,
+    )
 
 
 # common functions
@@ -402,13 +235,33 @@ async def to_greeter(context: RunContext_T) -> Agent:
     """Called when user asks any unrelated questions or requests
     any other services not in your job description."""
     curr_agent: BaseAgent = context.session.current_agent
+    # Items held for an order that was not checked out go back to the other callers (stock_holds.py)
+    session_id = context.userdata.session_id
+    await asyncio.to_thread(lambda: stock_holds.get_holds().release(session_id))
     return await curr_agent._transfer_to_agent("greeter", context)
 
 
+async def hold_stock(userdata: UserData, order: dict[str, int]) -> Optional[str]:
+    """Hold the order's items for this call (stock_holds.py); the reply for the LLM when one is short"""
+    wanted = order_quantities(userdata.inventory, order)
+    holds = await asyncio.to_thread(stock_holds.get_holds)
+    # Stock as of the latest inventory log event, read inside the hold transaction
+    held, available = await asyncio.to_thread(holds.hold, userdata.session_id, wanted,
+                                              inventory_feed.get_feed().current)
+    if held:
+        return None
+    key, quantity = next((key, qty) for key, qty in wanted.items() if qty > available[key])
+    left, name = max(0, available[key]), userdata.inventory[key]["name"]
+    return (
+        f"❌ Xin lỗi, hiện chỉ còn {left} {name} (phần còn lại đang được giữ cho đơn khác), không đủ {quantity} / "
+        f"Sorry, only {left} {name} left right now (the rest is held for other orders), not enough for {quantity}"
+    )
+
+
 class BaseAgent(Agent):
     async def on_enter(self) -> None:
         agent_name = self.__class__.__name__
-        logger.info(f"entering task {agent_name}")
+        logger.info("entering task", extra=fields(agent=agent_name))
 
         userdata: UserData = self.session.userdata
         chat_ctx = self.chat_ctx.copy()
@@ -422,31 +275,45 @@ class BaseAgent(Agent):
             items_copy = [item for item in truncated_chat_ctx.items if item.id not in existing_ids]
             chat_ctx.items.extend(items_copy)
 
-        # add an instructions including the user data as assistant message
+        resumed, userdata.resumed = userdata.resumed, False
+
+        # The per-session state goes last: the instructions before it stay byte-identical across
+        # sessions, so the provider can serve them from its prompt cache (prompts.py)
         chat_ctx.add_message(
             role="system",  # role=system works for OpenAI's LLM and Realtime API
-            content=(
-                f"You are {agent_name} agent. Current user data is {userdata.summarize()}\n\n"
-                "🚨 LANGUAGE RULE: Look at the user's previous messages.\n"
-                "- If they contain Vietnamese words (Xin chào, tôi, muốn, đặt, etc.) → SPEAK VIETNAMESE ONLY\n"
-                "- If they are in English → SPEAK ENGLISH ONLY\n"
-                "- NEVER mix languages. Your ENTIRE response must be in ONE language."
-            ),
+            content=prompts.state_message(agent_name, userdata.summarize(), resumed=resumed),
         )
         await self.update_chat_ctx(chat_ctx)
         self.session.generate_reply(tool_choice="none")
 
+    async def tts_node(self, text, model_settings):
+        """Tap the outgoing TTS audio to stream the viseme timeline to the avatar"""
+        viseme: Optional[VisemePublisher] = self.session.userdata.viseme
+        if viseme is None:
+            async for frame in Agent.default.tts_node(self, text, model_settings):
+                yield frame
+            return
+
+        viseme.start_segment()
+        try:
+            async for frame in Agent.default.tts_node(self, text, model_settings):
+                viseme.push_frame(frame)
+                yield frame
+        finally:
+            viseme.end_segment()
+
     async def _transfer_to_agent(self, name: str, context: RunContext_T) -> tuple[Agent, str]:
         userdata = context.userdata
         current_agent = context.session.current_agent
         next_agent = userdata.agents[name]
         userdata.prev_agent = current_agent
+        userdata.active_agent = name
 
         return next_agent, f"Transferring to {name}."
 
 
 class Greeter(BaseAgent):
-    def __init__(self, menu: str) -> None:
+    def __init__(self, menu: str, llm=None, tts=None) -> None:
         # Define tools first so they can be passed to super().__init__
         @function_tool()
         async def to_reservation_tool(context: RunContext_T) -> tuple['Agent', str]:
@@ -464,63 +331,97 @@ class Greeter(BaseAgent):
             return await self._transfer_to_agent("takeaway", context)
         
         super().__init__(
-            instructions=(
-                "🚨🚨🚨 ABSOLUTE CRITICAL RULE - LANGUAGE MATCHING 🚨🚨🚨\n\n"
-                "RULE #1: IF USER INPUT CONTAINS VIETNAMESE WORDS → RESPOND 100% IN VIETNAMESE\n"
-                "RULE #2: IF USER INPUT IS IN ENGLISH → RESPOND 100% IN ENGLISH\n"
-                "RULE #3: NEVER, EVER MIX LANGUAGES IN YOUR RESPONSE\n\n"
-                "Examples:\n"
-                "❌ WRONG: User: 'Xin chào' → You: 'Hello! How can I help you?'\n"
-                "✅ CORRECT: User: 'Xin chào' → You: 'Xin chào! Tôi có thể giúp gì cho bạn?'\n\n"
-                "❌ WRONG: User: 'Hello' → You: 'Xin chào! What do you need?'\n"
-                "✅ CORRECT: User: 'Hello' → You: 'Hello! How can I help you today?'\n\n"
-                f"You are a friendly Sota Yummy restaurant receptionist. Our Menu:\n{menu}\n"
-                "Ask if they want to make a reservation or place a takeaway order, then use tools to transfer."
-            ),
+            instructions=prompts.agent_instructions("greeter", menu),
             tools=[to_reservation_tool, to_takeaway_tool],
-            llm=google.LLM(
-                model="gemini-2.5-flash",
-                api_key=os.getenv("GEMINI_API_KEY")
-            ),
-            tts=elevenlabs.TTS(
-                api_key=os.getenv("ELEVENLABS_API_KEY"),
-                voice_id="Xb7hH8MSUJpSbSDYk0k2",
-                model="eleven_turbo_v2_5"
-            ),
+            llm=llm or create_agent_llm(),
+            tts=tts or create_agent_tts(),
         )
         self.menu = menu
 
 
 
 class Reservation(BaseAgent):
-    def __init__(self) -> None:
+    def __init__(self, menu: str, tts=None) -> None:
         super().__init__(
-            instructions=(
-                "🚨🚨🚨 IF USER SPEAKS VIETNAMESE → YOU SPEAK VIETNAMESE\n"
-                "🚨🚨🚨 IF USER SPEAKS ENGLISH → YOU SPEAK ENGLISH\n"
-                "🚨🚨🚨 NEVER MIX LANGUAGES\n\n"
-                "You are a reservation agent. Ask for: time, name, phone.\n"
-                "Then confirm the details."
-            ),
+            instructions=prompts.agent_instructions("reservation", menu),
             tools=[update_name, update_phone, to_greeter],
-            tts=elevenlabs.TTS(
-                api_key=os.getenv("ELEVENLABS_API_KEY"),
-                voice_id="Xb7hH8MSUJpSbSDYk0k2",
-                model="eleven_turbo_v2_5"
-            ),
+            tts=tts or create_agent_tts(),
         )
 
+    @function_tool()
+    async def update_party_size(
+        self,
+        party_size: Annotated[int, Field(description="Number of guests")],
+        context: RunContext_T,
+    ) -> str:
+        """Called when the user says how many people the table is for."""
+        userdata = context.userdata
+        if party_size < 1:
+            return "Please ask how many guests again."
+        book = await asyncio.to_thread(reservations.get_book)
+        if party_size > book.max_party:
+            return (
+                f"Bàn lớn nhất có {book.max_party} chỗ, nhóm {party_size} người vui lòng gọi nhà hàng / "
+                f"Our largest table seats {book.max_party}; for {party_size} guests please call the restaurant"
+            )
+        userdata.party_size = party_size
+        return f"The party size is updated to {party_size}"
+
+    @function_tool()
+    async def check_availability(
+        self,
+        time: Annotated[str, Field(description="The date and time as the customer said it, e.g. '7pm tomorrow'")],
+        context: RunContext_T,
+        party_size: Annotated[Optional[int], Field(description="Number of guests, if known")] = None,
+    ) -> str:
+        """Called when the user asks whether a table is free at some time, without booking yet."""
+        party_size = party_size or context.userdata.party_size or reservations.DEFAULT_PARTY_SIZE
+        _, message = await self._check_time(time, party_size)
+        return message
+
     @function_tool()
     async def update_reservation_time(
         self,
-        time: Annotated[str, Field(description="The reservation time")],
+        time: Annotated[str, Field(description="The reservation date and time as the customer said it")],
         context: RunContext_T,
     ) -> str:
         """Called when the user provides their reservation time.
         Confirm the time with the user before calling the function."""
         userdata = context.userdata
-        userdata.reservation_time = time
-        return f"The reservation time is updated to {time}"
+        party_size = userdata.party_size or reservations.DEFAULT_PARTY_SIZE
+        moment, message = await self._check_time(time, party_size)
+        if moment is not None:
+            userdata.reservation_time = reservations.format_time(moment)
+        return message
+
+    async def _check_time(self, time: str, party_size: int) -> tuple[Optional[datetime], str]:
+        """(parsed time if a table is free, reply for the LLM)"""
+        moment = reservations.parse_reservation_time(time)
+        if moment is None:
+            return None, (
+                f"Không hiểu thời gian '{time}', hỏi lại ngày và giờ / "
+                f"Could not understand the time '{time}', ask for the date and time again"
+            )
+        book = await asyncio.to_thread(reservations.get_book)
+        when = reservations.format_time(moment)
+        if moment < datetime.now():
+            return None, f"{when} đã qua, hỏi lại ngày và giờ / {when} is in the past, ask for the date and time again"
+        if not book.is_open(moment.timestamp()):
+            return None, (
+                f"Nhà hàng nhận đặt bàn từ {book.seating_hours()}, {when} không được / "
+                f"Tables can be booked between {book.seating_hours()}, {when} is not possible"
+            )
+        table = await asyncio.to_thread(book.free_table, moment.timestamp(), party_size)
+        if table is not None:
+            return moment, f"Còn bàn cho {party_size} người lúc {when} / A table for {party_size} is available at {when}"
+        slots = await asyncio.to_thread(book.suggest, moment.timestamp(), party_size)
+        if not slots:
+            return None, f"Hết bàn lúc {when} và các giờ gần đó / Fully booked at {when} and around it"
+        alternatives = reservations.format_slots(slots, moment)
+        return None, (
+            f"Hết bàn cho {party_size} người lúc {when}, còn trống: {alternatives} / "
+            f"Fully booked for {party_size} at {when}, available: {alternatives}"
+        )
 
     @function_tool()
     async def confirm_reservation(self, context: RunContext_T) -> str | tuple[Agent, str]:
@@ -532,42 +433,59 @@ class Reservation(BaseAgent):
         if not userdata.reservation_time:
             return "Please provide reservation time first."
 
-        # Send Telegram notification for reservation
+        if not userdata.party_size:
+            return "Please ask how many guests first."
+
+        # Hold a table (SQLite write lock shared with the other job processes); an update moves the
+        # existing booking in the same transaction instead of booking a second table
+        moment = datetime.fromisoformat(userdata.reservation_time)
+        book = await asyncio.to_thread(reservations.get_book)
+        previous = userdata.reservation_id
+        if previous:
+            booking = await asyncio.to_thread(book.rebook, previous, moment.timestamp(), userdata.party_size,
+                                              userdata.customer_name, userdata.customer_phone)
+        else:
+            booking = await asyncio.to_thread(
+                book.book, moment.timestamp(), userdata.party_size, userdata.customer_name, userdata.customer_phone
+            )
+        if booking is None:
+            userdata.reservation_time = userdata.booked_time if previous else None  # the booking still holds
+            slots = await asyncio.to_thread(book.suggest, moment.timestamp(), userdata.party_size)
+            alternatives = reservations.format_slots(slots, moment) or "—"
+            kept = ". Bàn đã đặt trước đó vẫn được giữ" if previous else ""
+            kept_en = ". The previous booking is kept" if previous else ""
+            return (
+                f"Vừa hết bàn lúc {moment:%H:%M}, còn trống: {alternatives}{kept} / "
+                f"The last table at {moment:%H:%M} was just taken, available: {alternatives}{kept_en}"
+            )
+        userdata.reservation_id = booking.id
+        userdata.booked_time = userdata.reservation_time
+
+        # Send Telegram notification for reservation (background thread, flushed at job shutdown)
         telegram_message = (
-            f"📅 <b>ĐẶT BÀN MỚI</b>\n"
+            f"📅 <b>{'ĐỔI GIỜ ĐẶT BÀN' if previous else 'ĐẶT BÀN MỚI'}</b>\n"
             f"━━━━━━━━━━━━━━━━━━\n"
             f"👤 <b>Khách hàng:</b> {userdata.customer_name}\n"
             f"📱 <b>Số điện thoại:</b> {userdata.customer_phone}\n"
             f"🕐 <b>Thời gian:</b> {userdata.reservation_time}\n"
+            f"👥 <b>Số khách:</b> {userdata.party_size} (bàn {booking.table})\n"
             f"━━━━━━━━━━━━━━━━━━\n"
             f"✅ Đặt bàn đã được xác nhận"
         )
-        send_telegram_notification(telegram_message)
+        pending_work.submit("telegram", send_telegram_notification, telegram_message)
+        if not previous:  # a moved booking is still one reservation
+            pending_work.submit("ledger", order_ledger.get_ledger().append_reservation, userdata.party_size,
+                                time.time())
 
         return await self._transfer_to_agent("greeter", context)
 
 
 class Takeaway(BaseAgent):
-    def __init__(self, menu: str) -> None:
+    def __init__(self, menu: str, tts=None) -> None:
         super().__init__(
-            instructions=(
-                "🚨🚨🚨 IF USER SPEAKS VIETNAMESE → YOU SPEAK VIETNAMESE\n"
-                "🚨🚨🚨 IF USER SPEAKS ENGLISH → YOU SPEAK ENGLISH\n"
-                "🚨🚨🚨 NEVER MIX LANGUAGES\n\n"
-                f"You take orders at Sota Yummy. Our Menu:\n{menu}\n"
-                "IMPORTANT: Ask what they want AND HOW MANY of each item.\n"
-                "Example questions:\n"
-                "- 'How many Cheeseburgers would you like?'\n"
-                "- 'How many Cappuccinos?'\n"
-                "- 'Would you like any desserts with that?'\n"
-                "Then clarify quantities and confirm the full order with quantities."
-            ),
+            instructions=prompts.agent_instructions("takeaway", menu),
             tools=[to_greeter],
-            tts=elevenlabs.TTS(
-                api_key=os.getenv("ELEVENLABS_API_KEY"),
-                voice_id="Xb7hH8MSUJpSbSDYk0k2",
-                model="eleven_turbo_v2_5"
-            ),
+            tts=tts or create_agent_tts(),
         )
 
     @function_tool()
@@ -582,28 +500,14 @@ class Takeaway(BaseAgent):
         """Called when the user creates or updates their order.
         The items should be a dictionary with item names as keys and quantities as values."""
         userdata = context.userdata
-        
-        # Debug logging
-        logger.info(f"🛒 Order requested: {items}")
-        logger.info(f"📦 Current inventory: {userdata.inventory}")
-        
-        # Check if inventory is loaded
-        if not userdata.inventory:
-            logger.error("❌ Inventory is empty!")
-            return "❌ Lỗi hệ thống: Không thể kiểm tra kho hàng / System error: Cannot check inventory"
-        
-        # Check if items are available in sufficient quantity
-        is_available, message = check_availability(userdata.inventory, items)
-        
-        if not is_available:
-            logger.warning(f"❌ Not available: {message}")
-            return f"❌ {message}"
-        
-        # Update order if available
-        userdata.order = items
-        order_summary = ", ".join([f"{qty}x {item}" for item, qty in items.items()])
-        logger.info(f"✅ Order updated: {order_summary}")
-        return f"✅ Đơn hàng đã cập nhật / Order updated: {order_summary}"
+        is_available, message = validate_order(userdata.inventory, items)
+        if is_available:
+            # Reserved for this call until checkout: other callers cannot be promised the same items
+            short = await hold_stock(userdata, items)
+            if short:
+                return short
+            userdata.order = items
+        return message
 
     @function_tool()
     async def check_stock(
@@ -616,7 +520,8 @@ class Takeaway(BaseAgent):
         item_key = find_inventory_key(item_name, userdata.inventory)
         
         if item_key and item_key in userdata.inventory:
-            quantity = userdata.inventory[item_key]["quantity"]
+            held = await asyncio.to_thread(lambda: stock_holds.get_holds().held([item_key], userdata.session_id))
+            quantity = max(0, userdata.inventory[item_key]["quantity"] - held[item_key])
             name = userdata.inventory[item_key]["name"]
             return f"Còn {quantity} {name} / We have {quantity} {name} available"
         else:
@@ -633,23 +538,11 @@ class Takeaway(BaseAgent):
 
 
 class Checkout(BaseAgent):
-    def __init__(self, menu: str) -> None:
+    def __init__(self, menu: str, tts=None) -> None:
         super().__init__(
-            instructions=(
-                "🚨🚨🚨 IF USER SPEAKS VIETNAMESE → YOU SPEAK VIETNAMESE\n"
-                "🚨🚨🚨 IF USER SPEAKS ENGLISH → YOU SPEAK ENGLISH\n"
-                "🚨🚨🚨 NEVER MIX LANGUAGES\n\n"
-                f"You handle checkout at Sota Yummy. Our Menu:\n{menu}\n"
-                "Confirm the total expense (in USD) and collect customer's name and phone number.\n"
-                "Example: 'Your total is $45.99'\n"
-                "Then complete the checkout process."
-            ),
+            instructions=prompts.agent_instructions("checkout", menu),
             tools=[update_name, update_phone, to_greeter],
-            tts=elevenlabs.TTS(
-                api_key=os.getenv("ELEVENLABS_API_KEY"),
-                voice_id="Xb7hH8MSUJpSbSDYk0k2",
-                model="eleven_turbo_v2_5"
-            ),
+            tts=tts or create_agent_tts(),
         )
 
     @function_tool()
@@ -673,11 +566,24 @@ class Checkout(BaseAgent):
         if not userdata.customer_name or not userdata.customer_phone:
             return "Please provide your name and phone number first."
 
-        # Deduct items from inventory after successful checkout
+        # Deduct items from inventory after successful checkout: appended to the inventory log, then
+        # the stock holds are released (in that order, so no other call is promised the sold items)
         if userdata.order:
+            # The hold may have expired or been released (back to the greeter): take it again
+            short = await hold_stock(userdata, userdata.order)
+            if short:
+                return short
             userdata.inventory = deduct_inventory(userdata.inventory, userdata.order)
-            save_inventory(userdata.inventory)
-            logger.info(f"Inventory updated after checkout: {userdata.order}")
+            sold = order_quantities(userdata.inventory, userdata.order)
+            # Other sessions of this process get the new quantities right away (inventory_feed.py)
+            await asyncio.to_thread(inventory_feed.get_feed().record, inventory_log.deduct_events(sold), "checkout")
+            await asyncio.to_thread(stock_holds.get_holds().release, userdata.session_id)
+            logger.info("Inventory updated after checkout", extra=fields(order=dict(userdata.order)))
+            # Sales ledger (order_ledger.py): names and prices copied here, the ledger thread must not
+            # read userdata.inventory while inventory_feed deltas add or remove its keys on the loop
+            priced = {key: {"name": userdata.inventory[key]["name"], "price": userdata.inventory[key]["price"]}
+                      for key in sold}
+            pending_work.submit("ledger", order_ledger.get_ledger().append_checkout, sold, priced, time.time())
 
         # Send Telegram notification with order details
         order_items = "\n".join([f"  • {qty}x {item}" for item, qty in userdata.order.items()]) if userdata.order else "Không có"
@@ -691,7 +597,7 @@ class Checkout(BaseAgent):
             f"━━━━━━━━━━━━━━━━━━\n"
             f"✅ Đơn hàng đã được xác nhận"
         )
-        send_telegram_notification(telegram_message)
+        pending_work.submit("telegram", send_telegram_notification, telegram_message)
 
         userdata.checked_out = True
         return await to_greeter(context)
@@ -702,138 +608,198 @@ class Checkout(BaseAgent):
         return await self._transfer_to_agent("takeaway", context)
 
 
-server = AgentServer()
+def create_agents(menu: str = MENU, llm=None, tts=None) -> dict[str, Agent]:
+    """All agents of one session; llm/tts override the cloud providers (replay harness)"""
+    return {
+        "greeter": Greeter(menu, llm=llm, tts=tts),
+        "reservation": Reservation(menu, tts=tts),
+        "takeaway": Takeaway(menu, tts=tts),
+        "checkout": Checkout(menu, tts=tts),
+    }
+
+
+def create_userdata(llm=None, tts=None) -> UserData:
+    """Per-session state: inventory snapshot (kept current by inventory_feed) + the four agents"""
+    userdata = UserData()
+    userdata.inventory = inventory_feed.get_feed().snapshot()
+    userdata.agents.update(create_agents(MENU, llm=llm, tts=tts))
+    return userdata
+
+
+# ==================== SESSION CHECKPOINTS ====================
+def checkpoint_on_tool_calls(session: AgentSession, room: str, participant: str) -> None:
+    """After every tool call: UserData, active agent and recent chat to session_store (background write)"""
+    store = session_store.get_store()
+
+    def on_tools_executed(_event) -> None:
+        userdata: UserData = session.userdata
+        checkpoint = session_store.Checkpoint(
+            room=room,
+            participant=participant,
+            agent=userdata.active_agent,
+            userdata=session_store.snapshot_userdata(userdata),
+            chat=session_store.compact_chat(
+                (item.role, item.text_content) for item in session.history.items if item.type == "message"
+            ),
+            updated_at=time.time(),
+        )
+        pending_work.submit("sessions", store.save, checkpoint)
+
+    session.on("function_tools_executed", on_tools_executed)
+
+
+async def resume_from_checkpoint(userdata: UserData, checkpoint: session_store.Checkpoint) -> Agent:
+    """Restore UserData and the recent chat; returns the agent that was handling the call"""
+    session_store.restore_userdata(userdata, checkpoint.userdata)
+    userdata.active_agent = checkpoint.agent if checkpoint.agent in userdata.agents else "greeter"
+    userdata.resumed = True
+    agent = userdata.agents[userdata.active_agent]
+    chat_ctx = agent.chat_ctx.copy()
+    for message in checkpoint.chat:
+        chat_ctx.add_message(role=message["role"], content=message["text"])
+    await agent.update_chat_ctx(chat_ctx)  # not started yet: only replaces its initial context
+    return agent
+
+
+server = AgentServer(
+    # JOB_EXECUTOR=thread: sessions share one process, so VAD_PROVIDER=silero-batched can batch them
+    job_executor_type=JobExecutorType.THREAD if os.getenv("JOB_EXECUTOR") == "thread" else JobExecutorType.PROCESS,
+)
+
+
+def prewarm(proc: JobProcess):
+    """Runs once per job process before it accepts jobs"""
+    # Log writes off the event loop that drives audio (LOG_SAMPLING / LOG_RATE_LIMIT)
+    agent_logging.setup()
+    providers.preload_plugins()
+    proc.userdata["vad"] = providers.create_vad()
+    inventory_feed.get_feed()  # reads the inventory once and starts watching it
+    stock_holds.get_holds()
+
+
+server.setup_fnc = prewarm
+
+# SIGUSR1: stop taking dispatches, let active calls finish (DRAIN_TIMEOUT), then exit
+drain_coordinator = DrainCoordinator(server, agent_name=AGENT_NAME)
+drain_coordinator.attach()
 
 
-@server.rtc_session(agent_name="restaurant-bot")
+@server.rtc_session(agent_name=AGENT_NAME)
 async def entrypoint(ctx: JobContext):
     """
     Explicit Dispatch Mode - Agent joins only when dispatched via API
     Dispatched automatically by token server when user joins room
     """
-    logger.info(f"🎯 Agent dispatched to room: {ctx.room.name}")
+    started = time.perf_counter()
+    room_name = ctx.job.room.name
+    logger.info(f"🎯 Agent dispatched to room: {room_name}")
+    
+    # Same room + participant as a checkpointed call (worker crash, dropped connection): resume it.
+    # participant_name is the identity the token server puts in the token and the dispatch metadata
+    participant = json.loads(ctx.job.metadata or "{}").get("participant_name")
+    resume = os.getenv("SESSION_RESUME", "1") == "1" and bool(participant)
+    checkpoint_task = None
+    if resume:
+        checkpoint_task = asyncio.create_task(
+            asyncio.to_thread(lambda: session_store.get_store().load(room_name, participant))
+        )
     
     # Connect to the room first (required for rtc_session)
     await ctx.connect(auto_subscribe="audio_only")
     
-    menu = """
-    ========== BREAKFAST (20 items) ==========
-    Sunny Side Up Eggs: $9.99 | Fluffy Pancakes: $11.99 | Belgian Waffles: $12.99
-    Avocado Toast: $13.50 | French Toast: $10.99 | Eggs Benedict: $14.99
-    Veggie Omelette: $11.50 | Breakfast Burrito: $12.99 | Açaí Bowl: $13.99
-    Greek Yogurt Parfait: $8.99 | Smoked Salmon Bagel: $15.99 | Butter Croissant: $6.99
-    Breakfast Sandwich: $10.50 | Steel Cut Oatmeal: $7.99 | Crispy Hash Browns: $5.99
-    Shakshuka: $13.99 | Nutella Crepes: $11.99 | Full English Breakfast: $18.99
-    Huevos Rancheros: $12.99 | Banana Nut Bread: $6.50
-
-    ========== MAIN DISHES (20 items) ==========
-    Classic Cheeseburger: $14.99 | Margherita Pizza: $18.99 | Grilled Salmon: $26.99
-    Pasta Carbonara: $16.99 | Ribeye Steak: $34.99 | Chicken Alfredo: $17.50
-    Fish & Chips: $18.99 | BBQ Baby Back Ribs: $28.99 | Chicken Parmesan: $19.99
-    Street Tacos: $14.99 | Lobster Tail: $22.99 | Spaghetti Bolognese: $15.99
-    Grilled Lamb Chops: $32.99 | Shrimp Scampi: $24.99 | Herb Roasted Chicken: $21.99
-    Grilled Pork Chops: $23.99 | Butter Chicken: $18.99 | Pad Thai: $16.99
-    Beef Lasagna: $17.99 | Grilled Chicken Salad: $13.99
-
-    ========== DRINKS (20 items) ==========
-    Mint Lemonade: $5.99 | Classic Mojito: $12.99 | Fresh Orange Juice: $6.50
-    Iced Caramel Latte: $5.50 | Mixed Berry Smoothie: $7.99 | Matcha Latte: $5.99
-    Classic Margarita: $11.99 | Chocolate Milkshake: $8.99 | Double Espresso: $3.99
-    Piña Colada: $13.99 | Hot Chocolate: $5.50 | Cappuccino: $4.99
-    Green Detox Smoothie: $8.50 | Red Wine Sangria: $10.99 | Peach Iced Tea: $4.50
-    Mango Lassi: $6.99 | Whiskey Sour: $13.99 | Vanilla Latte: $5.50
-    Fresh Coconut Water: $5.99 | Arnold Palmer: $4.99
-
-    ========== DESSERTS (20 items) ==========
-    Chocolate Gelato: $8.99 | NY Cheesecake: $9.99 | Glazed Donuts: $6.99
-    Classic Tiramisu: $10.99 | Crème Brûlée: $11.50 | Molten Lava Cake: $12.99
-    Fresh Fruit Tart: $8.99 | Red Velvet Cake: $9.50 | Apple Pie: $7.99
-    Vanilla Panna Cotta: $9.99 | French Macarons (6pc): $12.99 | Fudge Brownies: $6.99
-    Churros: $7.50 | Banana Split: $10.99 | Key Lime Pie: $8.99
-    Profiteroles: $9.50 | Carrot Cake: $8.50 | Affogato: $7.99
-    Chocolate Chip Cookies: $5.99 | Mango Sticky Rice: $9.99
-    """
+    userdata = create_userdata()
+    userdata.session_id = room_name  # a resumed call finds its stock holds again
+    if os.getenv("VISEME_ENABLED", "1") == "1":
+        userdata.viseme = VisemePublisher(ctx.room)
+    # Stock changes from staff and other calls, into userdata.inventory and to the client (topic "inventory")
+    live_inventory = inventory_feed.SessionInventory(inventory_feed.get_feed(), userdata, ctx.room)
     
-    # Load inventory
-    inventory = load_inventory()
-    
-    userdata = UserData()
-    userdata.inventory = inventory
-    userdata.agents.update(
-        {
-            "greeter": Greeter(menu),
-            "reservation": Reservation(),
-            "takeaway": Takeaway(menu),
-            "checkout": Checkout(menu),
-        }
-    )
+    start_agent = userdata.agents["greeter"]
+    checkpoint = None
+    if checkpoint_task is not None:
+        try:
+            checkpoint = await checkpoint_task
+        except Exception as e:
+            logger.warning(f"⚠️ Could not read session checkpoint: {e}")
+    if checkpoint is not None:
+        start_agent = await resume_from_checkpoint(userdata, checkpoint)
     
     session = AgentSession[UserData](
         userdata=userdata,
-        # Google Gemini model - direct API
-        llm=google.LLM(
-            model="gemini-2.5-flash",
-            api_key=os.getenv("GEMINI_API_KEY")
-        ),
-        # Soniox STT with language detection for Vietnamese and English
-        stt=soniox.STT(
-            api_key=os.getenv("SONIOX_API_KEY"),
-        ),
-        tts=openai.TTS(
-            voice="nova",
-            api_key=os.getenv("OPENAI_API_KEY"),
-        ),
-        vad=silero.VAD.load(),
+        # Providers selected by env / providers.json (default: Gemini, Soniox, ElevenLabs)
+        llm=providers.create_llm(),
+        stt=providers.create_stt(),
+        tts=providers.create_tts(sentence_tokenizer=create_sentence_tokenizer()),
+        vad=ctx.proc.userdata.get("vad") or providers.create_vad(),
         max_tool_steps=1,
     )
+    ctx.add_shutdown_callback(providers.log_provider_metrics)
+    ctx.add_shutdown_callback(live_inventory.close)
+
+    async def release_stock_holds() -> None:
+        await asyncio.to_thread(lambda: stock_holds.get_holds().release(userdata.session_id))
+
+    ctx.add_shutdown_callback(release_stock_holds)
+    ctx.add_shutdown_callback(flush_pending_work)
+    if resume:
+        checkpoint_on_tool_calls(session, room_name, participant)
     
     logger.info(f"✅ Agent ready in room: {ctx.room.name}")
     
     await session.start(
-        agent=userdata.agents["greeter"],
+        agent=start_agent,
         room=ctx.room,
     )
-
-
-async def main():
-    """Start both Token Server and Agent Server"""
-    # Start Token Server first
-    await start_token_server()
-    logger.info("="*60)
-    logger.info("🍜 Restaurant Bot - All-in-One Server")
-    logger.info("="*60)
-    logger.info(f"📡 Token Server: https://localhost:{TOKEN_SERVER_PORT}/api/token")
-    logger.info(f"🤖 Agent Name: {AGENT_NAME}")
-    logger.info("="*60)
+    live_inventory.send_snapshot()
+    ready_ms = round((time.perf_counter() - started) * 1000)
+    if checkpoint is not None:
+        logger.info("♻️ Session resumed", extra=fields(
+            room=room_name, agent=userdata.active_agent, messages=len(checkpoint.chat),
+            age_s=round(time.time() - checkpoint.updated_at), ready_ms=ready_ms,
+        ))
+    else:
+        logger.info("🆕 Session started", extra=fields(room=room_name, ready_ms=ready_ms))
 
 
 if __name__ == "__main__":
     import sys
+
+    import token_server
+    
+    if "--profile-startup" in sys.argv:
+        providers.profile_startup()
+        sys.exit(0)
     
     # Check if running with cli args (dev mode)
     if len(sys.argv) > 1:
-        # Start token server in background, then run agent
-        import threading
-        
-        def run_token_server():
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            loop.run_until_complete(start_token_server())
-            loop.run_forever()
+        # Plugins must be imported on the main thread (also needed for download-files)
+        providers.preload_plugins()
         
-        # Start token server in background thread
-        token_thread = threading.Thread(target=run_token_server, daemon=True)
-        token_thread.start()
+        # EMBED_TOKEN_SERVER=0: the token server runs as its own service (python token_server.py --workers N)
+        embed_token_server = os.getenv("EMBED_TOKEN_SERVER", "1") == "1"
+        if embed_token_server:
+            import threading
+            
+            def run_token_server():
+                loop = asyncio.new_event_loop()
+                asyncio.set_event_loop(loop)
+                loop.run_until_complete(token_server.start_token_server())
+                loop.run_forever()
+            
+            # Start token server in background thread (shares the GIL with the agent)
+            token_thread = threading.Thread(target=run_token_server, daemon=True)
+            token_thread.start()
         
         logger.info("="*60)
-        logger.info("🍜 Restaurant Bot - All-in-One Server")
+        logger.info("🍜 Restaurant Bot - All-in-One Server" if embed_token_server else "🍜 Restaurant Bot - Agent")
         logger.info("="*60)
-        logger.info(f"📡 Token Server: https://localhost:{TOKEN_SERVER_PORT}/api/token")
+        if embed_token_server:
+            logger.info(f"📡 Token Server: https://localhost:{token_server.TOKEN_SERVER_PORT}/api/token")
         logger.info(f"🤖 Agent Name: {AGENT_NAME}")
         logger.info("="*60)
         
         # Run agent with CLI
         cli.run_app(server)
     else:
-        # Just run token server standalone
-        asyncio.run(main()) 
\ No newline at end of file
+        # Just run token server standalone (TOKEN_SERVER_WORKERS worker processes)
+        token_server.main()
@@ -0,0 +1,227 @@
+"""
+Room Index
+Chỉ mục in-memory về room/participant, được cập nhật bằng LiveKit webhook
+(room_started, room_finished, participant_joined, participant_left) thay vì
+poll list_rooms / list_participants. Mọi truy vấn đều O(1).
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Optional
+
+from livekit import api
+
+logger = logging.getLogger("room-index")
+
+# Số event id gần nhất được nhớ để bỏ qua webhook bị gửi lại (LiveKit retry)
+DEDUP_WINDOW = 4096
+
+
+@dataclass
+class RoomState:
+    name: str
+    sid: str = ""
+    created_at: float = 0.0
+    # identity -> is_agent
+    participants: dict[str, bool] = field(default_factory=dict)
+    agent_count: int = 0
+    updated_at: float = 0.0  # last time the participant set changed
+
+    @property
+    def num_participants(self) -> int:
+        return len(self.participants)
+
+    @property
+    def human_count(self) -> int:
+        return len(self.participants) - self.agent_count
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.participants
+
+    @property
+    def is_agent_only(self) -> bool:
+        return bool(self.participants) and self.agent_count == len(self.participants)
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "sid": self.sid,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "num_participants": self.num_participants,
+            "agents": self.agent_count,
+            "humans": self.human_count,
+            "participants": sorted(self.participants),
+        }
+
+
+def _is_agent(participant, identity_prefix: str) -> bool:
+    if participant.kind == api.ParticipantInfo.Kind.AGENT:
+        return True
+    return participant.identity.startswith(identity_prefix)
+
+
+class RoomIndex:
+    """In-memory room/participant state fed by LiveKit webhook events"""
+
+    def __init__(self, agent_identity_prefix: str = "agent-"):
+        self.agent_identity_prefix = agent_identity_prefix
+        self.rooms: dict[str, RoomState] = {}
+        self.total_participants = 0
+        self.total_agents = 0
+        self.events_applied = 0
+        self.events_duplicated = 0
+        self.last_event_at: Optional[float] = None
+        self.synced = False  # True once seeded from the LiveKit API
+        self._seen_ids: set[str] = set()
+        self._seen_order: deque[str] = deque()
+
+    @property
+    def live(self) -> bool:
+        """True once seeded and webhooks are flowing, i.e. the index can replace polling"""
+        return self.synced and self.events_applied > 0
+
+    # ---------- queries (O(1)) ----------
+    def get(self, room_name: str) -> Optional[RoomState]:
+        return self.rooms.get(room_name)
+
+    def has_room(self, room_name: str) -> bool:
+        return room_name in self.rooms
+
+    def participant_count(self, room_name: str) -> int:
+        room = self.rooms.get(room_name)
+        return room.num_participants if room else 0
+
+    def has_participant(self, room_name: str, identity: str) -> bool:
+        room = self.rooms.get(room_name)
+        return room is not None and identity in room.participants
+
+    def stats(self) -> dict:
+        return {
+            "rooms": len(self.rooms),
+            "participants": self.total_participants,
+            "agents": self.total_agents,
+            "humans": self.total_participants - self.total_agents,
+            "events_applied": self.events_applied,
+            "events_duplicated": self.events_duplicated,
+            "last_event_at": self.last_event_at,
+            "synced": self.synced,
+            "live": self.live,
+        }
+
+    def snapshot(self) -> dict:
+        return {
+            "stats": self.stats(),
+            "rooms": [room.to_dict() for room in self.rooms.values()],
+        }
+
+    # ---------- updates ----------
+    def apply(self, event: api.WebhookEvent) -> bool:
+        """Apply one webhook event. Returns False if it was a duplicate or ignored"""
+        if event.id:
+            if event.id in self._seen_ids:
+                self.events_duplicated += 1
+                return False
+            self._remember(event.id)
+
+        kind = event.event
+        room_name = event.room.name if event.HasField("room") else ""
+        if not room_name:
+            return False
+
+        now = time.time()
+        if kind == "room_started":
+            room = self._ensure_room(room_name, now)
+            room.sid = event.room.sid or room.sid
+            room.created_at = float(event.room.creation_time or room.created_at or now)
+        elif kind == "room_finished":
+            self._drop_room(room_name)
+        elif kind == "participant_joined":
+            self._add_participant(room_name, event.participant, now)
+        elif kind in ("participant_left", "participant_connection_aborted"):
+            self._remove_participant(room_name, event.participant.identity, now)
+        else:
+            return False
+
+        self.events_applied += 1
+        self.last_event_at = now
+        return True
+
+    def _remember(self, event_id: str) -> None:
+        self._seen_ids.add(event_id)
+        self._seen_order.append(event_id)
+        if len(self._seen_order) > DEDUP_WINDOW:
+            self._seen_ids.discard(self._seen_order.popleft())
+
+    def _ensure_room(self, room_name: str, now: float) -> RoomState:
+        room = self.rooms.get(room_name)
+        if room is None:
+            # participant_joined may arrive before room_started
+            room = self.rooms[room_name] = RoomState(name=room_name, created_at=now, updated_at=now)
+        return room
+
+    def _drop_room(self, room_name: str) -> None:
+        room = self.rooms.pop(room_name, None)
+        if room is not None:
+            self.total_participants -= room.num_participants
+            self.total_agents -= room.agent_count
+
+    def _add_participant(self, room_name: str, participant, now: float) -> None:
+        room = self._ensure_room(room_name, now)
+        if participant.identity in room.participants:
+            return
+        is_agent = _is_agent(participant, self.agent_identity_prefix)
+        room.participants[participant.identity] = is_agent
+        room.agent_count += is_agent
+        room.updated_at = now
+        self.total_participants += 1
+        self.total_agents += is_agent
+
+    def _remove_participant(self, room_name: str, identity: str, now: float) -> None:
+        room = self.rooms.get(room_name)
+        if room is None or identity not in room.participants:
+            return
+        is_agent = room.participants.pop(identity)
+        room.agent_count -= is_agent
+        room.updated_at = now
+        self.total_participants -= 1
+        self.total_agents -= is_agent
+
+    async def seed(self, lkapi: api.LiveKitAPI, concurrency: int = 8) -> None:
+        """Load the current state once from the LiveKit API (events keep it fresh afterwards)"""
+        response = await lkapi.room.list_rooms(api.ListRoomsRequest())
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(room_name):
+            async with semaphore:
+                result = await lkapi.room.list_participants(api.ListParticipantsRequest(room=room_name))
+            return room_name, result.participants
+
+        occupied = [room.name for room in response.rooms if room.num_participants > 0]
+        participants = dict(await asyncio.gather(*(fetch(name) for name in occupied)))
+
+        now = time.time()
+        for info in response.rooms:
+            room = self._ensure_room(info.name, now)
+            room.sid = info.sid
+            room.created_at = float(info.creation_time or now)
+            for p in participants.get(info.name, []):
+                self._add_participant(info.name, p, now)
+
+        self.synced = True
+        logger.info(f"📇 Room index seeded: {len(self.rooms)} room(s), {self.total_participants} participant(s)")
+
+
+class WebhookVerifier:
+    """Verifies the signed Authorization header of LiveKit webhooks"""
+
+    def __init__(self, api_key: str, api_secret: str):
+        self._receiver = api.WebhookReceiver(api.TokenVerifier(api_key, api_secret))
+
+    def verify(self, body: str, auth_token: str) -> api.WebhookEvent:
+        """Raises if the signature or body hash does not match"""
+        return self._receiver.receive(body, auth_token)
@@ -0,0 +1,257 @@
+"""
+Room Janitor
+Định kỳ quét các room trên LiveKit và xóa room bị bỏ rơi (trống hoặc chỉ còn agent)
+để giải phóng worker slot khi client crash mà không gọi DELETE /api/room/{room_name}.
+
+Chạy trong token server (ROOM_JANITOR_ENABLED=1) hoặc qua `python manage_rooms.py watch`.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+from livekit import api
+
+from room_index import RoomIndex
+
+logger = logging.getLogger("room-janitor")
+
+
+@dataclass
+class JanitorPolicy:
+    interval: float = 60.0  # seconds between sweeps
+    empty_grace: float = 120.0  # delete rooms that stayed empty this long
+    agent_only_grace: float = 60.0  # delete rooms where only agents remain this long
+    max_room_age: float = 0.0  # hard limit on room lifetime (0 = disabled)
+    room_prefix: Optional[str] = None  # only manage rooms with this name prefix
+    agent_identity_prefix: str = "agent-"
+    concurrency: int = 8
+    dry_run: bool = False
+
+    @classmethod
+    def from_env(cls) -> "JanitorPolicy":
+        """Build a policy from ROOM_JANITOR_* environment variables"""
+        return cls(
+            interval=float(os.getenv("ROOM_JANITOR_INTERVAL", cls.interval)),
+            empty_grace=float(os.getenv("ROOM_JANITOR_EMPTY_GRACE", cls.empty_grace)),
+            agent_only_grace=float(os.getenv("ROOM_JANITOR_AGENT_ONLY_GRACE", cls.agent_only_grace)),
+            max_room_age=float(os.getenv("ROOM_JANITOR_MAX_ROOM_AGE", cls.max_room_age)),
+            room_prefix=os.getenv("ROOM_JANITOR_PREFIX") or None,
+            agent_identity_prefix=os.getenv("ROOM_JANITOR_AGENT_PREFIX", cls.agent_identity_prefix),
+            concurrency=int(os.getenv("ROOM_JANITOR_CONCURRENCY", cls.concurrency)),
+            dry_run=os.getenv("ROOM_JANITOR_DRY_RUN", "0") == "1",
+        )
+
+
+@dataclass
+class JanitorMetrics:
+    sweeps: int = 0
+    rooms_scanned: int = 0
+    rooms_deleted: int = 0
+    agents_reclaimed: int = 0  # agent participants removed = worker slots freed
+    errors: int = 0
+    deleted_by_reason: dict[str, int] = field(default_factory=dict)
+    last_sweep_at: Optional[float] = None
+    last_sweep_seconds: float = 0.0
+
+    def snapshot(self) -> dict:
+        return {
+            "sweeps": self.sweeps,
+            "rooms_scanned": self.rooms_scanned,
+            "rooms_deleted": self.rooms_deleted,
+            "agents_reclaimed": self.agents_reclaimed,
+            "errors": self.errors,
+            "deleted_by_reason": dict(self.deleted_by_reason),
+            "last_sweep_at": self.last_sweep_at,
+            "last_sweep_seconds": round(self.last_sweep_seconds, 3),
+        }
+
+
+def is_agent_participant(participant, identity_prefix: str = "agent-") -> bool:
+    """True if the participant is an agent (by kind, falling back to identity prefix)"""
+    if participant.kind == api.ParticipantInfo.Kind.AGENT:
+        return True
+    return participant.identity.startswith(identity_prefix)
+
+
+class RoomJanitor:
+    """Periodically removes empty / agent-only / expired rooms"""
+
+    def __init__(self, lkapi: api.LiveKitAPI, policy: Optional[JanitorPolicy] = None,
+                 index: Optional[RoomIndex] = None):
+        self.lkapi = lkapi
+        self.policy = policy or JanitorPolicy()
+        # When a webhook-fed RoomIndex is live, sweeps read it instead of polling
+        self.index = index
+        self.metrics = JanitorMetrics()
+        # room name -> (reason, first time the condition was observed)
+        self._suspects: dict[str, tuple[str, float]] = {}
+        self._semaphore = asyncio.Semaphore(max(1, self.policy.concurrency))
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> asyncio.Task:
+        """Start the sweep loop as a background task"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run(self):
+        logger.info(
+            f"🧹 Room janitor started (interval={self.policy.interval}s, "
+            f"empty_grace={self.policy.empty_grace}s, agent_only_grace={self.policy.agent_only_grace}s, "
+            f"dry_run={self.policy.dry_run})"
+        )
+        while True:
+            try:
+                await self.sweep()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.metrics.errors += 1
+                logger.error(f"❌ Room janitor sweep failed: {e}")
+            await asyncio.sleep(self.policy.interval)
+
+    async def sweep(self) -> list[tuple[str, str]]:
+        """Run one sweep. Returns the (room_name, reason) pairs that were deleted"""
+        start = time.perf_counter()
+        now = time.time()
+
+        if self.index is not None and self.index.live:
+            rooms = self._observe_from_index()
+        else:
+            rooms = await self._observe_from_api()
+
+        to_delete: list[tuple[str, str, int]] = []
+        seen = set()
+        for name, created_at, participant_count, agent_count in rooms:
+            seen.add(name)
+            reason = self._classify(created_at, participant_count, agent_count, now)
+
+            if reason is None:
+                self._suspects.pop(name, None)
+                continue
+
+            if reason == "max_age":
+                to_delete.append((name, reason, agent_count))
+                continue
+
+            prev = self._suspects.get(name)
+            if prev is None or prev[0] != reason:
+                # First time we see this condition: start the grace period now
+                prev = self._suspects[name] = (reason, now)
+
+            grace = self.policy.empty_grace if reason == "empty" else self.policy.agent_only_grace
+            if now - prev[1] >= grace:
+                to_delete.append((name, reason, agent_count))
+
+        # Forget rooms that disappeared on their own
+        for name in list(self._suspects):
+            if name not in seen:
+                del self._suspects[name]
+
+        deleted = await asyncio.gather(*(self._delete(*item) for item in to_delete))
+
+        self.metrics.sweeps += 1
+        self.metrics.rooms_scanned += len(rooms)
+        self.metrics.last_sweep_at = now
+        self.metrics.last_sweep_seconds = time.perf_counter() - start
+
+        result = [(name, reason) for (name, reason, _), ok in zip(to_delete, deleted) if ok]
+        if result:
+            logger.info(
+                f"🧹 Sweep removed {len(result)}/{len(rooms)} room(s) "
+                f"in {self.metrics.last_sweep_seconds:.2f}s"
+            )
+        return result
+
+    def _manages(self, room_name: str) -> bool:
+        return not self.policy.room_prefix or room_name.startswith(self.policy.room_prefix)
+
+    def _observe_from_index(self) -> list[tuple[str, float, int, int]]:
+        """(name, created_at, participants, agents) straight from the webhook-fed index"""
+        return [
+            (room.name, room.created_at, room.num_participants, room.agent_count)
+            for room in self.index.rooms.values()
+            if self._manages(room.name)
+        ]
+
+    async def _observe_from_api(self) -> list[tuple[str, float, int, int]]:
+        """(name, created_at, participants, agents) by polling the LiveKit API"""
+        response = await self.lkapi.room.list_rooms(api.ListRoomsRequest())
+        rooms = [room for room in response.rooms if self._manages(room.name)]
+
+        # Participants are only needed for non-empty rooms; fetch them concurrently
+        occupied = [room for room in rooms if room.num_participants > 0]
+        participants = dict(await asyncio.gather(
+            *(self._fetch_participants(room.name) for room in occupied)
+        ))
+
+        observed = []
+        for room in rooms:
+            room_participants = participants.get(room.name)
+            if room_participants is None:
+                # Empty room, or listing failed (keep the room: count it as non-agent)
+                count = room.num_participants
+                agents = 0
+            else:
+                count = len(room_participants)
+                agents = sum(
+                    1 for p in room_participants
+                    if is_agent_participant(p, self.policy.agent_identity_prefix)
+                )
+            observed.append((room.name, float(room.creation_time), count, agents))
+        return observed
+
+    def _classify(self, created_at: float, participant_count: int, agent_count: int,
+                  now: float) -> Optional[str]:
+        """Return the deletion reason, or None if the room should be kept"""
+        if self.policy.max_room_age and created_at and now - created_at > self.policy.max_room_age:
+            return "max_age"
+        if participant_count == 0:
+            return "empty"
+        if agent_count == participant_count:
+            return "agent_only"
+        return None
+
+    async def _fetch_participants(self, room_name: str):
+        try:
+            async with self._semaphore:
+                response = await self.lkapi.room.list_participants(
+                    api.ListParticipantsRequest(room=room_name)
+                )
+            return room_name, list(response.participants)
+        except Exception as e:
+            self.metrics.errors += 1
+            logger.warning(f"⚠️ Janitor could not list participants of '{room_name}': {e}")
+            return room_name, None
+
+    async def _delete(self, room_name: str, reason: str, agent_count: int) -> bool:
+        if self.policy.dry_run:
+            logger.info(f"🧹 [dry-run] Would delete room '{room_name}' ({reason})")
+            return False
+        try:
+            async with self._semaphore:
+                await self.lkapi.room.delete_room(api.DeleteRoomRequest(room=room_name))
+        except Exception as e:
+            self.metrics.errors += 1
+            logger.error(f"❌ Janitor failed to delete room '{room_name}': {e}")
+            return False
+
+        self._suspects.pop(room_name, None)
+        self.metrics.rooms_deleted += 1
+        self.metrics.agents_reclaimed += agent_count
+        self.metrics.deleted_by_reason[reason] = self.metrics.deleted_by_reason.get(reason, 0) + 1
+        logger.info(f"🗑️ Janitor deleted room '{room_name}' ({reason}, {agent_count} agent(s) reclaimed)")
+        return True
@@ -0,0 +1,160 @@
+"""
+Checkpoint phiên gọi để khách không phải bắt đầu lại khi agent crash hoặc mất kết nối
+- Sau mỗi lượt gọi tool: UserData (tên, số điện thoại, đơn hàng, giờ đặt bàn...), agent đang
+  phụ trách và vài lượt hội thoại gần nhất được ghi vào SQLite (SESSION_STORE_FILE)
+- Khi cùng room + participant kết nối lại, entrypoint khôi phục state và agent đó
+- Không lưu thông tin thẻ (số thẻ, ngày hết hạn, CVV): khách đọc lại khi thanh toán
+- Checkpoint quá SESSION_TTL giây bị bỏ qua; DELETE /api/room/{room_name} xóa checkpoint của room
+
+Không phụ thuộc LiveKit để đo riêng:  python tools/bench_session_store.py
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+from agent_logging import fields
+
+logger = logging.getLogger("restaurant-bot")
+
+SESSION_STORE_FILE = os.getenv(
+    "SESSION_STORE_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "sessions.sqlite3")
+)
+SESSION_TTL = float(os.getenv("SESSION_TTL", "1800"))  # seconds a checkpoint can be resumed
+CHAT_ITEMS = 12  # last messages kept for the resumed agent
+CHAT_MAX_CHARS = 300  # per message
+
+# UserData fields worth restoring (no card data, no runtime objects)
+CHECKPOINT_FIELDS = ("customer_name", "customer_phone", "reservation_time", "party_size", "reservation_id",
+                     "booked_time", "order", "expense", "checked_out")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    room TEXT NOT NULL,
+    participant TEXT NOT NULL,
+    agent TEXT NOT NULL,
+    userdata TEXT NOT NULL,
+    chat TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (room, participant)
+);
+CREATE INDEX IF NOT EXISTS checkpoints_updated_at ON checkpoints (updated_at);
+"""
+
+
+@dataclass
+class Checkpoint:
+    room: str
+    participant: str
+    agent: str = "greeter"
+    userdata: dict = field(default_factory=dict)
+    chat: list[dict] = field(default_factory=list)  # [{"role": "user", "text": "..."}]
+    updated_at: float = 0.0
+
+
+def snapshot_userdata(userdata) -> dict:
+    """Copied on the event loop: the write happens later on another thread"""
+    values = {}
+    for name in CHECKPOINT_FIELDS:
+        value = getattr(userdata, name)
+        values[name] = dict(value) if isinstance(value, dict) else value
+    return values
+
+
+def restore_userdata(userdata, values: dict) -> None:
+    for name in CHECKPOINT_FIELDS:
+        if values.get(name) is not None:
+            setattr(userdata, name, values[name])
+
+
+def compact_chat(messages: Iterable[tuple[str, str]], max_items: int = CHAT_ITEMS,
+                 max_chars: int = CHAT_MAX_CHARS) -> list[dict]:
+    """Last user / assistant messages, each cut to max_chars"""
+    kept = [(role, text.strip()) for role, text in messages if role in ("user", "assistant") and text and text.strip()]
+    return [
+        {"role": role, "text": text if len(text) <= max_chars else text[:max_chars - 1] + "…"}
+        for role, text in kept[-max_items:]
+    ]
+
+
+class SessionStore:
+    """
+    SQLite (WAL) shared by the job processes of the host. Writes come from one background
+    thread per process (drain.pending_work queue "sessions"), reads from the entrypoint.
+    """
+
+    def __init__(self, path: str = SESSION_STORE_FILE, ttl: float = SESSION_TTL) -> None:
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")  # a crash may lose the last checkpoint, never corrupt
+        self._conn.executescript(SCHEMA)
+
+    def save(self, checkpoint: Checkpoint) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    checkpoint.room,
+                    checkpoint.participant,
+                    checkpoint.agent,
+                    json.dumps(checkpoint.userdata, ensure_ascii=False),
+                    json.dumps(checkpoint.chat, ensure_ascii=False),
+                    checkpoint.updated_at or time.time(),
+                ),
+            )
+
+    def load(self, room: str, participant: str) -> Optional[Checkpoint]:
+        """Checkpoint of this room / participant if younger than ttl"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT agent, userdata, chat, updated_at FROM checkpoints"
+                " WHERE room = ? AND participant = ? AND updated_at >= ?",
+                (room, participant, time.time() - self.ttl),
+            ).fetchone()
+        if row is None:
+            return None
+        agent, userdata, chat, updated_at = row
+        return Checkpoint(room, participant, agent, json.loads(userdata), json.loads(chat), updated_at)
+
+    def delete_room(self, room: str) -> int:
+        with self._lock:
+            return self._conn.execute("DELETE FROM checkpoints WHERE room = ?", (room,)).rowcount
+
+    def purge(self) -> int:
+        """Drop expired checkpoints"""
+        with self._lock:
+            return self._conn.execute(
+                "DELETE FROM checkpoints WHERE updated_at < ?", (time.time() - self.ttl,)
+            ).rowcount
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM checkpoints").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_store: Optional[SessionStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> SessionStore:
+    """Process-wide store, expired checkpoints are purged when it is opened"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SessionStore()
+            purged = _store.purge()
+            if purged:
+                logger.info("🧹 Expired session checkpoints removed", extra=fields(count=purged))
+        return _store
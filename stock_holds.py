@@ -0,0 +1,138 @@
+"""
+Giữ hàng (stock hold) từ lúc gọi món (update_order) tới lúc checkout
+- Mỗi phiên giữ số lượng của từng món trong đơn; món còn cho phiên khác = tồn kho - tổng số đang
+  được các phiên khác giữ. Hai cuộc gọi cùng lúc không thể cùng được hứa phần cuối cùng
+- Lưu ở SQLite (STOCK_HOLDS_FILE), dùng chung cho các job process: mỗi lần giữ là một transaction
+  BEGIN IMMEDIATE ngắn (đọc tồn kho mới nhất từ nhật ký kho, tổng đang giữ của món theo khóa
+  chính, ghi lại phần giữ của phiên)
+- Hết hạn sau STOCK_HOLD_TTL giây (khách bỏ đi giữa chừng); về greeter hoặc kết thúc phiên thì nhả
+- Checkout ghi số trừ kho vào nhật ký kho (inventory_log.py) trước, rồi mới nhả phần giữ: lần giữ
+  nào chạy sau đó cũng đã thấy số trừ kho, không phụ thuộc thời gian poll
+
+Đo tranh chấp với hàng trăm phiên:  python tools/bench_stock_holds.py
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Iterable, Optional
+
+from agent_logging import fields
+
+logger = logging.getLogger("restaurant-bot")
+
+STOCK_HOLDS_FILE = os.getenv(
+    "STOCK_HOLDS_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "stock_holds.sqlite3")
+)
+STOCK_HOLD_TTL = float(os.getenv("STOCK_HOLD_TTL", "600"))  # seconds an order keeps its items
+PURGE_INTERVAL = 60  # seconds between deletes of expired holds
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS holds (
+    item TEXT NOT NULL,
+    session TEXT NOT NULL,
+    qty INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (item, session)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS holds_session ON holds (session);
+CREATE INDEX IF NOT EXISTS holds_expiry ON holds (expires_at);
+"""
+
+
+class StockHolds:
+    """
+    Holds of this process, one connection. The total held for an item is summed over its
+    primary key range inside the write transaction, so the check and the hold are atomic
+    across processes; expired rows are skipped and deleted now and then.
+    """
+
+    def __init__(self, path: str = STOCK_HOLDS_FILE, ttl: float = STOCK_HOLD_TTL) -> None:
+        self.path = path
+        self.ttl = ttl
+        self._purged = 0.0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=10.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    # Must hold self._lock
+    def _held_by_others(self, item: str, session: str, now: float) -> int:
+        return self._conn.execute(
+            "SELECT COALESCE(SUM(qty), 0) FROM holds WHERE item = ? AND session != ? AND expires_at > ?",
+            (item, session, now),
+        ).fetchone()[0]
+
+    def hold(self, session: str, wanted: dict[str, int], stock: Callable[[Iterable[str]], dict[str, int]],
+             ttl: Optional[float] = None) -> tuple[bool, dict[str, int]]:
+        """
+        Replace the session's holds with wanted ({inventory key: quantity}) if every item has
+        enough: stock - held by other sessions. Returns (held, available per item); nothing
+        changes when an item is short.
+
+        stock(items) runs inside the write transaction and must return the quantities with every
+        deduction appended so far (InventoryFeed.current): checkouts release their holds only
+        after appending, so nothing sold is missed between the two.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                quantities = stock(wanted)
+                available = {item: quantities.get(item, 0) - self._held_by_others(item, session, now)
+                             for item in wanted}
+                if any(qty > available[item] for item, qty in wanted.items()):
+                    self._conn.execute("ROLLBACK")
+                    logger.info("🔒 Stock hold refused", extra=fields(session=session, wanted=wanted,
+                                                                      available=available))
+                    return False, available
+                self._conn.execute("DELETE FROM holds WHERE session = ?", (session,))
+                expires_at = now + (self.ttl if ttl is None else ttl)
+                self._conn.executemany(
+                    "INSERT INTO holds (item, session, qty, expires_at) VALUES (?, ?, ?, ?)",
+                    [(item, session, qty, expires_at) for item, qty in wanted.items() if qty > 0],
+                )
+                if now - self._purged > PURGE_INTERVAL:
+                    self._conn.execute("DELETE FROM holds WHERE expires_at <= ?", (now,))
+                    self._purged = now
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        logger.info("🔒 Stock held", extra=fields(session=session, items=wanted))
+        return True, available
+
+    def release(self, session: str) -> int:
+        """Return to the greeter, end of the call, or checkout once the deduction is in the
+        inventory log: the items go back to everyone"""
+        with self._lock:
+            released = self._conn.execute("DELETE FROM holds WHERE session = ?", (session,)).rowcount
+        if released:
+            logger.info("🔓 Stock holds released", extra=fields(session=session, items=released))
+        return released
+
+    def held(self, items: Iterable[str], exclude: str = "") -> dict[str, int]:
+        """Quantity held per item by sessions other than exclude"""
+        now = time.time()
+        with self._lock:
+            return {item: self._held_by_others(item, exclude, now) for item in items}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_holds: Optional[StockHolds] = None
+_holds_lock = threading.Lock()
+
+
+def get_holds() -> StockHolds:
+    """Process-wide hold ledger (opened on first use)"""
+    global _holds
+    with _holds_lock:
+        if _holds is None:
+            _holds = StockHolds()
+        return _holds
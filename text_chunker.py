@@ -0,0 +1,165 @@
+"""
+Bilingual clause chunker (Việt + English) cho đầu vào TTS
+- Cắt văn bản LLM đang stream ở ranh giới câu / mệnh đề an toàn sớm nhất để TTS nói sớm hơn
+- Không cắt trong giá tiền ($13.50, 100.000đ, 1,5 triệu), giờ (7:30), chữ viết tắt
+  (Mr., Dr., TP., v.v., a.m.), trong ngoặc, hoặc trong tên món có dấu câu
+- min_chars: độ dài tối thiểu để cắt ở dấu phẩy / chấm phẩy của đoạn đầu tiên,
+  later_min_chars cho các đoạn sau (audio đã phát, ưu tiên ngữ điệu); hết câu luôn được cắt
+
+Không import LiveKit: ClauseTokenizer trong restaurant_agent.py nối nó vào TTS của session.
+"""
+
+import re
+from typing import Iterable
+
+SENTENCE_END = ".!?…"
+CLAUSE_END = ",;:—–"
+CLOSERS = "\"'”’)]»"
+OPENERS = {"(": ")", "[": "]", "“": "”", "«": "»"}
+
+# Lowercase, without the final dot
+ABBREVIATIONS = frozenset({
+    "mr", "mrs", "ms", "dr", "prof", "st", "vs", "etc", "approx", "jr", "sr", "inc", "ltd", "co", "dept",
+    "tel", "ext", "tp", "ths", "ts", "pgs", "gs", "bs", "sđt", "đc",
+})
+DOTTED_ABBREVIATION = re.compile(r"^(?:[^\W\d_]\.)+[^\W\d_]$")  # e.g, a.m, v.v, u.s
+
+DEFAULT_MIN_CHARS = 20
+LATER_MIN_CHARS = 60
+MAX_CHARS = 250
+PENDING = -2
+
+
+class ClauseSegmenter:
+    """
+    Incremental segmenter: push() LLM text as it streams, get back the chunks that
+    are safe to synthesize. A boundary is only confirmed once the next character
+    is known (whitespace), so "$13." never becomes a chunk before "50" arrives.
+    """
+
+    def __init__(
+        self,
+        min_chars: int = DEFAULT_MIN_CHARS,
+        later_min_chars: int = LATER_MIN_CHARS,
+        max_chars: int = MAX_CHARS,
+        protected: Iterable[str] = (),
+    ) -> None:
+        self.min_chars = min_chars
+        self.later_min_chars = later_min_chars
+        self.max_chars = max_chars
+        self._protected = protected_prefixes(protected)
+        self._buffer = ""
+        self._scan = 0
+        self._stack: list[str] = []
+        self._chunks = 0
+
+    def push(self, text: str) -> list[str]:
+        self._buffer += text
+        return self._drain()
+
+    def flush(self) -> list[str]:
+        """End of a reply: emit the rest, the next reply starts with min_chars again"""
+        rest = self._buffer.strip()
+        self._buffer, self._scan, self._stack, self._chunks = "", 0, [], 0
+        return [rest] if rest else []
+
+    def _drain(self) -> list[str]:
+        chunks = []
+        buf, i = self._buffer, self._scan
+        while i < len(buf) - 1:  # the last character has no look-ahead yet
+            end = self._boundary(buf, i)
+            if end == PENDING:
+                break
+            ch = buf[i]
+            if ch in OPENERS:
+                self._stack.append(OPENERS[ch])
+            elif self._stack and ch == self._stack[-1]:
+                self._stack.pop()
+
+            if end < 0 and i >= self.max_chars:
+                end = buf.rfind(" ", 0, i) + 1 or i  # no boundary in sight: cut at the last space
+            if end > 0:
+                chunk = buf[:end].strip()
+                if chunk:
+                    chunks.append(chunk)
+                    self._chunks += 1
+                buf, i, self._stack = buf[end:], 0, []
+                continue
+            i += 1
+
+        self._buffer, self._scan = buf, i
+        return chunks
+
+    def _boundary(self, buf: str, i: int) -> int:
+        """End index of the chunk if buf[i] closes one, -1 if not, PENDING until the look-ahead arrives"""
+        ch = buf[i]
+        if ch == "\n":
+            return i + 1
+        strong = ch in SENTENCE_END
+        weak = ch in CLAUSE_END or (ch == "-" and buf[i - 1:i] == " ")
+        if not (strong or weak) or self._stack:
+            return -1
+
+        end = i + 1
+        while end < len(buf) and (buf[end] in CLOSERS or buf[end] in SENTENCE_END):
+            end += 1
+        if end >= len(buf):
+            return PENDING
+        if not buf[end].isspace():
+            return -1  # decimal / thousands separator, time, URL ...
+
+        if strong:
+            if ch == "." and self._is_abbreviation(buf, i):
+                return -1
+        else:
+            minimum = self.min_chars if self._chunks == 0 else self.later_min_chars
+            if len(buf[:end].strip()) < minimum:
+                return -1
+        if self._inside_protected(buf, i):
+            return -1
+        return end
+
+    @staticmethod
+    def _is_abbreviation(buf: str, i: int) -> bool:
+        start = i
+        while start > 0 and not buf[start - 1].isspace():
+            start -= 1
+        word = buf[start:i].lstrip("\"'“(")
+        if not word:
+            return False
+        if len(word) == 1 and word.isascii() and word.isupper():
+            return True  # initial: "J. Smith", "Q. 1"
+        word = word.lower()
+        return word in ABBREVIATIONS or bool(DOTTED_ABBREVIATION.match(word))
+
+    def _inside_protected(self, buf: str, i: int) -> bool:
+        prefixes = self._protected.get(buf[i])
+        if not prefixes:
+            return False
+        head = buf[:i + 1].lower()
+        for prefix in prefixes:
+            if head.endswith(prefix):
+                before = len(head) - len(prefix) - 1
+                if before < 0 or not head[before].isalnum():
+                    return True
+        return False
+
+
+def protected_prefixes(names: Iterable[str]) -> dict[str, list[str]]:
+    """
+    Item names that contain boundary punctuation ("Mac, Cheese & Co. Burger"):
+    boundary char -> lowercased name prefixes ending at that char
+    """
+    prefixes: dict[str, list[str]] = {}
+    for name in names:
+        lowered = name.lower().strip()
+        for index, ch in enumerate(lowered[:-1]):
+            if ch in SENTENCE_END or ch in CLAUSE_END or ch == "-":
+                prefixes.setdefault(ch, []).append(lowered[:index + 1])
+    return prefixes
+
+
+def split_clauses(text: str, **options) -> list[str]:
+    """Whole-text version of ClauseSegmenter"""
+    segmenter = ClauseSegmenter(**options)
+    return segmenter.push(text) + segmenter.flush()
@@ -0,0 +1,480 @@
+#!/usr/bin/env python3
+"""
+Token server (tách khỏi process của agent)
+- GET /api/token: tạo room + dispatch agent + cấp JWT; DELETE /api/room/{room_name}
+- POST /api/livekit/webhook, GET /api/rooms: chỉ mục room từ webhook (room_index.py)
+- N worker process dùng chung một port (SO_REUSEPORT, kernel chia kết nối), không chia sẻ
+  state: mỗi worker có event loop, LiveKit API client riêng
+- SIGTERM / Ctrl+C: ngừng nhận kết nối mới, chờ request đang chạy xong rồi mới thoát;
+  worker chết bất thường được khởi động lại
+
+Chạy riêng:        python token_server.py --workers 4
+Đo throughput:     python tools/bench_token_server.py
+Agent chỉ chạy token server trong process của nó khi EMBED_TOKEN_SERVER=1 (mặc định).
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import ssl
+import time
+from typing import Optional
+
+from aiohttp import web
+from dotenv import load_dotenv
+from livekit.api import (
+    AccessToken, CreateAgentDispatchRequest, CreateRoomRequest, DeleteRoomRequest, LiveKitAPI, VideoGrants,
+)
+
+import session_store
+from drain import WorkerAvailability
+from room_index import RoomIndex, WebhookVerifier
+from room_janitor import JanitorPolicy, RoomJanitor
+
+load_dotenv()
+
+TOKEN_SERVER_PORT = int(os.getenv("TOKEN_SERVER_PORT", "8089"))
+AGENT_NAME = "restaurant-bot"
+CERT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cert')
+SHUTDOWN_TIMEOUT = float(os.getenv("TOKEN_SERVER_SHUTDOWN_TIMEOUT", "10"))  # seconds for in-flight requests
+RESTART_BACKOFF = 5.0  # a worker that dies sooner than this after start is restarted after a pause
+
+# The webhook index is per process: with several workers each one would only see the
+# events the kernel happened to hand it, so it is only kept with a single worker
+INDEX_DISABLED = "Room index needs TOKEN_SERVER_WORKERS=1 (webhooks are spread across workers)"
+
+logger = logging.getLogger("restaurant-bot")
+
+
+async def handle_token_request(request: web.Request) -> web.Response:
+    """
+    Create room + dispatch agent + generate token (ALL IN ONE).
+    
+    Flow:
+    1. Create room on LiveKit server
+    2. Dispatch agent to room
+    3. Generate JWT token for user
+    """
+    try:
+        room_name = request.query.get('room', 'default-room')
+        participant_name = request.query.get('name', 'user')
+        
+        api_key = os.getenv("LIVEKIT_API_KEY")
+        api_secret = os.getenv("LIVEKIT_API_SECRET")
+        livekit_url = os.getenv("LIVEKIT_URL")
+        
+        lk_api = request.app.get('lk_api')
+        if not api_key or not api_secret or lk_api is None:
+            return web.json_response(
+                {"error": "Missing LIVEKIT credentials"}, 
+                status=500
+            )
+        
+        # Every agent worker on this host is draining (restart/deploy): the room would stay empty
+        if request.app['agent_status'].all_draining():
+            logger.warning(f"🚰 Agent workers draining, refusing room {room_name}")
+            response = web.json_response(
+                {"error": "Agent is restarting, please retry shortly"},
+                status=503,
+                headers={'Retry-After': '5'}
+            )
+            response.headers['Access-Control-Allow-Origin'] = '*'
+            return response
+        
+        metadata = {"participant_name": participant_name}
+        
+        # ====== STEP 1: Create room on LiveKit server ======
+        # lk_api: one client per worker process (keeps its connections to LiveKit alive)
+        room_index: Optional[RoomIndex] = request.app['room_index']
+        if room_index is not None and room_index.live and room_index.has_room(room_name):
+            logger.info(f"♻️ Room already exists (webhook index): {room_name}")
+        else:
+            try:
+                await lk_api.room.create_room(
+                    CreateRoomRequest(
+                        name=room_name,
+                        metadata=json.dumps(metadata),
+                        empty_timeout=300,  # Auto-delete after 5 min empty
+                        max_participants=10
+                    )
+                )
+                logger.info(f"✅ Room created: {room_name}")
+            except Exception as e:
+                logger.warning(f"⚠️ Room may already exist: {e}")
+        
+        # ====== STEP 2: Dispatch agent to room ======
+        try:
+            logger.info(f"🤖 Dispatching agent '{AGENT_NAME}' to room {room_name}...")
+            await lk_api.agent_dispatch.create_dispatch(
+                CreateAgentDispatchRequest(
+                    agent_name=AGENT_NAME,
+                    room=room_name,
+                    metadata=json.dumps(metadata)
+                )
+            )
+            logger.info(f"✅ Agent '{AGENT_NAME}' dispatched to room {room_name}!")
+        except Exception as dispatch_error:
+            logger.error(f"❌ Agent dispatch failed: {dispatch_error}")
+        
+        # ====== STEP 3: Generate JWT token ======
+        token = AccessToken(api_key, api_secret)
+        token.with_identity(participant_name)
+        token.with_name(participant_name)
+        token.with_grants(
+            VideoGrants(
+                room_join=True,
+                room=room_name,
+                can_publish=True,
+                can_subscribe=True,
+                can_publish_data=True,
+            )
+        )
+        
+        jwt_token = token.to_jwt()
+        
+        logger.info(f"✅ Token generated | Room: {room_name} | User: {participant_name}")
+        
+        response = web.json_response({
+            "token": jwt_token,
+            "url": livekit_url,
+            "room": room_name,
+            "name": participant_name
+        })
+        response.headers['Access-Control-Allow-Origin'] = '*'
+        return response
+        
+    except Exception as e:
+        logger.error(f"❌ Error generating token: {e}")
+        return web.json_response({"error": str(e)}, status=500)
+
+
+async def handle_delete_room(request: web.Request) -> web.Response:
+    """Delete a LiveKit room when user disconnects"""
+    try:
+        room_name = request.match_info.get('room_name')
+        if not room_name:
+            return web.json_response({"error": "Room name required"}, status=400)
+        
+        lk_api = request.app.get('lk_api')
+        if lk_api is None:
+            return web.json_response({"error": "Missing LIVEKIT credentials"}, status=500)
+        
+        logger.info(f"🗑️ Deleting room: {room_name}")
+        
+        await lk_api.room.delete_room(
+            DeleteRoomRequest(room=room_name)
+        )
+        
+        logger.info(f"✅ Room deleted: {room_name}")
+        
+        # The call ended on purpose: a new call in this room starts fresh
+        await asyncio.to_thread(lambda: session_store.get_store().delete_room(room_name))
+        
+        response = web.json_response({
+            "success": True,
+            "message": f"Room '{room_name}' deleted",
+            "room_name": room_name
+        })
+        response.headers['Access-Control-Allow-Origin'] = '*'
+        return response
+        
+    except Exception as e:
+        logger.error(f"❌ Error deleting room: {e}")
+        return web.json_response({"error": str(e)}, status=500)
+
+
+async def handle_cors(request: web.Request) -> web.Response:
+    """Handle CORS preflight requests"""
+    return web.Response(
+        status=200,
+        headers={
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Allow-Methods': 'GET, DELETE, OPTIONS',
+            'Access-Control-Allow-Headers': 'Content-Type',
+        }
+    )
+
+
+async def handle_livekit_webhook(request: web.Request) -> web.Response:
+    """Receive LiveKit webhooks and update the in-memory room index"""
+    room_index: Optional[RoomIndex] = request.app['room_index']
+    if room_index is None:
+        return web.json_response({"error": INDEX_DISABLED}, status=503)
+    verifier: WebhookVerifier = request.app.get('webhook_verifier')
+    if verifier is None:
+        return web.json_response({"error": "Missing LIVEKIT credentials"}, status=500)
+
+    body = await request.text()
+    auth_token = request.headers.get('Authorization', '')
+    try:
+        event = verifier.verify(body, auth_token)
+    except Exception as e:
+        logger.warning(f"⚠️ Rejected webhook: {e}")
+        return web.json_response({"error": "Invalid webhook signature"}, status=401)
+
+    room_index.apply(event)
+    return web.json_response({"ok": True})
+
+
+async def handle_list_rooms(request: web.Request) -> web.Response:
+    """Room/participant state from the webhook index (no LiveKit API calls)"""
+    room_index: Optional[RoomIndex] = request.app['room_index']
+    if room_index is None:
+        return web.json_response({"error": INDEX_DISABLED}, status=503)
+    room_name = request.match_info.get('room_name')
+    if room_name:
+        room = room_index.get(room_name)
+        if room is None:
+            return web.json_response({"error": f"Room '{room_name}' not found"}, status=404)
+        body = room.to_dict()
+    else:
+        body = room_index.snapshot()
+
+    response = web.json_response(body)
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    return response
+
+
+async def setup_livekit_api(app: web.Application) -> None:
+    """One LiveKit API client per worker process, closed on shutdown"""
+    api_key = os.getenv("LIVEKIT_API_KEY")
+    api_secret = os.getenv("LIVEKIT_API_SECRET")
+    livekit_url = os.getenv("LIVEKIT_URL")
+    if not api_key or not api_secret or not livekit_url:
+        logger.warning("⚠️ LiveKit credentials missing: token endpoint disabled")
+        return
+
+    lk_api = LiveKitAPI(livekit_url, api_key, api_secret)
+    app['lk_api'] = lk_api
+
+    async def close_livekit_api(app: web.Application) -> None:
+        await lk_api.aclose()
+
+    app.on_cleanup.append(close_livekit_api)
+
+
+async def setup_room_index(app: web.Application) -> None:
+    """Enable webhook verification and seed the index from the LiveKit API once"""
+    room_index: Optional[RoomIndex] = app['room_index']
+    if room_index is None:
+        return
+    api_key = os.getenv("LIVEKIT_API_KEY")
+    api_secret = os.getenv("LIVEKIT_API_SECRET")
+    if not api_key or not api_secret or 'lk_api' not in app:
+        logger.warning("⚠️ LiveKit credentials missing: webhook receiver disabled")
+        return
+
+    app['webhook_verifier'] = WebhookVerifier(api_key, api_secret)
+    try:
+        await room_index.seed(app['lk_api'])
+    except Exception as e:
+        logger.warning(f"⚠️ Could not seed room index, relying on webhooks only: {e}")
+
+
+async def handle_janitor_metrics(request: web.Request) -> web.Response:
+    """Expose room janitor metrics (reclaimed rooms / agent slots)"""
+    janitor: RoomJanitor = request.app.get('janitor')
+    if janitor is None:
+        return web.json_response({"enabled": False})
+    return web.json_response({"enabled": True, **janitor.metrics.snapshot()})
+
+
+async def start_room_janitor(app: web.Application) -> None:
+    """Start the room janitor inside the token server (ROOM_JANITOR_ENABLED=1, worker 0 only)"""
+    if os.getenv("ROOM_JANITOR_ENABLED", "0") != "1" or app['worker_id'] != 0:
+        return
+
+    lk_api = LiveKitAPI(
+        os.getenv("LIVEKIT_URL"),
+        os.getenv("LIVEKIT_API_KEY"),
+        os.getenv("LIVEKIT_API_SECRET"),
+    )
+    # Without the index (several workers) the janitor polls list_rooms
+    janitor = RoomJanitor(lk_api, JanitorPolicy.from_env(), index=app['room_index'])
+    janitor.start()
+    app['janitor'] = janitor
+
+    async def stop_room_janitor(app: web.Application) -> None:
+        await janitor.stop()
+        await lk_api.aclose()
+
+    app.on_cleanup.append(stop_room_janitor)
+
+
+def create_app(worker_id: int = 0, workers: int = 1) -> web.Application:
+    """Token server app of one worker process"""
+    app = web.Application()
+    app['worker_id'] = worker_id
+    app['room_index'] = RoomIndex() if workers == 1 else None
+    app['agent_status'] = WorkerAvailability()  # drain.py status files of the local agent workers
+    app.router.add_get('/api/token', handle_token_request)
+    app.router.add_delete('/api/room/{room_name}', handle_delete_room)
+    app.router.add_get('/api/janitor', handle_janitor_metrics)
+    app.router.add_post('/api/livekit/webhook', handle_livekit_webhook)
+    app.router.add_get('/api/rooms', handle_list_rooms)
+    app.router.add_get('/api/rooms/{room_name}', handle_list_rooms)
+    app.router.add_options('/api/token', handle_cors)
+    app.router.add_options('/api/room/{room_name}', handle_cors)
+
+    async def on_startup(app: web.Application) -> None:
+        await setup_livekit_api(app)
+        await setup_room_index(app)
+        await start_room_janitor(app)
+
+    app.on_startup.append(on_startup)
+    return app
+
+
+def create_ssl_context(cert_dir: str = CERT_DIR) -> Optional[ssl.SSLContext]:
+    """TLS context from .cert/, None when the certificates are missing"""
+    cert_file = os.path.join(cert_dir, 'server-cert.pem')
+    key_file = os.path.join(cert_dir, 'server-key.pem')
+    if not (os.path.exists(cert_file) and os.path.exists(key_file)):
+        return None
+    ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    ssl_context.load_cert_chain(cert_file, key_file)
+    return ssl_context
+
+
+async def start_site(app: web.Application, host: str, port: int, ssl_context: Optional[ssl.SSLContext],
+                     reuse_port: bool = False) -> web.AppRunner:
+    runner = web.AppRunner(app, shutdown_timeout=SHUTDOWN_TIMEOUT)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port, ssl_context=ssl_context, reuse_port=reuse_port or None)
+    await site.start()
+    return runner
+
+
+async def start_token_server(port: int = TOKEN_SERVER_PORT) -> web.AppRunner:
+    """Start the HTTP token server on the running loop (embedded in the agent process)"""
+    ssl_context = create_ssl_context()
+    protocol = "https" if ssl_context else "http"
+    if ssl_context:
+        logger.info("🔒 Token Server: HTTPS enabled")
+    else:
+        logger.info("⚠️ Token Server: Running without HTTPS")
+
+    runner = await start_site(create_app(), '0.0.0.0', port, ssl_context)
+    
+    logger.info(f"🚀 Token Server running at: {protocol}://0.0.0.0:{port}")
+    logger.info(f"🔗 Token endpoint: {protocol}://localhost:{port}/api/token?room=<room>&name=<name>")
+    return runner
+
+
+async def serve(worker_id: int, workers: int, host: str, port: int, tls: bool) -> None:
+    """One worker: serve until SIGTERM / SIGINT, then drain in-flight requests"""
+    ssl_context = create_ssl_context() if tls else None
+    runner = await start_site(create_app(worker_id, workers), host, port, ssl_context, reuse_port=workers > 1)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+    logger.info(f"🚀 Token worker {worker_id} ready (pid {os.getpid()})")
+    await stop.wait()
+
+    logger.info(f"🛑 Token worker {worker_id} draining (up to {SHUTDOWN_TIMEOUT:g}s)")
+    await runner.cleanup()  # closes the listener, waits for requests, runs on_cleanup (janitor, API client)
+
+
+def run_worker(worker_id: int, workers: int, host: str, port: int, tls: bool) -> None:
+    """Entry point of a worker process (spawned: nothing is inherited from the supervisor)"""
+    logging.basicConfig(level=logging.INFO,
+                        format=f"%(asctime)s %(levelname)s [token-{worker_id}] %(name)s %(message)s")
+    logger.setLevel(logging.INFO)
+    try:
+        asyncio.run(serve(worker_id, workers, host, port, tls))
+    except KeyboardInterrupt:
+        pass
+
+
+def supervise(workers: int, host: str, port: int, tls: bool) -> None:
+    """Start the workers, restart the ones that die, forward SIGTERM / SIGINT on shutdown"""
+    context = multiprocessing.get_context("spawn")
+    processes: dict[int, multiprocessing.Process] = {}
+    started_at: dict[int, float] = {}
+    stopping = False
+
+    def start(worker_id: int) -> None:
+        process = context.Process(target=run_worker, args=(worker_id, workers, host, port, tls),
+                                  name=f"token-worker-{worker_id}")
+        process.start()
+        processes[worker_id] = process
+        started_at[worker_id] = time.monotonic()
+
+    def request_stop(signum, frame) -> None:
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+
+    for worker_id in range(workers):
+        start(worker_id)
+
+    restart_at: dict[int, float] = {}
+    while not stopping:
+        time.sleep(0.5)
+        now = time.monotonic()
+        for worker_id, process in list(processes.items()):
+            if stopping or process.is_alive():
+                continue
+            if worker_id not in restart_at:
+                uptime = now - started_at[worker_id]
+                logger.error(f"❌ Token worker {worker_id} exited (code {process.exitcode}, up {uptime:.1f}s)")
+                restart_at[worker_id] = now + (RESTART_BACKOFF if uptime < RESTART_BACKOFF else 0)
+            if now >= restart_at[worker_id]:
+                del restart_at[worker_id]
+                logger.info(f"🔄 Restarting token worker {worker_id}")
+                start(worker_id)
+
+    logger.info(f"🛑 Stopping {len(processes)} token worker(s)")
+    for process in processes.values():
+        if process.is_alive():
+            os.kill(process.pid, signal.SIGTERM)
+    deadline = time.monotonic() + SHUTDOWN_TIMEOUT + 5
+    for process in processes.values():
+        process.join(max(0.0, deadline - time.monotonic()))
+        if process.is_alive():
+            logger.warning(f"⚠️ Token worker {process.name} did not stop in time, killing it")
+            process.kill()
+            process.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='LiveKit token server (multi-process)')
+    parser.add_argument('--port', type=int, default=TOKEN_SERVER_PORT)
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--workers', type=int, default=int(os.getenv("TOKEN_SERVER_WORKERS", "1")),
+                        help='worker processes sharing the port (0 = one per CPU)')
+    parser.add_argument('--no-tls', action='store_true', help='serve plain HTTP (benchmarks)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+    workers = args.workers or os.cpu_count() or 1
+    if workers > 1 and not hasattr(socket, "SO_REUSEPORT"):
+        logger.warning("⚠️ SO_REUSEPORT not available on this platform: running a single worker")
+        workers = 1
+
+    tls = not args.no_tls
+    protocol = "https" if tls and create_ssl_context() else "http"
+    if tls and protocol == "http":
+        logger.info("⚠️ Token Server: Running without HTTPS (cert files not found)")
+    logger.info(f"🚀 Token Server: {protocol}://{args.host}:{args.port} with {workers} worker(s)")
+    logger.info(f"🔗 Token endpoint: {protocol}://localhost:{args.port}/api/token?room=<room>&name=<name>")
+    if workers > 1:
+        logger.info("ℹ️ Webhook room index disabled with several workers, the janitor polls LiveKit")
+
+    if workers == 1:
+        run_worker(0, 1, args.host, args.port, tls)
+    else:
+        supervise(workers, args.host, args.port, tls)
+
+
+if __name__ == '__main__':
+    main()
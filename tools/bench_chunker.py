@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Time-to-first-audio of the TTS text chunker (text_chunker.py) over recorded LLM streams.
+
+Each recording (tools/chunker_streams/*.json) holds agent replies as timed deltas:
+    {"model": "...", "replies": [{"tokens": [[ms_since_request, "text"], ...]}, ...]}
+The deltas are replayed into a segmenter; every emitted chunk is "synthesized" with a
+simple TTS model (first byte = --tts-base-ms + --tts-ms-per-char x chars, one request
+at a time like tts.StreamAdapter) and played at --speech-ms-per-char.
+
+Compared:
+  sentence    whole sentences only (what the default sentence tokenizer waits for)
+  clause-N    earliest safe clause boundary, first chunk >= N chars
+
+Reports time to first audio (p50 / p95), playback stalls between chunks, chunks per
+reply and segmenter CPU per delta.
+
+Usage:
+    python3 tools/bench_chunker.py
+    python3 tools/bench_chunker.py --min-chars 10 20 40 --tts-base-ms 180
+    python3 tools/bench_chunker.py tools/chunker_streams/gemini_flash.json --show-chunks
+"""
+
+import argparse
+import glob
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+STREAMS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "chunker_streams")
+sys.path.insert(0, ROOT)
+
+from text_chunker import ClauseSegmenter  # noqa: E402
+
+SENTENCE_ONLY = 10 ** 9  # min_chars that disables clause boundaries
+
+
+def replay(tokens: list, segmenter: ClauseSegmenter) -> tuple[list[tuple[float, str]], float]:
+    """[(emit_ms, chunk)], CPU µs per delta"""
+    chunks = []
+    cpu = 0.0
+    for at_ms, text in tokens:
+        start = time.perf_counter()
+        emitted = segmenter.push(text)
+        cpu += time.perf_counter() - start
+        chunks += [(at_ms, chunk) for chunk in emitted]
+    start = time.perf_counter()
+    emitted = segmenter.flush()
+    cpu += time.perf_counter() - start
+    chunks += [(tokens[-1][0], chunk) for chunk in emitted]
+    return chunks, cpu * 1e6 / len(tokens)
+
+
+def play(chunks: list[tuple[float, str]], args) -> tuple[float, float]:
+    """Time to first audio and total stall (ms) with sequential synthesis"""
+    ready = 0.0
+    playing_until = None
+    first_audio = None
+    stall = 0.0
+    for emit_ms, chunk in chunks:
+        ready = max(emit_ms, ready) + args.tts_base_ms + args.tts_ms_per_char * len(chunk)
+        start = ready if playing_until is None else max(ready, playing_until)
+        if playing_until is None:
+            first_audio = start
+        else:
+            stall += start - playing_until
+        playing_until = start + args.speech_ms_per_char * len(chunk)
+    return first_audio, stall
+
+
+def percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def bench(recording: dict, strategy: str, min_chars: int, args) -> dict:
+    ttfa, stalls, counts, cpu = [], [], [], []
+    examples = []
+    for reply in recording["replies"]:
+        segmenter = ClauseSegmenter(min_chars=min_chars, later_min_chars=max(min_chars, args.later_min_chars))
+        chunks, cpu_us = replay(reply["tokens"], segmenter)
+        first_audio, stall = play(chunks, args)
+        ttfa.append(first_audio)
+        stalls.append(stall)
+        counts.append(len(chunks))
+        cpu.append(cpu_us)
+        examples.append([chunk for _, chunk in chunks])
+    return {
+        "strategy": strategy,
+        "ttfa_p50_ms": round(percentile(ttfa, 0.5), 1),
+        "ttfa_p95_ms": round(percentile(ttfa, 0.95), 1),
+        "stall_ms": round(statistics.mean(stalls), 1),
+        "chunks": round(statistics.mean(counts), 2),
+        "cpu_us_per_delta": round(statistics.mean(cpu), 2),
+        "examples": examples,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time-to-first-audio of the TTS text chunker")
+    parser.add_argument("recordings", nargs="*", help=f"recorded streams (default: {STREAMS_DIR}/*.json)")
+    parser.add_argument("--min-chars", type=int, nargs="+", default=[10, 20, 40])
+    parser.add_argument("--later-min-chars", type=int, default=60)
+    parser.add_argument("--tts-base-ms", type=float, default=250.0, help="TTS first-byte latency")
+    parser.add_argument("--tts-ms-per-char", type=float, default=1.0, help="extra first-byte latency per char")
+    parser.add_argument("--speech-ms-per-char", type=float, default=65.0, help="speaking rate")
+    parser.add_argument("--show-chunks", action="store_true", help="print the chunks of every reply")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    paths = args.recordings or sorted(glob.glob(os.path.join(STREAMS_DIR, "*.json")))
+    results = {}
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            recording = json.load(f)
+        name = os.path.splitext(os.path.basename(path))[0]
+        rows = [bench(recording, "sentence", SENTENCE_ONLY, args)]
+        rows += [bench(recording, f"clause-{n}", n, args) for n in args.min_chars]
+        results[name] = rows
+
+        print(f"\n🎙️  {name} ({recording.get('model', '?')}, {len(recording['replies'])} replies)")
+        print(f"  {'strategy':<11} {'TTFA p50':>9} {'TTFA p95':>9} {'stall ms':>9} {'chunks':>7} {'µs/delta':>9}")
+        print("  " + "-" * 58)
+        base = rows[0]["ttfa_p50_ms"]
+        for r in rows:
+            gain = f"  {r['ttfa_p50_ms'] - base:+.0f} ms" if r is not rows[0] else ""
+            print(f"  {r['strategy']:<11} {r['ttfa_p50_ms']:>9.0f} {r['ttfa_p95_ms']:>9.0f} {r['stall_ms']:>9.0f} "
+                  f"{r['chunks']:>7.2f} {r['cpu_us_per_delta']:>9.2f}{gain}")
+        if args.show_chunks:
+            for r in rows:
+                print(f"\n  [{r['strategy']}]")
+                for chunks in r["examples"]:
+                    print("   " + " | ".join(chunks))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Inventory microbenchmarks (inventory.py) on synthetic menus of 100 .. 100k items.
+
+Times normalize_item_name, find_inventory_key (exact / normalized / partial / miss),
+check_availability, deduct_inventory, load_inventory and the update_order (validate_order) /
+confirm_checkout (deduct_inventory + deduction appended to the inventory log) tool paths,
+with the agent's INFO logging enabled like in production (sent to /dev/null).
+Peak allocations per call are measured in a separate tracemalloc pass.
+
+Results are written to bench_results/inventory-<commit>.json; use --compare
+to print the change against an earlier run.
+
+Usage:
+    python3 tools/bench_inventory.py --sizes 100 1000 10000 100000
+    python3 tools/bench_inventory.py --sizes 100 1000 --compare bench_results/inventory-abc1234.json
+"""
+
+import argparse
+import copy
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import inventory  # noqa: E402
+import inventory_log  # noqa: E402
+
+RESULTS_DIR = os.path.join(ROOT, "bench_results")
+TIME_BUDGET = 0.5  # seconds per function and size
+MAX_CALLS = 2000
+TRACE_CALLS = 3
+
+VI_DISHES = ["Phở bò", "Bún chả", "Bánh mì", "Cơm tấm", "Gỏi cuốn", "Bún bò Huế", "Chả giò",
+             "Bánh xèo", "Cà phê sữa đá", "Chè ba màu", "Hủ tiếu", "Mì Quảng", "Bò lúc lắc"]
+VI_STYLES = ["đặc biệt", "truyền thống", "chay", "thập cẩm", "nhà làm", "cay", "Sài Gòn", "Hà Nội"]
+EN_DISHES = ["Cheeseburger", "Margherita Pizza", "Grilled Salmon", "Pasta Carbonara", "Caesar Salad",
+             "Iced Latte", "Cappuccino", "Tiramisu", "Pad Thai", "Fish Tacos", "Ribeye Steak"]
+EN_STYLES = ["Classic", "Spicy", "Double", "Vegan", "Smoked", "Crispy", "Signature", "Mini"]
+
+
+def make_inventory(size: int, seed: int = 1) -> dict:
+    """Unique Vietnamese + English names, keyed like inventory.json (normalized name)"""
+    rng = random.Random(seed)
+    items = {}
+    serial = 0
+    while len(items) < size:
+        serial += 1
+        if serial % 2:
+            name = f"{rng.choice(VI_DISHES)} {rng.choice(VI_STYLES)} {serial}"
+        else:
+            name = f"{rng.choice(EN_STYLES)} {rng.choice(EN_DISHES)} {serial}"
+        items[inventory.normalize_item_name(name)] = {
+            "name": name,
+            "price": round(rng.uniform(2, 40), 2),
+            "quantity": rng.randint(50, 500),
+        }
+    return items
+
+
+def make_lookups(items: dict, count: int, seed: int = 2) -> dict[str, list[str]]:
+    """Names as a caller (the LLM) would send them"""
+    rng = random.Random(seed)
+    names = [item["name"] for item in items.values()]
+    sample = [rng.choice(names) for _ in range(count)]
+    return {
+        "exact": sample,
+        "normalized": [f"'{name.upper()}'" for name in sample],  # quoted/uppercased -> exact after normalize
+        "partial": [name.rsplit(" ", 1)[0] for name in sample],  # no serial -> substring scan
+        "miss": [f"Món không có {i}" for i in range(count)],
+    }
+
+
+def make_orders(items: dict, count: int, seed: int = 3) -> list[dict[str, int]]:
+    rng = random.Random(seed)
+    names = [item["name"] for item in items.values()]
+    return [{rng.choice(names): rng.randint(1, 3) for _ in range(rng.randint(1, 5))} for _ in range(count)]
+
+
+def time_calls(func, args_list: list[tuple]) -> dict:
+    """Call func on args_list until TIME_BUDGET is used; per-call latencies in µs"""
+    samples = []
+    deadline = time.perf_counter() + TIME_BUDGET
+    for args in args_list:
+        start = time.perf_counter()
+        func(*args)
+        samples.append((time.perf_counter() - start) * 1e6)
+        if time.perf_counter() > deadline:
+            break
+    samples.sort()
+    return {
+        "calls": len(samples),
+        "mean_us": round(statistics.mean(samples), 2),
+        "p50_us": round(samples[len(samples) // 2], 2),
+        "p95_us": round(samples[max(0, int(len(samples) * 0.95) - 1)], 2),
+    }
+
+
+def peak_alloc(func, args_list: list[tuple]) -> float:
+    """Max tracemalloc peak (KB) over a few calls"""
+    peak = 0
+    tracemalloc.start()
+    try:
+        for args in args_list[:TRACE_CALLS]:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            func(*args)
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - base)
+    finally:
+        tracemalloc.stop()
+    return round(peak / 1024, 1)
+
+
+def checkout(log: inventory_log.InventoryLog, stock: dict, order: dict[str, int]) -> None:
+    """confirm_checkout: deduct the session's copy, append the deduction (InventoryFeed.record)"""
+    sold = inventory.order_quantities(stock, order)
+    inventory.deduct_inventory(stock, order)
+    log.append(inventory_log.deduct_events(sold), "checkout")
+
+
+def bench_size(size: int, workdir: str) -> dict:
+    items = make_inventory(size)
+    calls = max(TRACE_CALLS, min(MAX_CALLS, 2_000_000 // size))
+    lookups = make_lookups(items, calls)
+    orders = make_orders(items, calls)
+    path = os.path.join(workdir, f"inventory-{size}.json")
+    inventory_log.write_json_atomic(path, items)
+    log = inventory_log.InventoryLog(path)
+
+    # Deduction mutates quantities: run on a private copy
+    stock = copy.deepcopy(items)
+    cases = {
+        "normalize_item_name": (inventory.normalize_item_name, [(n,) for n in lookups["exact"]]),
+        "find_inventory_key[exact]": (inventory.find_inventory_key, [(n, items) for n in lookups["exact"]]),
+        "find_inventory_key[normalized]": (inventory.find_inventory_key, [(n, items) for n in lookups["normalized"]]),
+        "find_inventory_key[partial]": (inventory.find_inventory_key, [(n, items) for n in lookups["partial"]]),
+        "find_inventory_key[miss]": (inventory.find_inventory_key, [(n, items) for n in lookups["miss"]]),
+        "check_availability": (inventory.check_availability, [(items, o) for o in orders]),
+        "deduct_inventory": (inventory.deduct_inventory, [(stock, o) for o in orders]),
+        "load_inventory": (inventory.load_inventory, [(path,)] * calls),
+        "update_order (validate_order)": (inventory.validate_order, [(items, o) for o in orders]),
+        "confirm_checkout (deduct + log)": (checkout, [(log, stock, o) for o in orders]),
+    }
+
+    results = {}
+    for name, (func, args_list) in cases.items():
+        results[name] = time_calls(func, args_list)
+        results[name]["peak_kb"] = peak_alloc(func, args_list)
+    log.close()
+    results["_file_kb"] = round(os.path.getsize(path) / 1024, 1)
+    return results
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_results(results: dict, baseline: dict = None):
+    for size, functions in results["sizes"].items():
+        print(f"\n📦 {int(size):,} items (inventory.json {functions['_file_kb']} KB)")
+        print(f"  {'function':<34} {'calls':>6} {'mean µs':>12} {'p95 µs':>12} {'peak KB':>10}"
+              f"{'  vs base' if baseline else ''}")
+        for name, r in functions.items():
+            if name.startswith("_"):
+                continue
+            line = (f"  {name:<34} {r['calls']:>6} {r['mean_us']:>12,.1f} {r['p95_us']:>12,.1f} "
+                    f"{r['peak_kb']:>10,.1f}")
+            base = (baseline or {}).get("sizes", {}).get(size, {}).get(name)
+            if base:
+                line += f"  {r['mean_us'] / base['mean_us']:>6.2f}x"
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inventory microbenchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000])
+    parser.add_argument("--log-level", default="INFO", help="agent logger level during the run")
+    parser.add_argument("--out", help=f"result file (default: {RESULTS_DIR}/inventory-<commit>.json)")
+    parser.add_argument("--compare", help="earlier result file to compare against")
+    args = parser.parse_args()
+
+    # Production-like logging: records are formatted and written, just not to the terminal
+    devnull = open(os.devnull, "w")
+    handler = logging.StreamHandler(devnull)
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+    inventory.logger.addHandler(handler)
+    inventory.logger.setLevel(args.log_level)
+    inventory.logger.propagate = False
+
+    commit = git_commit()
+    results = {
+        "benchmark": "inventory",
+        "commit": commit,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "log_level": args.log_level,
+        "sizes": {},
+    }
+    with tempfile.TemporaryDirectory(prefix="bench-inventory-") as workdir:
+        for size in args.sizes:
+            print(f"⏱️  {size:,} items ...", flush=True)
+            results["sizes"][str(size)] = bench_size(size, workdir)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"\n🔁 Comparing with {baseline.get('commit', '?')} ({args.compare})")
+    print_results(results, baseline)
+
+    out = args.out or os.path.join(RESULTS_DIR, f"inventory-{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Results written to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Inventory change feed (inventory_feed.py) with many live sessions in one job process.
+
+  log       an event appended to the inventory log by another writer (manage_inventory.py
+            update, another job process checking out): time until every session's inventory
+            has it, with the watcher polling every --poll seconds (detection is at most one
+            poll interval)
+  record    a checkout in this process (InventoryFeed.record: append, then read back): time
+            until every session has applied the delta and queued its data channel message
+  re-read   baseline: every session loading the inventory (snapshot + log) itself to pick up the change
+
+Sessions are inventory_feed.SessionInventory objects with a stand-in room that only counts
+the data packets (no LiveKit). Exits 1 if a session misses an update.
+
+Usage:
+    python3 tools/bench_inventory_feed.py
+    python3 tools/bench_inventory_feed.py --sessions 10 100 1000 --rounds 50 --poll 0.05
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import inventory_feed  # noqa: E402
+import inventory_log  # noqa: E402
+
+
+class CountingParticipant:
+    def __init__(self):
+        self.packets = 0
+        self.bytes = 0
+
+    async def publish_data(self, data: bytes, topic: str = "") -> None:
+        self.packets += 1
+        self.bytes += len(data)
+
+
+class StandInRoom:
+    def __init__(self):
+        self.local_participant = CountingParticipant()
+
+
+class StandInUserData:
+    def __init__(self, items: dict):
+        self.inventory = items
+
+
+def percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+async def wait_applied(views: list, key: str, quantity: int, timeout: float = 10.0) -> float:
+    """ms until every session has the quantity"""
+    start = time.perf_counter()
+    while any(view.userdata.inventory[key]["quantity"] != quantity for view in views):
+        if time.perf_counter() - start > timeout:
+            raise TimeoutError(f"{key} not updated in every session")
+        await asyncio.sleep(0.0005)
+    return (time.perf_counter() - start) * 1000
+
+
+async def bench_sessions(path: str, sessions: int, rounds: int, poll: float) -> dict:
+    feed = inventory_feed.InventoryFeed(path, poll_interval=poll).start()
+    views = [inventory_feed.SessionInventory(feed, StandInUserData(feed.snapshot()), StandInRoom())
+             for _ in range(sessions)]
+    keys = list(feed.snapshot())
+
+    other = inventory_log.InventoryLog(path)  # another writer of the same log
+    log_ms, record_ms, reread_ms = [], [], []
+    for n in range(rounds):
+        key = keys[n % len(keys)]
+        other.append([{"op": "set", "key": key, "qty": 1000 + n}], source="bench")
+        log_ms.append(await wait_applied(views, key, 1000 + n))
+
+        start = time.perf_counter()
+        for _ in range(sessions):
+            inventory_log.InventoryLog(path).load()
+        reread_ms.append((time.perf_counter() - start) * 1000)
+
+        quantity = 0 if n % 2 else 500 + n  # sold out every other round
+        start = time.perf_counter()
+        feed.record([{"op": "set", "key": key, "qty": quantity}], source="bench")
+        await asyncio.sleep(0)
+        await wait_applied(views, key, quantity)
+        record_ms.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(poll * 1.5)  # the watcher finds nothing new: no second delta
+
+    for view in views:
+        await view.close()
+    feed.stop()
+    packets = [view.room.local_participant.packets for view in views]
+    sent_bytes = sum(view.room.local_participant.bytes for view in views)
+    return {
+        "sessions": sessions,
+        "deltas": feed.version,
+        "log_p50_ms": round(statistics.median(log_ms), 2),
+        "log_p99_ms": round(percentile(log_ms, 0.99), 2),
+        "record_p50_ms": round(statistics.median(record_ms), 3),
+        "record_p99_ms": round(percentile(record_ms, 0.99), 3),
+        "reread_p50_ms": round(statistics.median(reread_ms), 2),
+        "packets_per_session": round(statistics.mean(packets), 1),
+        "bytes_per_packet": round(sent_bytes / max(1, sum(packets))),
+        "missed": sum(1 for count in packets if count != 2 * rounds),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inventory change feed with many sessions")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--poll", type=float, default=inventory_feed.INVENTORY_POLL_INTERVAL,
+                        help="watcher poll interval (s)")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    logging.getLogger("restaurant-bot").setLevel(logging.WARNING)
+    results = []
+    with tempfile.TemporaryDirectory(prefix="bench-feed-") as workdir:
+        for sessions in args.sessions:
+            path = os.path.join(workdir, f"inventory-{sessions}.json")
+            shutil.copyfile(os.path.join(ROOT, "inventory.json"), path)
+            print(f"⏱️  {sessions:,} sessions ...", flush=True)
+            results.append(asyncio.run(bench_sessions(path, sessions, args.rounds, args.poll)))
+
+    print(f"\n📦 Inventory feed, poll every {args.poll:g} s, {args.rounds} log events + {args.rounds} checkouts")
+    print(f"  {'sessions':>9} {'log p50 ms':>12} {'p99':>8} {'record p50 ms':>15} {'p99':>7} "
+          f"{'re-read ms':>11} {'packets':>8} {'B/packet':>9}")
+    print("  " + "-" * 86)
+    for r in results:
+        print(f"  {r['sessions']:>9,} {r['log_p50_ms']:>12.1f} {r['log_p99_ms']:>8.1f} {r['record_p50_ms']:>15.3f} "
+              f"{r['record_p99_ms']:>7.3f} {r['reread_p50_ms']:>11.1f} {r['packets_per_session']:>8} "
+              f"{r['bytes_per_packet']:>9}")
+    print("\n  log = until every session has it (includes waiting for the poll); re-read = every session"
+          " loading the inventory itself once")
+
+    missed = sum(r["missed"] for r in results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results written to {args.json}")
+    if missed:
+        print(f"\n❌ {missed} sessions missed an update")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Inventory event log (inventory_log.py) against rewriting the whole inventory file per change.
+
+  append      one checkout deduction appended to the log (flock + one O_APPEND write), per call
+  rewrite     the same change written like before the log: load inventory.json, change one item,
+              write the whole file (temp file + os.replace); cost grows with the menu
+  writers     --writers processes deducting the same item at once, --events each, with compaction
+              every ~64 KB of log: events/s and lost updates (the final quantity must be exactly
+              the start minus every deduction). The rewrite column does the same with
+              read-modify-write of the file.
+  recovery    load(): latest snapshot + replay of the events after it, for several log lengths
+  compact     snapshot + new log + inventory.json for each inventory size
+
+Exits 1 if the log loses an update.
+
+Usage:
+    python3 tools/bench_inventory_log.py
+    python3 tools/bench_inventory_log.py --sizes 80 10000 50000 --events 100000 --writers 8
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import inventory_log  # noqa: E402
+from bench_inventory import make_inventory  # noqa: E402
+
+NO_COMPACTION = 2**62
+WRITER_COMPACT_BYTES = 64 * 1024
+START_QUANTITY = 10**9
+
+
+def percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def fresh(workdir: str, name: str, items: dict) -> str:
+    path = os.path.join(workdir, name)
+    inventory_log.write_json_atomic(path, items)
+    return path
+
+
+def per_call_us(fn, count: int) -> list[float]:
+    times = []
+    for n in range(count):
+        start = time.perf_counter()
+        fn(n)
+        times.append((time.perf_counter() - start) * 1e6)
+    return times
+
+
+# ==================== WRITE ====================
+def bench_append(workdir: str, items: dict, calls: int) -> dict:
+    path = fresh(workdir, "append.json", items)
+    keys = list(items)
+    log = inventory_log.InventoryLog(path, compact_bytes=NO_COMPACTION)
+    times = per_call_us(lambda n: log.deduct({keys[n % len(keys)]: 1}), calls)
+    log.close()
+    return {"append_p50_us": statistics.median(times), "append_p99_us": percentile(times, 0.99),
+            "append_per_s": calls / (sum(times) / 1e6)}
+
+
+def bench_rewrite(workdir: str, items: dict, calls: int) -> dict:
+    path = fresh(workdir, "rewrite.json", items)
+    keys = list(items)
+
+    def rewrite(n: int) -> None:
+        with open(path, encoding="utf-8") as f:
+            current = json.load(f)
+        current[keys[n % len(keys)]]["quantity"] -= 1
+        inventory_log.write_json_atomic(path, current)
+
+    times = per_call_us(rewrite, calls)
+    return {"rewrite_p50_us": statistics.median(times), "rewrite_per_s": calls / (sum(times) / 1e6)}
+
+
+def log_writer(path: str, key: str, events: int, barrier) -> None:
+    log = inventory_log.InventoryLog(path, compact_bytes=WRITER_COMPACT_BYTES)
+    barrier.wait()
+    for _ in range(events):
+        log.deduct({key: 1}, source=f"bench-{os.getpid()}")
+    log.close()
+
+
+def file_writer(path: str, key: str, events: int, barrier) -> None:
+    barrier.wait()
+    for _ in range(events):
+        with open(path, encoding="utf-8") as f:
+            current = json.load(f)
+        current[key]["quantity"] -= 1
+        inventory_log.write_json_atomic(path, current)
+
+
+def run_writers(target, path: str, key: str, writers: int, events: int) -> float:
+    barrier = multiprocessing.Barrier(writers + 1)
+    processes = [multiprocessing.Process(target=target, args=(path, key, events, barrier)) for _ in range(writers)]
+    for process in processes:
+        process.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for process in processes:
+        process.join()
+    return time.perf_counter() - start
+
+
+def bench_writers(workdir: str, items: dict, writers: int, events: int) -> dict:
+    items = {key: dict(item) for key, item in items.items()}
+    key = next(iter(items))
+    items[key]["quantity"] = START_QUANTITY
+    expected = START_QUANTITY - writers * events
+
+    path = fresh(workdir, "writers-log.json", items)
+    log_s = run_writers(log_writer, path, key, writers, events)
+    log = inventory_log.InventoryLog(path)
+    log_final = log.load()[0][key]["quantity"]
+
+    path = fresh(workdir, "writers-file.json", items)
+    rewrite_events = max(1, events // 10)  # a whole-file rewrite per event: fewer of them
+    file_s = run_writers(file_writer, path, key, writers, rewrite_events)
+    with open(path, encoding="utf-8") as f:
+        file_final = json.load(f)[key]["quantity"]
+    return {
+        "writers": writers,
+        "writers_log_per_s": writers * events / log_s,
+        "writers_log_lost": log_final - expected,
+        "compactions": log.snapshot_generation(),
+        "writers_file_per_s": writers * rewrite_events / file_s,
+        "writers_file_lost": file_final - (START_QUANTITY - writers * rewrite_events),
+    }
+
+
+# ==================== RECOVERY ====================
+def bench_recovery(workdir: str, items: dict, event_counts: list[int]) -> list[dict]:
+    path = fresh(workdir, "recovery.json", items)
+    keys = list(items)
+    log = inventory_log.InventoryLog(path, compact_bytes=NO_COMPACTION)
+    compact_ms = log.compact()["ms"]  # start from a real snapshot
+    rows = []
+    written = 0
+    batch = 10_000
+    for count in sorted(event_counts):
+        while written < count:
+            n = min(batch, count - written)
+            log.append([{"op": "deduct", "key": keys[(written + i) % len(keys)], "qty": 1} for i in range(n)],
+                       source="bench")
+            written += n
+        times = []
+        for _ in range(3):
+            start = time.perf_counter()
+            _, position = inventory_log.InventoryLog(path).load()
+            times.append((time.perf_counter() - start) * 1000)
+        rows.append({"events": count, "log_mb": position.offset / 2**20, "load_ms": min(times)})
+    start = time.perf_counter()
+    with open(path, encoding="utf-8") as f:
+        json.load(f)
+    plain_ms = (time.perf_counter() - start) * 1000
+    log.close()
+    return [{**row, "compact_ms": compact_ms, "plain_json_ms": plain_ms} for row in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inventory event log vs whole-file rewrites")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[80, 10000, 50000], help="inventory items")
+    parser.add_argument("--calls", type=int, default=2000, help="appends timed per size")
+    parser.add_argument("--writers", type=int, default=4, help="concurrent writer processes")
+    parser.add_argument("--events", type=int, default=5000, help="deductions per writer process")
+    parser.add_argument("--replay", type=int, nargs="+", default=[0, 10000, 100000],
+                        help="events after the snapshot for the recovery test")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    logging.getLogger("restaurant-bot").setLevel(logging.WARNING)
+    results = []
+    with tempfile.TemporaryDirectory(prefix="bench-inventory-log-") as workdir:
+        for size in args.sizes:
+            print(f"⏱️  {size:,} items ...", flush=True)
+            items = make_inventory(size, args.seed)
+            sizedir = os.path.join(workdir, str(size))  # each log keeps its own snapshot and archives
+            os.mkdir(sizedir)
+            rewrite_calls = max(20, min(args.calls, 2000 * 80 // size))
+            result = {"items": size, **bench_append(sizedir, items, args.calls),
+                      **bench_rewrite(sizedir, items, rewrite_calls)}
+            result["recovery"] = bench_recovery(sizedir, items, args.replay)
+            results.append(result)
+        print(f"⏱️  {args.writers} writer processes ...", flush=True)
+        writers = bench_writers(workdir, make_inventory(args.sizes[0], args.seed), args.writers, args.events)
+
+    print(f"\n📜 Inventory log writes, {os.cpu_count()} CPUs")
+    print(f"  {'items':>8} {'append p50 µs':>14} {'p99':>7} {'appends/s':>10} {'rewrite p50 µs':>15} "
+          f"{'rewrites/s':>11} {'speedup':>8}")
+    print("  " + "-" * 79)
+    for r in results:
+        print(f"  {r['items']:>8,} {r['append_p50_us']:>14.1f} {r['append_p99_us']:>7.1f} {r['append_per_s']:>10,.0f} "
+              f"{r['rewrite_p50_us']:>15,.0f} {r['rewrite_per_s']:>11,.0f} "
+              f"{r['append_per_s'] / r['rewrite_per_s']:>7.0f}x")
+
+    print(f"\n  {args.writers} processes on one item ({args.sizes[0]:,} items): log {writers['writers_log_per_s']:,.0f}"
+          f" events/s, {writers['writers_log_lost']} lost, {writers['compactions']} compactions;"
+          f" read-modify-write {writers['writers_file_per_s']:,.0f}/s, {writers['writers_file_lost']} lost")
+
+    print("\n🔁 Recovery: snapshot + replay (ms)")
+    print(f"  {'items':>8} {'events':>8} {'log MB':>7} {'load':>8} {'plain json':>11} {'compact':>8}")
+    print("  " + "-" * 56)
+    for r in results:
+        for row in r["recovery"]:
+            print(f"  {r['items']:>8,} {row['events']:>8,} {row['log_mb']:>7.1f} {row['load_ms']:>8.1f} "
+                  f"{row['plain_json_ms']:>11.1f} {row['compact_ms']:>8.1f}")
+    print("\n  rewrite = load + change + atomic write of the whole file (the write path before the log);"
+          " plain json = json.load of inventory.json alone")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"sizes": results, "writers": writers}, f, indent=2)
+        print(f"\n💾 Results written to {args.json}")
+    if writers["writers_log_lost"]:
+        print(f"\n❌ The log lost {writers['writers_log_lost']} deductions")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Event-loop time spent in logging on the agent hot path (inventory lookups of update_order,
+deduction of confirm_checkout), per logging setup:
+
+  off         logger disabled (reference: the work itself)
+  sync        StreamHandler writing on the loop thread (stock logging config)
+  queue       agent_logging.setup(): QueueHandler on the loop, writes on a listener thread
+  queue+rate  same with LOG_RATE_LIMIT-style rate limit on restaurant-bot
+
+"logging ms" = turn time of the setup - turn time with logging off. With --baseline-ref
+the same runs are done with inventory.py of an earlier commit (before/after).
+
+Usage:
+    python3 tools/bench_logging.py
+    python3 tools/bench_logging.py --sizes 80 1000 10000 --baseline-ref HEAD~1
+"""
+
+import argparse
+import asyncio
+import copy
+import importlib.util
+import logging
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import agent_logging  # noqa: E402
+import inventory  # noqa: E402
+from bench_inventory import make_inventory, make_orders  # noqa: E402
+
+SETUPS = ("off", "sync", "queue", "queue+rate")
+RATE_LIMIT = 50.0  # records/s
+
+
+def load_inventory_module(ref: str, workdir: str):
+    """inventory.py as of a git ref, imported under another name"""
+    source = subprocess.check_output(["git", "show", f"{ref}:inventory.py"], cwd=ROOT, text=True)
+    path = os.path.join(workdir, "inventory_baseline.py")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(source)
+    spec = importlib.util.spec_from_file_location("inventory_baseline", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def configure(setup: str, log_path: str) -> logging.Handler:
+    root = logging.getLogger()
+    handler = logging.FileHandler(log_path, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+    root.addHandler(handler)
+    logger = logging.getLogger("restaurant-bot")
+    logger.setLevel(logging.CRITICAL + 1 if setup == "off" else logging.INFO)
+    if setup == "queue":
+        agent_logging.setup(sample_rates={}, rate_limits={})
+    elif setup == "queue+rate":
+        agent_logging.setup(sample_rates={}, rate_limits={"restaurant-bot": RATE_LIMIT})
+    return handler
+
+
+def teardown(handler: logging.Handler) -> None:
+    agent_logging.shutdown()
+    logging.getLogger().removeHandler(handler)
+    handler.close()
+
+
+async def run_turns(module, items: dict, orders: list[dict], turns: int) -> list[float]:
+    """One turn = update_order (validate) + confirm_checkout (deduct), timed on the loop thread"""
+    stock = copy.deepcopy(items)
+    samples = []
+    for index in range(turns):
+        order = orders[index % len(orders)]
+        start = time.perf_counter()
+        module.validate_order(items, order)
+        module.deduct_inventory(stock, order)
+        samples.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(0)  # let the loop (and other tasks) run between turns
+    return samples
+
+
+async def bench(module, size: int, turns: int, workdir: str) -> dict:
+    items = make_inventory(size)
+    # Mix in misses: the "No match" path logged every key before
+    orders = make_orders(items, 200)
+    rng = random.Random(5)
+    for order in orders[::10]:
+        order[f"món không có {rng.randint(0, 999)}"] = 1
+
+    results = {}
+    for setup in SETUPS:
+        handler = configure(setup, os.path.join(workdir, f"{setup}.log"))
+        try:
+            samples = await run_turns(module, items, orders, turns)
+        finally:
+            teardown(handler)
+        results[setup] = statistics.mean(samples)
+    return {setup: {"turn_ms": round(ms, 4), "logging_ms": round(ms - results["off"], 4)}
+            for setup, ms in results.items()}
+
+
+def print_rows(title: str, rows: dict):
+    print(f"\n{title}")
+    print(f"  {'items':>7} " + " ".join(f"{setup:>12}" for setup in SETUPS) + "   (loop ms in logging per turn)")
+    for size, result in rows.items():
+        print(f"  {size:>7,} " + " ".join(f"{result[setup]['logging_ms']:>12.3f}" for setup in SETUPS))
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Event-loop time spent in logging on the agent hot path")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[80, 1000, 10000])
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--baseline-ref", help="git ref whose inventory.py is measured as 'before'")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench-logging-") as workdir:
+        modules = {"after (working tree)": inventory}
+        if args.baseline_ref:
+            modules = {f"before ({args.baseline_ref})": load_inventory_module(args.baseline_ref, workdir), **modules}
+
+        for label, module in modules.items():
+            rows = {}
+            for size in args.sizes:
+                # Fewer turns on huge menus: the old code logs the whole inventory every turn
+                turns = max(10, min(args.turns, args.turns * 1000 // size))
+                rows[size] = await bench(module, size, turns, workdir)
+            print_rows(f"📝 inventory.py {label}", rows)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
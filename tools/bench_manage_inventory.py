@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+manage_inventory.py on large inventory files (default 50k items): how long a nightly stock
+sync takes, and what batching saves over one `update` per item.
+
+  load            snapshot + inventory log (inventory_log.py)
+  export          CSV and JSON
+  import          CSV with a new quantity for every item (read, validate, merge, diff, write),
+                  in-process and as `python manage_inventory.py import` end to end; --dry-run too
+  batch update    --updates items in one `update` (one read, one log append)
+  one by one      the same items as separate single-item updates (read + append each), like
+                  `manage_inventory.py update <tên> <số>` before batching; measured on a sample
+                  and scaled to --updates
+  restock         one category back to par
+  compact         snapshot of everything above, new log, inventory.json rewritten
+
+Items are synthetic (tools/bench_inventory.py names) with a category and a par level.
+
+Usage:
+    python3 tools/bench_manage_inventory.py
+    python3 tools/bench_manage_inventory.py --sizes 10000 50000 200000 --updates 5000
+"""
+
+import argparse
+import contextlib
+import csv
+import io
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import inventory_log  # noqa: E402
+import manage_inventory  # noqa: E402
+from bench_inventory import make_inventory  # noqa: E402
+
+CATEGORIES = ["breakfast", "main", "drinks", "desserts"]
+ONE_BY_ONE_SAMPLE = 20
+
+
+def make_items(size: int, seed: int) -> dict:
+    items = make_inventory(size, seed)
+    for n, item in enumerate(items.values()):
+        item["category"] = CATEGORIES[n % len(CATEGORIES)]
+        item["par"] = item["quantity"]
+    return items
+
+
+def timed(fn) -> tuple[float, object]:
+    """ms, result; the CLI's own prints are swallowed"""
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = fn()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def write_stock_csv(path: str, items: dict, rng: random.Random) -> None:
+    """Nightly sync file: name + counted quantity for every item"""
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["name", "quantity"])
+        for item in items.values():
+            writer.writerow([item["name"], rng.randint(0, 600)])
+
+
+def bench_size(workdir: str, size: int, updates: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    path = os.path.join(workdir, f"inventory-{size}.json")
+    items = make_items(size, seed)
+    inventory_log.write_json_atomic(path, items)
+    result = {"items": size, "file_mb": round(os.path.getsize(path) / 2**20, 1)}
+
+    result["load_ms"], items = timed(lambda: manage_inventory.load_items(path))
+
+    csv_path, json_path = os.path.join(workdir, "export.csv"), os.path.join(workdir, "export.json")
+
+    def export(target, fmt):
+        with open(target, "w", encoding="utf-8", newline="") as f:
+            manage_inventory.export_items(items, fmt, f)
+
+    result["export_csv_ms"], _ = timed(lambda: export(csv_path, "csv"))
+    result["export_json_ms"], _ = timed(lambda: export(json_path, "json"))
+
+    stock_path = os.path.join(workdir, "stock.csv")
+    write_stock_csv(stock_path, items, rng)
+
+    def import_stock(dry_run: bool):
+        current = manage_inventory.load_items(path)
+        merged = manage_inventory.merge_rows(current, manage_inventory.read_rows(stock_path))
+        manage_inventory.commit(current, merged, dry_run, path)
+        return merged
+
+    result["import_dry_run_ms"], _ = timed(lambda: import_stock(True))
+    result["import_ms"], merged = timed(lambda: import_stock(False))
+    assert manage_inventory.load_items(path) == merged
+
+    write_stock_csv(stock_path, merged, rng)  # the next night's counts: every quantity changes again
+    start = time.perf_counter()
+    subprocess.run([sys.executable, os.path.join(ROOT, "manage_inventory.py"), "--file", path, "import", stock_path],
+                   check=True, capture_output=True)
+    result["import_cli_ms"] = (time.perf_counter() - start) * 1000
+
+    names = [item["name"] for item in rng.sample(list(merged.values()), min(updates, size))]
+    pairs = [(name, f"+{rng.randint(1, 50)}") for name in names]
+
+    def batch():
+        current = manage_inventory.load_items(path)
+        manage_inventory.commit(current, manage_inventory.apply_updates(current, pairs), False, path)
+
+    result["batch_update_ms"], _ = timed(batch)
+
+    def one_by_one(sample):
+        for name, spec in sample:
+            current = manage_inventory.load_items(path)
+            manage_inventory.commit(current, manage_inventory.apply_updates(current, [(name, spec)]), False, path)
+
+    sample = pairs[:ONE_BY_ONE_SAMPLE]
+    sample_ms, _ = timed(lambda: one_by_one(sample))
+    result["one_by_one_ms"] = sample_ms / len(sample) * len(pairs)
+
+    def restock_drinks():
+        current = manage_inventory.load_items(path)
+        manage_inventory.commit(current, manage_inventory.restock(current, "drinks"), False, path)
+
+    result["restock_ms"], _ = timed(restock_drinks)
+    result["compact_ms"], _ = timed(lambda: inventory_log.InventoryLog(path).compact())
+    result["updates"] = len(pairs)
+    return {key: round(value, 1) if isinstance(value, float) else value for key, value in result.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="manage_inventory.py on large inventory files")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--updates", type=int, default=1000, help="items changed by the batch update")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    logging.getLogger("restaurant-bot").setLevel(logging.WARNING)
+    results = []
+    with tempfile.TemporaryDirectory(prefix="bench-manage-inventory-") as workdir:
+        for size in args.sizes:
+            print(f"⏱️  {size:,} items ...", flush=True)
+            results.append(bench_size(workdir, size, args.updates, args.seed))
+
+    print(f"\n🛠️  manage_inventory.py (ms), {os.cpu_count()} CPUs")
+    print(f"  {'items':>8} {'MB':>5} {'load':>7} {'compact':>8} {'csv out':>8} {'json out':>9} {'import':>8} "
+          f"{'dry-run':>8} {'CLI':>7} {'restock':>8}")
+    print("  " + "-" * 87)
+    for r in results:
+        print(f"  {r['items']:>8,} {r['file_mb']:>5} {r['load_ms']:>7.1f} {r['compact_ms']:>8.1f} {r['export_csv_ms']:>8.1f} "
+              f"{r['export_json_ms']:>9.1f} {r['import_ms']:>8.1f} {r['import_dry_run_ms']:>8.1f} "
+              f"{r['import_cli_ms']:>7.0f} {r['restock_ms']:>8.1f}")
+    print(f"\n  {'items':>8} {'updates':>8} {'batch ms':>9} {'one by one ms':>14} {'speedup':>8}")
+    for r in results:
+        print(f"  {r['items']:>8,} {r['updates']:>8,} {r['batch_update_ms']:>9.1f} {r['one_by_one_ms']:>14,.0f} "
+              f"{r['one_by_one_ms'] / r['batch_update_ms']:>7.0f}x")
+    print(f"\n  import = CSV with every item's quantity; CLI = same as a process (interpreter start included);"
+          f" one by one scaled from {ONE_BY_ONE_SAMPLE} single-item updates")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Order ledger (order_ledger.py): append cost on the checkout path and report time over
+millions of records.
+
+  append        OrderLedger.append_checkout of a 3-line order (what the "ledger" background
+                queue runs after confirm_checkout), and the 32-byte records it adds
+  scan          report by item / hour / day straight from the memmap (--no-cache, and
+                ranges that are not whole hours, e.g. 11:15 -> 13:40)
+  cache cold    first cached report: hourly rollup built from every record and saved
+  cache warm    rollup loaded, nothing new appended
+  incremental   --append new records appended, then a cached report (only those are read)
+
+Records are synthetic: --days of sales over the real menu (inventory.json), lunch and
+dinner peaks, 1-5 lines per order, one reservation per ~8 orders.
+
+Usage:
+    python3 tools/bench_order_ledger.py
+    python3 tools/bench_order_ledger.py --rows 1000000 5000000 --append 20000
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import inventory  # noqa: E402
+import order_ledger  # noqa: E402
+
+
+def synthetic_records(rows: int, days: int, menu: dict, rng: np.random.Generator, end: float) -> np.ndarray:
+    """rows records ending at end, ts sorted like an append-only file"""
+    items = np.array([order_ledger.item_id(entry["name"]) for entry in menu.values()], dtype=np.uint32)
+    prices = np.array([entry["price"] for entry in menu.values()], dtype=np.float32)
+    popularity = rng.zipf(1.3, len(items)).astype(np.float64)
+    popularity /= popularity.sum()
+
+    lines = rng.integers(1, 6, rows)  # lines per order
+    orders = np.repeat(np.arange(rows), lines)[:rows]
+    n_orders = int(orders[-1]) + 1
+    day = rng.integers(0, days, n_orders)
+    hour = np.where(rng.random(n_orders) < 0.55, rng.normal(12.5, 1.2, n_orders), rng.normal(19.0, 1.5, n_orders))
+    order_ts = np.sort(end - days * 86400 + day * 86400 + np.clip(hour, 7, 22.9) * 3600)
+
+    records = np.zeros(rows, dtype=order_ledger.RECORD)
+    records["ts"] = order_ts[orders]
+    records["order"] = (records["ts"] * 1000).astype(np.uint64) << np.uint64(22) | orders.astype(np.uint64)
+    pick = rng.choice(len(items), rows, p=popularity)
+    qty = rng.integers(1, 4, rows).astype(np.uint32)
+    records["item"] = items[pick]
+    records["qty"] = qty
+    records["amount"] = prices[pick] * qty
+    reservation = (rng.random(n_orders) < 0.12)[orders]
+    first = np.r_[True, orders[1:] != orders[:-1]]
+    reservation &= first
+    records["kind"][reservation] = order_ledger.RESERVATION
+    records["item"][reservation] = 0
+    records["amount"][reservation] = 0
+    records["qty"][reservation] = rng.integers(1, 9, int(reservation.sum()))
+    return records
+
+
+def write_ledger(path: str, records: np.ndarray, menu: dict) -> None:
+    order_ledger.create_ledger(path)
+    with open(path, "ab") as f:
+        f.write(records.tobytes())
+    with open(f"{path}.items", "w", encoding="utf-8") as f:
+        for entry in menu.values():
+            f.write(f"{order_ledger.item_id(entry['name'])}\t{entry['name']}\n")
+
+
+def timed(fn, repeat: int = 3) -> tuple[float, object]:
+    """Best of repeat, ms"""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best, result
+
+
+def drop_cache(path: str) -> None:
+    try:
+        os.remove(order_ledger.rollup_path(path))
+    except FileNotFoundError:
+        pass
+
+
+def bench_append(workdir: str, menu: dict, samples: int) -> dict:
+    path = os.path.join(workdir, "append.ledger")
+    ledger = order_ledger.OrderLedger(path)
+    names = list(menu)
+    latencies = []
+    for n in range(samples):
+        order = {names[n % len(names)]: 2, names[(n * 7) % len(names)]: 1, names[(n * 13) % len(names)]: 3}
+        start = time.perf_counter()
+        ledger.append_checkout(order, menu)
+        latencies.append((time.perf_counter() - start) * 1e6)
+    ledger.close()
+    records = order_ledger.read_records(path)
+    return {
+        "append_p50_us": round(statistics.median(latencies), 1),
+        "append_p99_us": round(sorted(latencies)[int(len(latencies) * 0.99)], 1),
+        "bytes_per_order": round((os.path.getsize(path) - order_ledger.HEADER_SIZE) / samples, 1),
+        "records": len(records),
+    }
+
+
+def bench_size(workdir: str, rows: int, args, menu: dict, rng: np.random.Generator) -> dict:
+    path = os.path.join(workdir, f"orders-{rows}.ledger")
+    end = (time.time() // 86400) * 86400
+    records = synthetic_records(rows, args.days, menu, rng, end)
+    write_ledger(path, records, menu)
+    expected_qty = int(records["qty"][records["kind"] == order_ledger.CHECKOUT].sum())
+
+    lunch_start, lunch_end = end - 86400 + 11 * 3600 + 15 * 60, end - 86400 + 13 * 3600 + 40 * 60
+    result = {"rows": rows, "mb": round(os.path.getsize(path) / 2**20, 1)}
+    for by in ("item", "hour", "day"):
+        result[f"scan_{by}_ms"], rows_out = timed(
+            lambda: order_ledger.report(path, by=by, offset_hours=0, use_cache=False))
+        if by == "item":
+            assert sum(row["qty"] for row in rows_out) == expected_qty
+    result["scan_range_ms"], _ = timed(
+        lambda: order_ledger.report(path, by="item", start=lunch_start, end=lunch_end, offset_hours=0))
+
+    drop_cache(path)
+    result["cache_cold_ms"], _ = timed(lambda: (drop_cache(path), order_ledger.report(path, by="item", offset_hours=0)))
+    result["cache_warm_ms"], rows_out = timed(lambda: order_ledger.report(path, by="item", offset_hours=0))
+    assert sum(row["qty"] for row in rows_out) == expected_qty
+    result["cache_warm_hour_range_ms"], _ = timed(
+        lambda: order_ledger.report(path, by="hour", start=end - 7 * 86400, end=end, offset_hours=0))
+
+    # Incremental: append, then one cached report reads only the new records
+    extra = synthetic_records(args.append, 1, menu, rng, end + 86400)
+    with open(path, "ab") as f:
+        f.write(extra.tobytes())
+    start = time.perf_counter()
+    rows_out = order_ledger.report(path, by="item", offset_hours=0)
+    result["incremental_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    expected_qty += int(extra["qty"][extra["kind"] == order_ledger.CHECKOUT].sum())
+    assert sum(row["qty"] for row in rows_out) == expected_qty
+    result["cache_kb"] = round(os.path.getsize(order_ledger.rollup_path(path)) / 1024)
+    for key, value in result.items():
+        if key.endswith("_ms"):
+            result[key] = round(value, 2)
+    os.remove(path)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Order ledger append cost and report time")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000, 5_000_000])
+    parser.add_argument("--days", type=int, default=365, help="days of sales in the synthetic ledger")
+    parser.add_argument("--append", type=int, default=10_000, help="records appended before the incremental report")
+    parser.add_argument("--samples", type=int, default=2000, help="orders for the append benchmark")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    logging.getLogger("restaurant-bot").setLevel(logging.WARNING)
+    menu = inventory.load_inventory(os.path.join(ROOT, "inventory.json"))
+    rng = np.random.default_rng(args.seed)
+
+    with tempfile.TemporaryDirectory(prefix="bench-ledger-") as workdir:
+        append = bench_append(workdir, menu, args.samples)
+        sizes = []
+        for rows in args.rows:
+            print(f"⏱️  {rows:,} records ...", flush=True)
+            sizes.append(bench_size(workdir, rows, args, menu, rng))
+
+    print(f"\n📒 Append (3-line order, {len(menu)} menu items): p50 {append['append_p50_us']} µs, "
+          f"p99 {append['append_p99_us']} µs, {append['bytes_per_order']:g} bytes/order")
+    print(f"\n📊 Reports (ms), {args.days} days of sales, {os.cpu_count()} CPUs")
+    print(f"  {'records':>10} {'MB':>6} {'scan item':>10} {'hour':>7} {'day':>7} {'range':>7}   "
+          f"{'cold':>7} {'warm':>6} {'warm 7d':>8} {f'+{args.append:,}':>8} {'cache KB':>9}")
+    print("  " + "-" * 98)
+    for r in sizes:
+        print(f"  {r['rows']:>10,} {r['mb']:>6} {r['scan_item_ms']:>10.1f} {r['scan_hour_ms']:>7.1f} "
+              f"{r['scan_day_ms']:>7.1f} {r['scan_range_ms']:>7.1f}   {r['cache_cold_ms']:>7.1f} "
+              f"{r['cache_warm_ms']:>6.1f} {r['cache_warm_hour_range_ms']:>8.1f} {r['incremental_ms']:>8.1f} "
+              f"{r['cache_kb']:>9,}")
+    print("\n  scan = no cache; range = 11:15 -> 13:40 (not whole hours, always a scan);"
+          " cold = rollup built and saved")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"append": append, "reports": sizes}, f, indent=2)
+        print(f"\n💾 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Provider routing simulation (provider_router.py) with local fake providers.
+
+Two TTS / STT stand-ins from tools/fake_providers.py with injected first-byte delays:
+  fast    ~150 ms, browns out (10x slower + 20% errors) during the middle third of the run
+  steady  ~300 ms
+Strategies compared on the same request sequence:
+  fixed   always the fast provider (today's single-provider setup)
+  routed  RoutingTTS / RoutingSTT: fastest healthy provider, failover on error
+  hedged  RoutingTTS with TTS_HEDGE=first: first sentence of each reply raced on both
+
+Reports first-byte latency p50/p95/p99, failed requests and provider requests
+per sentence (the cost of hedging), plus the router's own decision counters.
+Delays are scaled by --time-scale so a run takes seconds.
+
+Usage:
+    python3 tools/bench_provider_router.py
+    python3 tools/bench_provider_router.py --replies 300 --time-scale 0.2 --json router.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from livekit import rtc  # noqa: E402
+from livekit.agents import APIConnectOptions, APIError  # noqa: E402
+
+import provider_router  # noqa: E402
+from fake_providers import ScriptedSTT, SilentTTS  # noqa: E402
+
+SENTENCES_PER_REPLY = 3
+SENTENCE = "Dạ, món phở bò đặc biệt của quán hôm nay còn ạ."
+# No framework retries (they sleep for seconds): a failed request counts as failed
+CONN_OPTIONS = APIConnectOptions(max_retry=0, timeout=10.0)
+
+
+class Timeline:
+    """Which phase the run is in: the fast provider browns out in the middle third"""
+
+    def __init__(self, total: int):
+        self.total = total
+        self.done = 0
+
+    @property
+    def brownout(self) -> bool:
+        return self.total / 3 <= self.done < 2 * self.total / 3
+
+
+def provider_delays(timeline: Timeline, scale: float, seed: int):
+    rng = random.Random(seed)
+
+    def fast() -> float:
+        base = rng.lognormvariate(0, 0.3) * 0.150
+        return base * scale * (10 if timeline.brownout else 1)
+
+    def steady() -> float:
+        return rng.lognormvariate(0, 0.2) * 0.300 * scale
+
+    return fast, steady
+
+
+def fast_error_rate(timeline: Timeline, base: float = 0.01) -> float:
+    return 0.2 if timeline.brownout else base
+
+
+def percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] if values else 0.0
+
+
+def summarize(name: str, latencies: list[float], failures: int, requests: int, sentences: int,
+              router: dict = None) -> dict:
+    return {
+        "strategy": name,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 1) if latencies else 0.0,
+        "failed": failures,
+        "requests_per_item": round(requests / max(sentences, 1), 3),
+        "router": router,
+    }
+
+
+class FaultyTTS(SilentTTS):
+    """SilentTTS whose error rate follows the timeline"""
+
+    def __init__(self, timeline: Timeline, **kwargs):
+        super().__init__(**kwargs)
+        self._timeline = timeline
+
+    def synthesize(self, text, **kwargs):
+        self.faults.error_rate = fast_error_rate(self._timeline)
+        return super().synthesize(text, **kwargs)
+
+
+async def first_byte(tts, text: str) -> float:
+    start = time.perf_counter()
+    latency = None
+    async with tts.synthesize(text, conn_options=CONN_OPTIONS) as stream:
+        async for _ in stream:
+            if latency is None:
+                latency = time.perf_counter() - start
+    return latency
+
+
+async def run_tts(strategy: str, replies: int, scale: float, seed: int) -> dict:
+    provider_router._routers.clear()
+    timeline = Timeline(replies * SENTENCES_PER_REPLY)
+    fast_delay, steady_delay = provider_delays(timeline, scale, seed)
+    fast = FaultyTTS(timeline, delay=fast_delay, seed=seed, seconds_per_char=0.001)
+    steady = SilentTTS(delay=steady_delay, error_rate=0.01, seed=seed + 1, seconds_per_char=0.001)
+
+    if strategy == "fixed":
+        tts = fast
+    else:
+        tts = provider_router.RoutingTTS(
+            {"fast": fast, "steady": steady},
+            hedge="first" if strategy == "hedged" else "off",
+            first_byte_timeout=5.0 * scale,
+            reply_gap=0.5 * scale,
+        )
+
+    latencies, failures = [], 0
+    for _ in range(replies):
+        for _ in range(SENTENCES_PER_REPLY):
+            try:
+                latencies.append(await first_byte(tts, SENTENCE))
+            except APIError:
+                failures += 1
+            timeline.done += 1
+        await asyncio.sleep(1.0 * scale)  # user speaking: next sentence starts a new reply
+
+    requests = fast.faults.requests + (steady.faults.requests if strategy != "fixed" else 0)
+    router = provider_router.snapshot().get("tts")
+    return summarize(strategy, latencies, failures, requests, timeline.total, router)
+
+
+async def run_stt(strategy: str, utterances: int, scale: float, seed: int) -> dict:
+    provider_router._routers.clear()
+    timeline = Timeline(utterances)
+    fast_delay, steady_delay = provider_delays(timeline, scale, seed)
+    transcripts = ["cho tôi một phở bò"] * utterances * 2
+    fast = ScriptedSTT(transcripts, delay=fast_delay, seed=seed)
+    steady = ScriptedSTT(transcripts, delay=steady_delay, error_rate=0.01, seed=seed + 1)
+    stt = fast if strategy == "fixed" else provider_router.RoutingSTT(
+        {"fast": fast, "steady": steady}, timeout=5.0 * scale
+    )
+    frame = rtc.AudioFrame.create(16000, 1, 16000)  # 1 s utterance
+
+    latencies, failures = [], 0
+    for _ in range(utterances):
+        fast.faults.error_rate = fast_error_rate(timeline)
+        start = time.perf_counter()
+        try:
+            await stt.recognize(frame, conn_options=CONN_OPTIONS)
+            latencies.append(time.perf_counter() - start)
+        except APIError:
+            failures += 1
+        timeline.done += 1
+
+    requests = fast.faults.requests + (steady.faults.requests if strategy != "fixed" else 0)
+    router = provider_router.snapshot().get("stt")
+    return summarize(strategy, latencies, failures, requests, utterances, router)
+
+
+def print_table(title: str, rows: list[dict]):
+    print(f"\n{title}")
+    print(f"  {'strategy':<8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'mean ms':>8} {'failed':>7} {'req/item':>9}")
+    print("  " + "-" * 62)
+    for r in rows:
+        print(f"  {r['strategy']:<8} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} "
+              f"{r['mean_ms']:>8.1f} {r['failed']:>7} {r['requests_per_item']:>9.3f}")
+    for r in rows:
+        if r["router"]:
+            print(f"  📊 {r['strategy']}: decisions {r['router']['decisions']}, "
+                  f"failovers {r['router']['failovers']}, hedges {r['router']['hedges']}")
+            for name, stats in r["router"]["providers"].items():
+                print(f"       {name:<7} routed {stats['routed']:>4}  errors {stats['errors']:>3}  "
+                      f"timeouts {stats['timeouts']:>3}  hedge wins {stats['hedge_wins']:>3}  "
+                      f"cancelled {stats['cancelled']:>3}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Simulate latency-aware STT/TTS routing with fake providers")
+    parser.add_argument("--replies", type=int, default=150, help="agent replies (x3 sentences) / utterances")
+    parser.add_argument("--time-scale", type=float, default=0.1, help="multiplier for every simulated delay")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    provider_router.logger.setLevel(logging.ERROR)
+    # Router time constants follow the simulated clock
+    provider_router.COOLDOWN *= args.time_scale
+    provider_router.STALE_AFTER *= args.time_scale
+
+    tts_rows = [await run_tts(s, args.replies, args.time_scale, args.seed) for s in ("fixed", "routed", "hedged")]
+    stt_rows = [await run_stt(s, args.replies, args.time_scale, args.seed) for s in ("fixed", "routed")]
+
+    scale = f"(delays x{args.time_scale})"
+    print_table(f"🔊 TTS first byte, {args.replies} replies x {SENTENCES_PER_REPLY} sentences {scale}", tts_rows)
+    print_table(f"🎤 STT final transcript, {args.replies} utterances {scale}", stt_rows)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"time_scale": args.time_scale, "tts": tts_rows, "stt": stt_rows}, f, indent=2)
+        print(f"\n💾 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Reservation engine (reservations.py) with tens of thousands of bookings.
+
+  parse        parse_reservation_time over Vietnamese / English phrases
+  load         ReservationBook opening the file (index built from SQLite)
+  free_table   availability for a party at a random time (per-table bisect), against a
+               linear scan of every booking (what a plain list / SQL scan per query costs)
+  suggest      alternatives at a fully booked peak time
+  book         BEGIN IMMEDIATE + refresh + insert (what confirm_reservation waits for)
+  rebook       moving a booking to another time (an updated reservation): new table + cancel of
+               the old one in one transaction
+  overbooking  --workers processes booking the same peak slots at once and moving half of
+               their bookings to another slot; every table's bookings must not overlap afterwards
+               and a moved booking must not leave its old table booked (exits 1 if either happens)
+
+Usage:
+    python3 tools/bench_reservations.py
+    python3 tools/bench_reservations.py --sizes 10000 50000 100000 --workers 4
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import reservations  # noqa: E402
+
+PHRASES = [
+    "7 giờ tối", "19h30", "7 rưỡi tối mai", "thứ bảy 8 giờ tối", "8 giờ kém 15 tối", "bảy giờ tối nay",
+    "tôi muốn đặt bàn 12 giờ trưa ngày mai", "ngày 25 lúc 19:00", "tomorrow at 7pm", "half past seven tonight",
+    "saturday 6:30 pm", "quarter to eight", "20/12 12:00", "a table for 4 at 7", "seven thirty pm",
+]
+
+
+def percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def peak_start(day: int) -> float:
+    base = datetime.now().replace(hour=19, minute=0, second=0, microsecond=0) + timedelta(days=day)
+    return base.timestamp()
+
+
+def prefill(path: str, size: int, rng: random.Random) -> tuple[int, list[tuple]]:
+    """size non-overlapping bookings from tomorrow on, busiest around lunch and dinner"""
+    book = reservations.ReservationBook(path)
+    days = max(1, size // 60)
+    rows, seq, attempts = [], 0, 0
+    while len(rows) < size and attempts < size * 20:
+        attempts += 1
+        day = rng.randrange(1, days + 1)
+        hour = rng.choice([11.5, 12, 12.5, 13, 18, 18.5, 19, 19.5, 20]) + rng.choice([0, 0.25])
+        start = peak_start(day) + (hour - 19) * 3600
+        party = rng.choice([1, 2, 2, 2, 3, 4, 4, 5, 6, 8])
+        table_no = book._free_table(start, party)
+        if table_no is None:
+            continue
+        seq += 1
+        book.tables[table_no - 1].add(seq, start, start + book.duration)
+        rows.append((seq, table_no, party, start, start + book.duration, f"Khách {seq}", f"09{seq:08d}", seq, time.time()))
+    book.close()
+    with sqlite3.connect(path) as conn:
+        conn.executemany(
+            "INSERT INTO bookings (id, table_no, party_size, start_ts, end_ts, customer_name, customer_phone, seq,"
+            " created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    return days, rows
+
+
+def linear_free_table(rows: list[tuple], tables: list[int], start: float, end: float, party: int):
+    """Baseline: scan every booking"""
+    busy = {table_no for _, table_no, _, s, e, *_ in rows if s < end and e > start}
+    for table_no, seats in enumerate(tables, 1):
+        if seats >= party and table_no not in busy:
+            return table_no
+    return None
+
+
+def bench_size(workdir: str, size: int, samples: int, rng: random.Random) -> dict:
+    path = os.path.join(workdir, f"reservations-{size}.sqlite3")
+    days, rows = prefill(path, size, rng)
+
+    start = time.perf_counter()
+    book = reservations.ReservationBook(path)
+    load_ms = (time.perf_counter() - start) * 1000
+    assert book.bookings() == len(rows)
+
+    queries = [(peak_start(rng.randrange(1, days + 1)) + rng.choice([-7, -6.5, 0, 0.5, 1]) * 3600,
+                rng.choice([2, 4, 6])) for _ in range(samples)]
+    free_us, linear_us, found = [], [], []
+    for when, party in queries:
+        t = time.perf_counter()
+        table = book._free_table(when, party)
+        free_us.append((time.perf_counter() - t) * 1e6)
+        found.append(table)
+    for (when, party), table in zip(queries[:min(samples, 200)], found):
+        t = time.perf_counter()
+        expected = linear_free_table(rows, [s.seats for s in book.tables], when, when + book.duration, party)
+        linear_us.append((time.perf_counter() - t) * 1e6)
+        assert expected == table, (when, party, expected, table)
+
+    # Peak day fully booked for big parties: suggestions
+    suggest_ms = []
+    for _ in range(min(samples, 200)):
+        when = peak_start(rng.randrange(1, days + 1))
+        t = time.perf_counter()
+        book.suggest(when, 8)
+        suggest_ms.append((time.perf_counter() - t) * 1000)
+
+    book_ms, rebook_ms, held = [], [], []
+    for _ in range(min(samples, 300)):
+        when = peak_start(days + rng.randrange(1, 30)) + rng.choice([-7, 0, 1]) * 3600
+        t = time.perf_counter()
+        booking = book.book(when, 2, "Bench", "0900000000")
+        book_ms.append((time.perf_counter() - t) * 1000)
+        if booking is not None:
+            held.append(booking)
+    before = book.bookings()
+    for booking in held:
+        t = time.perf_counter()
+        moved = book.rebook(booking.id, booking.start + 1800, 2, "Bench", "0900000000")
+        rebook_ms.append((time.perf_counter() - t) * 1000)
+        if moved is None:
+            assert book.bookings() == before  # nothing free: the old booking stays
+    assert book.bookings() == before, "a rebook left the old booking in place"
+    book.close()
+    return {
+        "bookings": len(rows),
+        "days": days,
+        "load_ms": round(load_ms, 1),
+        "free_p50_us": round(statistics.median(free_us), 2),
+        "free_p99_us": round(percentile(free_us, 0.99), 2),
+        "linear_p50_us": round(statistics.median(linear_us), 1),
+        "suggest_p50_ms": round(statistics.median(suggest_ms), 3),
+        "book_p50_ms": round(statistics.median(book_ms), 3),
+        "book_p99_ms": round(percentile(book_ms, 0.99), 3),
+        "rebook_p50_ms": round(statistics.median(rebook_ms), 3) if rebook_ms else 0.0,
+        "db_kb": round(os.path.getsize(path) / 1024),
+    }
+
+
+def bench_parse(samples: int) -> dict:
+    latencies = []
+    for n in range(samples):
+        phrase = PHRASES[n % len(PHRASES)]
+        t = time.perf_counter()
+        parsed = reservations.parse_reservation_time(phrase)
+        latencies.append((time.perf_counter() - t) * 1e6)
+        assert parsed is not None, phrase
+    return {"parse_p50_us": round(statistics.median(latencies), 1), "parse_p99_us": round(percentile(latencies, 0.99), 1)}
+
+
+def booker(path: str, starts: list[float], attempts: int, seed: int, results) -> None:
+    logging.getLogger("restaurant-bot").setLevel(logging.WARNING)
+    rng = random.Random(seed)
+    book = reservations.ReservationBook(path)
+    booked = moved = 0
+    for _ in range(attempts):
+        booking = book.book(rng.choice(starts), rng.choice([2, 2, 4, 6]), "Race", "0900000000")
+        if booking is None:
+            continue
+        booked += 1
+        if rng.random() < 0.5 and book.rebook(booking.id, rng.choice(starts), booking.party_size,
+                                              "Race", "0900000000") is not None:
+            moved += 1
+    book.close()
+    results.put((booked, moved))
+
+
+def bench_overbooking(workdir: str, workers: int, attempts: int) -> dict:
+    """Everyone books the same evening: the tables must never be double booked"""
+    path = os.path.join(workdir, "race.sqlite3")
+    reservations.ReservationBook(path).close()
+    starts = [peak_start(3) + offset * 900 for offset in range(-2, 3)]
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    processes = [context.Process(target=booker, args=(path, starts, attempts, seed, results)) for seed in range(workers)]
+    t = time.perf_counter()
+    for process in processes:
+        process.start()
+    counts = [results.get() for _ in processes]
+    booked, moved = sum(c[0] for c in counts), sum(c[1] for c in counts)
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - t
+
+    with sqlite3.connect(path) as conn:
+        rows = conn.execute("SELECT table_no, party_size, start_ts, end_ts FROM bookings WHERE status = 'booked'"
+                            " ORDER BY table_no, start_ts").fetchall()
+    seats = reservations.parse_tables()
+    overlaps = sum(1 for a, b in zip(rows, rows[1:]) if a[0] == b[0] and b[2] < a[3])
+    too_small = sum(1 for table_no, party, *_ in rows if seats[table_no - 1] < party)
+    return {"workers": workers, "attempts": workers * attempts, "booked": booked, "moved": moved, "rows": len(rows),
+            "phantoms": len(rows) - booked, "overlaps": overlaps, "too_small": too_small,
+            "bookings_s": round(workers * attempts / elapsed)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reservation engine with many bookings")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--samples", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=4, help="processes racing for the same slots")
+    parser.add_argument("--attempts", type=int, default=50, help="booking attempts per process")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    logging.getLogger("restaurant-bot").setLevel(logging.WARNING)
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory(prefix="bench-reservations-") as workdir:
+        parse = bench_parse(args.samples)
+        sizes = []
+        for size in args.sizes:
+            print(f"⏱️  {size:,} bookings ...", flush=True)
+            sizes.append(bench_size(workdir, size, args.samples, rng))
+        print(f"⏱️  {args.workers} processes racing ...", flush=True)
+        race = bench_overbooking(workdir, args.workers, args.attempts)
+
+    tables = reservations.parse_tables()
+    print(f"\n🗓️  {len(tables)} tables ({reservations.RESERVATION_TABLES}), {reservations.DINING_MINUTES} min per booking, "
+          f"{os.cpu_count()} CPUs")
+    print(f"  parse_reservation_time: p50 {parse['parse_p50_us']} µs, p99 {parse['parse_p99_us']} µs")
+    print(f"\n  {'bookings':>9} {'days':>5} {'load ms':>8} {'free µs':>8} {'p99':>6} {'linear µs':>10} "
+          f"{'suggest ms':>11} {'book ms':>8} {'p99':>7} {'rebook ms':>10} {'db KB':>7}")
+    print("  " + "-" * 101)
+    for r in sizes:
+        print(f"  {r['bookings']:>9,} {r['days']:>5} {r['load_ms']:>8.1f} {r['free_p50_us']:>8.2f} "
+              f"{r['free_p99_us']:>6.1f} {r['linear_p50_us']:>10.1f} {r['suggest_p50_ms']:>11.3f} "
+              f"{r['book_p50_ms']:>8.3f} {r['book_p99_ms']:>7.3f} {r['rebook_p50_ms']:>10.3f} {r['db_kb']:>7,}")
+    print("\n  free = smallest free table for the party; linear = same answer by scanning every booking")
+
+    ok = race["overlaps"] == 0 and race["too_small"] == 0 and race["phantoms"] == 0
+    print(f"\n🔀 {race['workers']} processes, {race['attempts']} attempts on 5 peak slots: {race['booked']} booked, "
+          f"{race['moved']} moved ({race['rows']} rows), {race['bookings_s']} attempts/s")
+    print(f"   {'✅' if ok else '❌'} overlapping bookings: {race['overlaps']}, tables too small: {race['too_small']}, "
+          f"old bookings left after a move: {race['phantoms']}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"parse": parse, "sizes": sizes, "race": race}, f, indent=2)
+        print(f"\n💾 Results written to {args.json}")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Cost of session checkpoints (session_store.py) and resume latency.
+
+  checkpoint  on the loop: snapshot of UserData + compact chat (what the
+              function_tools_executed handler does); on the writer thread: SQLite save
+  resume      what entrypoint adds before session.start: load + restore UserData + chat
+  contention  --writers processes saving at the same time (one job process per call)
+
+The chat comes from the replay scripts (tools/replay_scripts/*.json), repeated to
+--history messages. The store is prefilled with --sizes other sessions.
+
+Usage:
+    python3 tools/bench_session_store.py
+    python3 tools/bench_session_store.py --sizes 1000 100000 --writers 1 8 16
+"""
+
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "replay_scripts")
+sys.path.insert(0, ROOT)
+
+import session_store  # noqa: E402
+
+
+def script_messages() -> list[tuple[str, str]]:
+    messages = []
+    for path in sorted(glob.glob(os.path.join(SCRIPTS_DIR, "*.json"))):
+        with open(path, "r", encoding="utf-8") as f:
+            for turn in json.load(f)["turns"]:
+                messages.append(("user", turn["user"]))
+                messages += [("assistant", step["say"]) for step in turn["llm"] if "say" in step]
+    return messages
+
+
+def make_userdata(index: int) -> SimpleNamespace:
+    """Fields of restaurant_agent.UserData mid-checkout (card data is never checkpointed)"""
+    return SimpleNamespace(
+        customer_name=f"Nguyễn Văn {index}", customer_phone=f"09{index:08d}", reservation_time="2026-10-20 19:30",
+        party_size=4, reservation_id=None, booked_time=None,
+        order={"Pad Thai": 2, "Mango Sticky Rice": 1, "Mint Lemonade": 3}, expense=61.95, checked_out=False,
+        customer_credit_card="4111111111111111", customer_credit_card_cvv="123",
+    )
+
+
+def make_checkpoint(index: int, history: list[tuple[str, str]]) -> session_store.Checkpoint:
+    return session_store.Checkpoint(
+        room=f"restaurant-{index}", participant=f"user-{index}", agent="checkout",
+        userdata=session_store.snapshot_userdata(make_userdata(index)),
+        chat=session_store.compact_chat(history), updated_at=time.time(),
+    )
+
+
+def percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def prefill(path: str, size: int, history: list[tuple[str, str]]) -> None:
+    session_store.SessionStore(path).close()  # schema
+    rows = []
+    for index in range(size):
+        cp = make_checkpoint(index, history)
+        rows.append((cp.room, cp.participant, cp.agent, json.dumps(cp.userdata, ensure_ascii=False),
+                     json.dumps(cp.chat, ensure_ascii=False), cp.updated_at))
+    with sqlite3.connect(path) as conn:
+        conn.executemany("INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+
+def bench_single(path: str, size: int, history: list[tuple[str, str]], samples: int) -> dict:
+    store = session_store.SessionStore(path)
+    userdata = make_userdata(1)
+
+    snapshot_us, save_ms, load_ms, restore_us = [], [], [], []
+    for n in range(samples):
+        index = n % max(size, 1)
+        start = time.perf_counter()
+        cp = session_store.Checkpoint(
+            room=f"restaurant-{index}", participant=f"user-{index}", agent="checkout",
+            userdata=session_store.snapshot_userdata(userdata), chat=session_store.compact_chat(history),
+            updated_at=time.time(),
+        )
+        snapshot_us.append((time.perf_counter() - start) * 1e6)
+
+        start = time.perf_counter()
+        store.save(cp)
+        save_ms.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        loaded = store.load(cp.room, cp.participant)
+        load_ms.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        fresh = SimpleNamespace(**{name: None for name in session_store.CHECKPOINT_FIELDS})
+        session_store.restore_userdata(fresh, loaded.userdata)
+        chat = [(message["role"], message["text"]) for message in loaded.chat]  # -> ChatContext.add_message
+        restore_us.append((time.perf_counter() - start) * 1e6)
+        assert fresh.order == userdata.order and chat
+    store.close()
+    return {
+        "stored": size,
+        "snapshot_us": round(statistics.median(snapshot_us), 1),
+        "save_p50_ms": round(statistics.median(save_ms), 3),
+        "save_p99_ms": round(percentile(save_ms, 0.99), 3),
+        "load_p50_ms": round(statistics.median(load_ms), 3),
+        "load_p99_ms": round(percentile(load_ms, 0.99), 3),
+        "restore_us": round(statistics.median(restore_us), 1),
+        "db_kb": round(os.path.getsize(path) / 1024),
+    }
+
+
+def writer(path: str, worker: int, saves: int, history: list, results) -> None:
+    store = session_store.SessionStore(path)
+    latencies = []
+    for n in range(saves):
+        cp = make_checkpoint(1_000_000 + worker * saves + n, history)
+        start = time.perf_counter()
+        store.save(cp)
+        latencies.append((time.perf_counter() - start) * 1000)
+    store.close()
+    results.put(latencies)
+
+
+def bench_contention(path: str, writers: int, saves: int, history: list) -> dict:
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    processes = [context.Process(target=writer, args=(path, w, saves, history, results)) for w in range(writers)]
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    latencies = [lat for _ in processes for lat in results.get()]
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - start
+    return {
+        "writers": writers,
+        "saves_s": round(len(latencies) / elapsed),
+        "save_p50_ms": round(statistics.median(latencies), 3),
+        "save_p99_ms": round(percentile(latencies, 0.99), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Session checkpoint cost and resume latency")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="sessions already stored")
+    parser.add_argument("--history", type=int, default=40, help="chat messages in the session")
+    parser.add_argument("--samples", type=int, default=500)
+    parser.add_argument("--writers", type=int, nargs="+", default=[1, 4, 8], help="concurrent writer processes")
+    parser.add_argument("--saves", type=int, default=200, help="saves per writer")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    messages = script_messages()
+    history = (messages * (args.history // len(messages) + 1))[:args.history]
+
+    single, contention = [], []
+    with tempfile.TemporaryDirectory(prefix="bench-sessions-") as workdir:
+        for size in args.sizes:
+            path = os.path.join(workdir, f"sessions-{size}.sqlite3")
+            print(f"⏱️  {size:,} stored sessions ...", flush=True)
+            prefill(path, size, history)
+            single.append(bench_single(path, size, history, args.samples))
+        path = os.path.join(workdir, f"sessions-{args.sizes[0]}.sqlite3")
+        for writers in args.writers:
+            print(f"⏱️  {writers} writer process(es) ...", flush=True)
+            contention.append(bench_contention(path, writers, args.saves, history))
+
+    print(f"\n💾 Session checkpoints, {args.history} chat messages -> {session_store.CHAT_ITEMS} kept")
+    print(f"  {'stored':>8} {'loop µs':>8} {'save p50':>9} {'p99':>7} {'load p50':>9} {'p99':>7} "
+          f"{'restore µs':>11} {'db KB':>8}")
+    print("  " + "-" * 76)
+    for r in single:
+        print(f"  {r['stored']:>8,} {r['snapshot_us']:>8.1f} {r['save_p50_ms']:>9.3f} {r['save_p99_ms']:>7.3f} "
+              f"{r['load_p50_ms']:>9.3f} {r['load_p99_ms']:>7.3f} {r['restore_us']:>11.1f} {r['db_kb']:>8,}")
+    print("\n  resume = load + restore (entrypoint, before session.start); save runs on the writer thread")
+
+    print(f"\n🔀 Concurrent writers ({args.saves} saves each, {os.cpu_count()} CPUs)")
+    print(f"  {'writers':>8} {'saves/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for r in contention:
+        print(f"  {r['writers']:>8} {r['saves_s']:>9,} {r['save_p50_ms']:>8.3f} {r['save_p99_ms']:>8.3f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"single": single, "contention": contention}, f, indent=2)
+        print(f"\n💾 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Benchmark: https_server.py (async, in-memory, precompressed) vs the old
+single-threaded http.server.SimpleHTTPRequestHandler.
+
+Both servers run as plain HTTP subprocesses on localhost so only the serving
+path is measured. Reports requests/sec, latency and bytes on the wire for a
+cold load (no validators) and a warm reload (If-None-Match -> 304).
+
+Usage:
+    python3 tools/bench_static_server.py --requests 2000 --concurrency 32
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import aiohttp
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+PAGES = ["Homepage.html", "Menu.html", "About.html", "Blog.html", "BlogDetail.html"]
+
+LEGACY_SERVER = """
+import http.server, os, sys
+os.chdir(sys.argv[1])
+http.server.HTTPServer(('127.0.0.1', int(sys.argv[2])), http.server.SimpleHTTPRequestHandler).serve_forever()
+"""
+
+
+def start_server(kind: str, port: int) -> subprocess.Popen:
+    if kind == "legacy":
+        cmd = [sys.executable, "-c", LEGACY_SERVER, ROOT, str(port)]
+    else:
+        cmd = [sys.executable, os.path.join(ROOT, "https_server.py"), "--port", str(port),
+               "--no-tls", "--no-reload"]
+    return subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+async def wait_ready(url: str, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            try:
+                async with session.get(url) as response:
+                    await response.read()
+                    return
+            except aiohttp.ClientError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError(f"server at {url} did not start")
+
+
+async def run_load(base_url: str, total: int, concurrency: int, revalidate: bool) -> dict:
+    # auto_decompress=False: count the bytes actually sent over the wire
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    etags: dict[str, str] = {}
+    latencies: list[float] = []
+    wire_bytes = 0
+    statuses: dict[int, int] = {}
+
+    async with aiohttp.ClientSession(connector=connector, auto_decompress=False) as session:
+        if revalidate:
+            for page in PAGES:
+                async with session.get(f"{base_url}/{page}") as response:
+                    await response.read()
+                    if "ETag" in response.headers:
+                        etags[page] = response.headers["ETag"]
+
+        counter = iter(range(total))
+
+        async def worker():
+            nonlocal wire_bytes
+            for i in counter:
+                page = PAGES[i % len(PAGES)]
+                headers = {"Accept-Encoding": "gzip, br"}
+                if revalidate and page in etags:
+                    headers["If-None-Match"] = etags[page]
+                start = time.perf_counter()
+                async with session.get(f"{base_url}/{page}", headers=headers) as response:
+                    body = await response.read()
+                latencies.append(time.perf_counter() - start)
+                wire_bytes += len(body)
+                statuses[response.status] = statuses.get(response.status, 0) + 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "elapsed_s": round(elapsed, 3),
+        "requests_per_sec": round(total / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 2),
+        "body_bytes": wire_bytes,
+        "bytes_per_request": round(wire_bytes / total),
+        "statuses": statuses,
+    }
+
+
+async def bench(kind: str, port: int, total: int, concurrency: int) -> dict:
+    proc = start_server(kind, port)
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        await wait_ready(f"{base_url}/{PAGES[0]}")
+        return {
+            "cold": await run_load(base_url, total, concurrency, revalidate=False),
+            "revalidate": await run_load(base_url, total, concurrency, revalidate=True),
+        }
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def print_table(results: dict):
+    print(f"\n{'server':<8} {'mode':<11} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'bytes/req':>10}  statuses")
+    print("-" * 72)
+    for kind, modes in results.items():
+        for mode, r in modes.items():
+            print(f"{kind:<8} {mode:<11} {r['requests_per_sec']:>9} {r['p50_ms']:>8} {r['p99_ms']:>8} "
+                  f"{r['bytes_per_request']:>10}  {r['statuses']}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Static server benchmark")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--port", type=int, default=18099)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    results = {
+        "legacy": await bench("legacy", args.port, args.requests, args.concurrency),
+        "async": await bench("async", args.port + 1, args.requests, args.concurrency),
+    }
+    print_table(results)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
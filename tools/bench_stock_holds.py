@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Stock holds (stock_holds.py) under contention: hundreds of concurrent sessions ordering the same
+scarce item (like the last Crispy Hash Browns) from several job processes.
+
+Every session (a thread; --processes processes share them) repeats: read the current stock
+from the inventory log (inventory_log.py), order 1-2 of the hot item + 1 of a cold item, wait
+--think-ms, then check out (deduct, then release the holds) or go back to the greeter (release).
+
+  holds     update_order takes a hold (BEGIN IMMEDIATE on the shared SQLite file, stock read
+            from the log inside it); checkout only happens with a hold
+  no holds  before the hold ledger: the order is checked against the stock the session saw,
+            checkout deducts whatever it was promised
+
+Reports hold latency (p50 / p99), holds/s, refusals, units sold and units oversold (the hot item
+below 0). Exits 1 if an order is oversold with holds.
+
+Usage:
+    python3 tools/bench_stock_holds.py
+    python3 tools/bench_stock_holds.py --sessions 100 300 1000 --processes 4 --stock 200
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import inventory_log  # noqa: E402
+import stock_holds  # noqa: E402
+
+HOT = "crispy hash browns"
+COLD_ITEMS = 20
+COLD_STOCK = 10**6
+CHECKOUT_SHARE = 0.6  # sessions that check out; the rest go back to the greeter
+
+
+class StockView:
+    """A process's inventory brought up to date from the log, like InventoryFeed.current"""
+
+    def __init__(self, log: inventory_log.InventoryLog):
+        self.log = log
+        self._lock = threading.Lock()
+        self.items, self.position = log.load()
+
+    def current(self, keys) -> dict[str, int]:
+        with self._lock:
+            events, position = self.log.read_since(self.position)
+            if events is None:
+                self.items, self.position = self.log.load()
+            else:
+                inventory_log.apply_events(self.items, events)
+                self.position = position
+            return {key: self.items[key]["quantity"] for key in keys}
+
+
+def session(name: str, view: StockView, log: inventory_log.InventoryLog, holds, rounds: int,
+            think: float, seed: int, out: dict) -> None:
+    rng = random.Random(seed)
+    for _ in range(rounds):
+        wanted = {HOT: rng.randint(1, 2), f"cold {rng.randrange(COLD_ITEMS)}": 1}
+        start = time.perf_counter()
+        if holds is not None:
+            held, _ = holds.hold(name, wanted, view.current)
+        else:
+            stock = view.current(wanted)
+            held = all(qty <= stock[key] for key, qty in wanted.items())
+        out["latency_ms"].append((time.perf_counter() - start) * 1000)
+        if not held:
+            out["refused"] += 1
+            time.sleep(think)
+            continue
+        time.sleep(rng.uniform(0, 2 * think))
+        if rng.random() < CHECKOUT_SHARE:
+            log.deduct(wanted, source="bench")
+            out["sold"] += wanted[HOT]
+        if holds is not None:
+            holds.release(name)  # after the deduction is in the log
+
+
+def worker(path: str, holds_path: str, sessions: range, rounds: int, think: float, queue) -> None:
+    """One job process; holds_path "" runs without holds"""
+    logging.getLogger("restaurant-bot").setLevel(logging.WARNING)
+    log = inventory_log.InventoryLog(path)
+    view = StockView(log)
+    holds = stock_holds.StockHolds(holds_path) if holds_path else None
+    outs = []
+    threads = []
+    for n in sessions:
+        out = {"latency_ms": [], "refused": 0, "sold": 0}
+        outs.append(out)
+        threads.append(threading.Thread(target=session, args=(f"session-{n}", view, log, holds, rounds, think,
+                                                              n, out)))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    queue.put({
+        "latency_ms": [ms for out in outs for ms in out["latency_ms"]],
+        "refused": sum(out["refused"] for out in outs),
+        "sold": sum(out["sold"] for out in outs),
+    })
+
+
+def run(workdir: str, sessions: int, processes: int, stock: int, rounds: int, think: float, with_holds: bool) -> dict:
+    label = "holds" if with_holds else "no-holds"
+    path = os.path.join(workdir, f"inventory-{label}-{sessions}.json")
+    items = {HOT: {"name": "Crispy Hash Browns", "price": 5.99, "quantity": stock}}
+    items.update({f"cold {n}": {"name": f"Cold {n}", "price": 1.0, "quantity": COLD_STOCK} for n in range(COLD_ITEMS)})
+    inventory_log.write_json_atomic(path, items)
+    holds_path = os.path.join(workdir, f"holds-{sessions}.sqlite3") if with_holds else ""
+
+    queue = multiprocessing.Queue()
+    per_process = [range(p, sessions, processes) for p in range(processes)]
+    workers = [multiprocessing.Process(target=worker, args=(path, holds_path, ids, rounds, think, queue))
+               for ids in per_process]
+    start = time.perf_counter()
+    for process in workers:
+        process.start()
+    results = [queue.get() for _ in workers]
+    for process in workers:
+        process.join()
+    elapsed = time.perf_counter() - start
+
+    latency = sorted(ms for r in results for ms in r["latency_ms"])
+    final = inventory_log.InventoryLog(path).load()[0][HOT]["quantity"]
+    return {
+        "mode": label,
+        "sessions": sessions,
+        "orders": len(latency),
+        "hold_p50_ms": statistics.median(latency),
+        "hold_p99_ms": latency[min(len(latency) - 1, int(len(latency) * 0.99))],
+        "orders_per_s": len(latency) / elapsed,
+        "refused": sum(r["refused"] for r in results),
+        "sold": sum(r["sold"] for r in results),
+        "oversold": max(0, -final),
+        "seconds": elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stock holds under contention")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[100, 300, 1000])
+    parser.add_argument("--processes", type=int, default=4, help="job processes sharing the hold ledger")
+    parser.add_argument("--stock", type=int, default=200, help="hot item stock")
+    parser.add_argument("--rounds", type=int, default=5, help="orders per session")
+    parser.add_argument("--think-ms", type=float, default=5.0, help="time between order and checkout")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    logging.getLogger("restaurant-bot").setLevel(logging.WARNING)
+    results = []
+    with tempfile.TemporaryDirectory(prefix="bench-stock-holds-") as workdir:
+        for sessions in args.sessions:
+            for with_holds in (True, False):
+                print(f"⏱️  {sessions:,} sessions, {'holds' if with_holds else 'no holds'} ...", flush=True)
+                results.append(run(workdir, sessions, args.processes, args.stock, args.rounds,
+                                   args.think_ms / 1000, with_holds))
+
+    print(f"\n🔒 Stock holds, {args.processes} processes, hot item stock {args.stock}, {os.cpu_count()} CPUs")
+    print(f"  {'mode':>9} {'sessions':>9} {'orders':>7} {'p50 ms':>8} {'p99 ms':>8} {'orders/s':>9} "
+          f"{'refused':>8} {'sold':>6} {'oversold':>9}")
+    print("  " + "-" * 82)
+    for r in results:
+        print(f"  {r['mode']:>9} {r['sessions']:>9,} {r['orders']:>7,} {r['hold_p50_ms']:>8.2f} {r['hold_p99_ms']:>8.2f} "
+              f"{r['orders_per_s']:>9,.0f} {r['refused']:>8,} {r['sold']:>6,} {r['oversold']:>9,}")
+    print("\n  p50 / p99 = update_order's stock check (with holds: the SQLite transaction and log read, waits included);"
+          " oversold = hot item units sold beyond the stock")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results written to {args.json}")
+    oversold = sum(r["oversold"] for r in results if r["mode"] == "holds")
+    if oversold:
+        print(f"\n❌ {oversold} units oversold with holds")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Token server throughput per number of worker processes, and what the token traffic does
+to the agent's audio loop when the server is embedded in the agent process vs separate.
+
+Everything runs locally:
+  fake LiveKit   aiohttp app answering the Twirp calls of /api/token (CreateRoom,
+                 CreateDispatch) with an empty 200 after --livekit-ms
+  token server   python token_server.py --workers N --no-tls (separate), or
+                 token_server.start_site() on a thread of the agent process (embedded,
+                 what restaurant_agent.py does with EMBED_TOKEN_SERVER=1)
+  agent          an event loop with a 20 ms audio tick doing --tick-work-ms of CPU
+                 (VAD, resampling, viseme); reported: how late the ticks start
+  load           --clients processes, each with --concurrency requests in flight
+
+Usage:
+    python3 tools/bench_token_server.py
+    python3 tools/bench_token_server.py --workers 1 2 4 8 --seconds 10 --concurrency 64
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+TICK = 0.020  # audio frame period
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port: int, timeout: float = 15.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise SystemExit(f"❌ nothing listening on port {port} after {timeout:g}s")
+
+
+def quiet_logging() -> None:
+    """The servers log every request as in production, written to /dev/null"""
+    handler = logging.StreamHandler(open(os.devnull, "w"))
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+    logging.basicConfig(level=logging.INFO, handlers=[handler], force=True)
+
+
+# ---------- fake LiveKit ----------
+def run_fake_livekit(port: int, latency_ms: float) -> None:
+    from aiohttp import web
+
+    async def twirp(request: web.Request) -> web.Response:
+        await request.read()
+        await asyncio.sleep(latency_ms / 1000)
+        return web.Response(body=b"", content_type="application/protobuf")  # empty message
+
+    app = web.Application()
+    app.router.add_post("/twirp/{method:.*}", twirp)
+    web.run_app(app, host="127.0.0.1", port=port, print=None, access_log=None)
+
+
+# ---------- agent audio loop ----------
+def burn(ms: float) -> None:
+    end = time.perf_counter() + ms / 1000
+    while time.perf_counter() < end:
+        pass
+
+
+async def audio_ticks(seconds: float, work_ms: float) -> list[float]:
+    """Lateness (ms) of every 20 ms tick"""
+    lags = []
+    next_at = time.perf_counter() + TICK
+    end = next_at + seconds
+    while next_at < end:
+        await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+        lags.append((time.perf_counter() - next_at) * 1000)
+        burn(work_ms)
+        next_at += TICK
+    return lags
+
+
+def run_agent(seconds: float, work_ms: float, embed_port: int, env: dict, results) -> None:
+    """Agent process; with embed_port the token server runs on a thread inside it"""
+    os.environ.update(env)
+    quiet_logging()
+    if embed_port:
+        import token_server
+
+        ready = threading.Event()
+
+        def run_token_server():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            loop.run_until_complete(token_server.start_site(token_server.create_app(), "0.0.0.0", embed_port, None))
+            ready.set()
+            loop.run_forever()
+
+        threading.Thread(target=run_token_server, daemon=True).start()
+        ready.wait()
+    results.put(asyncio.run(audio_ticks(seconds, work_ms)))
+
+
+# ---------- load ----------
+async def load(url: str, concurrency: int, seconds: float) -> dict:
+    import aiohttp
+
+    latencies, errors = [], 0
+    end = time.perf_counter() + seconds
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        async def user(index: int):
+            nonlocal errors
+            n = 0
+            while time.perf_counter() < end:
+                start = time.perf_counter()
+                try:
+                    async with session.get(url, params={"room": f"bench-{index}-{n}", "name": f"user-{index}"}) as resp:
+                        body = await resp.json()
+                        if resp.status != 200 or "token" not in body:
+                            errors += 1
+                            continue
+                except aiohttp.ClientError:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - start)
+                n += 1
+
+        await asyncio.gather(*(user(i) for i in range(concurrency)))
+    return {"latencies": latencies, "errors": errors}
+
+
+def run_load(url: str, concurrency: int, seconds: float, results) -> None:
+    results.put(asyncio.run(load(url, concurrency, seconds)))
+
+
+def percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] if values else 0.0
+
+
+def measure(label: str, workers: int, args, env: dict) -> dict:
+    """One run: agent loop + token server + load generators for args.seconds"""
+    context = multiprocessing.get_context("spawn")
+    port = free_port()
+    server = None
+    if workers:  # separate service
+        server = subprocess.Popen(
+            [sys.executable, os.path.join(ROOT, "token_server.py"), "--workers", str(workers),
+             "--port", str(port), "--no-tls"],
+            env={**os.environ, **env}, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+    results = context.Queue()
+    agent = context.Process(target=run_agent, args=(args.seconds + 2, args.tick_work_ms,
+                                                    0 if workers else port, env, results))
+    agent.start()
+    wait_for_port(port)
+    time.sleep(1.0)  # workers started, agent loop running
+
+    loads = [context.Process(target=run_load, args=(f"http://127.0.0.1:{port}/api/token",
+                                                    args.concurrency, args.seconds, results))
+             for _ in range(args.clients)]
+    for process in loads:
+        process.start()
+    outputs = [results.get() for _ in range(len(loads) + 1)]
+    for process in loads + [agent]:
+        process.join()
+    if server:
+        server.terminate()  # SIGTERM: graceful drain
+        server.wait(timeout=30)
+
+    lags = next(out for out in outputs if isinstance(out, list))
+    runs = [out for out in outputs if isinstance(out, dict)]
+    latencies = [lat for run in runs for lat in run["latencies"]]
+    return {
+        "setup": label,
+        "req_s": round(len(latencies) / args.seconds, 1),
+        "errors": sum(run["errors"] for run in runs),
+        "token_p50_ms": round(percentile(latencies, 0.5) * 1000, 1),
+        "token_p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+        "tick_lag_p50_ms": round(statistics.median(lags), 2),
+        "tick_lag_p99_ms": round(percentile(lags, 0.99), 2),
+        "late_ticks_pct": round(100 * sum(lag > TICK * 1000 for lag in lags) / len(lags), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Token server throughput and agent loop lag")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="separate-service worker counts")
+    parser.add_argument("--seconds", type=float, default=8.0)
+    parser.add_argument("--clients", type=int, default=2, help="load generator processes")
+    parser.add_argument("--concurrency", type=int, default=32, help="requests in flight per client")
+    parser.add_argument("--livekit-ms", type=float, default=20.0, help="fake LiveKit API latency")
+    parser.add_argument("--tick-work-ms", type=float, default=3.0, help="CPU per 20 ms audio tick")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    livekit_port = free_port()
+    livekit = context.Process(target=run_fake_livekit, args=(livekit_port, args.livekit_ms), daemon=True)
+    livekit.start()
+    wait_for_port(livekit_port)
+    env = {
+        "LIVEKIT_URL": f"http://127.0.0.1:{livekit_port}",
+        "LIVEKIT_API_KEY": "bench-key",
+        "LIVEKIT_API_SECRET": "bench-secret-bench-secret-bench-secret",
+        "ROOM_JANITOR_ENABLED": "0",
+    }
+
+    rows = []
+    for label, workers in [("embedded", 0)] + [(f"separate x{n}", n) for n in args.workers]:
+        print(f"⏱️  {label} ...", flush=True)
+        rows.append(measure(label, workers, args, env))
+    livekit.terminate()
+
+    print(f"\n🔑 /api/token, {args.clients}x{args.concurrency} in flight, LiveKit {args.livekit_ms:g} ms, "
+          f"{args.seconds:g}s per run ({os.cpu_count()} CPUs)")
+    print(f"  audio loop: 20 ms tick with {args.tick_work_ms:g} ms CPU\n")
+    print(f"  {'setup':<12} {'req/s':>8} {'err':>5} {'p50 ms':>7} {'p99 ms':>7}   "
+          f"{'tick lag p50':>12} {'p99':>7} {'late %':>7}")
+    print("  " + "-" * 76)
+    for r in rows:
+        print(f"  {r['setup']:<12} {r['req_s']:>8.1f} {r['errors']:>5} {r['token_p50_ms']:>7.1f} "
+              f"{r['token_p99_ms']:>7.1f}   {r['tick_lag_p50_ms']:>12.2f} {r['tick_lag_p99_ms']:>7.2f} "
+              f"{r['late_ticks_pct']:>7.2f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+        print(f"\n💾 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
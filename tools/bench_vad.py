@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+CPU per session of Silero VAD inference: one ONNX call per session and window (what each
+silero.VADStream does today) vs vad_batcher.SileroBatcher (one batched call per tick).
+
+Every simulated session is a thread that sends a 32 ms window (16 kHz) in real time, like
+the executor thread of a VADStream, with a random phase. Process CPU time is measured over
+the run. Reported: CPU ms per session per audio second, % of one core, window latency
+(call -> probability) and mean batch size.
+
+Needs onnxruntime and the Silero model (installed with livekit-plugins-silero, or --model).
+
+Usage:
+    python3 tools/bench_vad.py
+    python3 tools/bench_vad.py --sessions 1 10 50 100 --seconds 20 --wait-ms 2 4 8
+"""
+
+import argparse
+import importlib.resources
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import vad_batcher  # noqa: E402
+
+SAMPLE_RATE = 16000
+WINDOW = vad_batcher.WINDOW_SAMPLES[SAMPLE_RATE]
+CONTEXT = vad_batcher.CONTEXT_SAMPLES[SAMPLE_RATE]
+PERIOD = WINDOW / SAMPLE_RATE
+
+
+def default_model_path() -> str:
+    try:
+        return str(importlib.resources.files("livekit.plugins.silero.resources") / "silero_vad.onnx")
+    except ModuleNotFoundError:
+        raise SystemExit("❌ livekit-plugins-silero is not installed, pass --model path/to/silero_vad.onnx")
+
+
+def new_session(path: str):
+    """Same session options as livekit.plugins.silero.onnx_model.new_inference_session"""
+    import onnxruntime
+
+    opts = onnxruntime.SessionOptions()
+    opts.add_session_config_entry("session.intra_op.allow_spinning", "0")
+    opts.add_session_config_entry("session.inter_op.allow_spinning", "0")
+    opts.inter_op_num_threads = 1
+    opts.intra_op_num_threads = 1
+    opts.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+    return onnxruntime.InferenceSession(path, providers=["CPUExecutionProvider"], sess_options=opts)
+
+
+class PerSessionModel:
+    """The plugin's OnnxModel: batch of one, own state and context"""
+
+    def __init__(self, session) -> None:
+        self._session = session
+        self._sr = np.array(SAMPLE_RATE, dtype=np.int64)
+        self._state = np.zeros((2, 1, 128), dtype=np.float32)
+        self._input = np.zeros((1, CONTEXT + WINDOW), dtype=np.float32)
+        self._context = np.zeros((1, CONTEXT), dtype=np.float32)
+
+    def __call__(self, x: np.ndarray) -> float:
+        self._input[:, :CONTEXT] = self._context
+        self._input[:, CONTEXT:] = x
+        out, self._state = self._session.run(None, {"input": self._input, "state": self._state, "sr": self._sr})
+        self._context = self._input[:, -CONTEXT:]
+        return out.item()
+
+
+def make_audio(seconds: float, seed: int) -> np.ndarray:
+    """Noise with voiced bursts, float32 in [-1, 1]"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    voiced = (np.sin(2 * np.pi * 0.5 * t) > 0).astype(np.float32)
+    signal = 0.3 * np.sin(2 * np.pi * 180 * t) * voiced + 0.02 * rng.standard_normal(t.size)
+    return signal.astype(np.float32)
+
+
+def session_thread(model, audio: np.ndarray, seconds: float, start_at: float, latencies: list, late: list):
+    next_at = start_at + random.uniform(0, PERIOD)  # sessions are not in phase
+    offset = 0
+    end = start_at + seconds
+    while next_at < end:
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        window = audio[offset:offset + WINDOW]
+        offset = (offset + WINDOW) % (len(audio) - WINDOW)
+        called = time.perf_counter()
+        model(window)
+        done = time.perf_counter()
+        latencies.append(done - called)
+        if done - next_at > PERIOD:
+            late.append(1)  # fell behind real time
+        next_at += PERIOD
+
+
+def run(mode: str, sessions: int, seconds: float, path: str, wait_ms: float) -> dict:
+    session = new_session(path)
+    batcher = None
+    if mode == "batched":
+        batcher = vad_batcher.SileroBatcher(session, SAMPLE_RATE, max_wait=wait_ms / 1000)
+        models = [vad_batcher.BatchedOnnxModel(batcher) for _ in range(sessions)]
+    else:
+        models = [PerSessionModel(session) for _ in range(sessions)]
+    audio = make_audio(10, seed=1)
+    for model in models:
+        model(audio[:WINDOW])  # warm-up
+
+    latencies: list[float] = []
+    late: list[int] = []
+    start_at = time.perf_counter() + 0.05
+    cpu_start = time.process_time()
+    threads = [
+        threading.Thread(target=session_thread, args=(model, audio, seconds, start_at, latencies, late))
+        for model in models
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    cpu = time.process_time() - cpu_start
+
+    latencies.sort()
+    result = {
+        "mode": mode if mode != "batched" else f"batched-{wait_ms:g}ms",
+        "sessions": sessions,
+        "cpu_ms_per_session_s": round(cpu * 1000 / sessions / seconds, 3),
+        "core_pct": round(cpu * 100 / seconds, 1),
+        "latency_p50_ms": round(latencies[len(latencies) // 2] * 1000, 3),
+        "latency_p95_ms": round(latencies[int(len(latencies) * 0.95)] * 1000, 3),
+        "late_windows": len(late),
+        "mean_batch": batcher.stats()["mean_batch"] if batcher else 1.0,
+    }
+    del models
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-session vs batched Silero VAD CPU")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--seconds", type=float, default=10.0, help="audio seconds per run")
+    parser.add_argument("--wait-ms", type=float, nargs="+", default=[4.0], help="batcher max wait")
+    parser.add_argument("--model", help="silero_vad.onnx (default: from livekit-plugins-silero)")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    path = args.model or default_model_path()
+    rows = []
+    for sessions in args.sessions:
+        print(f"⏱️  {sessions} session(s) ...", flush=True)
+        rows.append(run("per-session", sessions, args.seconds, path, 0))
+        for wait_ms in args.wait_ms:
+            rows.append(run("batched", sessions, args.seconds, path, wait_ms))
+
+    print(f"\n🎚️  Silero VAD, {args.seconds:g} s of 16 kHz audio per session ({os.cpu_count()} CPUs)")
+    print(f"  {'mode':<16} {'sessions':>8} {'CPU ms/s/sess':>14} {'core %':>7} {'p50 ms':>7} {'p95 ms':>7} "
+          f"{'late':>5} {'batch':>6}")
+    print("  " + "-" * 78)
+    for r in rows:
+        print(f"  {r['mode']:<16} {r['sessions']:>8} {r['cpu_ms_per_session_s']:>14.2f} {r['core_pct']:>7.1f} "
+              f"{r['latency_p50_ms']:>7.2f} {r['latency_p95_ms']:>7.2f} {r['late_windows']:>5} {r['mean_batch']:>6.1f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+        print(f"\n💾 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark: CPU cost of the viseme timeline (viseme.py) on the agent side.
+
+Synthesises speech-like audio (voiced harmonics, sibilant noise, pauses) and
+feeds it through VisemeAnalyzer in TTS-sized frames, the same way
+BaseAgent.tts_node does. Reports CPU milliseconds per second of audio and the
+share of one core, next to a per-window pure-Python loop for reference.
+
+Usage:
+    python3 tools/bench_viseme.py --seconds 60 --sample-rate 24000 --frame-ms 20
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from viseme import NUM_MOUTH_FRAMES, VisemeAnalyzer  # noqa: E402
+
+
+def synth_speech(seconds: float, sample_rate: int, seed: int = 7) -> np.ndarray:
+    """Syllable-like bursts: vowels (harmonics 120-220 Hz), sibilants (high noise), pauses"""
+    rng = np.random.default_rng(seed)
+    out = np.zeros(int(seconds * sample_rate), dtype=np.float32)
+    pos = 0
+    while pos < out.size:
+        kind = rng.choice(["vowel", "sibilant", "pause"], p=[0.6, 0.2, 0.2])
+        length = int(rng.uniform(0.06, 0.25) * sample_rate)
+        seg = out[pos:pos + length]
+        t = np.arange(seg.size) / sample_rate
+        if kind == "vowel":
+            f0 = rng.uniform(120, 220)
+            tone = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 8))
+            seg[:] = tone * np.hanning(seg.size) * rng.uniform(0.05, 0.3)
+        elif kind == "sibilant":
+            noise = rng.standard_normal(seg.size)
+            seg[:] = np.diff(noise, prepend=0) * np.hanning(seg.size) * rng.uniform(0.02, 0.08)
+        pos += length
+    return (np.clip(out, -1, 1) * 32767).astype(np.int16)
+
+
+def naive_frames(pcm: np.ndarray, sample_rate: int, window_ms: int = 40) -> list[int]:
+    """Reference: one window at a time in pure Python (RMS only)"""
+    window = int(sample_rate * window_ms / 1000)
+    frames = []
+    for start in range(0, len(pcm) - window + 1, window):
+        chunk = pcm[start:start + window].tolist()
+        rms = math.sqrt(sum((s / 32768.0) ** 2 for s in chunk) / window) + 1e-12
+        db = 20 * math.log10(rms)
+        openness = min(max((db + 50) / 38, 0.0), 1.0)
+        frames.append(round(openness * (NUM_MOUTH_FRAMES - 1)))
+    return frames
+
+
+def bench_vectorized(pcm: np.ndarray, sample_rate: int, frame_ms: int) -> dict:
+    analyzer = VisemeAnalyzer(sample_rate)
+    step = int(sample_rate * frame_ms / 1000)
+    timeline = []
+    start = time.process_time()
+    for offset in range(0, len(pcm), step):
+        timeline.extend(analyzer.push(pcm[offset:offset + step]))
+    cpu = time.process_time() - start
+    counts = np.bincount([f for _, f in timeline], minlength=NUM_MOUTH_FRAMES)
+    return {"cpu_s": cpu, "windows": len(timeline), "histogram": counts.tolist()}
+
+
+def bench_naive(pcm: np.ndarray, sample_rate: int) -> dict:
+    start = time.process_time()
+    frames = naive_frames(pcm, sample_rate)
+    return {"cpu_s": time.process_time() - start, "windows": len(frames)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Viseme timeline CPU benchmark")
+    parser.add_argument("--seconds", type=float, default=60.0)
+    parser.add_argument("--sample-rate", type=int, nargs="+", default=[24000, 48000])
+    parser.add_argument("--frame-ms", type=int, default=20, help="size of each TTS audio frame")
+    parser.add_argument("--skip-naive", action="store_true")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    results = {}
+    print(f"\n{'rate':>6} {'impl':<11} {'windows':>8} {'cpu ms/s audio':>15} {'% of 1 core':>12}")
+    print("-" * 58)
+    for rate in args.sample_rate:
+        pcm = synth_speech(args.seconds, rate)
+        runs = {"vectorized": bench_vectorized(pcm, rate, args.frame_ms)}
+        if not args.skip_naive:
+            runs["naive"] = bench_naive(pcm, rate)
+        for impl, r in runs.items():
+            r["cpu_ms_per_audio_s"] = round(r["cpu_s"] * 1000 / args.seconds, 3)
+            r["core_percent"] = round(r["cpu_s"] * 100 / args.seconds, 3)
+            print(f"{rate:>6} {impl:<11} {r['windows']:>8} {r['cpu_ms_per_audio_s']:>15} {r['core_percent']:>11}%")
+        results[str(rate)] = runs
+        print(f"{'':>6} mouth frame histogram: {runs['vectorized']['histogram']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
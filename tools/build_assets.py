@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Build step cho các trang HTML tĩnh (Homepage, Menu, About, Blog, BlogDetail)
+
+- Minify HTML / CSS / JS (bảo toàn string, template literal, regex literal)
+- CSS trong <head> giữ inline (critical CSS -> first paint không tốn thêm round trip)
+- <style>/<script> inline trong <body> (voice chat widget, filter menu...) được tách ra
+  thành file có fingerprint `assets/<name>.<hash>.css|js`, cache lâu dài (immutable).
+  Block giống hệt nhau giữa các trang dùng chung một file.
+- Script ngoài trong <body> (livekit-client CDN) và script đã tách được load `defer`
+  theo đúng thứ tự, nên không còn chặn parser trước khi nút voice được vẽ.
+- Ghi `dist/manifest.json` cho https_server.py (--dist) và in báo cáo dung lượng /
+  ước lượng first paint.
+
+Usage:
+    python3 tools/build_assets.py                 # build into ./dist
+    python3 tools/build_assets.py --external-css  # also move <head> CSS to cached bundles
+    python3 https_server.py --dist
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+DIST_DIR = os.path.join(ROOT, "dist")
+ASSETS_SUBDIR = "assets"
+PAGES = ["Homepage.html", "Menu.html", "About.html", "Blog.html", "BlogDetail.html"]
+
+# First-paint model: TCP slow start, 10 x 1460 byte initial window, doubling per RTT
+INIT_CWND_BYTES = 10 * 1460
+DEFAULT_RTT_MS = 150
+
+INLINE_BLOCK_RE = re.compile(r"<(style|script)>(.*?)</\1>", re.S)
+EXTERNAL_SCRIPT_RE = re.compile(r"<script src=\"([^\"]+)\"></script>")
+HTML_COMMENT_RE = re.compile(r"<!--(?!\[if).*?-->", re.S)
+
+
+# ==================== MINIFIERS ====================
+def minify_css(css: str) -> str:
+    """Strip comments and whitespace; string literals are preserved"""
+    strings: list[str] = []
+
+    def stash(match):
+        strings.append(match.group(0))
+        return f"\x00{len(strings) - 1}\x00"
+
+    css = re.sub(r"\"(?:\\.|[^\"\\])*\"|'(?:\\.|[^'\\])*'", stash, css)
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    css = re.sub(r":\s+", ":", css)
+    css = css.replace(";}", "}").strip()
+    return re.sub(r"\x00(\d+)\x00", lambda m: strings[int(m.group(1))], css)
+
+
+# A '/' after one of these (or at the start) begins a regex literal, not a division
+_REGEX_PRECEDERS = set("(,=:[!&|?{};+-*%<>~^")
+
+
+def minify_js(js: str) -> str:
+    """
+    Conservative JS minifier: drops comments and collapses whitespace, but keeps
+    newlines (automatic semicolon insertion stays intact) and never touches the
+    contents of strings, template literals or regex literals.
+    """
+    out: list[str] = []
+    i, n = 0, len(js)
+    pending_ws = ""  # "", " " or "\n"
+    last_sig = ""
+
+    def emit(text: str):
+        nonlocal pending_ws, last_sig
+        if pending_ws and out:
+            out.append(pending_ws)
+        pending_ws = ""
+        out.append(text)
+        last_sig = text[-1]
+
+    while i < n:
+        ch = js[i]
+        nxt = js[i + 1] if i + 1 < n else ""
+
+        if ch in " \t\r\n":
+            if ch == "\n":
+                pending_ws = "\n"
+            elif not pending_ws:
+                pending_ws = " "
+            i += 1
+        elif ch == "/" and nxt == "/":
+            end = js.find("\n", i)
+            i = n if end == -1 else end
+        elif ch == "/" and nxt == "*":
+            end = js.find("*/", i + 2)
+            i = n if end == -1 else end + 2
+            if not pending_ws:
+                pending_ws = " "
+        elif ch in "'\"`":
+            j = i + 1
+            while j < n and js[j] != ch:
+                j += 2 if js[j] == "\\" else 1
+            emit(js[i:j + 1])
+            i = j + 1
+        elif ch == "/" and (not last_sig or last_sig in _REGEX_PRECEDERS):
+            j, in_class = i + 1, False
+            while j < n and js[j] != "\n":
+                if js[j] == "\\":
+                    j += 2
+                    continue
+                if js[j] == "[":
+                    in_class = True
+                elif js[j] == "]":
+                    in_class = False
+                elif js[j] == "/" and not in_class:
+                    break
+                j += 1
+            j += 1
+            while j < n and (js[j].isalnum()):  # flags
+                j += 1
+            emit(js[i:j])
+            i = j
+        else:
+            # Whitespace between two punctuators is never significant
+            word_chars = (last_sig.isalnum() or last_sig in "_$") and (ch.isalnum() or ch in "_$")
+            if pending_ws == " " and not word_chars and not (last_sig in "+-" and ch in "+-"):
+                pending_ws = ""
+            emit(ch)
+            i += 1
+
+    return "".join(out).strip()
+
+
+def minify_html(html: str) -> str:
+    """Remove comments and collapse whitespace (a run with a newline becomes one newline)"""
+    html = HTML_COMMENT_RE.sub("", html)
+    html = re.sub(r"[ \t]*\n\s*", "\n", html)
+    html = re.sub(r"[ \t]{2,}", " ", html)
+    return html.strip() + "\n"
+
+
+# ==================== BUILD ====================
+def fingerprint(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()[:10]
+
+
+def gzip_size(data: bytes) -> int:
+    return len(gzip.compress(data, compresslevel=9, mtime=0))
+
+
+def rtt_rounds(num_bytes: int) -> int:
+    """Round trips needed to deliver num_bytes under TCP slow start"""
+    rounds, window, sent = 0, INIT_CWND_BYTES, 0
+    while sent < num_bytes:
+        sent += window
+        window *= 2
+        rounds += 1
+    return max(rounds, 1)
+
+
+def first_paint_ms(critical_bytes: int, blocking_requests: int, rtt_ms: float) -> float:
+    """1 RTT for the request + slow-start rounds for the document + 1 RTT per blocking resource"""
+    return rtt_ms * (1 + rtt_rounds(critical_bytes) + blocking_requests)
+
+
+class AssetBundler:
+    """Writes fingerprinted bundles; identical content is written once and shared"""
+
+    def __init__(self, out_dir: str):
+        self.out_dir = out_dir
+        self.by_hash: dict[str, str] = {}
+        self.assets: dict[str, dict] = {}
+
+    def add(self, name: str, ext: str, content: str, page: str) -> str:
+        data = content.encode("utf-8")
+        digest = fingerprint(data)
+        rel_path = self.by_hash.get(digest)
+        if rel_path is None:
+            rel_path = f"{ASSETS_SUBDIR}/{name}.{digest}.{ext}"
+            with open(os.path.join(self.out_dir, rel_path), "wb") as f:
+                f.write(data)
+            self.by_hash[digest] = rel_path
+            self.assets[rel_path] = {
+                "sha256": hashlib.sha256(data).hexdigest(),
+                "bytes": len(data),
+                "gzip_bytes": gzip_size(data),
+                "pages": [],
+            }
+        if page not in self.assets[rel_path]["pages"]:
+            self.assets[rel_path]["pages"].append(page)
+        return rel_path
+
+
+def build_page(page: str, source: str, bundler: AssetBundler, external_css: bool) -> tuple[str, list[str]]:
+    stem = os.path.splitext(page)[0].lower()
+    head_end = source.find("</head>")
+    counters = {"style": 0, "script": 0}
+    page_assets: list[str] = []
+
+    def replace_block(match):
+        kind, body = match.group(1), match.group(2)
+        in_head = match.start() < head_end
+        counters[kind] += 1
+
+        if kind == "style":
+            css = minify_css(body)
+            if in_head and not external_css:
+                return f"<style>{css}</style>"
+            rel_path = bundler.add(f"{stem}-style{counters[kind]}", "css", css, page)
+            page_assets.append(rel_path)
+            if in_head:
+                return f'<link rel="stylesheet" href="{rel_path}">'
+            # Below-the-fold styles (e.g. the hidden voice modal) must not block rendering
+            return (f'<link rel="stylesheet" href="{rel_path}" media="print" onload="this.media=\'all\'">'
+                    f'<noscript><link rel="stylesheet" href="{rel_path}"></noscript>')
+
+        rel_path = bundler.add(f"{stem}-script{counters[kind]}", "js", minify_js(body), page)
+        page_assets.append(rel_path)
+        return f'<script defer src="{rel_path}"></script>'
+
+    html = INLINE_BLOCK_RE.sub(replace_block, source)
+    # Inline scripts are now deferred; defer the external ones too so execution order is kept
+    html = EXTERNAL_SCRIPT_RE.sub(r'<script defer src="\1"></script>', html)
+    return minify_html(html), page_assets
+
+
+def blocking_bytes_before(source: str) -> tuple[int, int]:
+    """(document bytes, blocking external scripts) as served by the old uncompressed server"""
+    return len(source.encode("utf-8")), len(EXTERNAL_SCRIPT_RE.findall(source))
+
+
+def build(out_dir: str, external_css: bool, rtt_ms: float) -> dict:
+    if os.path.isdir(out_dir):
+        shutil.rmtree(out_dir)
+    os.makedirs(os.path.join(out_dir, ASSETS_SUBDIR))
+
+    bundler = AssetBundler(out_dir)
+    pages: dict[str, dict] = {}
+    start = time.perf_counter()
+
+    for page in PAGES:
+        with open(os.path.join(ROOT, page), "r", encoding="utf-8") as f:
+            source = f.read()
+        html, page_assets = build_page(page, source, bundler, external_css)
+        with open(os.path.join(out_dir, page), "w", encoding="utf-8") as f:
+            f.write(html)
+
+        html_bytes = html.encode("utf-8")
+        before_bytes, before_blocking = blocking_bytes_before(source)
+        # Head CSS links are the only render-blocking requests left
+        after_blocking = sum(1 for p in page_assets if p.endswith(".css") and f'href="{p}">' in html)
+        after_critical = gzip_size(html_bytes) + sum(
+            bundler.assets[p]["gzip_bytes"] for p in page_assets if p.endswith(".css") and f'href="{p}">' in html
+        )
+
+        pages[page] = {
+            "assets": page_assets,
+            "source_bytes": len(source.encode("utf-8")),
+            "html_bytes": len(html_bytes),
+            "html_gzip_bytes": gzip_size(html_bytes),
+            "first_paint": {
+                "before_bytes": before_bytes,
+                "after_bytes": after_critical,
+                "before_ms": first_paint_ms(before_bytes, before_blocking, rtt_ms),
+                "after_ms": first_paint_ms(after_critical, after_blocking, rtt_ms),
+            },
+        }
+
+    manifest = {
+        "version": 1,
+        "generated_at": int(time.time()),
+        "build_seconds": round(time.perf_counter() - start, 3),
+        "rtt_ms": rtt_ms,
+        "pages": pages,
+        "assets": bundler.assets,
+    }
+    with open(os.path.join(out_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def print_report(manifest: dict):
+    print(f"\n{'page':<16} {'source':>9} {'html':>9} {'html.gz':>9} {'assets':>7} "
+          f"{'paint KB before→after':>23} {'first paint ms':>18}")
+    print("-" * 98)
+    for page, info in manifest["pages"].items():
+        fp = info["first_paint"]
+        print(f"{page:<16} {info['source_bytes']:>9} {info['html_bytes']:>9} {info['html_gzip_bytes']:>9} "
+              f"{len(info['assets']):>7} {fp['before_bytes'] / 1024:>10.1f} → {fp['after_bytes'] / 1024:<10.1f}"
+              f"{fp['before_ms']:>8.0f} → {fp['after_ms']:<8.0f}")
+
+    total_source = sum(p["source_bytes"] for p in manifest["pages"].values())
+    total_html = sum(p["html_bytes"] for p in manifest["pages"].values())
+    total_assets = sum(a["bytes"] for a in manifest["assets"].values())
+    shared = [path for path, a in manifest["assets"].items() if len(a["pages"]) > 1]
+    print("-" * 98)
+    print(f"📦 {total_source / 1024:.1f} KB source → {total_html / 1024:.1f} KB HTML + "
+          f"{total_assets / 1024:.1f} KB cacheable bundles "
+          f"({(1 - (total_html + total_assets) / total_source) * 100:.0f}% smaller before compression)")
+    print(f"🔁 {len(manifest['assets'])} bundle(s), {len(shared)} shared between pages")
+    print(f"⏱️  First paint estimate: TCP slow start, RTT {manifest['rtt_ms']:.0f}ms "
+          f"(old server: uncompressed + blocking CDN script; new: gzip + deferred bundles)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Minify and bundle the static HTML pages")
+    parser.add_argument("--out", default=DIST_DIR)
+    parser.add_argument("--external-css", action="store_true",
+                        help="move <head> CSS to cached bundles too (faster repeat visits, +1 RTT first visit)")
+    parser.add_argument("--rtt", type=float, default=DEFAULT_RTT_MS, help="RTT in ms for the first-paint estimate")
+    args = parser.parse_args()
+
+    manifest = build(args.out, args.external_css, args.rtt)
+    print_report(manifest)
+    print(f"\n✅ Built {len(manifest['pages'])} page(s) into {args.out} in {manifest['build_seconds']}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Prompt prefix check (prompts.py): is the static part of every LLM request byte-identical
+across sessions and agents, and how much of each request can the provider serve from its
+prompt cache?
+
+Checks (exits 1 if one fails):
+  stable      every agent's instructions hash the same in fresh interpreters
+              (different PYTHONHASHSEED: no set / dict ordering leaking into the text)
+  shared      every agent's instructions start with prompts.SHARED_PREFIX, and that prefix
+              is at least --min-tokens long (OpenAI and Gemini do not cache shorter prefixes)
+  tail        two sessions with different user data send the same bytes up to the end of
+              the instructions: per-session state only appears after them
+
+Cacheable fraction: the tools/replay_scripts conversations are replayed --sessions times
+(different customers) the way the agents build their chat context: instructions, the
+previous agent's last 6 items and the state message on each handoff, then the turns.
+Every LLM request is compared with all earlier ones (one provider cache shared by all
+sessions); the cached part is the longest common prefix, counted only from --min-tokens
+and in --block token steps like OpenAI's implicit caching. Tool declarations are sent
+separately by the LLM plugin and are not counted.
+
+Token counts use tiktoken (o200k_base) when installed, otherwise a word / punctuation
+estimate (marked "~").
+
+Usage:
+    python3 tools/check_prompt_prefix.py
+    python3 tools/check_prompt_prefix.py --sessions 5 --json prefix.json
+"""
+
+import argparse
+import functools
+import glob
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "replay_scripts")
+sys.path.insert(0, ROOT)
+
+import prompts  # noqa: E402
+
+try:
+    import tiktoken
+except ImportError:  # tiktoken is optional, the estimate is close enough to compare layouts
+    tiktoken = None
+
+AGENTS = {"greeter": "Greeter", "reservation": "Reservation", "takeaway": "Takeaway", "checkout": "Checkout"}
+# tool -> agent that handles the call afterwards (restaurant_agent.py handoffs)
+HANDOFFS = {
+    "to_reservation_tool": "reservation",
+    "to_takeaway_tool": "takeaway",
+    "to_takeaway": "takeaway",
+    "to_checkout": "checkout",
+    "to_greeter": "greeter",
+    "confirm_reservation": "greeter",
+    "confirm_checkout": "greeter",
+}
+# tool -> user data field it fills (enough to make every session's state differ)
+UPDATES = {
+    "update_name": "customer_name",
+    "update_phone": "customer_phone",
+    "update_party_size": "party_size",
+    "update_reservation_time": "reservation_time",
+    "update_order": "order",
+    "confirm_expense": "expense",
+}
+_WORDS = re.compile(r"\w+|[^\w\s]")
+
+
+def count_tokens(text: str) -> int:
+    if tiktoken is not None:
+        return len(_encoding().encode(text))
+    return len(_WORDS.findall(text))
+
+
+@functools.lru_cache(maxsize=1)
+def _encoding():
+    return tiktoken.get_encoding("o200k_base")
+
+
+def common_prefix(a: str, b: str) -> int:
+    return len(os.path.commonprefix([a, b]))
+
+
+# ---------------------------------------------------------------- checks
+def instruction_hashes() -> dict:
+    return {
+        role: hashlib.sha256(prompts.agent_instructions(role).encode()).hexdigest() for role in AGENTS
+    } | {"shared_prefix": hashlib.sha256(prompts.SHARED_PREFIX.encode()).hexdigest()}
+
+
+def check_stable(runs: int) -> tuple[bool, str]:
+    code = (
+        "import hashlib, json, sys; sys.path.insert(0, sys.argv[1]); import prompts; "
+        "print(json.dumps({r: hashlib.sha256(prompts.agent_instructions(r).encode()).hexdigest() "
+        f"for r in {list(AGENTS)!r}}} | {{'shared_prefix': hashlib.sha256(prompts.SHARED_PREFIX.encode()).hexdigest()}}))"
+    )
+    expected = instruction_hashes()
+    for seed in range(runs):
+        env = dict(os.environ, PYTHONHASHSEED=str(seed))
+        out = subprocess.run([sys.executable, "-c", code, ROOT], env=env, capture_output=True, text=True, check=True)
+        if json.loads(out.stdout) != expected:
+            return False, f"instructions differ with PYTHONHASHSEED={seed}"
+    return True, f"{len(AGENTS)} agents, same sha256 in {runs} fresh interpreters"
+
+
+def check_shared(min_tokens: int) -> tuple[bool, str]:
+    texts = [prompts.agent_instructions(role) for role in AGENTS]
+    missing = [role for role, text in zip(AGENTS, texts) if not text.startswith(prompts.SHARED_PREFIX)]
+    if missing:
+        return False, f"instructions of {', '.join(missing)} do not start with SHARED_PREFIX"
+    tokens = count_tokens(prompts.SHARED_PREFIX)
+    if tokens < min_tokens:
+        return False, f"SHARED_PREFIX is {tokens} tokens, below the {min_tokens} providers cache"
+    return True, f"SHARED_PREFIX {tokens} tokens, {len(prompts.SHARED_PREFIX.encode())} bytes, first in all agents"
+
+
+def check_tail() -> tuple[bool, str]:
+    for role, name in AGENTS.items():
+        a = render(build_context(role, name, {"customer_name": "Minh"}))
+        b = render(build_context(role, name, {"customer_name": "Alice", "order": {"Pad Thai": 2}}))
+        instructions = len(render([("system", prompts.agent_instructions(role))]))
+        if common_prefix(a, b) < instructions:
+            return False, f"{name}: session data appears inside the instructions"
+    return True, "user data only after the instructions"
+
+
+# ---------------------------------------------------------------- simulation
+def summary(userdata: dict) -> str:
+    """Stand-in for UserData.summarize(): sorted keys, unknown when empty"""
+    fields = ("customer_name", "customer_phone", "reservation_time", "party_size", "order", "expense")
+    return "".join(f"{key}: {json.dumps(userdata.get(key) or 'unknown', ensure_ascii=False)}\n" for key in fields)
+
+
+def build_context(role: str, name: str, userdata: dict, carried: list | None = None) -> list:
+    return [("system", prompts.agent_instructions(role)), *(carried or []),
+            ("system", prompts.state_message(name, summary(userdata)))]
+
+
+def render(messages: list) -> str:
+    return "".join(f"<{role}>\n{content}\n" for role, content in messages)
+
+
+class ProviderCache:
+    """Every request seen so far; a new request is cached up to its longest common prefix"""
+
+    def __init__(self, min_tokens: int, block: int):
+        self.min_tokens = min_tokens
+        self.block = block
+        self.requests: list[str] = []
+
+    def send(self, request: str) -> tuple[int, int]:
+        """(prompt tokens, cached tokens)"""
+        longest = max((common_prefix(request, seen) for seen in self.requests), default=0)
+        self.requests.append(request)
+        cached = count_tokens(request[:longest])
+        if cached < self.min_tokens:
+            cached = 0
+        else:
+            cached = self.min_tokens + (cached - self.min_tokens) // self.block * self.block
+        return count_tokens(request), cached
+
+
+def replay(script: dict, session: int, cache: ProviderCache) -> list[dict]:
+    """One call of the script; each LLM request as {agent, tokens, cached}"""
+    userdata = {"customer_name": None}
+    contexts = {"greeter": build_context("greeter", AGENTS["greeter"], userdata)}
+    agent = "greeter"
+    requests = []
+
+    def ask():
+        tokens, cached = cache.send(render(contexts[agent]))
+        requests.append({"agent": agent, "tokens": tokens, "cached": cached})
+
+    ask()  # greeting after on_enter
+    contexts[agent].append(("assistant", "Xin chào! / Hello!"))
+    for turn in script["turns"]:
+        contexts[agent].append(("user", turn["user"]))
+        for step in turn["llm"]:
+            if "say" in step:
+                ask()
+                contexts[agent].append(("assistant", step["say"]))
+                continue
+            ask()  # the request that produced the tool call
+            args = dict(step.get("args") or {})
+            if step["tool"] in UPDATES:
+                value = next(iter(args.values()), None) if args else None
+                if step["tool"] == "update_name":
+                    value = f"{value} {session}"  # a different customer every session
+                userdata[UPDATES[step["tool"]]] = value
+            contexts[agent].append(("assistant", f"call {step['tool']}({json.dumps(args, ensure_ascii=False)})"))
+            contexts[agent].append(("tool", "ok"))
+            target = HANDOFFS.get(step["tool"])
+            if target and target != agent:
+                carried = contexts[agent][1:][-6:]
+                previous = contexts.get(target, [("system", prompts.agent_instructions(target))])
+                contexts[target] = previous + carried + [("system", prompts.state_message(AGENTS[target], summary(userdata)))]
+                agent = target
+    return requests
+
+
+def totals(requests: list[dict]) -> dict:
+    tokens = sum(r["tokens"] for r in requests)
+    cached = sum(r["cached"] for r in requests)
+    return {"requests": len(requests), "tokens": tokens, "cached": cached,
+            "fraction": round(cached / tokens, 3) if tokens else 0.0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt prefix stability and cacheable token fraction")
+    parser.add_argument("scripts", nargs="*", help="replay scripts (default: tools/replay_scripts/*.json)")
+    parser.add_argument("--sessions", type=int, default=3, help="calls per script, different customers")
+    parser.add_argument("--min-tokens", type=int, default=1024, help="shortest prefix the provider caches")
+    parser.add_argument("--block", type=int, default=128, help="cache granularity past --min-tokens")
+    parser.add_argument("--hash-runs", type=int, default=3, help="fresh interpreters for the stability check")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    approx = "" if tiktoken is not None else "~"
+    checks = {
+        "stable": check_stable(args.hash_runs),
+        "shared": check_shared(args.min_tokens),
+        "tail": check_tail(),
+    }
+    print(f"🔎 Prompt prefix ({'tiktoken o200k_base' if tiktoken is not None else 'estimated tokens'})")
+    for name, (ok, detail) in checks.items():
+        print(f"  {'✅' if ok else '❌'} {name:<7} {detail}")
+
+    print(f"\n  {'agent':<12} {'instructions':>13} {'shared':>8}")
+    for role in AGENTS:
+        text = prompts.agent_instructions(role)
+        print(f"  {role:<12} {approx}{count_tokens(text):>12,} {common_prefix(text, prompts.SHARED_PREFIX) / len(text):>8.0%}")
+
+    paths = args.scripts or sorted(glob.glob(os.path.join(SCRIPTS_DIR, "*.json")))
+    cache = ProviderCache(args.min_tokens, args.block)
+    results = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            script = json.load(f)
+        runs = [replay(script, session, cache) for session in range(args.sessions)]
+        results.append({"script": script["name"], "first": totals(runs[0]),
+                        "later": totals([r for run in runs[1:] for r in run]), "all": totals([r for run in runs for r in run])})
+
+    print(f"\n📦 Cacheable prompt tokens, {args.sessions} sessions per script, one shared provider cache "
+          f"(>= {args.min_tokens}, {args.block}-token steps)")
+    print(f"  {'script':<20} {'requests':>8} {'tokens':>9} {'cached':>9} {'first call':>11} {'later calls':>12} {'all':>6}")
+    print("  " + "-" * 79)
+    for r in results:
+        print(f"  {r['script']:<20} {r['all']['requests']:>8} {approx}{r['all']['tokens']:>8,} {approx}{r['all']['cached']:>8,} "
+              f"{r['first']['fraction']:>11.0%} {r['later']['fraction']:>12.0%} {r['all']['fraction']:>6.0%}")
+    overall = totals([{"tokens": r["all"]["tokens"], "cached": r["all"]["cached"]} for r in results])
+    print(f"  {'total':<20} {sum(r['all']['requests'] for r in results):>8} {approx}{overall['tokens']:>8,} "
+          f"{approx}{overall['cached']:>8,} {'':>11} {'':>12} {overall['fraction']:>6.0%}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"checks": {name: {"ok": ok, "detail": detail} for name, (ok, detail) in checks.items()},
+                       "scripts": results, "overall": overall, "tokenizer": "o200k_base" if tiktoken else "estimate"},
+                      f, indent=2)
+        print(f"\n💾 Results written to {args.json}")
+    if not all(ok for ok, _ in checks.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
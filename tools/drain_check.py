@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Drain check with local stand-ins (no LiveKit, no API keys).
+
+Drives the real drain.DrainCoordinator, drain.PendingWork and token server (/api/token)
+with a stand-in AgentServer and scripted calls:
+
+  - calls arrive through the token server; an accepted call is dispatched to the worker
+    (LiveKit routes nothing to a worker that reports itself full while draining)
+  - every call checks out once: inventory deduction appended to the inventory log like in
+    confirm_checkout, and a slow Telegram stand-in flushed by the job shutdown callback
+  - SIGUSR1 is sent to this process mid-run; one call is longer than the drain deadline
+
+Scenarios:
+  single       the only worker drains: the token server must answer 503 meanwhile
+  replacement  a new worker is already up: the token server keeps routing (200)
+
+Checks: no dispatch to the draining worker, calls finished or closed at the deadline,
+no lost inventory write / notification, worker exits (SIGTERM) once drained.
+Exits 1 if a check fails.
+
+Usage:
+    python3 tools/drain_check.py
+    python3 tools/drain_check.py --deadline 3 --calls 30 --verbose
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import shutil
+import signal
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+# Must be set before drain / token_server are imported (read at import time)
+_workdir = tempfile.mkdtemp(prefix="drain-check-")
+os.environ["AGENT_STATUS_DIR"] = os.path.join(_workdir, "workers")
+os.environ["LIVEKIT_API_KEY"] = "drain-check-key"
+os.environ["LIVEKIT_API_SECRET"] = "drain-check-secret-drain-check-secret"
+os.environ["ROOM_JANITOR_ENABLED"] = "0"
+
+from aiohttp import web  # noqa: E402
+from aiohttp.test_utils import TestClient, TestServer  # noqa: E402
+
+import drain  # noqa: E402
+import inventory  # noqa: E402
+import inventory_log  # noqa: E402
+import token_server  # noqa: E402
+
+
+class StandInJob:
+    def __init__(self, job_id: str, task: asyncio.Task) -> None:
+        self.id = job_id
+        self.task = task
+
+
+class StandInAgentServer:
+    """The parts of livekit.agents.AgentServer the coordinator uses"""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._listeners: dict[str, list] = {}
+        self._jobs: dict[str, StandInJob] = {}
+        self.draining = False
+        self.dispatched = 0
+        self.dispatched_while_draining = 0
+
+    def on(self, event: str, callback) -> None:
+        self._listeners.setdefault(event, []).append(callback)
+
+    def emit(self, event: str) -> None:
+        for callback in self._listeners.get(event, []):
+            callback()
+
+    @property
+    def active_jobs(self) -> list[StandInJob]:
+        return list(self._jobs.values())
+
+    def dispatch(self, job_id: str, call) -> None:
+        if self.draining:
+            self.dispatched_while_draining += 1
+        self.dispatched += 1
+        task = asyncio.get_running_loop().create_task(call)
+        self._jobs[job_id] = StandInJob(job_id, task)
+        task.add_done_callback(lambda _: self._jobs.pop(job_id, None))
+
+    async def drain(self, timeout=None) -> None:
+        self.draining = True
+        tasks = [job.task for job in self._jobs.values()]
+        if tasks:
+            await asyncio.wait_for(asyncio.gather(*[asyncio.shield(t) for t in tasks], return_exceptions=True),
+                                   timeout)
+
+    async def aclose(self) -> None:
+        """Shut the remaining jobs down, then run their shutdown callback"""
+        for job in self.active_jobs:
+            job.task.cancel()
+        for job in self.active_jobs:
+            try:
+                await job.task
+            except asyncio.CancelledError:
+                pass
+
+
+class CallLog:
+    def __init__(self) -> None:
+        self.finished = 0
+        self.closed_at_deadline = 0
+        self.checkouts = 0
+        self.notifications: list[str] = []
+        self._lock = threading.Lock()
+
+    def notify(self, message: str, delay: float) -> None:
+        """Telegram stand-in: blocking HTTP call"""
+        time.sleep(delay)
+        with self._lock:
+            self.notifications.append(message)
+
+
+async def call(call_id: int, duration: float, stock: dict, inv_log: inventory_log.InventoryLog, log: CallLog,
+               rng: random.Random, work: drain.PendingWork) -> None:
+    """One call: talk, check out once, talk; shutdown callback flushes background work"""
+    try:
+        await asyncio.sleep(duration * rng.uniform(0.2, 0.6))
+        item = rng.choice(list(stock))
+        inventory.deduct_inventory(stock, {item: 1})
+        work.submit("telegram", log.notify, f"order {call_id}", rng.uniform(0.2, 1.5))
+        log.checkouts += 1  # the append below runs even if the call is closed while it waits
+        await asyncio.to_thread(inv_log.append, inventory_log.deduct_events({item: 1}), "checkout")
+        await asyncio.sleep(duration * rng.uniform(0.4, 0.8))
+        log.finished += 1
+    except asyncio.CancelledError:
+        log.closed_at_deadline += 1
+        raise
+    finally:
+        await work.flush()  # flush_pending_work() of the worker process
+
+
+async def fake_livekit_app() -> web.Application:
+    async def twirp(request: web.Request) -> web.Response:
+        await request.read()
+        return web.Response(body=b"", content_type="application/protobuf")
+
+    app = web.Application()
+    app.router.add_post("/twirp/{method:.*}", twirp)
+    return app
+
+
+async def scenario(name: str, args) -> dict:
+    status_dir = os.environ["AGENT_STATUS_DIR"]
+    shutil.rmtree(status_dir, ignore_errors=True)
+    inventory_path = os.path.join(_workdir, f"inventory-{name}.json")
+    shutil.copyfile(os.path.join(ROOT, "inventory.json"), inventory_path)
+    stock = inventory.load_inventory(inventory_path)
+    inv_log = inventory_log.InventoryLog(inventory_path)
+    initial_total = sum(item["quantity"] for item in stock.values())
+    rng = random.Random(args.seed)
+
+    livekit = TestServer(await fake_livekit_app())
+    await livekit.start_server()
+    os.environ["LIVEKIT_URL"] = str(livekit.make_url("")).rstrip("/")
+    client = TestClient(TestServer(token_server.create_app()))
+    await client.start_server()
+
+    loop = asyncio.get_running_loop()
+    exited = asyncio.Event()
+    loop.add_signal_handler(signal.SIGTERM, exited.set)  # what the LiveKit CLI does on SIGTERM
+
+    server = StandInAgentServer("old")
+    coordinator = drain.DrainCoordinator(server, timeout=args.deadline, status_dir=status_dir)
+    coordinator.attach()
+    server.emit("worker_started")
+    replacement = StandInAgentServer("new") if name == "replacement" else None
+    replacement_work = drain.PendingWork()  # another process: its own background work
+    if replacement:
+        drain.write_status({"pid": 999999, "agent_name": "restaurant-bot", "draining": False,
+                            "active_jobs": 0, "updated_at": time.time()}, status_dir)
+
+    log = CallLog()
+    responses = {"before": [], "during": []}
+    drain_at = args.drain_after
+    start = time.monotonic()
+
+    async def send_drain():
+        await asyncio.sleep(drain_at)
+        os.kill(os.getpid(), signal.SIGUSR1)
+
+    drain_task = loop.create_task(send_drain())
+    for call_id in range(args.calls):
+        elapsed = time.monotonic() - start
+        if exited.is_set():
+            break
+        # One call outlives the deadline: it must be closed, with its writes flushed
+        duration = args.deadline + drain_at + 5 if call_id == 2 else rng.uniform(1.0, 3.0)
+        resp = await client.get("/api/token", params={"room": f"drain-{name}-{call_id}", "name": f"u{call_id}"})
+        phase = "during" if coordinator.draining else "before"
+        responses[phase].append(resp.status)
+        if resp.status == 200:
+            target, work = (server, drain.pending_work) if not server.draining else (replacement, replacement_work)
+            if target is not None:
+                target.dispatch(f"job-{call_id}", call(call_id, duration, stock, inv_log, log, rng, work))
+        if args.verbose:
+            print(f"  t={elapsed:5.2f}s call {call_id:>3}: {resp.status} ({phase})")
+        await asyncio.sleep(args.interval)
+
+    try:
+        await asyncio.wait_for(exited.wait(), args.deadline + drain_at + 10)
+    except asyncio.TimeoutError:
+        pass
+    exited_after = time.monotonic() - start
+    await server.aclose()  # the CLI closes the worker after SIGTERM
+    if replacement:
+        await replacement.drain()
+    await drain_task
+    loop.remove_signal_handler(signal.SIGUSR1)
+    loop.remove_signal_handler(signal.SIGTERM)
+    await client.close()
+    await livekit.close()
+
+    # What a restarted process would load: snapshot + every deduction in the log
+    inv_log.close()
+    written_total = sum(item["quantity"] for item in inventory_log.InventoryLog(inventory_path).load()[0].values())
+
+    checks = {
+        "no dispatch to the draining worker": server.dispatched_while_draining == 0,
+        "worker exited after drain": exited.is_set() and exited_after <= drain_at + args.deadline + 2,
+        "long call closed at the deadline": log.closed_at_deadline >= 1,
+        "no pending background work": all(work.pending == 0 and work.failed == 0
+                                          for work in (drain.pending_work, replacement_work)),
+        "every notification sent": len(log.notifications) == log.checkouts,
+        "every inventory write landed": initial_total - written_total == log.checkouts,
+        "status file removed": not drain.read_statuses(status_dir) or replacement is not None,
+    }
+    if name == "single":
+        checks["token server refuses while draining (503)"] = bool(responses["during"]) and set(responses["during"]) == {503}
+    else:
+        checks["token server keeps routing to the new worker (200)"] = bool(responses["during"]) and set(responses["during"]) == {200}
+
+    return {
+        "scenario": name,
+        "dispatched_old": server.dispatched,
+        "dispatched_new": replacement.dispatched if replacement else 0,
+        "finished": log.finished,
+        "closed_at_deadline": log.closed_at_deadline,
+        "checkouts": log.checkouts,
+        "notifications": len(log.notifications),
+        "exited_after_s": round(exited_after, 2),
+        "responses": {phase: {str(code): codes.count(code) for code in set(codes)} for phase, codes in responses.items()},
+        "checks": checks,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drain check with local stand-ins")
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--interval", type=float, default=0.25, help="seconds between incoming calls")
+    parser.add_argument("--drain-after", type=float, default=2.0, help="SIGUSR1 after this many seconds")
+    parser.add_argument("--deadline", type=float, default=4.0, help="DRAIN_TIMEOUT for the check")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--verbose", action="store_true")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format="%(asctime)s %(levelname)s %(name)s %(message)s")
+    logging.getLogger("restaurant-bot").setLevel(logging.INFO if args.verbose else logging.WARNING)
+
+    results = []
+    for name in ("single", "replacement"):
+        print(f"🚰 {name} ...", flush=True)
+        results.append(asyncio.run(scenario(name, args)))
+
+    failed = 0
+    for result in results:
+        print(f"\n📋 {result['scenario']}: dispatched {result['dispatched_old']} (old) / {result['dispatched_new']} (new), "
+              f"{result['finished']} finished, {result['closed_at_deadline']} closed at deadline, "
+              f"{result['checkouts']} checkouts, exit after {result['exited_after_s']}s")
+        print(f"   /api/token before drain {result['responses']['before']}, during {result['responses']['during']}")
+        for check, ok in result["checks"].items():
+            print(f"   {'✅' if ok else '❌'} {check}")
+            failed += not ok
+
+    shutil.rmtree(_workdir, ignore_errors=True)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results written to {args.json}")
+    if failed:
+        print(f"\n❌ {failed} check(s) failed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
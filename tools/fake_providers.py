@@ -0,0 +1,237 @@
+"""
+Deterministic local stand-ins for the cloud providers (no network, no API keys).
+
+- ScriptedLLM: replies / tool calls read from a replay script
+- SilentTTS:   silence frames, length proportional to the text
+- ScriptedSTT: returns the next scripted transcript for every utterance
+
+SilentTTS / ScriptedSTT accept an injected first-byte delay (seconds, or a callable
+returning seconds) and error rate, to exercise provider_router.py offline.
+
+Used by tools/replay_harness.py to drive the real agents and function tools.
+"""
+
+import asyncio
+import json
+import random
+from typing import Callable, Optional, Union
+
+from livekit.agents import (
+    DEFAULT_API_CONNECT_OPTIONS,
+    APIConnectionError,
+    APIConnectOptions,
+    llm,
+    stt,
+    tts,
+    utils,
+)
+from livekit.agents.types import NOT_GIVEN, NotGivenOr
+
+DEFAULT_REPLY = "OK."
+ENTER_REPLY = "Xin chào! How can I help you?"
+SECONDS_PER_CHAR = 0.06  # ~ speaking rate used for the silence length
+
+Delay = Union[float, Callable[[], float]]
+
+
+class FaultInjection:
+    """Delay before the first byte and random failures (for provider routing tests)"""
+
+    def __init__(self, delay: Delay = 0.0, error_rate: float = 0.0, seed: Optional[int] = None) -> None:
+        self.delay = delay
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self.requests = 0
+        self.failures = 0
+
+    async def wait(self) -> None:
+        self.requests += 1
+        delay = self.delay() if callable(self.delay) else self.delay
+        if delay:
+            await asyncio.sleep(delay)
+        if self.error_rate and self._rng.random() < self.error_rate:
+            self.failures += 1
+            raise APIConnectionError("injected failure")
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+class ScriptedLLM(llm.LLM):
+    """
+    Replies from a script instead of a model.
+
+    turns: [{"user": "...", "llm": [{"tool": "name", "args": {...}}, {"say": "..."}]}, ...]
+    A user message starts the steps of the matching turn; every following LLM call
+    (after a tool output or a handoff's on_enter) consumes the next step.
+    """
+
+    def __init__(self, turns: list[dict], *, latency: float = 0.0) -> None:
+        super().__init__()
+        self._turns = {normalize_text(turn["user"]): list(turn.get("llm", [])) for turn in turns}
+        self._queue: list[dict] = []
+        self._latency = latency
+        self._last_user_item: Optional[str] = None
+        self.calls = 0
+        self.tool_calls: list[str] = []
+
+    @property
+    def model(self) -> str:
+        return "scripted"
+
+    @property
+    def provider(self) -> str:
+        return "local"
+
+    def _next_step(self, chat_ctx: llm.ChatContext, tool_choice) -> dict:
+        for item in reversed(chat_ctx.items):
+            if item.type == "message" and item.role == "user":
+                # A new user message (not seen before) starts its scripted turn
+                if item.id != self._last_user_item:
+                    self._last_user_item = item.id
+                    self._queue = list(self._turns.get(normalize_text(item.text_content or ""), []))
+                break
+
+        while self._queue:
+            step = self._queue.pop(0)
+            if "tool" in step and tool_choice == "none":
+                continue  # tools disabled for this generation (on_enter, max_tool_steps)
+            return step
+        return {"say": DEFAULT_REPLY if tool_choice != "none" else ENTER_REPLY}
+
+    def chat(
+        self,
+        *,
+        chat_ctx: llm.ChatContext,
+        tools: Optional[list] = None,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+        parallel_tool_calls: NotGivenOr[bool] = NOT_GIVEN,
+        tool_choice: NotGivenOr[llm.ToolChoice] = NOT_GIVEN,
+        extra_kwargs: NotGivenOr[dict] = NOT_GIVEN,
+    ) -> "ScriptedLLMStream":
+        self.calls += 1
+        step = self._next_step(chat_ctx, tool_choice)
+        if "tool" in step:
+            self.tool_calls.append(step["tool"])
+        return ScriptedLLMStream(
+            self, chat_ctx=chat_ctx, tools=tools or [], conn_options=conn_options, step=step
+        )
+
+
+class ScriptedLLMStream(llm.LLMStream):
+    def __init__(self, llm_: ScriptedLLM, *, chat_ctx, tools, conn_options, step: dict) -> None:
+        super().__init__(llm_, chat_ctx=chat_ctx, tools=tools, conn_options=conn_options)
+        self._step = step
+
+    async def _run(self) -> None:
+        if self._llm._latency:
+            await asyncio.sleep(self._llm._latency)
+
+        request_id = utils.shortuuid()
+        if "tool" in self._step:
+            call = llm.FunctionToolCall(
+                name=self._step["tool"],
+                arguments=json.dumps(self._step.get("args", {})),
+                call_id=utils.shortuuid("call_"),
+            )
+            self._event_ch.send_nowait(
+                llm.ChatChunk(id=request_id, delta=llm.ChoiceDelta(role="assistant", tool_calls=[call]))
+            )
+            return
+
+        # Stream word by word like a real model
+        for word in self._step["say"].split(" "):
+            self._event_ch.send_nowait(
+                llm.ChatChunk(id=request_id, delta=llm.ChoiceDelta(role="assistant", content=word + " "))
+            )
+
+
+class SilentTTS(tts.TTS):
+    """Emits silence, SECONDS_PER_CHAR per character (realtime=False: instantly)"""
+
+    def __init__(
+        self,
+        *,
+        sample_rate: int = 24000,
+        seconds_per_char: float = SECONDS_PER_CHAR,
+        delay: Delay = 0.0,
+        error_rate: float = 0.0,
+        seed: Optional[int] = None,
+    ) -> None:
+        super().__init__(
+            capabilities=tts.TTSCapabilities(streaming=False),
+            sample_rate=sample_rate,
+            num_channels=1,
+        )
+        self._seconds_per_char = seconds_per_char
+        self.faults = FaultInjection(delay, error_rate, seed)
+        self.characters = 0
+
+    @property
+    def model(self) -> str:
+        return "silence"
+
+    @property
+    def provider(self) -> str:
+        return "local"
+
+    def synthesize(
+        self, text: str, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS
+    ) -> "SilentChunkedStream":
+        self.characters += len(text)
+        return SilentChunkedStream(tts=self, input_text=text, conn_options=conn_options)
+
+
+class SilentChunkedStream(tts.ChunkedStream):
+    async def _run(self, output_emitter: tts.AudioEmitter) -> None:
+        output_emitter.initialize(
+            request_id=utils.shortuuid(),
+            sample_rate=self._tts.sample_rate,
+            num_channels=1,
+            mime_type="audio/pcm",
+        )
+        await self._tts.faults.wait()
+        samples = int(len(self.input_text) * self._tts._seconds_per_char * self._tts.sample_rate)
+        output_emitter.push(bytes(samples * 2))  # int16 zeros
+        output_emitter.flush()
+
+
+class ScriptedSTT(stt.STT):
+    """Non-streaming STT: each recognized utterance is the next scripted transcript"""
+
+    def __init__(
+        self,
+        transcripts: list[str],
+        *,
+        language: str = "vi",
+        delay: Delay = 0.0,
+        error_rate: float = 0.0,
+        seed: Optional[int] = None,
+    ) -> None:
+        super().__init__(capabilities=stt.STTCapabilities(streaming=False, interim_results=False))
+        self._transcripts = list(transcripts)
+        self._language = language
+        self.faults = FaultInjection(delay, error_rate, seed)
+
+    @property
+    def model(self) -> str:
+        return "scripted"
+
+    @property
+    def provider(self) -> str:
+        return "local"
+
+    async def _recognize_impl(
+        self,
+        buffer: utils.AudioBuffer,
+        *,
+        language: NotGivenOr[str] = NOT_GIVEN,
+        conn_options: APIConnectOptions,
+    ) -> stt.SpeechEvent:
+        await self.faults.wait()
+        text = self._transcripts.pop(0) if self._transcripts else ""
+        return stt.SpeechEvent(
+            type=stt.SpeechEventType.FINAL_TRANSCRIPT,
+            alternatives=[stt.SpeechData(language=self._language, text=text)],
+        )
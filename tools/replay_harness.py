@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Offline conversation replay harness.
+
+Runs the real Greeter / Reservation / Takeaway / Checkout agents and their
+function tools in an AgentSession (text mode, no room) against scripted
+transcripts, with the local stand-ins of tools/fake_providers.py instead of
+Gemini / OpenAI / ElevenLabs / Soniox. No network, no API keys.
+
+Reports per-turn wall time and the time spent in our own hot path
+(handoffs, on_enter, inventory lookups, summarize, inventory log write) so
+regressions show up on a plain Linux box. Exits 1 if an expectation fails
+or a turn is slower than --max-turn-ms.
+
+Usage:
+    python3 tools/replay_harness.py                       # all scripts in tools/replay_scripts
+    python3 tools/replay_harness.py tools/replay_scripts/takeaway_checkout.json --repeat 20
+    python3 tools/replay_harness.py --json replay.json --max-turn-ms 50
+"""
+
+import argparse
+import asyncio
+import functools
+import glob
+import json
+import logging
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "replay_scripts")
+sys.path.insert(0, ROOT)
+
+# Must be set before restaurant_agent is imported (read at import time, .env does not override)
+_workdir = tempfile.mkdtemp(prefix="replay-")
+os.environ["INVENTORY_FILE"] = os.path.join(_workdir, "inventory.json")
+os.environ["ORDER_LEDGER_FILE"] = os.path.join(_workdir, "orders.ledger")
+os.environ["RESERVATIONS_FILE"] = os.path.join(_workdir, "reservations.sqlite3")
+os.environ["STOCK_HOLDS_FILE"] = os.path.join(_workdir, "stock_holds.sqlite3")
+os.environ["TELEGRAM_BOT_TOKEN"] = ""
+os.environ["TELEGRAM_CHAT_ID"] = ""
+
+from livekit.agents.voice import AgentSession  # noqa: E402
+
+import inventory  # noqa: E402
+import inventory_feed  # noqa: E402
+import restaurant_agent as ra  # noqa: E402
+from fake_providers import ScriptedLLM, SilentTTS  # noqa: E402
+
+# (owner, attribute) of our own code on the per-turn hot path
+HOT_PATH = [
+    (ra.BaseAgent, "on_enter"),
+    (ra.BaseAgent, "_transfer_to_agent"),
+    (ra.UserData, "summarize"),
+    (inventory, "find_inventory_key"),
+    (inventory, "check_availability"),
+    (inventory, "validate_order"),
+    (inventory, "deduct_inventory"),
+    (inventory_feed.InventoryFeed, "record"),
+    (ra, "send_telegram_notification"),
+]
+
+
+class HotPathProfiler:
+    """Wraps the HOT_PATH callables with timers; totals are collected per turn"""
+
+    def __init__(self):
+        self.turn: dict[str, list[float]] = defaultdict(list)
+        self.total: dict[str, list[float]] = defaultdict(list)
+
+    def install(self):
+        for owner, name in HOT_PATH:
+            original = getattr(owner, name)
+            timed = self._wrap(original, name)
+            setattr(owner, name, timed)
+            # restaurant_agent imports some of them by name: patch that reference too
+            if getattr(ra, name, None) is original:
+                setattr(ra, name, timed)
+
+    def _record(self, name: str, elapsed: float):
+        self.turn[name].append(elapsed)
+        self.total[name].append(elapsed)
+
+    def _wrap(self, func, name: str):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def timed_async(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    self._record(name, time.perf_counter() - start)
+            return timed_async
+
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._record(name, time.perf_counter() - start)
+        return timed
+
+    def take_turn(self) -> dict[str, float]:
+        """Own-code milliseconds of the finished turn, per function"""
+        result = {name: round(sum(times) * 1000, 3) for name, times in self.turn.items()}
+        self.turn.clear()
+        return result
+
+
+def load_scripts(paths: list[str]) -> list[dict]:
+    if not paths:
+        paths = sorted(glob.glob(os.path.join(SCRIPTS_DIR, "*.json")))
+    scripts = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            script = json.load(f)
+        script.setdefault("name", os.path.splitext(os.path.basename(path))[0])
+        scripts.append(script)
+    return scripts
+
+
+def check_expectations(expect: dict, session: AgentSession, userdata: ra.UserData) -> list[str]:
+    failures = []
+    agent = expect.get("agent")
+    if agent and session.current_agent is not userdata.agents.get(agent):
+        failures.append(f"agent is {type(session.current_agent).__name__}, expected {agent}")
+    for field, expected in expect.get("userdata", {}).items():
+        actual = getattr(userdata, field)
+        if actual != expected:
+            failures.append(f"userdata.{field} = {actual!r}, expected {expected!r}")
+    return failures
+
+
+async def run_script(script: dict, profiler: HotPathProfiler) -> dict:
+    # Fresh inventory for every run (checkout appends to its log)
+    feed = inventory_feed.get_feed()
+    for path in [feed.log.log_path, feed.log.snapshot_path, *feed.log.archives()]:
+        if os.path.exists(path):
+            os.remove(path)
+    shutil.copyfile(os.path.join(ROOT, "inventory.json"), inventory.INVENTORY_FILE)
+    feed.check()  # sessions start from the feed's copy, not the file
+
+    fake_llm = ScriptedLLM(script["turns"])
+    fake_tts = SilentTTS()
+    userdata = ra.create_userdata(llm=fake_llm, tts=fake_tts)
+
+    turns = []
+    async with AgentSession[ra.UserData](
+        userdata=userdata, llm=fake_llm, tts=fake_tts, max_tool_steps=1
+    ) as session:
+        start = time.perf_counter()
+        await session.start(agent=userdata.agents["greeter"])
+        profiler.take_turn()  # greeting is not a turn
+        startup_ms = (time.perf_counter() - start) * 1000
+
+        for turn in script["turns"]:
+            calls_before = fake_llm.calls
+            start = time.perf_counter()
+            result = await session.run(user_input=turn["user"])
+            wall_ms = (time.perf_counter() - start) * 1000
+            turns.append({
+                "user": turn["user"],
+                "wall_ms": wall_ms,
+                "own_ms": profiler.take_turn(),
+                "llm_calls": fake_llm.calls - calls_before,
+                "events": [event.type for event in result.events],
+                "failures": check_expectations(turn.get("expect", {}), session, userdata),
+            })
+    await ra.flush_pending_work()  # job shutdown callback: inventory write, notifications
+    await asyncio.to_thread(ra.stock_holds.get_holds().release, userdata.session_id)  # and the stock holds
+    if userdata.reservation_id:  # free the table: --repeat books the same slot again
+        await asyncio.to_thread(ra.reservations.get_book().cancel, userdata.reservation_id)
+    return {"startup_ms": startup_ms, "turns": turns}
+
+
+def summarize_runs(name: str, runs: list[dict]) -> dict:
+    """Median over the repeats, per turn"""
+    summary = {"script": name, "startup_ms": round(statistics.median(r["startup_ms"] for r in runs), 3), "turns": []}
+    for index, first in enumerate(runs[0]["turns"]):
+        samples = [run["turns"][index] for run in runs]
+        own = defaultdict(list)
+        for sample in samples:
+            for func, ms in sample["own_ms"].items():
+                own[func].append(ms)
+        summary["turns"].append({
+            "user": first["user"],
+            "wall_ms": round(statistics.median(s["wall_ms"] for s in samples), 3),
+            "own_ms": {func: round(statistics.median(ms), 3) for func, ms in own.items()},
+            "llm_calls": first["llm_calls"],
+            "events": first["events"],
+            "failures": sorted({f for s in samples for f in s["failures"]}),
+        })
+    return summary
+
+
+def print_report(summaries: list[dict], profiler: HotPathProfiler):
+    for summary in summaries:
+        print(f"\n▶ {summary['script']}  (session start {summary['startup_ms']:.2f} ms)")
+        print(f"  {'#':>2} {'wall ms':>9} {'own ms':>8} {'llm':>4}  user / hot path")
+        for index, turn in enumerate(summary["turns"], 1):
+            own_total = sum(turn["own_ms"].values())
+            status = "❌" if turn["failures"] else "✅"
+            print(f"  {index:>2} {turn['wall_ms']:>9.2f} {own_total:>8.3f} {turn['llm_calls']:>4}  "
+                  f"{status} {turn['user'][:48]}")
+            if turn["own_ms"]:
+                breakdown = ", ".join(f"{func} {ms:.3f}" for func, ms in sorted(turn["own_ms"].items()))
+                print(f"  {'':>26}{breakdown}")
+            for failure in turn["failures"]:
+                print(f"  {'':>26}⚠️  {failure}")
+
+    print(f"\n{'function':<28} {'calls':>7} {'total ms':>10} {'mean µs':>10} {'max µs':>10}")
+    print("-" * 69)
+    for func, times in sorted(profiler.total.items(), key=lambda kv: -sum(kv[1])):
+        print(f"{func:<28} {len(times):>7} {sum(times) * 1000:>10.3f} "
+              f"{statistics.mean(times) * 1e6:>10.1f} {max(times) * 1e6:>10.1f}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Replay scripted conversations against the agents offline")
+    parser.add_argument("scripts", nargs="*", help=f"replay scripts (default: {SCRIPTS_DIR}/*.json)")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per script (median is reported)")
+    parser.add_argument("--max-turn-ms", type=float, help="fail if a turn's median wall time is above this")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--verbose", action="store_true", help="keep the agent's INFO logs")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.ERROR)
+    ra.logger.setLevel(logging.INFO if args.verbose else logging.ERROR)
+
+    profiler = HotPathProfiler()
+    profiler.install()
+
+    summaries = []
+    for script in load_scripts(args.scripts):
+        runs = [await run_script(script, profiler) for _ in range(args.repeat)]
+        summaries.append(summarize_runs(script["name"], runs))
+
+    print_report(summaries, profiler)
+
+    failed = [t for s in summaries for t in s["turns"] if t["failures"]]
+    slow = [t for s in summaries for t in s["turns"]
+            if args.max_turn_ms is not None and t["wall_ms"] > args.max_turn_ms]
+    if slow:
+        print(f"\n🐢 {len(slow)} turn(s) slower than {args.max_turn_ms} ms")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"scripts": summaries, "repeat": args.repeat}, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Results written to {args.json}")
+
+    shutil.rmtree(_workdir, ignore_errors=True)
+    if failed:
+        print(f"\n❌ {len(failed)} turn(s) did not meet their expectations")
+    if failed or slow:
+        sys.exit(1)
+    print("\n✅ All scripted turns passed")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Soak test: N concurrent simulated sessions in one worker process.
+
+Each session is built like entrypoint() (create_userdata: inventory + four
+agents) and runs in an AgentSession in text mode with the local stand-ins of
+tools/fake_providers.py, looping over the reservation/takeaway flows in
+tools/replay_scripts. A call lasts --turns-per-call turns (long calls grow the
+chat context), then the session is closed and a new one starts.
+
+Every --sample-interval it records RSS, event-loop lag, turn latency, chat
+context size and the tracemalloc allocators that grew since warm-up. The
+report gives the RSS slope (MB/hour), memory per session, the top growing
+allocation sites and, with --ramp, the max sessions per worker before loop
+lag or turn latency exceed their limits.
+
+Usage:
+    python3 tools/soak_test.py --sessions 20 --duration 2h
+    python3 tools/soak_test.py --ramp --ramp-step 10 --ramp-interval 5m --max-lag-ms 100
+    python3 tools/soak_test.py --sessions 5 --duration 10m --json soak.json
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import logging
+import os
+import random
+import re
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "replay_scripts")
+sys.path.insert(0, ROOT)
+
+# Must be set before restaurant_agent is imported (read at import time, .env does not override)
+_workdir = tempfile.mkdtemp(prefix="soak-")
+os.environ["INVENTORY_FILE"] = os.path.join(_workdir, "inventory.json")
+os.environ["ORDER_LEDGER_FILE"] = os.path.join(_workdir, "orders.ledger")
+os.environ["RESERVATIONS_FILE"] = os.path.join(_workdir, "reservations.sqlite3")
+os.environ["STOCK_HOLDS_FILE"] = os.path.join(_workdir, "stock_holds.sqlite3")
+os.environ["TELEGRAM_BOT_TOKEN"] = ""
+os.environ["TELEGRAM_CHAT_ID"] = ""
+shutil.copyfile(os.path.join(ROOT, "inventory.json"), os.environ["INVENTORY_FILE"])
+
+from livekit.agents.voice import AgentSession  # noqa: E402
+
+import restaurant_agent as ra  # noqa: E402
+from fake_providers import ScriptedLLM, SilentTTS  # noqa: E402
+
+LAG_PROBE_INTERVAL = 0.1  # seconds
+TOP_ALLOCATORS = 10
+TRACEMALLOC_FRAMES = 5
+
+
+def parse_duration(value: str) -> float:
+    """'90', '30s', '10m', '2h' -> seconds"""
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)([smh]?)", value.strip())
+    if not match:
+        raise argparse.ArgumentTypeError(f"invalid duration: {value}")
+    return float(match.group(1)) * {"": 1, "s": 1, "m": 60, "h": 3600}[match.group(2)]
+
+
+def read_rss_mb() -> float:
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource  # fallback: peak RSS (KB on Linux)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def load_flows() -> list[dict]:
+    flows = []
+    for path in sorted(glob.glob(os.path.join(SCRIPTS_DIR, "*.json"))):
+        with open(path, "r", encoding="utf-8") as f:
+            flows.append(json.load(f))
+    return flows
+
+
+class SoakStats:
+    """Counters shared by the sessions and the sampler; reset every sample"""
+
+    def __init__(self):
+        self.active_sessions = 0
+        self.calls_completed = 0
+        self.turns_completed = 0
+        self.errors = 0
+        self.turn_ms: list[float] = []
+        self.lag_ms: list[float] = []
+        self.chat_items: dict[int, int] = {}  # session id -> chat context items
+
+    def drain(self) -> dict:
+        turn_ms, lag_ms = sorted(self.turn_ms), sorted(self.lag_ms)
+        self.turn_ms, self.lag_ms = [], []
+        return {
+            "turns": len(turn_ms),
+            "turn_p50_ms": round(turn_ms[len(turn_ms) // 2], 2) if turn_ms else None,
+            "turn_p95_ms": round(turn_ms[int(len(turn_ms) * 0.95) - 1], 2) if len(turn_ms) >= 20 else None,
+            "lag_max_ms": round(lag_ms[-1], 2) if lag_ms else 0.0,
+            "lag_p99_ms": round(lag_ms[int(len(lag_ms) * 0.99) - 1], 2) if len(lag_ms) >= 100 else None,
+            "chat_items_avg": round(statistics.mean(self.chat_items.values()), 1) if self.chat_items else 0,
+        }
+
+
+async def probe_loop_lag(stats: SoakStats):
+    """Oversleep of a periodic timer = time the loop was blocked"""
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(LAG_PROBE_INTERVAL)
+        stats.lag_ms.append(max(0.0, (time.perf_counter() - start - LAG_PROBE_INTERVAL) * 1000))
+
+
+async def run_call(session_id: int, flows: list[dict], args, stats: SoakStats, rng: random.Random):
+    """One call: a fresh session (like entrypoint) looping over flows for turns_per_call turns"""
+    flow = rng.choice(flows)
+    fake_llm = ScriptedLLM([t for f in flows for t in f["turns"]], latency=args.llm_latency)
+    fake_tts = SilentTTS()
+    userdata = ra.create_userdata(llm=fake_llm, tts=fake_tts)
+
+    async with AgentSession[ra.UserData](
+        userdata=userdata, llm=fake_llm, tts=fake_tts, max_tool_steps=1
+    ) as session:
+        await session.start(agent=userdata.agents["greeter"])
+        turns = 0
+        while turns < args.turns_per_call:
+            for turn in flow["turns"]:
+                start = time.perf_counter()
+                await session.run(user_input=turn["user"])
+                stats.turn_ms.append((time.perf_counter() - start) * 1000)
+                stats.turns_completed += 1
+                stats.chat_items[session_id] = len(session.current_agent.chat_ctx.items)
+                turns += 1
+                await asyncio.sleep(rng.uniform(0, 2 * args.think_time))
+            if userdata.reservation_id:  # free the table: every loop books the same slot
+                await asyncio.to_thread(ra.reservations.get_book().cancel, userdata.reservation_id)
+                userdata.reservation_id = userdata.booked_time = None
+            flow = rng.choice(flows)
+    await ra.flush_pending_work()  # job shutdown callback: inventory write, notifications
+    await asyncio.to_thread(ra.stock_holds.get_holds().release, userdata.session_id)  # and the stock holds
+    stats.chat_items.pop(session_id, None)
+    stats.calls_completed += 1
+
+
+async def session_worker(session_id: int, flows: list[dict], args, stats: SoakStats, stop: asyncio.Event):
+    rng = random.Random(session_id)
+    stats.active_sessions += 1
+    try:
+        while not stop.is_set():
+            try:
+                await run_call(session_id, flows, args, stats, rng)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                stats.errors += 1
+                ra.logger.error(f"❌ session {session_id} failed: {e}")
+                await asyncio.sleep(1)
+    finally:
+        stats.active_sessions -= 1
+
+
+def top_growth(baseline: tracemalloc.Snapshot, current: tracemalloc.Snapshot) -> list[dict]:
+    filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen *>")]
+    diff = current.filter_traces(filters).compare_to(baseline.filter_traces(filters), "traceback")
+    top = []
+    for stat in diff[:TOP_ALLOCATORS]:
+        frame = stat.traceback[-1] if stat.traceback else None
+        top.append({
+            "site": f"{os.path.relpath(frame.filename, ROOT) if frame else '?'}:{frame.lineno if frame else 0}",
+            "growth_kb": round(stat.size_diff / 1024, 1),
+            "size_kb": round(stat.size / 1024, 1),
+            "blocks": stat.count,
+            "stack": [f"{os.path.basename(f.filename)}:{f.lineno}" for f in stat.traceback],
+        })
+    return top
+
+
+def rss_slope_mb_per_hour(samples: list[dict]) -> float:
+    """Least-squares slope of RSS over time"""
+    if len(samples) < 2:
+        return 0.0
+    xs = [s["t"] for s in samples]
+    ys = [s["rss_mb"] for s in samples]
+    x_mean, y_mean = statistics.mean(xs), statistics.mean(ys)
+    denom = sum((x - x_mean) ** 2 for x in xs)
+    if denom == 0:
+        return 0.0
+    return sum((x - x_mean) * (y - y_mean) for x, y in zip(xs, ys)) / denom * 3600
+
+
+async def soak(args) -> dict:
+    flows = load_flows()
+    stats = SoakStats()
+    stop = asyncio.Event()
+    workers: list[asyncio.Task] = []
+    lag_task = asyncio.create_task(probe_loop_lag(stats))
+
+    def scale_to(count: int):
+        while len(workers) < count:
+            workers.append(asyncio.create_task(session_worker(len(workers), flows, args, stats, stop)))
+
+    idle_rss = read_rss_mb()
+    tracemalloc.start(TRACEMALLOC_FRAMES)
+    started = time.monotonic()
+    level = args.ramp_step if args.ramp else args.sessions
+    scale_to(level)
+    next_ramp = started + args.ramp_interval
+
+    samples, levels = [], []
+    baseline_snapshot = None
+    warmed_up_at = started + args.warmup
+    deadline = started + args.duration
+    level_samples: list[dict] = []
+
+    try:
+        while time.monotonic() < deadline:
+            await asyncio.sleep(args.sample_interval)
+            now = time.monotonic()
+            sample = {
+                "t": round(now - started, 1),
+                "sessions": stats.active_sessions,
+                "rss_mb": round(read_rss_mb(), 1),
+                "traced_mb": round(tracemalloc.get_traced_memory()[0] / 1024 / 1024, 1),
+                "calls": stats.calls_completed,
+                "turns_total": stats.turns_completed,
+                "errors": stats.errors,
+                **stats.drain(),
+            }
+            samples.append(sample)
+            level_samples.append(sample)
+            print(f"⏱️  t={sample['t']:>7}s sessions={sample['sessions']:>4} rss={sample['rss_mb']:>7} MB "
+                  f"turn p50={sample['turn_p50_ms']} ms lag max={sample['lag_max_ms']} ms "
+                  f"ctx≈{sample['chat_items_avg']} items errors={sample['errors']}", flush=True)
+
+            if baseline_snapshot is None and now >= warmed_up_at:
+                baseline_snapshot = tracemalloc.take_snapshot()
+
+            if args.ramp and now >= next_ramp:
+                healthy = all(
+                    (s["lag_p99_ms"] or s["lag_max_ms"]) <= args.max_lag_ms
+                    and (s["turn_p95_ms"] or 0) <= args.max_turn_ms
+                    for s in level_samples
+                )
+                levels.append({"sessions": level, "healthy": healthy,
+                               "rss_mb": level_samples[-1]["rss_mb"] if level_samples else None})
+                if not healthy:
+                    print(f"🛑 {level} sessions exceed the limits, stopping ramp")
+                    break
+                level += args.ramp_step
+                scale_to(level)
+                next_ramp = now + args.ramp_interval
+                level_samples = []
+    finally:
+        stop.set()
+        final_snapshot = tracemalloc.take_snapshot()
+        for task in workers:
+            task.cancel()
+        lag_task.cancel()
+        await asyncio.gather(*workers, lag_task, return_exceptions=True)
+        tracemalloc.stop()
+
+    steady = [s for s in samples if s["t"] >= args.warmup] or samples
+    sessions = max((s["sessions"] for s in samples), default=0)
+    good_levels = [lvl["sessions"] for lvl in levels if lvl["healthy"]]
+    return {
+        "config": {k: v for k, v in vars(args).items() if k != "json"},
+        "idle_rss_mb": round(idle_rss, 1),
+        "peak_rss_mb": max((s["rss_mb"] for s in samples), default=idle_rss),
+        "rss_slope_mb_per_hour": round(rss_slope_mb_per_hour(steady), 2),
+        "mb_per_session": round((steady[-1]["rss_mb"] - idle_rss) / sessions, 2) if steady and sessions else None,
+        "max_sessions_per_worker": max(good_levels) if good_levels else None,
+        "ramp_levels": levels,
+        "top_growth": top_growth(baseline_snapshot, final_snapshot) if baseline_snapshot else [],
+        "samples": samples,
+    }
+
+
+def print_report(report: dict):
+    print("\n" + "=" * 72)
+    print(f"RSS idle {report['idle_rss_mb']} MB, peak {report['peak_rss_mb']} MB, "
+          f"slope {report['rss_slope_mb_per_hour']} MB/h after warm-up")
+    if report["mb_per_session"] is not None:
+        print(f"≈ {report['mb_per_session']} MB per concurrent session")
+    if report["ramp_levels"]:
+        for level in report["ramp_levels"]:
+            print(f"  {level['sessions']:>5} sessions  rss={level['rss_mb']} MB  "
+                  f"{'✅' if level['healthy'] else '❌'}")
+        print(f"🏁 Max sessions per worker: {report['max_sessions_per_worker']}")
+    if report["top_growth"]:
+        print(f"\nTop {len(report['top_growth'])} growing allocation sites since warm-up:")
+        for entry in report["top_growth"]:
+            print(f"  {entry['growth_kb']:>+10.1f} KB  {entry['blocks']:>7} blocks  {entry['site']}")
+            print(f"  {'':>32}{' <- '.join(reversed(entry['stack'][:-1]))}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Concurrent-session soak test with memory tracking")
+    parser.add_argument("--sessions", type=int, default=10, help="concurrent sessions (without --ramp)")
+    parser.add_argument("--duration", type=parse_duration,
+                        help="default 10m, or until a ramp limit is hit with --ramp")
+    parser.add_argument("--turns-per-call", type=int, default=40, help="turns before a session is closed")
+    parser.add_argument("--think-time", type=float, default=1.0, help="mean seconds between user turns")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="seconds per scripted LLM reply")
+    parser.add_argument("--sample-interval", type=parse_duration, default=parse_duration("30s"))
+    parser.add_argument("--warmup", type=parse_duration, default=parse_duration("2m"),
+                        help="ignored for the slope, tracemalloc baseline taken after it")
+    parser.add_argument("--ramp", action="store_true", help="add sessions stepwise to find the max per worker")
+    parser.add_argument("--ramp-step", type=int, default=10)
+    parser.add_argument("--ramp-interval", type=parse_duration, default=parse_duration("5m"))
+    parser.add_argument("--max-lag-ms", type=float, default=100.0, help="ramp limit: loop lag p99")
+    parser.add_argument("--max-turn-ms", type=float, default=2000.0, help="ramp limit: turn latency p95")
+    parser.add_argument("--json", help="write the full report to this file")
+    args = parser.parse_args()
+    if args.duration is None:
+        args.duration = float("inf") if args.ramp else parse_duration("10m")
+
+    logging.basicConfig(level=logging.ERROR)
+    ra.logger.setLevel(logging.ERROR)
+
+    try:
+        report = await soak(args)
+    finally:
+        shutil.rmtree(_workdir, ignore_errors=True)
+    print_report(report)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
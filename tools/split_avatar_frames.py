@@ -2,65 +2,85 @@
 """
 Script để cắt ảnh avatar 6 frames thành 6 files riêng biệt
 Ảnh gốc có 6 bánh bao xếp thành 2 hàng x 3 cột
+
+Batch mode: xử lý cả thư mục ảnh gốc song song (process pool), xuất texture atlas
+(PNG + WebP) kèm JSON manifest cho mỗi avatar, bỏ qua ảnh không đổi (content hash).
 """
 
 from PIL import Image
+import hashlib
+import json
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Frame positions: [row][col]
+FRAME_POSITIONS = [
+    (0, 0), (0, 1), (0, 2),  # Hàng 1
+    (1, 0), (1, 1), (1, 2),  # Hàng 2
+]
+
+SOURCE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp')
+CACHE_FILE = '.avatar_cache.json'
+ATLAS_PADDING = 2  # px between packed frames (avoids texture bleeding)
+# Bump when the output format changes so cached entries are rebuilt
+ATLAS_VERSION = 1
+
+
+def crop_frames(img):
+    """
+    Cắt ảnh 2x3 thành 6 frames (mỗi frame chỉ crop một lần)
+
+    Layout: 2 hàng x 3 cột
+    [0] [1] [2]
+    [3] [4] [5]
+    """
+    width, height = img.size
+    frame_width = width // 3
+    frame_height = height // 2
+
+    frames = []
+    for row, col in FRAME_POSITIONS:
+        left = col * frame_width
+        top = row * frame_height
+        frames.append(img.crop((left, top, left + frame_width, top + frame_height)))
+    return frames
+
 
 def split_avatar_frames(input_image_path, output_dir):
     """
     Cắt ảnh 6 frames thành 6 files riêng
-    
+
     Layout: 2 hàng x 3 cột
     [0] [1] [2]
     [3] [4] [5]
     """
-    
+
     # Tạo output directory
     os.makedirs(output_dir, exist_ok=True)
-    
+
     # Load ảnh gốc
     img = Image.open(input_image_path)
     width, height = img.size
-    
+
     print(f"📸 Ảnh gốc: {width}x{height}")
-    
-    # Tính kích thước mỗi frame
-    frame_width = width // 3
-    frame_height = height // 2
-    
-    print(f"✂️  Mỗi frame: {frame_width}x{frame_height}")
-    
-    # Frame positions: [row][col]
-    positions = [
-        (0, 0), (0, 1), (0, 2),  # Hàng 1
-        (1, 0), (1, 1), (1, 2),  # Hàng 2
-    ]
-    
-    # Cắt và lưu từng frame
-    for idx, (row, col) in enumerate(positions):
-        # Tính tọa độ crop
-        left = col * frame_width
-        top = row * frame_height
-        right = left + frame_width
-        bottom = top + frame_height
-        
-        # Crop frame
-        frame = img.crop((left, top, right, bottom))
-        
-        # Lưu file
+
+    frames = crop_frames(img)
+    print(f"✂️  Mỗi frame: {frames[0].size[0]}x{frames[0].size[1]}")
+
+    # Lưu từng frame
+    for idx, frame in enumerate(frames):
         output_path = os.path.join(output_dir, f"mouth_{idx}.png")
         frame.save(output_path, "PNG")
-        
+
         print(f"✅ Saved: mouth_{idx}.png ({frame.size[0]}x{frame.size[1]})")
-    
+
     # Tạo base.png (frame đầu tiên làm base - có thể customize sau)
-    base_frame = img.crop((0, 0, frame_width, frame_height))
     base_path = os.path.join(output_dir, "base.png")
-    base_frame.save(base_path, "PNG")
+    frames[0].save(base_path, "PNG")
     print(f"✅ Saved: base.png (base avatar)")
-    
-    print(f"\n🎉 Hoàn thành! Đã tạo {len(positions)} mouth frames + 1 base")
+
+    print(f"\n🎉 Hoàn thành! Đã tạo {len(frames)} mouth frames + 1 base")
     print(f"📁 Output: {output_dir}")
     print("\n💡 Tiếp theo:")
     print(f"   1. Copy folder '{output_dir}' vào 'web-client-react/public/avatar/'")
@@ -73,35 +93,181 @@ def create_spritesheet_alternative(input_image_path, output_path):
     Tối ưu cho CSS animations
     """
     img = Image.open(input_image_path)
-    width, height = img.size
-    
-    frame_width = width // 3
-    frame_height = height // 2
-    
+    frames = crop_frames(img)
+    frame_width, frame_height = frames[0].size
+
     # Create new vertical image
-    spritesheet = Image.new('RGBA', (frame_width, frame_height * 6))
-    
-    positions = [
-        (0, 0), (0, 1), (0, 2),  # Hàng 1
-        (1, 0), (1, 1), (1, 2),  # Hàng 2
-    ]
-    
-    for idx, (row, col) in enumerate(positions):
-        left = col * frame_width
-        top = row * frame_height
-        right = left + frame_width
-        bottom = top + frame_height
-        
-        frame = img.crop((left, top, right, bottom))
+    spritesheet = Image.new('RGBA', (frame_width, frame_height * len(frames)))
+
+    for idx, frame in enumerate(frames):
         spritesheet.paste(frame, (0, idx * frame_height))
-    
+
     spritesheet.save(output_path, "PNG")
     print(f"✅ Created spritesheet: {output_path}")
 
 
+def pack_frames(frames):
+    """
+    Trim transparent borders and shelf-pack the frames into one atlas.
+    Returns (atlas_image, rects) where rects[i] = {x, y, w, h, offset_x, offset_y}
+    """
+    trimmed = []
+    for frame in frames:
+        frame = frame.convert('RGBA')
+        bbox = frame.getchannel('A').getbbox() or (0, 0, 1, 1)
+        trimmed.append((frame.crop(bbox), bbox[0], bbox[1]))
+
+    # Shelf packing: tallest first, rows no wider than ~sqrt(total area)
+    total_area = sum((t.size[0] + ATLAS_PADDING) * (t.size[1] + ATLAS_PADDING) for t, _, _ in trimmed)
+    max_row_width = max(max(t.size[0] for t, _, _ in trimmed), int(total_area ** 0.5) + 1)
+    order = sorted(range(len(trimmed)), key=lambda i: -trimmed[i][0].size[1])
+
+    rects = [None] * len(trimmed)
+    x = y = row_height = atlas_width = 0
+    for i in order:
+        image, offset_x, offset_y = trimmed[i]
+        w, h = image.size
+        if x > 0 and x + w > max_row_width:
+            x = 0
+            y += row_height + ATLAS_PADDING
+            row_height = 0
+        rects[i] = {"x": x, "y": y, "w": w, "h": h, "offset_x": offset_x, "offset_y": offset_y}
+        x += w + ATLAS_PADDING
+        row_height = max(row_height, h)
+        atlas_width = max(atlas_width, x - ATLAS_PADDING)
+
+    atlas = Image.new('RGBA', (atlas_width, y + row_height), (0, 0, 0, 0))
+    for (image, _, _), rect in zip(trimmed, rects):
+        atlas.paste(image, (rect["x"], rect["y"]))
+    return atlas, rects
+
+
+def create_atlas(input_image_path, output_dir, name=None):
+    """
+    Tạo texture atlas (PNG + WebP) + JSON manifest cho một avatar.
+    AnimatedAvatar chỉ cần tải 1 file ảnh thay vì 7 (base + 6 mouth).
+    """
+    name = name or os.path.splitext(os.path.basename(input_image_path))[0]
+    os.makedirs(output_dir, exist_ok=True)
+
+    img = Image.open(input_image_path)
+    frames = crop_frames(img)
+    atlas, rects = pack_frames(frames)
+
+    png_name = f"{name}.atlas.png"
+    webp_name = f"{name}.atlas.webp"
+    atlas.save(os.path.join(output_dir, png_name), "PNG", optimize=True)
+    atlas.save(os.path.join(output_dir, webp_name), "WEBP", quality=90, method=4)
+
+    frame_width, frame_height = frames[0].size
+    manifest = {
+        "version": ATLAS_VERSION,
+        "image": webp_name,
+        "fallback": png_name,
+        "size": list(atlas.size),
+        "frame_size": [frame_width, frame_height],
+        "frames": {f"mouth_{idx}": rect for idx, rect in enumerate(rects)},
+        # base.png is the same image as mouth_0
+        "aliases": {"base": "mouth_0"},
+    }
+    with open(os.path.join(output_dir, f"{name}.atlas.json"), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _process_source(input_path, output_dir, name):
+    """Worker: build the atlas of one source image, return (name, seconds)"""
+    start = time.perf_counter()
+    create_atlas(input_path, output_dir, name)
+    return name, time.perf_counter() - start
+
+
+def batch_create_atlases(input_dir, output_dir, workers=None, force=False):
+    """
+    Xử lý cả thư mục ảnh gốc song song. Ảnh có content hash không đổi
+    (và output còn nguyên) sẽ được bỏ qua.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    cache_path = os.path.join(output_dir, CACHE_FILE)
+    cache = {}
+    if os.path.exists(cache_path) and not force:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+
+    sources = sorted(
+        f for f in os.listdir(input_dir)
+        if f.lower().endswith(SOURCE_EXTENSIONS) and not f.startswith('.')
+    )
+    if not sources:
+        print(f"❌ No images found in {input_dir}")
+        return {}
+
+    start = time.perf_counter()
+    jobs = {}
+    skipped = []
+    for filename in sources:
+        name = os.path.splitext(filename)[0]
+        input_path = os.path.join(input_dir, filename)
+        digest = file_hash(input_path)
+        outputs_exist = all(
+            os.path.exists(os.path.join(output_dir, f"{name}.atlas.{ext}"))
+            for ext in ('png', 'webp', 'json')
+        )
+        entry = cache.get(filename)
+        if entry and entry.get("sha256") == digest and entry.get("version") == ATLAS_VERSION and outputs_exist:
+            skipped.append(name)
+            continue
+        jobs[name] = (filename, input_path, digest)
+
+    timings = {}
+    if jobs:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(_process_source, input_path, output_dir, name): name
+                for name, (_, input_path, _) in jobs.items()
+            }
+            for future in as_completed(futures):
+                name = futures[future]
+                filename, _, digest = jobs[name]
+                try:
+                    _, seconds = future.result()
+                except Exception as e:
+                    print(f"❌ {filename}: {e}")
+                    continue
+                timings[name] = seconds
+                cache[filename] = {"sha256": digest, "version": ATLAS_VERSION}
+                print(f"✅ {name}: {seconds * 1000:.0f}ms")
+
+    # Index of every avatar variant for the web client
+    index = {
+        os.path.splitext(filename)[0]: f"{os.path.splitext(filename)[0]}.atlas.json"
+        for filename in sources if filename in cache
+    }
+    with open(os.path.join(output_dir, "avatars.json"), 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2)
+    with open(cache_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=2)
+
+    elapsed = time.perf_counter() - start
+    print(f"\n🎉 {len(timings)} built, {len(skipped)} unchanged (skipped) in {elapsed:.2f}s")
+    if timings:
+        avg = sum(timings.values()) / len(timings)
+        print(f"⏱️  Per image: avg {avg * 1000:.0f}ms, max {max(timings.values()) * 1000:.0f}ms")
+    print(f"📁 Output: {output_dir}")
+    return timings
+
+
 if __name__ == "__main__":
     import sys
-    
+
     if len(sys.argv) < 2:
         print("""
 ╔══════════════════════════════════════════════════════════╗
@@ -110,6 +276,7 @@ if __name__ == "__main__":
 
 Usage:
     python3 split_avatar_frames.py <input_image> [output_dir]
+    python3 split_avatar_frames.py --batch <input_dir> [output_dir] [--workers N] [--force]
 
 Arguments:
     input_image    - Path to 6-frame avatar image (2x3 grid)
@@ -120,21 +287,45 @@ Example:
 
 Optional - Create vertical spritesheet:
     python3 split_avatar_frames.py avatar_6frames.png ./output --spritesheet
+
+Optional - Create texture atlas (PNG + WebP + JSON manifest):
+    python3 split_avatar_frames.py avatar_6frames.png ./output --atlas
+
+Batch - All avatar variants of a folder, in parallel (unchanged images are skipped):
+    python3 split_avatar_frames.py --batch ./avatars ../web-client-react/public/avatar
 """)
         sys.exit(1)
-    
-    input_path = sys.argv[1]
-    output_dir = sys.argv[2] if len(sys.argv) > 2 else "./avatar_frames"
-    
+
+    argv = sys.argv[1:]
+    workers = None
+    if "--workers" in argv:
+        i = argv.index("--workers")
+        workers = int(argv[i + 1])
+        del argv[i:i + 2]  # by position: the value may look like a path argument
+    args = [a for a in argv if not a.startswith("--")]
+
+    if "--batch" in sys.argv:
+        if not args or not os.path.isdir(args[0]):
+            print(f"❌ Error: Folder not found: {args[0] if args else '<input_dir>'}")
+            sys.exit(1)
+        output_dir = args[1] if len(args) > 1 else "./avatar_frames"
+        batch_create_atlases(args[0], output_dir, workers=workers, force="--force" in sys.argv)
+        sys.exit(0)
+
+    input_path = args[0]
+    output_dir = args[1] if len(args) > 1 else "./avatar_frames"
+
     if not os.path.exists(input_path):
         print(f"❌ Error: File not found: {input_path}")
         sys.exit(1)
-    
+
     # Check for spritesheet flag
     if "--spritesheet" in sys.argv:
         spritesheet_path = os.path.join(output_dir, "mouth_spritesheet.png")
         os.makedirs(output_dir, exist_ok=True)
         create_spritesheet_alternative(input_path, spritesheet_path)
+    elif "--atlas" in sys.argv:
+        manifest = create_atlas(input_path, output_dir)
+        print(f"✅ Created atlas: {manifest['image']} + {manifest['fallback']} ({manifest['size'][0]}x{manifest['size'][1]})")
     else:
         split_avatar_frames(input_path, output_dir)
-
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Local LiveKit webhook event generator
+Sinh các event room_started / participant_joined / participant_left / room_finished
+đã ký (giống LiveKit server) để test endpoint POST /api/livekit/webhook và RoomIndex
+mà không cần LiveKit Cloud.
+
+Usage:
+    python3 tools/webhook_events.py --url https://localhost:8089/api/livekit/webhook --rooms 50
+    python3 tools/webhook_events.py --local --rooms 10000      # apply to an in-process RoomIndex
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import os
+import sys
+import time
+import uuid
+
+import aiohttp
+from dotenv import load_dotenv
+from google.protobuf.json_format import MessageToJson
+from livekit import api
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from room_index import RoomIndex  # noqa: E402
+
+load_dotenv()
+
+
+def make_event(kind: str, room_name: str, identity: str = None, agent: bool = False) -> api.WebhookEvent:
+    """Build a webhook event like the LiveKit server sends"""
+    event = api.WebhookEvent(
+        event=kind,
+        id=f"EV_{uuid.uuid4().hex[:12]}",
+        created_at=int(time.time()),
+        room=api.Room(name=room_name, sid=f"RM_{hashlib.md5(room_name.encode()).hexdigest()[:12]}",
+                      creation_time=int(time.time())),
+    )
+    if identity:
+        event.participant.identity = identity
+        event.participant.name = identity
+        if agent:
+            event.participant.kind = api.ParticipantInfo.Kind.AGENT
+    return event
+
+
+def sign(body: str, api_key: str, api_secret: str) -> str:
+    """Authorization header value: JWT whose sha256 claim is the body hash"""
+    digest = base64.b64encode(hashlib.sha256(body.encode()).digest()).decode()
+    return api.AccessToken(api_key, api_secret).with_sha256(digest).to_jwt()
+
+
+def scenario(rooms: int, users_leave: bool, finish: bool) -> list[api.WebhookEvent]:
+    """One call per room: room starts, user + agent join, user leaves, room finishes"""
+    events = []
+    for i in range(rooms):
+        room_name = f"restaurant-sim-{i}"
+        events.append(make_event("room_started", room_name))
+        events.append(make_event("participant_joined", room_name, f"guest-{i}"))
+        events.append(make_event("participant_joined", room_name, f"agent-AJ_{i}", agent=True))
+        if users_leave:
+            events.append(make_event("participant_left", room_name, f"guest-{i}"))
+        if finish:
+            events.append(make_event("participant_left", room_name, f"agent-AJ_{i}", agent=True))
+            events.append(make_event("room_finished", room_name))
+    return events
+
+
+async def post_events(url: str, events: list[api.WebhookEvent], concurrency: int) -> None:
+    api_key = os.getenv("LIVEKIT_API_KEY")
+    api_secret = os.getenv("LIVEKIT_API_SECRET")
+    if not api_key or not api_secret:
+        print("❌ Missing LIVEKIT_API_KEY / LIVEKIT_API_SECRET in .env")
+        return
+
+    semaphore = asyncio.Semaphore(concurrency)
+    failures = 0
+
+    async def send(session, event):
+        nonlocal failures
+        body = MessageToJson(event)
+        headers = {"Authorization": sign(body, api_key, api_secret), "Content-Type": "application/webhook+json"}
+        async with semaphore:
+            async with session.post(url, data=body, headers=headers, ssl=False) as response:
+                if response.status != 200:
+                    failures += 1
+
+    # Events for one room must stay ordered, rooms are sent in parallel
+    by_room: dict[str, list] = {}
+    for event in events:
+        by_room.setdefault(event.room.name, []).append(event)
+
+    async def send_room(session, room_events):
+        for event in room_events:
+            await send(session, event)
+
+    start = time.perf_counter()
+    async with aiohttp.ClientSession() as session:
+        await asyncio.gather(*(send_room(session, room_events) for room_events in by_room.values()))
+        elapsed = time.perf_counter() - start
+
+        print(f"📨 Sent {len(events)} event(s) in {elapsed:.2f}s ({len(events) / elapsed:.0f} events/s), "
+              f"{failures} rejected")
+
+        rooms_url = url.replace("/api/livekit/webhook", "/api/rooms")
+        async with session.get(rooms_url, ssl=False) as response:
+            data = await response.json()
+            print(f"📇 Index stats: {data['stats']}")
+
+
+def apply_locally(events: list[api.WebhookEvent]) -> None:
+    index = RoomIndex()
+    start = time.perf_counter()
+    for event in events:
+        index.apply(event)
+    elapsed = time.perf_counter() - start
+    print(f"📇 Applied {len(events)} event(s) in {elapsed * 1000:.1f}ms "
+          f"({elapsed / len(events) * 1e6:.2f}µs/event)")
+
+    lookups = 100_000
+    names = list(index.rooms) or ["missing"]
+    start = time.perf_counter()
+    for i in range(lookups):
+        index.participant_count(names[i % len(names)])
+    elapsed = time.perf_counter() - start
+    print(f"🔎 {lookups} participant_count lookups: {elapsed / lookups * 1e9:.0f}ns each")
+    print(f"📊 Index stats: {index.stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate signed LiveKit webhook events")
+    parser.add_argument("--url", default="https://localhost:8089/api/livekit/webhook")
+    parser.add_argument("--rooms", type=int, default=20)
+    parser.add_argument("--users-leave", action="store_true", help="leave agent-only rooms behind")
+    parser.add_argument("--finish", action="store_true", help="finish every room at the end")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--local", action="store_true", help="apply to an in-process RoomIndex")
+    args = parser.parse_args()
+
+    events = scenario(args.rooms, args.users_leave, args.finish)
+    if args.local:
+        apply_locally(events)
+    else:
+        asyncio.run(post_events(args.url, events, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+Batched Silero VAD cho nhiều session trong cùng một worker process
+- Mỗi VADStream (một session) vẫn giữ logic của plugin silero (ngưỡng, padding, sự kiện),
+  chỉ phần suy luận ONNX được gom lại: một lần session.run cho mọi cửa sổ 32ms đang chờ
+- State RNN (2 x 128) và context (64 mẫu) của từng stream nằm trong batcher, theo slot
+- Chỉ có lợi khi nhiều session chạy chung process: JOB_EXECUTOR=thread + VAD_PROVIDER=silero-batched
+
+Đo CPU / session ở 1, 10, 50 cuộc gọi:  python tools/bench_vad.py
+"""
+
+import functools
+import logging
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+from typing import Optional
+
+import numpy as np
+
+from agent_logging import fields
+
+logger = logging.getLogger("restaurant-bot")
+
+WINDOW_SAMPLES = {16000: 512, 8000: 256}
+CONTEXT_SAMPLES = {16000: 64, 8000: 32}
+STATE_SHAPE = (2, 128)
+MAX_WAIT = float(os.getenv("VAD_BATCH_WAIT_MS", "4")) / 1000  # wait for the other streams' windows
+MAX_BATCH = 64
+
+
+class SileroBatcher:
+    """
+    Runs the Silero ONNX model for all registered streams: callers block in infer()
+    (from the executor thread the plugin already uses) until their batch is done.
+    A batch runs once every registered stream has a window pending, or MAX_WAIT
+    after the first one arrived.
+    """
+
+    def __init__(self, session, sample_rate: int = 16000, max_wait: float = MAX_WAIT,
+                 max_batch: int = MAX_BATCH) -> None:
+        if sample_rate not in WINDOW_SAMPLES:
+            raise ValueError("Silero VAD only supports 8KHz and 16KHz sample rates")
+        self.session = session
+        self.sample_rate = sample_rate
+        self.window_size = WINDOW_SAMPLES[sample_rate]
+        self.context_size = CONTEXT_SAMPLES[sample_rate]
+        self.max_wait = max_wait
+        self.max_batch = max_batch
+
+        self._sample_rate_nd = np.array(sample_rate, dtype=np.int64)
+        self._cond = threading.Condition()
+        self._pending: dict[int, tuple[np.ndarray, Future]] = {}
+        self._states: dict[int, np.ndarray] = {}
+        self._contexts: dict[int, np.ndarray] = {}
+        self._next_slot = 0
+
+        # Stats
+        self.batches = 0
+        self.windows = 0
+        self.inference_seconds = 0.0
+
+        self._thread = threading.Thread(target=self._run, name=f"vad-batcher-{sample_rate}", daemon=True)
+        self._thread.start()
+
+    @property
+    def streams(self) -> int:
+        return len(self._states)
+
+    def register(self) -> int:
+        with self._cond:
+            slot = self._next_slot
+            self._next_slot += 1
+            self._states[slot] = np.zeros(STATE_SHAPE, dtype=np.float32)
+            self._contexts[slot] = np.zeros(self.context_size, dtype=np.float32)
+            return slot
+
+    def release(self, slot: int) -> None:
+        with self._cond:
+            self._states.pop(slot, None)
+            self._contexts.pop(slot, None)
+            self._cond.notify()  # a batch may have been waiting for this stream
+
+    def reset(self, slot: int) -> None:
+        with self._cond:
+            self._states[slot].fill(0)
+            self._contexts[slot].fill(0)
+
+    def infer(self, slot: int, window: np.ndarray) -> float:
+        """Speech probability of one window (blocking)"""
+        future: Future = Future()
+        with self._cond:
+            self._pending[slot] = (np.array(window, dtype=np.float32, copy=True), future)
+            self._cond.notify()
+        return future.result()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                deadline = time.monotonic() + self.max_wait
+                while len(self._pending) < min(len(self._states), self.max_batch):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._pending
+                self._pending = {}
+                slots = list(batch)
+                states = np.stack([self._states[slot] for slot in slots], axis=1)
+                contexts = np.stack([self._contexts[slot] for slot in slots])
+
+            x = np.empty((len(slots), self.context_size + self.window_size), dtype=np.float32)
+            x[:, :self.context_size] = contexts
+            x[:, self.context_size:] = np.stack([batch[slot][0] for slot in slots])
+            try:
+                start = time.perf_counter()
+                out, new_states = self.session.run(
+                    None, {"input": x, "state": states, "sr": self._sample_rate_nd}
+                )
+                self.inference_seconds += time.perf_counter() - start
+            except Exception as e:
+                logger.error("❌ Batched VAD inference failed", extra=fields(error=str(e)))
+                for slot in slots:
+                    batch[slot][1].set_exception(e)
+                continue
+
+            with self._cond:
+                for index, slot in enumerate(slots):
+                    if slot in self._states:  # not released meanwhile
+                        self._states[slot] = new_states[:, index, :].copy()
+                        self._contexts[slot] = x[index, -self.context_size:].copy()
+            self.batches += 1
+            self.windows += len(slots)
+            for index, slot in enumerate(slots):
+                batch[slot][1].set_result(float(out[index, 0]))
+
+    def stats(self) -> dict:
+        return {
+            "streams": self.streams,
+            "batches": self.batches,
+            "mean_batch": round(self.windows / self.batches, 2) if self.batches else 0.0,
+            "inference_ms_per_window": round(self.inference_seconds * 1000 / self.windows, 4) if self.windows else 0.0,
+        }
+
+
+class BatchedOnnxModel:
+    """Drop-in for livekit.plugins.silero.onnx_model.OnnxModel backed by a SileroBatcher slot"""
+
+    def __init__(self, batcher: SileroBatcher) -> None:
+        self._batcher = batcher
+        self._slot = batcher.register()
+        weakref.finalize(self, batcher.release, self._slot)
+
+    @property
+    def sample_rate(self) -> int:
+        return self._batcher.sample_rate
+
+    @property
+    def window_size_samples(self) -> int:
+        return self._batcher.window_size
+
+    @property
+    def context_size(self) -> int:
+        return self._batcher.context_size
+
+    def reset(self) -> None:
+        self._batcher.reset(self._slot)
+
+    def __call__(self, x: np.ndarray) -> float:
+        return self._batcher.infer(self._slot, x)
+
+
+_batchers: dict[int, SileroBatcher] = {}
+_batchers_lock = threading.Lock()
+
+
+def get_batcher(session, sample_rate: int) -> SileroBatcher:
+    """Process-wide batcher per sample rate (job threads of one worker share it)"""
+    with _batchers_lock:
+        if sample_rate not in _batchers:
+            _batchers[sample_rate] = SileroBatcher(session, sample_rate)
+            logger.info("🎚️ Batched VAD started", extra=fields(sample_rate=sample_rate, max_wait_ms=MAX_WAIT * 1000))
+        return _batchers[sample_rate]
+
+
+@functools.cache
+def _batched_vad_class():
+    # Imported on first use like the other plugins (providers.py)
+    from livekit.plugins import silero
+    from livekit.plugins.silero.vad import VADStream
+
+    class BatchedSileroVAD(silero.VAD):
+        """silero.VAD whose streams run their inference through the shared batcher"""
+
+        @property
+        def model(self) -> str:
+            return "silero-batched"
+
+        def stream(self) -> VADStream:
+            batcher = get_batcher(self._onnx_session, self._opts.sample_rate)
+            stream = VADStream(self, self._opts, BatchedOnnxModel(batcher))
+            self._streams.add(stream)
+            return stream
+
+    return BatchedSileroVAD
+
+
+def load_vad(**kwargs):
+    """Same options as silero.VAD.load (providers.py: VAD_PROVIDER=silero-batched)"""
+    return _batched_vad_class().load(**kwargs)
+
+
+def batcher_stats() -> Optional[dict]:
+    return {rate: batcher.stats() for rate, batcher in _batchers.items()} or None
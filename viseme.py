@@ -0,0 +1,160 @@
+"""
+Viseme timeline
+Tính chỉ số khung miệng (mouth_0 ... mouth_5, tạo bởi tools/split_avatar_frames.py)
+từ audio TTS của agent, mỗi cửa sổ 40ms, rồi gửi qua LiveKit data channel
+(topic "viseme") kèm timestamp để client chỉ việc phát lại, không cần tự phân tích audio.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger("restaurant-bot")
+
+VISEME_TOPIC = "viseme"
+WINDOW_MS = 40
+NUM_MOUTH_FRAMES = 6  # mouth_0 (closed) ... mouth_5 (widest)
+
+# Loudness range mapped onto the mouth frames (dBFS)
+SILENCE_DB = -50.0
+LOUD_DB = -12.0
+
+# Energy bands (Hz): voiced vowels live in low/mid, sibilants ("s", "x", "ch") in high
+LOW_BAND = (80, 500)
+MID_BAND = (500, 2000)
+HIGH_BAND = (2000, 6000)
+
+PUBLISH_INTERVAL_MS = 200  # batch frames into one data packet per 200ms of audio
+
+
+class VisemeAnalyzer:
+    """Turns PCM audio into (offset_ms, mouth_frame) pairs, one per 40ms window"""
+
+    def __init__(self, sample_rate: int, window_ms: int = WINDOW_MS):
+        self.sample_rate = sample_rate
+        self.window_ms = window_ms
+        self.window_len = int(sample_rate * window_ms / 1000)
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._windows_done = 0
+        self._last_frame = 0
+
+        freqs = np.fft.rfftfreq(self.window_len, 1.0 / sample_rate)
+        self._bands = [(freqs >= lo) & (freqs < hi) for lo, hi in (LOW_BAND, MID_BAND, HIGH_BAND)]
+        self._hann = np.hanning(self.window_len).astype(np.float32)
+
+    def reset(self) -> None:
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._windows_done = 0
+        self._last_frame = 0
+
+    def push(self, pcm: np.ndarray) -> list[tuple[int, int]]:
+        """Feed int16 (or float) mono samples; returns frames for every completed window"""
+        samples = pcm.astype(np.float32)
+        if pcm.dtype == np.int16:
+            samples /= 32768.0
+        if self._pending.size:
+            samples = np.concatenate((self._pending, samples))
+
+        count = samples.size // self.window_len
+        self._pending = samples[count * self.window_len:]
+        if count == 0:
+            return []
+
+        frames = self.analyze(samples[:count * self.window_len].reshape(count, self.window_len))
+        start = self._windows_done
+        self._windows_done += count
+        return [((start + i) * self.window_ms, int(f)) for i, f in enumerate(frames)]
+
+    def analyze(self, windows: np.ndarray) -> np.ndarray:
+        """Vectorized: (n_windows, window_len) float32 -> (n_windows,) mouth frame indices"""
+        rms = np.sqrt(np.mean(windows * windows, axis=1) + 1e-12)
+        db = 20.0 * np.log10(rms)
+        openness = np.clip((db - SILENCE_DB) / (LOUD_DB - SILENCE_DB), 0.0, 1.0)
+
+        spectrum = np.abs(np.fft.rfft(windows * self._hann, axis=1)) ** 2
+        low, mid, high = (spectrum[:, band].sum(axis=1) for band in self._bands)
+        voiced_ratio = (low + mid) / (low + mid + high + 1e-12)
+        # Sibilants are loud but the mouth stays narrow
+        openness *= 0.55 + 0.45 * voiced_ratio
+
+        target = np.rint(openness * (NUM_MOUTH_FRAMES - 1)).astype(np.int8)
+
+        # Release limit: the mouth closes at most one step per window (no flicker)
+        out = np.empty_like(target)
+        last = self._last_frame
+        for i, value in enumerate(target):
+            last = value if value >= last else last - 1
+            out[i] = last
+        self._last_frame = int(last)
+        return out
+
+
+def frame_to_mono_int16(frame) -> np.ndarray:
+    """rtc.AudioFrame -> mono int16 samples"""
+    pcm = np.frombuffer(frame.data, dtype=np.int16)
+    if frame.num_channels > 1:
+        pcm = pcm.reshape(-1, frame.num_channels).mean(axis=1).astype(np.int16)
+    return pcm
+
+
+class VisemePublisher:
+    """Buffers viseme frames of the current TTS segment and publishes them on the data channel"""
+
+    def __init__(self, room, topic: str = VISEME_TOPIC, publish_interval_ms: int = PUBLISH_INTERVAL_MS):
+        self.room = room
+        self.topic = topic
+        self.publish_interval_ms = publish_interval_ms
+        self._analyzer: Optional[VisemeAnalyzer] = None
+        self._segment = 0
+        self._segment_started_at = 0.0
+        self._buffer: list[tuple[int, int]] = []
+        self._tasks: set[asyncio.Task] = set()
+        self.cpu_seconds = 0.0  # time spent analysing, for metrics
+        self.audio_seconds = 0.0
+
+    def start_segment(self) -> None:
+        self._segment += 1
+        self._segment_started_at = time.time()
+        self._buffer = []
+        if self._analyzer is not None:
+            self._analyzer.reset()
+
+    def push_frame(self, frame) -> None:
+        start = time.perf_counter()
+        if self._analyzer is None or self._analyzer.sample_rate != frame.sample_rate:
+            self._analyzer = VisemeAnalyzer(frame.sample_rate)
+        self._buffer.extend(self._analyzer.push(frame_to_mono_int16(frame)))
+        self.cpu_seconds += time.perf_counter() - start
+        self.audio_seconds += frame.samples_per_channel / frame.sample_rate
+
+        if self._buffer and self._buffer[-1][0] - self._buffer[0][0] >= self.publish_interval_ms:
+            self._flush()
+
+    def end_segment(self) -> None:
+        self._flush(final=True)
+
+    def _flush(self, final: bool = False) -> None:
+        if not self._buffer and not final:
+            return
+        payload = {
+            "segment": self._segment,
+            "started_at": int(self._segment_started_at * 1000),
+            "window_ms": WINDOW_MS,
+            "frames": self._buffer,  # [[offset_ms, mouth_frame], ...] from segment start
+            "final": final,
+        }
+        self._buffer = []
+        # Fire-and-forget: publishing must never stall the audio pipeline
+        task = asyncio.create_task(self._publish(json.dumps(payload, separators=(",", ":"))))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _publish(self, data: str) -> None:
+        try:
+            await self.room.local_participant.publish_data(data, topic=self.topic)
+        except Exception as e:
+            logger.warning(f"⚠️ Viseme publish failed: {e}")
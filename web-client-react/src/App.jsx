@@ -4,6 +4,9 @@ import '@livekit/components-styles';
 import './App.css';
 import AnimatedAvatar from './components/AnimatedAvatar';
 
+// Live stock from the agent (topic "inventory", see inventory_feed.py)
+const INVENTORY_TOPIC = 'inventory';
+
 const SERVER_URL = window.location.hostname === 'localhost' || window.location.hostname === '127.0.0.1' 
   ? 'http://localhost:8089' 
   : 'https://192.168.200.22:8089';
@@ -14,6 +17,7 @@ function VoiceAssistantUI() {
   const [messages, setMessages] = useState([]);
   const [currentUserText, setCurrentUserText] = useState('');
   const [currentAiText, setCurrentAiText] = useState('');
+  const [stock, setStock] = useState({}); // inventory key -> {name, quantity}
   const messagesEndRef = useRef(null);
   const room = useRoomContext();
   const prevStateRef = useRef(state);
@@ -98,6 +102,37 @@ function VoiceAssistantUI() {
     };
   }, [room, state]);
 
+  // Inventory snapshot on join, then deltas when staff or other calls change the stock
+  useEffect(() => {
+    if (!room) return;
+    const decoder = new TextDecoder();
+
+    const handleData = (payload, participant, kind, topic) => {
+      if (topic !== INVENTORY_TOPIC) return;
+      let update;
+      try {
+        update = JSON.parse(decoder.decode(payload));
+      } catch {
+        return;
+      }
+      setStock(prev => {
+        const next = update.type === 'snapshot' ? {} : { ...prev };
+        update.items.forEach(item => {
+          next[item.key] = { name: item.name, quantity: item.quantity };
+        });
+        (update.removed || []).forEach(key => delete next[key]);
+        return next;
+      });
+    };
+
+    room.on('dataReceived', handleData);
+    return () => {
+      room.off('dataReceived', handleData);
+    };
+  }, [room]);
+
+  const soldOut = Object.values(stock).filter(item => item.quantity <= 0).map(item => item.name);
+
   // Update refs continuously when text changes
   useEffect(() => {
     savedUserTextRef.current = currentUserText;
@@ -166,6 +201,7 @@ function VoiceAssistantUI() {
         <div className="header-avatar">
           <AnimatedAvatar 
             audioTrack={audioTrack}
+            room={room}
             isAgent={true}
           />
           <div className="avatar-status">
@@ -177,6 +213,12 @@ function VoiceAssistantUI() {
         </div>
       </div>
 
+      {soldOut.length > 0 && (
+        <div className="sold-out-bar">
+          Hết hàng / Sold out: {soldOut.join(', ')}
+        </div>
+      )}
+
       {/* Messages */}
       <div className="messages-container">
         {messages.length === 0 && !currentUserText && !currentAiText && (
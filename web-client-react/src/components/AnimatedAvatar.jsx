@@ -1,21 +1,105 @@
 import { useState, useEffect, useRef } from 'react';
+import { RoomEvent } from 'livekit-client';
 import './AnimatedAvatar.css';
 
+const VISEME_TOPIC = 'viseme';
+
 /**
  * Animated Avatar với 6 states miệng
  * Volume-based mouth animation
+ *
+ * atlasUrl: JSON manifest tạo bởi `tools/split_avatar_frames.py --atlas/--batch`
+ * -> chỉ tải 1 ảnh (WebP, fallback PNG) thay vì 7 file mouth_N.png
+ *
+ * room: nếu agent gửi viseme timeline (topic "viseme", xem viseme.py) thì
+ * phát lại timeline đó thay vì tự phân tích audio trên client
  */
-const AnimatedAvatar = ({ audioTrack, isAgent = false }) => {
+const AnimatedAvatar = ({ audioTrack, room = null, isAgent = false, atlasUrl = '/avatar/avatar.atlas.json' }) => {
   const [mouthState, setMouthState] = useState(0); // 0-5 states
+  const [atlas, setAtlas] = useState(null);
+  const [serverDriven, setServerDriven] = useState(false);
+  const timelineRef = useRef({ segment: null, start: 0, windowMs: 40, frames: [] });
   const animationFrameRef = useRef(null);
   const audioContextRef = useRef(null);
   const analyserRef = useRef(null);
 
+  // Load atlas manifest (falls back to individual PNG frames if missing)
+  useEffect(() => {
+    if (!atlasUrl) return;
+    let cancelled = false;
+    const baseUrl = atlasUrl.substring(0, atlasUrl.lastIndexOf('/') + 1);
+
+    fetch(atlasUrl)
+      .then(res => (res.ok ? res.json() : null))
+      .then(manifest => {
+        if (cancelled || !manifest) return;
+        const probe = document.createElement('canvas');
+        const supportsWebp = probe.toDataURL('image/webp').startsWith('data:image/webp');
+        setAtlas({
+          ...manifest,
+          imageUrl: baseUrl + (supportsWebp ? manifest.image : manifest.fallback),
+        });
+      })
+      .catch(() => {});
+
+    return () => {
+      cancelled = true;
+    };
+  }, [atlasUrl]);
+
+  // Viseme timeline from the agent: [[offset_ms, mouth_frame], ...] per TTS segment
+  useEffect(() => {
+    if (!room) return;
+    const decoder = new TextDecoder();
+
+    const handleData = (payload, participant, kind, topic) => {
+      if (topic !== VISEME_TOPIC) return;
+      let message;
+      try {
+        message = JSON.parse(decoder.decode(payload));
+      } catch {
+        return;
+      }
+      const timeline = timelineRef.current;
+      if (timeline.segment !== message.segment) {
+        // New utterance: its audio starts playing about now
+        timeline.segment = message.segment;
+        timeline.start = performance.now();
+        timeline.windowMs = message.window_ms;
+        timeline.frames = [];
+      }
+      timeline.frames.push(...message.frames);
+      setServerDriven(true);
+    };
+
+    room.on(RoomEvent.DataReceived, handleData);
+    return () => {
+      room.off(RoomEvent.DataReceived, handleData);
+    };
+  }, [room]);
+
+  useEffect(() => {
+    if (!serverDriven) return;
+    let frameId;
+
+    const playTimeline = () => {
+      const timeline = timelineRef.current;
+      // Frames are contiguous from offset 0, so the index is a division
+      const index = Math.floor((performance.now() - timeline.start) / timeline.windowMs);
+      setMouthState(index >= 0 && index < timeline.frames.length ? timeline.frames[index][1] : 0);
+      frameId = requestAnimationFrame(playTimeline);
+    };
+    playTimeline();
+
+    return () => cancelAnimationFrame(frameId);
+  }, [serverDriven]);
+
   useEffect(() => {
     if (!audioTrack) {
       setMouthState(0); // Đóng miệng khi không có audio
       return;
     }
+    if (serverDriven) return; // timeline from the agent, no local analysis needed
 
     // Setup Audio Context và Analyser
     const setupAudioAnalysis = async () => {
@@ -54,7 +138,7 @@ const AnimatedAvatar = ({ audioTrack, isAgent = false }) => {
         audioContextRef.current.close();
       }
     };
-  }, [audioTrack]);
+  }, [audioTrack, serverDriven]);
 
   const animateMouth = () => {
     if (!analyserRef.current) return;
@@ -98,6 +182,41 @@ const AnimatedAvatar = ({ audioTrack, isAgent = false }) => {
     updateMouth();
   };
 
+  if (atlas) {
+    const frame = atlas.frames[`mouth_${mouthState}`];
+    const [frameWidth, frameHeight] = atlas.frame_size;
+    return (
+      <div className={`animated-avatar ${isAgent ? 'agent' : 'user'}`}>
+        <div className="avatar-container">
+          {/* Animated mouth - 6 states, one atlas image */}
+          <div
+            className="avatar-atlas"
+            style={{ aspectRatio: `${frameWidth} / ${frameHeight}` }}
+          >
+            <div
+              className="avatar-atlas-frame"
+              style={{
+                left: `${(frame.offset_x / frameWidth) * 100}%`,
+                top: `${(frame.offset_y / frameHeight) * 100}%`,
+                width: `${(frame.w / frameWidth) * 100}%`,
+                height: `${(frame.h / frameHeight) * 100}%`,
+                backgroundImage: `url(${atlas.imageUrl})`,
+                backgroundSize: `${(atlas.size[0] / frame.w) * 100}% ${(atlas.size[1] / frame.h) * 100}%`,
+                backgroundPosition: `${atlas.size[0] === frame.w ? 0 : (frame.x / (atlas.size[0] - frame.w)) * 100}% ${atlas.size[1] === frame.h ? 0 : (frame.y / (atlas.size[1] - frame.h)) * 100}%`,
+              }}
+            />
+          </div>
+        </div>
+
+        {process.env.NODE_ENV === 'development' && (
+          <div className="volume-debug">
+            State: {mouthState}
+          </div>
+        )}
+      </div>
+    );
+  }
+
   return (
     <div className={`animated-avatar ${isAgent ? 'agent' : 'user'}`}>
       <div className="avatar-container">